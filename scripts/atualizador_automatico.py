@@ -44,6 +44,7 @@ class AtualizadorAutomatico:
         self.sync = DataSynchronizer()
         self.historico_file = METADATA_DIR / 'historico_atualizacoes.json'
         self.historico = self._carregar_historico()
+        self.tabelas_alteradas = None
         
     def _carregar_historico(self):
         """Carrega histórico de atualizações"""
@@ -61,26 +62,25 @@ class AtualizadorAutomatico:
         """
         Verifica se houve mudanças no servidor
         
+        Compara o fingerprint remoto de cada tabela (contagem, última alteração e
+        hash agregado calculados no servidor) com o da última sincronização, sem
+        baixar dados. As tabelas alteradas ficam em ``self.tabelas_alteradas``.
+        
         Returns:
             bool: True se houve mudanças
         """
         logger.info("Verificando mudanças no servidor...")
         
-        # Obter status atual
-        status_atual = self.sync.get_sync_status()
+        mudancas = self.sync.detect_changes()
+        self.tabelas_alteradas = [table for table, mudou in mudancas.items() if mudou]
         
-        # Se não há sincronização anterior, há mudanças
-        if not status_atual:
-            logger.info("Primeira sincronização - considerando como mudança")
-            return True
+        for table in self.tabelas_alteradas:
+            logger.info(f"Fingerprint de {table} alterado - há mudanças")
         
-        # Verificar idade do cache
-        for table, info in status_atual.items():
-            if not info['is_fresh']:
-                logger.info(f"Cache de {table} desatualizado - há mudanças")
-                return True
+        if self.tabelas_alteradas:
+            return True
         
-        logger.info("Cache ainda válido - sem mudanças")
+        logger.info("Fingerprints inalterados - sem mudanças")
         return False
     
     def executar_atualizacao_completa(self, force=False):
@@ -119,9 +119,12 @@ class AtualizadorAutomatico:
                     resultado['motivo'] = 'sem_mudancas'
                     return resultado
             
-            # 2. Sincronizar dados do servidor
+            # 2. Sincronizar dados do servidor (apenas tabelas alteradas, se detectadas).
+            # Sem force, as tabelas alteradas ignoram o TTL do cache (fingerprint
+            # mudou) e usam o modo incremental quando a tabela o permite
             logger.info("\n1️⃣ Sincronizando dados do servidor PostgreSQL...")
-            sync_result = self.sync.sync_all(force=True)
+            tabelas = None if force else self.tabelas_alteradas
+            sync_result = self.sync.sync_all(force=force, tables=tabelas)
             resultado['etapas']['sincronizacao'] = sync_result
             
             # Verificar se sincronização foi bem-sucedida
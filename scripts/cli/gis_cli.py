@@ -219,16 +219,13 @@ def cmd_export(args):
     elif args.table == 'planilha_campo':
         sync.sync_planilha_campo()
     
-    # Carregar do cache
-    cache_file = Config.PATHS.cache_dir / f"{args.table}.parquet"
+    # Carregar do cache (arquivo único ou particionado)
+    df = sync.load_cache(args.table)
     
-    if not cache_file.exists():
-        print(f"❌ Cache não encontrado: {cache_file}")
+    if df is None:
+        print(f"❌ Cache não encontrado: {Config.PATHS.cache_dir / f'{args.table}.parquet'}")
         return 1
     
-    import pandas as pd
-    df = pd.read_parquet(cache_file)
-    
     # Exportar
     output_path = Path(args.output)
     
@@ -254,6 +251,8 @@ def cmd_warehouse_ingest(args):
         print("✅ Ingestão concluída")
         print(f"   Tabela: {result.get('table')}")
         print(f"   Linhas ingeridas: {result.get('ingested_rows')}")
+        if 'inserted' in result:
+            print(f"   Inseridas: {result['inserted']} | Atualizadas: {result['updated']} | Inalteradas: {result['unchanged']}")
         return 0
     except Exception as e:
         print(f"❌ Erro na ingestão: {e}")
@@ -11,16 +11,23 @@ PRINCÍPIOS:
 4. Validação: Testes automatizados em cada dataset
 """
 
+import multiprocessing
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import hashlib
 import json
-import unicodedata
 import warnings
 warnings.filterwarnings('ignore')
 from src.config import Config
+from src.core.dataset_schema import write_dataset
+from src.core.excel_cache import read_excel_cached
+from src.core.lineage import DataLineage
+from src.core.municipio_resolver import MunicipioResolver
+from src.core.task_graph import ERROR, BLOCKED, EXECUTED, TaskGraph, file_source
 
 # ============================================================================
 # CONFIGURAÇÕES E CONSTANTES
@@ -33,6 +40,9 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 # Versão da base integrada (incrementar quando houver mudanças)
 VERSAO_BASE = "1.0.0"
 
+# Anos com arquivo base.dengue.<ano>.xlsx (processados em paralelo)
+ANOS_DENGUE = [2023, 2024, 2025]
+
 # ============================================================================
 # CLASSE PARA VALIDAÇÃO E INTEGRIDADE
 # ============================================================================
@@ -177,7 +187,7 @@ def criar_tabela_municipios():
     
     # Carregar dados IBGE
     print("\n1. Carregando dados IBGE...")
-    df_ibge = pd.read_excel(
+    df_ibge = read_excel_cached(
         BASE_DIR / "dados_techdengue" / "Atividades Techdengue.xlsx",
         sheet_name='IBGE'
     )
@@ -211,7 +221,7 @@ def criar_tabela_municipios():
     # Salvar
     print("\n3. Salvando tabela...")
     output_path = OUTPUT_DIR / 'dim_municipios.parquet'
-    df_ibge.to_parquet(output_path, index=False)
+    write_dataset(df_ibge, output_path)
     
     # Calcular hash e salvar metadados
     hash_value = GerenciadorIntegridade.calcular_hash_dataframe(df_ibge)
@@ -227,14 +237,12 @@ def criar_tabela_municipios():
 def carregar_mapa_ibge_referencia():
     """
     Carrega tabela de referência IBGE (fonte de verdade)
-    Retorna dicionário: {nome_normalizado: codigo_ibge}
+    Retorna o resolvedor nome normalizado → codigo_ibge e a aba IBGE
     """
     print("\n📚 Carregando tabela de referência IBGE (fonte de verdade)...")
     
-    df_ibge = pd.read_excel(
-        BASE_DIR / "dados_techdengue" / "Atividades Techdengue.xlsx",
-        sheet_name='IBGE'
-    )
+    arquivo = BASE_DIR / "dados_techdengue" / "Atividades Techdengue.xlsx"
+    df_ibge = read_excel_cached(arquivo, sheet_name='IBGE')
     
     # Padronizar colunas
     df_ibge = df_ibge.rename(columns={
@@ -242,41 +250,20 @@ def carregar_mapa_ibge_referencia():
         'Nome_Município': 'MUNICIPIO'
     })
     
-    # Normalizar nomes para matching
-    def normalizar_texto(texto):
-        if pd.isna(texto):
-            return ''
-        texto = unicodedata.normalize('NFKD', str(texto))
-        texto = texto.encode('ascii', errors='ignore').decode('ascii')
-        return texto.upper().strip()
-    
-    df_ibge['MUNICIPIO_NORM'] = df_ibge['MUNICIPIO'].apply(normalizar_texto)
-    
-    # Criar dicionário de referência
-    mapa_ibge = dict(zip(df_ibge['MUNICIPIO_NORM'], df_ibge['CODIGO_IBGE'].astype(str)))
+    # Índice de nomes normalizados (persistido enquanto a planilha não mudar)
+    mapa_ibge = MunicipioResolver.carregar(arquivo)
     
     print(f"   ✓ {len(mapa_ibge)} municípios na tabela de referência")
     
     return mapa_ibge, df_ibge
 
-def normalizar_nome_municipio(nome):
-    """
-    Normaliza nome do município para matching consistente
-    Remove acentos, converte para maiúsculas, remove espaços extras
-    """
-    if pd.isna(nome):
-        return ''
-    texto = unicodedata.normalize('NFKD', str(nome))
-    texto = texto.encode('ascii', errors='ignore').decode('ascii')
-    return texto.upper().strip()
-
 def correlacionar_codigo_ibge(df, mapa_ibge, nome_arquivo=''):
     """
     Correlaciona código IBGE correto pelo nome do município
     
     Args:
         df: DataFrame com coluna MUNICIPIO
-        mapa_ibge: Dicionário {nome_normalizado: codigo_ibge}
+        mapa_ibge: MunicipioResolver (nome normalizado → codigo_ibge)
         nome_arquivo: Nome do arquivo para logging
     
     Returns:
@@ -284,16 +271,12 @@ def correlacionar_codigo_ibge(df, mapa_ibge, nome_arquivo=''):
     """
     print(f"\n  🔗 Correlacionando códigos IBGE para {nome_arquivo}...")
     
-    # Normalizar nomes
-    df['MUNICIPIO_NORM'] = df['MUNICIPIO'].apply(normalizar_nome_municipio)
-    
-    # Mapear códigos IBGE
-    df['CODIGO_IBGE_NOVO'] = df['MUNICIPIO_NORM'].map(mapa_ibge)
+    # Mapear códigos IBGE (coluna inteira de uma vez)
+    codigos = mapa_ibge.resolve(df['MUNICIPIO'])
     
     # Validar correlação
-    total = len(df['MUNICIPIO'].unique())
-    matched = df['CODIGO_IBGE_NOVO'].notna().sum()
-    not_matched = df['CODIGO_IBGE_NOVO'].isna().sum()
+    matched = int(codigos.notna().sum())
+    not_matched = len(df) - matched
     
     taxa_match = (matched / len(df)) * 100 if len(df) > 0 else 0
     
@@ -302,14 +285,13 @@ def correlacionar_codigo_ibge(df, mapa_ibge, nome_arquivo=''):
     
     if not_matched > 0:
         print(f"     ⚠️  Registros NÃO correlacionados: {not_matched:,}")
-        municipios_sem_match = df[df['CODIGO_IBGE_NOVO'].isna()]['MUNICIPIO'].unique()
+        municipios_sem_match = mapa_ibge.unmatched(df['MUNICIPIO'])
         print(f"     ⚠️  Exemplos (primeiros 5):")
         for mun in municipios_sem_match[:5]:
             print(f"        - {mun}")
     
     # Substituir código antigo pelo novo
-    df['CODIGO_IBGE'] = df['CODIGO_IBGE_NOVO']
-    df = df.drop(columns=['MUNICIPIO_NORM', 'CODIGO_IBGE_NOVO'])
+    df['CODIGO_IBGE'] = codigos
     
     # VALIDAÇÃO CRÍTICA: Taxa de match deve ser >= 95%
     if taxa_match < 95.0:
@@ -321,6 +303,55 @@ def correlacionar_codigo_ibge(df, mapa_ibge, nome_arquivo=''):
     
     return df
 
+def processar_ano_dengue(ano, mapa_ibge, base_dir=None):
+    """
+    Lê, correlaciona e converte para formato longo um arquivo anual de dengue.
+    Executada em processo separado (um por ano); não depende dos demais anos.
+    
+    Args:
+        ano: Ano do arquivo base.dengue.<ano>.xlsx
+        mapa_ibge: MunicipioResolver (enviado ao processo por pickle)
+        base_dir: Diretório de dados (default: BASE_DIR). Com spawn o módulo é
+            reimportado no processo filho, então o chamador passa o diretório
+    
+    Returns:
+        DataFrame longo (CODIGO_IBGE, MUNICIPIO, CASOS, SEMANA_EPIDEMIOLOGICA, ANO)
+    """
+    arquivo = Path(base_dir or BASE_DIR) / "dados_dengue" / f"base.dengue.{ano}.xlsx"
+    # Ler SEM especificar dtype - vamos ignorar o código corrompido
+    df = read_excel_cached(arquivo)
+    
+    # Padronizar nomes (IGNORAR coluna Cod IBGE corrompida)
+    df = df.rename(columns={
+        'Municipio': 'MUNICIPIO'
+    })
+    
+    # CORRELACIONAR código IBGE correto pelo nome
+    df = correlacionar_codigo_ibge(df, mapa_ibge, f"Dengue {ano}")
+    
+    # Transformar de wide para long (cada linha = município + semana)
+    colunas_semanas = [col for col in df.columns if col.startswith('Semana')]
+    
+    df_long = df.melt(
+        id_vars=['CODIGO_IBGE', 'MUNICIPIO'],
+        value_vars=colunas_semanas,
+        var_name='SEMANA_STR',
+        value_name='CASOS'
+    )
+    
+    # Extrair número da semana e compactar tipos (semana <= 53, casos cabem em int32)
+    df_long['SEMANA_EPIDEMIOLOGICA'] = df_long['SEMANA_STR'].str.extract(r'(\d+)', expand=False).astype('int8')
+    df_long['ANO'] = np.int16(ano)
+    casos = pd.to_numeric(df_long['CASOS'])
+    df_long['CASOS'] = casos if casos.hasnans else casos.astype('int32')
+    
+    # Remover coluna temporária
+    return df_long.drop(columns=['SEMANA_STR'])
+
+def _workers_dengue(anos):
+    workers = Config.ETL_MAX_WORKERS or os.cpu_count() or 1
+    return max(1, min(workers, len(anos)))
+
 def criar_tabela_dengue_historico():
     """
     Tabela Fato: fato_dengue_historico
@@ -336,46 +367,19 @@ def criar_tabela_dengue_historico():
     # Carregar mapa de referência IBGE
     mapa_ibge, df_ibge_ref = carregar_mapa_ibge_referencia()
     
-    # Lista para armazenar DataFrames
-    dfs = []
+    # Processar cada ano (arquivos independentes: um processo por ano)
+    workers = _workers_dengue(ANOS_DENGUE)
+    print(f"\n1. Processando dados de {ANOS_DENGUE[0]}-{ANOS_DENGUE[-1]} ({workers} processo(s))...")
+    if workers == 1:
+        dfs = [processar_ano_dengue(ano, mapa_ibge, BASE_DIR) for ano in ANOS_DENGUE]
+    else:
+        # spawn: a etapa roda em uma thread do TaskGraph (fork com threads ativas não é seguro)
+        n = len(ANOS_DENGUE)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            dfs = list(pool.map(processar_ano_dengue, ANOS_DENGUE, [mapa_ibge] * n, [BASE_DIR] * n))
     
-    # Processar cada ano
-    for ano in [2023, 2024, 2025]:
-        print(f"\n1. Processando dados de {ano}...")
-        
-        arquivo = BASE_DIR / "dados_dengue" / f"base.dengue.{ano}.xlsx"
-        # Ler SEM especificar dtype - vamos ignorar o código corrompido
-        df = pd.read_excel(arquivo)
-        
-        # Padronizar nomes (IGNORAR coluna Cod IBGE corrompida)
-        df = df.rename(columns={
-            'Municipio': 'MUNICIPIO'
-        })
-        
-        # CORRELACIONAR código IBGE correto pelo nome
-        df = correlacionar_codigo_ibge(df, mapa_ibge, f"Dengue {ano}")
-        
-        # Transformar de wide para long (cada linha = município + semana)
-        colunas_semanas = [col for col in df.columns if col.startswith('Semana')]
-        
-        df_long = df.melt(
-            id_vars=['CODIGO_IBGE', 'MUNICIPIO'],
-            value_vars=colunas_semanas,
-            var_name='SEMANA_STR',
-            value_name='CASOS'
-        )
-        
-        # Extrair número da semana
-        df_long['SEMANA_EPIDEMIOLOGICA'] = df_long['SEMANA_STR'].str.extract(r'(\d+)').astype(int)
-        df_long['ANO'] = ano
-        
-        # Remover coluna temporária
-        df_long = df_long.drop(columns=['SEMANA_STR'])
-        
-        # Adicionar ao DataFrame consolidado
-        dfs.append(df_long)
-        
-        print(f"   ✓ {len(df_long):,} registros processados")
+    for ano, df_long in zip(ANOS_DENGUE, dfs):
+        print(f"   ✓ {ano}: {len(df_long):,} registros processados")
     
     # Consolidar todos os anos
     print("\n2. Consolidando dados...")
@@ -393,7 +397,7 @@ def criar_tabela_dengue_historico():
     # Salvar
     print("\n4. Salvando tabela...")
     output_path = OUTPUT_DIR / 'fato_dengue_historico.parquet'
-    df_consolidado.to_parquet(output_path, index=False)
+    write_dataset(df_consolidado, output_path)
     
     # Hash e metadados
     hash_value = GerenciadorIntegridade.calcular_hash_dataframe(df_consolidado)
@@ -423,10 +427,8 @@ def criar_tabela_atividades():
     
     # Carregar atividades completas
     print("\n1. Carregando atividades...")
-    df = pd.read_excel(
-        BASE_DIR / "dados_techdengue" / "Atividades Techdengue.xlsx",
-        sheet_name='Atividades (com sub)'
-    )
+    arquivo = BASE_DIR / "dados_techdengue" / "Atividades Techdengue.xlsx"
+    df = read_excel_cached(arquivo, sheet_name='Atividades (com sub)')
     
     # Renomear coluna se necessário (com espaço → sem espaço)
     if 'CODIGO IBGE' in df.columns:
@@ -435,6 +437,14 @@ def criar_tabela_atividades():
     # Padronizar CODIGO_IBGE
     df['CODIGO_IBGE'] = df['CODIGO_IBGE'].astype(str)
     
+    # Códigos ausentes ou fora do padrão: recuperar pelo nome do município
+    coluna_municipio = next((c for c in ('Municipio', 'Município', 'MUNICIPIO') if c in df.columns), None)
+    invalidos = ~df['CODIGO_IBGE'].str.match(r'^31\d{5}$', na=False)
+    if coluna_municipio and invalidos.any():
+        codigos = MunicipioResolver.carregar(arquivo).resolve(df.loc[invalidos, coluna_municipio]).dropna()
+        df.loc[codigos.index, 'CODIGO_IBGE'] = codigos
+        print(f"   ✓ Códigos IBGE recuperados pelo nome: {len(codigos):,} de {int(invalidos.sum()):,}")
+    
     # CORREÇÃO: Agrupar para evitar duplicação de hectares por sub-atividades
     print("\n2. Corrigindo duplicação de hectares (sub-atividades)...")
     print(f"   Registros originais: {len(df)}")
@@ -488,7 +498,7 @@ def criar_tabela_atividades():
     # Salvar
     print("\n4. Salvando tabela...")
     output_path = OUTPUT_DIR / 'fato_atividades_techdengue.parquet'
-    df.to_parquet(output_path, index=False)
+    write_dataset(df, output_path)
     
     # Hash e metadados
     hash_value = GerenciadorIntegridade.calcular_hash_dataframe(df)
@@ -501,10 +511,12 @@ def criar_tabela_atividades():
     
     return df, validador
 
-def criar_tabela_cruzada_analise():
+def criar_tabela_cruzada_analise(dim_municipios=None, fato_dengue=None, fato_atividades=None):
     """
     Tabela Agregada: analise_integrada
     Cruza dengue + atividades + municípios para análises rápidas
+    
+    Tabelas base não informadas são lidas de OUTPUT_DIR.
     """
     print("\n" + "="*80)
     print("📋 CRIANDO TABELA CRUZADA: analise_integrada")
@@ -514,20 +526,23 @@ def criar_tabela_cruzada_analise():
     
     # Carregar tabelas já criadas
     print("\n1. Carregando tabelas base...")
-    dim_municipios = pd.read_parquet(OUTPUT_DIR / 'dim_municipios.parquet')
-    fato_dengue = pd.read_parquet(OUTPUT_DIR / 'fato_dengue_historico.parquet')
-    fato_atividades = pd.read_parquet(OUTPUT_DIR / 'fato_atividades_techdengue.parquet')
+    if dim_municipios is None:
+        dim_municipios = pd.read_parquet(OUTPUT_DIR / 'dim_municipios.parquet')
+    if fato_dengue is None:
+        fato_dengue = pd.read_parquet(OUTPUT_DIR / 'fato_dengue_historico.parquet')
+    if fato_atividades is None:
+        fato_atividades = pd.read_parquet(OUTPUT_DIR / 'fato_atividades_techdengue.parquet')
     
     # Agregar dengue por município e ano
     print("\n2. Agregando casos de dengue...")
-    dengue_agg = fato_dengue.groupby(['CODIGO_IBGE', 'ANO']).agg({
+    dengue_agg = fato_dengue.groupby(['CODIGO_IBGE', 'ANO'], observed=True).agg({
         'CASOS': 'sum'
     }).reset_index()
     dengue_agg = dengue_agg.rename(columns={'CASOS': 'TOTAL_CASOS_DENGUE'})
     
     # Agregar atividades por município
     print("\n3. Agregando atividades TechDengue...")
-    atividades_agg = fato_atividades.groupby('CODIGO_IBGE').agg({
+    atividades_agg = fato_atividades.groupby('CODIGO_IBGE', observed=True).agg({
         'NOMENCLATURA_ATIVIDADE': 'count',
         'POIS': 'sum',
         'devolutivas': 'sum',
@@ -549,7 +564,7 @@ def criar_tabela_cruzada_analise():
     df_integrado = dim_municipios.copy()
     
     # Join com dengue (pivotando anos)
-    for ano in [2023, 2024, 2025]:
+    for ano in ANOS_DENGUE:
         dengue_ano = dengue_agg[dengue_agg['ANO'] == ano][['CODIGO_IBGE', 'TOTAL_CASOS_DENGUE']]
         dengue_ano = dengue_ano.rename(columns={'TOTAL_CASOS_DENGUE': f'CASOS_DENGUE_{ano}'})
         df_integrado = df_integrado.merge(dengue_ano, on='CODIGO_IBGE', how='left')
@@ -577,7 +592,7 @@ def criar_tabela_cruzada_analise():
     # Salvar
     print("\n6. Salvando tabela...")
     output_path = OUTPUT_DIR / 'analise_integrada.parquet'
-    df_integrado.to_parquet(output_path, index=False)
+    write_dataset(df_integrado, output_path)
     
     # Hash e metadados
     hash_value = GerenciadorIntegridade.calcular_hash_dataframe(df_integrado)
@@ -595,7 +610,50 @@ def criar_tabela_cruzada_analise():
 # FUNÇÃO PRINCIPAL
 # ============================================================================
 
-def main():
+def construir_grafo(lineage, validadores):
+    """
+    Declara as tabelas da base integrada e suas entradas. As três tabelas base
+    são independentes e rodam em paralelo; analise_integrada recebe as três em
+    memória. Tabelas com entradas inalteradas são reaproveitadas.
+    """
+    graph = TaskGraph(lineage, max_workers=Config.ETL_MAX_WORKERS or None)
+    excel = {'excel.Atividades Techdengue.xlsx': file_source(BASE_DIR / "dados_techdengue" / "Atividades Techdengue.xlsx")}
+    dengue = {
+        f'excel.base.dengue.{ano}.xlsx': file_source(BASE_DIR / "dados_dengue" / f"base.dengue.{ano}.xlsx")
+        for ano in ANOS_DENGUE
+    }
+    
+    def tabela(nome, criar):
+        def run(inputs):
+            df, validadores[nome] = criar(inputs)
+            return df
+        return run
+    
+    graph.add(
+        'dim_municipios', tabela('dim_municipios', lambda i: criar_tabela_municipios()),
+        sources=excel, output=OUTPUT_DIR / 'dim_municipios.parquet', transformation='load_ibge',
+    )
+    graph.add(
+        'fato_dengue_historico', tabela('fato_dengue_historico', lambda i: criar_tabela_dengue_historico()),
+        sources={**excel, **dengue}, output=OUTPUT_DIR / 'fato_dengue_historico.parquet',
+        transformation='correlate_ibge_melt_weeks',
+    )
+    graph.add(
+        'fato_atividades_techdengue', tabela('fato_atividades_techdengue', lambda i: criar_tabela_atividades()),
+        sources=excel, output=OUTPUT_DIR / 'fato_atividades_techdengue.parquet',
+        transformation='aggregate_sub_activities',
+    )
+    graph.add(
+        'analise_integrada',
+        tabela('analise_integrada', lambda i: criar_tabela_cruzada_analise(
+            i['dim_municipios'], i['fato_dengue_historico'], i['fato_atividades_techdengue']
+        )),
+        inputs=['dim_municipios', 'fato_dengue_historico', 'fato_atividades_techdengue'],
+        output=OUTPUT_DIR / 'analise_integrada.parquet', transformation='cross_join_municipio',
+    )
+    return graph
+
+def main(force=False):
     """Executa criação completa da base integrada"""
     
     print("╔═══════════════════════════════════════════════════════════════════════════════╗")
@@ -608,11 +666,10 @@ def main():
     inicio = datetime.now()
     
     try:
-        # Criar tabelas
-        dim_municipios, val1 = criar_tabela_municipios()
-        fato_dengue, val2 = criar_tabela_dengue_historico()
-        fato_atividades, val3 = criar_tabela_atividades()
-        analise_integrada, val4 = criar_tabela_cruzada_analise()
+        # Criar tabelas (em paralelo quando independentes)
+        lineage = DataLineage(OUTPUT_DIR / 'data_lineage.json', VERSAO_BASE)
+        validadores = {}
+        status = construir_grafo(lineage, validadores).run(force=force)
         
         # Relatório final
         print("\n" + "="*80)
@@ -620,16 +677,14 @@ def main():
         print("="*80)
         
         print("\n✅ TABELAS CRIADAS:")
-        print(f"  1. dim_municipios.parquet ({len(dim_municipios):,} linhas)")
-        print(f"  2. fato_dengue_historico.parquet ({len(fato_dengue):,} linhas)")
-        print(f"  3. fato_atividades_techdengue.parquet ({len(fato_atividades):,} linhas)")
-        print(f"  4. analise_integrada.parquet ({len(analise_integrada):,} linhas)")
+        for i, (nome, situacao) in enumerate(status.items(), 1):
+            linhas = (lineage.get_lineage(nome) or {}).get('row_count', 0)
+            detalhe = {EXECUTED: '', ERROR: ' - FALHOU', BLOCKED: ' - não gerada'}.get(situacao, ' - reaproveitada')
+            print(f"  {i}. {nome}.parquet ({linhas:,} linhas){detalhe}")
         
-        # Consolidar validações
-        total_avisos = (len(val1.avisos) + len(val2.avisos) + 
-                       len(val3.avisos) + len(val4.avisos))
-        total_erros = (len(val1.erros) + len(val2.erros) + 
-                      len(val3.erros) + len(val4.erros))
+        # Consolidar validações (tabelas executadas nesta rodada)
+        total_avisos = sum(len(v.avisos) for v in validadores.values())
+        total_erros = sum(len(v.erros) for v in validadores.values())
         
         print(f"\n📋 VALIDAÇÕES:")
         print(f"  • Avisos: {total_avisos}")
@@ -641,6 +696,10 @@ def main():
         duracao = (datetime.now() - inicio).total_seconds()
         print(f"\n⏱️  Tempo de processamento: {duracao:.2f} segundos")
         
+        if any(situacao in (ERROR, BLOCKED) for situacao in status.values()):
+            print("\n❌ ERRO: nem todas as tabelas foram criadas")
+            return
+        
         print("\n✅ BASE INTEGRADA CRIADA COM SUCESSO!")
         print(f"\nTodas as tabelas estão em: {OUTPUT_DIR}")
         print("Cada tabela possui um arquivo .json com metadados e hash MD5")
@@ -651,4 +710,8 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Criação da base de dados integrada")
+    parser.add_argument('--force', action='store_true', help="Recria todas as tabelas, mesmo sem mudanças nas entradas")
+    main(force=parser.parse_args().force)
@@ -2,9 +2,18 @@
 Criação da MEGA TABELA - Tabela Analítica Completa
 Granularidade: MUNICÍPIO × ANO
 Todas as métricas consolidadas em uma única tabela
+
+A tabela é construída ano a ano: cada ano lê apenas as atividades e os casos
+de dengue daquele ano (filtro aplicado na leitura do Parquet) e é gravado como
+um row group. Os POIs do servidor são agregados em lotes. O pico de memória
+acompanha o tamanho de um ano de fatos, não o total das tabelas silver.
 """
+import os
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime
 import hashlib
@@ -16,356 +25,503 @@ METADATA_DIR = BASE_DIR / "data_lake" / "metadata"
 
 GOLD_DIR.mkdir(exist_ok=True, parents=True)
 
-print("="*80)
-print("🥇 CRIANDO MEGA TABELA ANALÍTICA COMPLETA")
-print("="*80)
-
-# ============================================================================
-# 1. CARREGAR DADOS DA CAMADA SILVER
-# ============================================================================
-
-print("\n1️⃣ Carregando dados da camada SILVER...")
-
-# Dimensões
-df_municipios = pd.read_parquet(SILVER_DIR / 'dim_municipios.parquet')
-print(f"✓ dim_municipios: {len(df_municipios):,} registros")
-
-# Fatos
-df_pois_servidor = pd.read_parquet(SILVER_DIR / 'fato_pois_servidor.parquet')
-print(f"✓ fato_pois_servidor: {len(df_pois_servidor):,} registros")
-
-df_atividades = pd.read_parquet(SILVER_DIR / 'fato_atividades.parquet')
-print(f"✓ fato_atividades: {len(df_atividades):,} registros")
-
-df_dengue = pd.read_parquet(SILVER_DIR / 'fato_dengue.parquet')
-print(f"✓ fato_dengue: {len(df_dengue):,} registros")
-
-# ============================================================================
-# 2. AGREGAR POIS DO SERVIDOR POR MUNICÍPIO
-# ============================================================================
-
-print("\n2️⃣ Agregando POIs do servidor por município...")
-
-# Extrair código IBGE das coordenadas (aproximação)
-# Como não temos código IBGE direto nos POIs, vamos criar uma agregação espacial
-
-agg_pois_servidor = df_pois_servidor.groupby('sistema_id').agg({
-    'poi_id': 'count',
-    'latitude': 'mean',
-    'longitude': 'mean',
-    'analista': lambda x: x.mode()[0] if len(x.mode()) > 0 else None
-}).reset_index()
-
-agg_pois_servidor.columns = [
-    'sistema_id',
-    'total_pois_servidor',
-    'lat_media_sistema',
-    'long_media_sistema',
-    'analista_principal'
-]
-
-print(f"✓ Agregado por sistema: {len(agg_pois_servidor):,} sistemas")
-
-# Agregação geral (sem município por enquanto)
-total_pois_geral = len(df_pois_servidor)
-print(f"✓ Total de POIs no servidor: {total_pois_geral:,}")
-
-# ============================================================================
-# 3. AGREGAR ATIVIDADES POR MUNICÍPIO E ANO
-# ============================================================================
-
-print("\n3️⃣ Agregando atividades por município...")
-
-# Extrair ano da data
-df_atividades['ANO'] = pd.to_datetime(df_atividades['DATA_MAP']).dt.year
-
-# Identificar colunas de categorias
-colunas_categorias = [col for col in df_atividades.columns 
-                      if col.startswith(('A -', 'B -', 'C -', 'D -', 'O -'))]
-
-# Colunas de tratamento
-colunas_tratamento = [
-    'removido_solucionado', 'descaracterizado', 'Tratado',
-    'morador_ausente', 'nao_Autorizado', 'tratamento_via_drones', 'monitorado'
-]
-
-# Agregar por município e ano
-agg_dict = {
-    'NOMENCLATURA_ATIVIDADE': 'count',
-    'POIS': 'sum',
-    'devolutivas': 'sum',
-    'HECTARES_MAPEADOS': 'sum',
-    'DATA_MAP': ['min', 'max']
-}
-
-# Adicionar categorias
-for col in colunas_categorias:
-    if col in df_atividades.columns:
-        agg_dict[col] = 'sum'
-
-# Adicionar tratamentos
-for col in colunas_tratamento:
-    if col in df_atividades.columns:
-        agg_dict[col] = 'sum'
-
-agg_atividades = df_atividades.groupby(['CODIGO_IBGE', 'ANO']).agg(agg_dict).reset_index()
-
-# Renomear colunas
-agg_atividades.columns = [
-    'codigo_ibge', 'ano',
-    'total_atividades',
-    'total_pois_excel',
-    'total_devolutivas',
-    'total_hectares_mapeados',
-    'data_primeira_atividade',
-    'data_ultima_atividade'
-] + colunas_categorias + colunas_tratamento
-
-# Calcular métricas derivadas
-agg_atividades['taxa_conversao_devolutivas'] = (
-    agg_atividades['total_devolutivas'] / agg_atividades['total_pois_excel'] * 100
-).fillna(0)
-
-agg_atividades['dias_operacao'] = (
-    pd.to_datetime(agg_atividades['data_ultima_atividade']) - 
-    pd.to_datetime(agg_atividades['data_primeira_atividade'])
-).dt.days
-
-print(f"✓ Agregado: {len(agg_atividades):,} registros (município × ano)")
-
-# ============================================================================
-# 4. AGREGAR DENGUE POR MUNICÍPIO E ANO
-# ============================================================================
-
-print("\n4️⃣ Agregando casos de dengue por município e ano...")
-
-# Verificar se tem coluna de casos
-if 'CASOS' in df_dengue.columns:
+ANOS = [2023, 2024, 2025]
+
+# Linhas de fato_pois_servidor lidas por lote
+POIS_LOTE = 100_000
+COLUNAS_POIS = ['sistema_id', 'poi_id', 'latitude', 'longitude', 'analista']
+
+
+def carregar_silver():
+    """Carrega as tabelas da camada SILVER usadas pela MEGA TABELA"""
+    # ============================================================================
+    # 1. CARREGAR DADOS DA CAMADA SILVER
+    # ============================================================================
+
+    print("\n1️⃣ Carregando dados da camada SILVER...")
+
+    # Dimensões
+    df_municipios = pd.read_parquet(SILVER_DIR / 'dim_municipios.parquet')
+    print(f"✓ dim_municipios: {len(df_municipios):,} registros")
+
+    # Fatos
+    df_pois_servidor = pd.read_parquet(SILVER_DIR / 'fato_pois_servidor.parquet')
+    print(f"✓ fato_pois_servidor: {len(df_pois_servidor):,} registros")
+
+    df_atividades = pd.read_parquet(SILVER_DIR / 'fato_atividades.parquet')
+    print(f"✓ fato_atividades: {len(df_atividades):,} registros")
+
+    df_dengue = pd.read_parquet(SILVER_DIR / 'fato_dengue.parquet')
+    print(f"✓ fato_dengue: {len(df_dengue):,} registros")
+
+    return df_municipios, df_pois_servidor, df_atividades, df_dengue
+
+
+def agregar_pois_servidor(lotes):
+    """
+    Agrega POIs do servidor por sistema a partir de lotes de DataFrames.
+    Cada lote é reduzido a somas e contagens por sistema (e por analista, para
+    a moda), então a memória depende do lote e do número de sistemas.
+
+    Returns:
+        (agregado por sistema, total de POIs)
+    """
+    totais = None
+    analistas = None
+    total_pois = 0
+
+    for lote in lotes:
+        parcial = lote.groupby('sistema_id').agg(
+            total_pois_servidor=('poi_id', 'count'),
+            lat_soma=('latitude', 'sum'),
+            lat_n=('latitude', 'count'),
+            long_soma=('longitude', 'sum'),
+            long_n=('longitude', 'count'),
+        )
+        contagem = lote.groupby(['sistema_id', 'analista']).size()
+        totais = parcial if totais is None else totais.add(parcial, fill_value=0)
+        analistas = contagem if analistas is None else analistas.add(contagem, fill_value=0)
+        total_pois += len(lote)
+
+    if totais is None:
+        agg = pd.DataFrame(columns=[
+            'sistema_id', 'total_pois_servidor', 'lat_media_sistema', 'long_media_sistema', 'analista_principal'
+        ])
+        return agg, total_pois
+
+    # Moda do analista: maior contagem; empate → menor valor (mesma regra de Series.mode)
+    principal = (
+        analistas.rename('n').reset_index()
+        .sort_values(['sistema_id', 'n', 'analista'], ascending=[True, False, True])
+        .drop_duplicates('sistema_id')
+        .set_index('sistema_id')['analista']
+    )
+
+    agg = pd.DataFrame({
+        'sistema_id': totais.index,
+        'total_pois_servidor': totais['total_pois_servidor'].astype('int64').to_numpy(),
+        'lat_media_sistema': (totais['lat_soma'] / totais['lat_n']).to_numpy(),
+        'long_media_sistema': (totais['long_soma'] / totais['long_n']).to_numpy(),
+        'analista_principal': principal.reindex(totais.index).to_numpy(dtype=object),
+    })
+    agg['analista_principal'] = agg['analista_principal'].where(agg['analista_principal'].notna(), None)
+    return agg, total_pois
+
+
+def agregar_atividades(df_atividades):
+    """Atividades agregadas por município e ano"""
+    # Extrair ano da data
+    df_atividades = df_atividades.assign(ANO=pd.to_datetime(df_atividades['DATA_MAP']).dt.year)
+
+    # Identificar colunas de categorias
+    colunas_categorias = [col for col in df_atividades.columns
+                          if col.startswith(('A -', 'B -', 'C -', 'D -', 'O -'))]
+
+    # Colunas de tratamento
+    colunas_tratamento = [
+        'removido_solucionado', 'descaracterizado', 'Tratado',
+        'morador_ausente', 'nao_Autorizado', 'tratamento_via_drones', 'monitorado'
+    ]
+
+    # Agregar por município e ano
+    agg_dict = {
+        'NOMENCLATURA_ATIVIDADE': 'count',
+        'POIS': 'sum',
+        'devolutivas': 'sum',
+        'HECTARES_MAPEADOS': 'sum',
+        'DATA_MAP': ['min', 'max']
+    }
+
+    # Adicionar categorias
+    for col in colunas_categorias:
+        if col in df_atividades.columns:
+            agg_dict[col] = 'sum'
+
+    # Adicionar tratamentos
+    for col in colunas_tratamento:
+        if col in df_atividades.columns:
+            agg_dict[col] = 'sum'
+
+    agg_atividades = df_atividades.groupby(['CODIGO_IBGE', 'ANO']).agg(agg_dict).reset_index()
+
+    # Renomear colunas
+    agg_atividades.columns = [
+        'codigo_ibge', 'ano',
+        'total_atividades',
+        'total_pois_excel',
+        'total_devolutivas',
+        'total_hectares_mapeados',
+        'data_primeira_atividade',
+        'data_ultima_atividade'
+    ] + colunas_categorias + colunas_tratamento
+
+    # Calcular métricas derivadas
+    agg_atividades['taxa_conversao_devolutivas'] = (
+        agg_atividades['total_devolutivas'] / agg_atividades['total_pois_excel'] * 100
+    ).fillna(0)
+
+    agg_atividades['dias_operacao'] = (
+        pd.to_datetime(agg_atividades['data_ultima_atividade']) -
+        pd.to_datetime(agg_atividades['data_primeira_atividade'])
+    ).dt.days
+
+    return agg_atividades
+
+
+def agregar_dengue(df_dengue):
+    """Casos de dengue por município e ano (None sem a coluna CASOS)"""
+    if 'CASOS' not in df_dengue.columns:
+        return None
+
     agg_dengue = df_dengue.groupby(['MUNICIPIO', 'ANO']).agg({
         'CASOS': 'sum'
     }).reset_index()
-    
+
     agg_dengue.columns = ['municipio', 'ano', 'total_casos_dengue']
-    
-    print(f"✓ Agregado: {len(agg_dengue):,} registros (município × ano)")
-else:
-    print("⚠️  Coluna CASOS não encontrada em dengue")
-    agg_dengue = pd.DataFrame(columns=['municipio', 'ano', 'total_casos_dengue'])
-
-# ============================================================================
-# 5. CRIAR MEGA TABELA (MUNICÍPIO × ANO)
-# ============================================================================
-
-print("\n5️⃣ Criando MEGA TABELA...")
-
-# Base: todos os municípios × todos os anos
-anos = [2023, 2024, 2025]
-base = []
-
-for ano in anos:
-    df_ano = df_municipios.copy()
-    df_ano['ano'] = ano
-    base.append(df_ano)
-
-mega_tabela = pd.concat(base, ignore_index=True)
-
-print(f"✓ Base criada: {len(mega_tabela):,} registros ({len(df_municipios)} municípios × {len(anos)} anos)")
-
-# Merge com atividades
-mega_tabela = mega_tabela.merge(
-    agg_atividades,
-    on=['codigo_ibge', 'ano'],
-    how='left'
-)
-
-print(f"✓ Após merge com atividades: {len(mega_tabela):,} registros")
-
-# Merge com dengue (por município)
-mega_tabela = mega_tabela.merge(
-    agg_dengue,
-    left_on=['municipio', 'ano'],
-    right_on=['municipio', 'ano'],
-    how='left'
-)
-
-print(f"✓ Após merge com dengue: {len(mega_tabela):,} registros")
-
-# ============================================================================
-# 6. PREENCHER VALORES NULOS E CRIAR INDICADORES
-# ============================================================================
-
-print("\n6️⃣ Criando indicadores e preenchendo valores...")
-
-# Preencher nulos numéricos com 0
-colunas_numericas = mega_tabela.select_dtypes(include=[np.number]).columns
-for col in colunas_numericas:
-    mega_tabela[col] = mega_tabela[col].fillna(0)
-
-# Converter colunas para numérico
-mega_tabela['populacao'] = pd.to_numeric(mega_tabela['populacao'], errors='coerce').fillna(0)
-mega_tabela['area_ha'] = pd.to_numeric(mega_tabela['area_ha'], errors='coerce').fillna(0)
-mega_tabela['total_casos_dengue'] = pd.to_numeric(mega_tabela['total_casos_dengue'], errors='coerce').fillna(0)
-mega_tabela['total_pois_excel'] = pd.to_numeric(mega_tabela['total_pois_excel'], errors='coerce').fillna(0)
-mega_tabela['total_hectares_mapeados'] = pd.to_numeric(mega_tabela['total_hectares_mapeados'], errors='coerce').fillna(0)
-
-# Criar indicadores booleanos
-mega_tabela['tem_atividade_techdengue'] = (mega_tabela['total_atividades'] > 0).astype(int)
-mega_tabela['tem_casos_dengue'] = (mega_tabela['total_casos_dengue'] > 0).astype(int)
-
-# Calcular densidade
-mega_tabela['densidade_populacional'] = (
-    mega_tabela['populacao'] / mega_tabela['area_ha']
-).replace([np.inf, -np.inf], 0).fillna(0)
-
-mega_tabela['densidade_pois_por_hectare'] = (
-    mega_tabela['total_pois_excel'] / mega_tabela['total_hectares_mapeados']
-).replace([np.inf, -np.inf], 0).fillna(0)
-
-# Taxa de incidência de dengue (por 100 mil habitantes)
-mega_tabela['taxa_incidencia_dengue_100k'] = np.where(
-    mega_tabela['populacao'] > 0,
-    mega_tabela['total_casos_dengue'] / mega_tabela['populacao'] * 100000,
-    0
-)
-
-# POIs por caso de dengue
-mega_tabela['pois_por_caso_dengue'] = (
-    mega_tabela['total_pois_excel'] / mega_tabela['total_casos_dengue']
-).replace([np.inf, -np.inf], 0).fillna(0)
-
-# Score de efetividade (0-100)
-# Baseado em: atividades, devolutivas, redução de casos
-mega_tabela['efetividade_score'] = 0  # Placeholder para cálculo futuro
-
-# Score de risco de dengue (0-100)
-# Baseado em: incidência, tendência, densidade populacional
-mega_tabela['risco_dengue_score'] = np.clip(
-    mega_tabela['taxa_incidencia_dengue_100k'] / 100,
-    0, 100
-)
-
-# Adicionar metadados
-mega_tabela['data_atualizacao'] = datetime.now()
-mega_tabela['versao'] = '1.0.0'
-
-print(f"✓ Indicadores criados")
-
-# ============================================================================
-# 7. SALVAR MEGA TABELA
-# ============================================================================
-
-print("\n7️⃣ Salvando MEGA TABELA...")
-
-# Ordenar colunas
-colunas_ordem = [
-    # Identificação
-    'codigo_ibge', 'municipio', 'ano',
-    'urs', 'microregiao_saude', 'macroregiao_saude',
-    
-    # Demografia
-    'populacao', 'area_ha', 'densidade_populacional',
-    
-    # Dengue
-    'total_casos_dengue', 'taxa_incidencia_dengue_100k',
-    
-    # Atividades TechDengue
-    'total_atividades', 'total_pois_excel', 'total_devolutivas',
-    'total_hectares_mapeados', 'taxa_conversao_devolutivas',
-    'data_primeira_atividade', 'data_ultima_atividade', 'dias_operacao',
-    
-    # Indicadores
-    'tem_atividade_techdengue', 'tem_casos_dengue',
-    'densidade_pois_por_hectare', 'pois_por_caso_dengue',
-    'efetividade_score', 'risco_dengue_score',
-    
-    # Metadados
-    'data_atualizacao', 'versao'
-]
-
-# Adicionar colunas de categorias e tratamentos que existem
-colunas_existentes = [col for col in colunas_ordem if col in mega_tabela.columns]
-colunas_extras = [col for col in mega_tabela.columns if col not in colunas_existentes]
-
-colunas_final = colunas_existentes + colunas_extras
-
-mega_tabela = mega_tabela[colunas_final]
-
-# Salvar
-mega_tabela_path = GOLD_DIR / 'mega_tabela_analitica.parquet'
-mega_tabela.to_parquet(mega_tabela_path, index=False)
-
-print(f"✓ MEGA TABELA salva: {mega_tabela_path}")
-print(f"   Registros: {len(mega_tabela):,}")
-print(f"   Colunas: {len(mega_tabela.columns)}")
-print(f"   Tamanho: {mega_tabela_path.stat().st_size / 1024 / 1024:.2f} MB")
-
-# Salvar também em CSV para fácil visualização
-mega_tabela_csv = GOLD_DIR / 'mega_tabela_analitica.csv'
-mega_tabela.to_csv(mega_tabela_csv, index=False)
-print(f"✓ CSV salvo: {mega_tabela_csv}")
-
-# ============================================================================
-# 8. ESTATÍSTICAS DA MEGA TABELA
-# ============================================================================
-
-print("\n8️⃣ Estatísticas da MEGA TABELA:")
-print("="*80)
-
-print(f"\nDimensões:")
-print(f"  Registros: {len(mega_tabela):,}")
-print(f"  Colunas: {len(mega_tabela.columns)}")
-print(f"  Municípios únicos: {mega_tabela['codigo_ibge'].nunique()}")
-print(f"  Anos: {sorted(mega_tabela['ano'].unique())}")
-
-print(f"\nCobertura:")
-print(f"  Municípios com atividades: {mega_tabela['tem_atividade_techdengue'].sum():,}")
-print(f"  Municípios com casos de dengue: {mega_tabela['tem_casos_dengue'].sum():,}")
-
-print(f"\nTotais:")
-print(f"  Total de atividades: {mega_tabela['total_atividades'].sum():,.0f}")
-print(f"  Total de POIs: {mega_tabela['total_pois_excel'].sum():,.0f}")
-print(f"  Total de devolutivas: {mega_tabela['total_devolutivas'].sum():,.0f}")
-print(f"  Total de hectares: {mega_tabela['total_hectares_mapeados'].sum():,.2f}")
-print(f"  Total de casos dengue: {mega_tabela['total_casos_dengue'].sum():,.0f}")
-
-print(f"\nMétricas médias:")
-print(f"  Taxa de conversão: {mega_tabela[mega_tabela['total_pois_excel'] > 0]['taxa_conversao_devolutivas'].mean():.2f}%")
-print(f"  Densidade POIs/ha: {mega_tabela[mega_tabela['total_hectares_mapeados'] > 0]['densidade_pois_por_hectare'].mean():.2f}")
-print(f"  Taxa incidência dengue: {mega_tabela[mega_tabela['populacao'] > 0]['taxa_incidencia_dengue_100k'].mean():.2f} por 100k hab")
-
-# ============================================================================
-# 9. CRIAR DICIONÁRIO DE DADOS
-# ============================================================================
-
-print("\n9️⃣ Criando dicionário de dados...")
-
-dicionario = []
-
-for col in mega_tabela.columns:
-    dicionario.append({
-        'coluna': col,
-        'tipo': str(mega_tabela[col].dtype),
-        'nulos': mega_tabela[col].isnull().sum(),
-        'nulos_pct': f"{mega_tabela[col].isnull().sum() / len(mega_tabela) * 100:.1f}%",
-        'unicos': mega_tabela[col].nunique(),
-        'exemplo': str(mega_tabela[col].iloc[0]) if len(mega_tabela) > 0 else None
-    })
+    return agg_dengue
+
+
+def montar_mega_tabela(df_municipios, anos, agg_atividades, agg_dengue):
+    """Cruza municípios × anos com os agregados e calcula os indicadores"""
+    if agg_dengue is None:
+        agg_dengue = pd.DataFrame(columns=['municipio', 'ano', 'total_casos_dengue'])
+
+    # Base: todos os municípios × todos os anos
+    base = []
+
+    for ano in anos:
+        df_ano = df_municipios.copy()
+        df_ano['ano'] = ano
+        base.append(df_ano)
+
+    mega_tabela = pd.concat(base, ignore_index=True)
+
+    # Merge com atividades
+    mega_tabela = mega_tabela.merge(
+        agg_atividades,
+        on=['codigo_ibge', 'ano'],
+        how='left'
+    )
+
+    # Merge com dengue (por município)
+    mega_tabela = mega_tabela.merge(
+        agg_dengue,
+        left_on=['municipio', 'ano'],
+        right_on=['municipio', 'ano'],
+        how='left'
+    )
+
+    # ============================================================================
+    # 6. PREENCHER VALORES NULOS E CRIAR INDICADORES
+    # ============================================================================
+
+    # Preencher nulos numéricos com 0
+    colunas_numericas = mega_tabela.select_dtypes(include=[np.number]).columns
+    for col in colunas_numericas:
+        mega_tabela[col] = mega_tabela[col].fillna(0)
+
+    # Converter colunas para numérico
+    mega_tabela['populacao'] = pd.to_numeric(mega_tabela['populacao'], errors='coerce').fillna(0)
+    mega_tabela['area_ha'] = pd.to_numeric(mega_tabela['area_ha'], errors='coerce').fillna(0)
+    mega_tabela['total_casos_dengue'] = pd.to_numeric(mega_tabela['total_casos_dengue'], errors='coerce').fillna(0)
+    mega_tabela['total_pois_excel'] = pd.to_numeric(mega_tabela['total_pois_excel'], errors='coerce').fillna(0)
+    mega_tabela['total_hectares_mapeados'] = pd.to_numeric(mega_tabela['total_hectares_mapeados'], errors='coerce').fillna(0)
+
+    # Criar indicadores booleanos
+    mega_tabela['tem_atividade_techdengue'] = (mega_tabela['total_atividades'] > 0).astype(int)
+    mega_tabela['tem_casos_dengue'] = (mega_tabela['total_casos_dengue'] > 0).astype(int)
+
+    # Calcular densidade
+    mega_tabela['densidade_populacional'] = (
+        mega_tabela['populacao'] / mega_tabela['area_ha']
+    ).replace([np.inf, -np.inf], 0).fillna(0)
+
+    mega_tabela['densidade_pois_por_hectare'] = (
+        mega_tabela['total_pois_excel'] / mega_tabela['total_hectares_mapeados']
+    ).replace([np.inf, -np.inf], 0).fillna(0)
+
+    # Taxa de incidência de dengue (por 100 mil habitantes)
+    mega_tabela['taxa_incidencia_dengue_100k'] = np.where(
+        mega_tabela['populacao'] > 0,
+        mega_tabela['total_casos_dengue'] / mega_tabela['populacao'] * 100000,
+        0
+    )
+
+    # POIs por caso de dengue
+    mega_tabela['pois_por_caso_dengue'] = (
+        mega_tabela['total_pois_excel'] / mega_tabela['total_casos_dengue']
+    ).replace([np.inf, -np.inf], 0).fillna(0)
+
+    # Score de efetividade (0-100)
+    # Baseado em: atividades, devolutivas, redução de casos
+    mega_tabela['efetividade_score'] = 0  # Placeholder para cálculo futuro
+
+    # Score de risco de dengue (0-100)
+    # Baseado em: incidência, tendência, densidade populacional
+    mega_tabela['risco_dengue_score'] = np.clip(
+        mega_tabela['taxa_incidencia_dengue_100k'] / 100,
+        0, 100
+    )
+
+    # Adicionar metadados
+    mega_tabela['data_atualizacao'] = datetime.now()
+    mega_tabela['versao'] = '1.0.0'
+
+    # Ordenar colunas
+    colunas_ordem = [
+        # Identificação
+        'codigo_ibge', 'municipio', 'ano',
+        'urs', 'microregiao_saude', 'macroregiao_saude',
+
+        # Demografia
+        'populacao', 'area_ha', 'densidade_populacional',
+
+        # Dengue
+        'total_casos_dengue', 'taxa_incidencia_dengue_100k',
+
+        # Atividades TechDengue
+        'total_atividades', 'total_pois_excel', 'total_devolutivas',
+        'total_hectares_mapeados', 'taxa_conversao_devolutivas',
+        'data_primeira_atividade', 'data_ultima_atividade', 'dias_operacao',
+
+        # Indicadores
+        'tem_atividade_techdengue', 'tem_casos_dengue',
+        'densidade_pois_por_hectare', 'pois_por_caso_dengue',
+        'efetividade_score', 'risco_dengue_score',
+
+        # Metadados
+        'data_atualizacao', 'versao'
+    ]
+
+    # Adicionar colunas de categorias e tratamentos que existem
+    colunas_existentes = [col for col in colunas_ordem if col in mega_tabela.columns]
+    colunas_extras = [col for col in mega_tabela.columns if col not in colunas_existentes]
+
+    colunas_final = colunas_existentes + colunas_extras
+
+    return mega_tabela[colunas_final]
+
+
+def construir_mega_tabela(df_municipios, df_pois_servidor, df_atividades, df_dengue):
+    """
+    Monta a MEGA TABELA (município × ano) a partir das tabelas silver em memória.
+    Os DataFrames de entrada não são alterados.
+    """
+    # ============================================================================
+    # 2. AGREGAR POIS DO SERVIDOR POR MUNICÍPIO
+    # ============================================================================
+
+    print("\n2️⃣ Agregando POIs do servidor por município...")
+
+    # Como não temos código IBGE direto nos POIs, a agregação é por sistema
+    agg_pois_servidor, total_pois_geral = agregar_pois_servidor([df_pois_servidor])
+
+    print(f"✓ Agregado por sistema: {len(agg_pois_servidor):,} sistemas")
+    print(f"✓ Total de POIs no servidor: {total_pois_geral:,}")
 
-df_dicionario = pd.DataFrame(dicionario)
-dicionario_path = METADATA_DIR / 'dicionario_mega_tabela.csv'
-df_dicionario.to_csv(dicionario_path, index=False)
+    # ============================================================================
+    # 3. AGREGAR ATIVIDADES POR MUNICÍPIO E ANO
+    # ============================================================================
 
-print(f"✓ Dicionário salvo: {dicionario_path}")
+    print("\n3️⃣ Agregando atividades por município...")
 
-# ============================================================================
-# 10. RESUMO FINAL
-# ============================================================================
+    agg_atividades = agregar_atividades(df_atividades)
 
-print("\n" + "="*80)
-print("✅ MEGA TABELA CRIADA COM SUCESSO!")
-print("="*80)
+    print(f"✓ Agregado: {len(agg_atividades):,} registros (município × ano)")
+
+    # ============================================================================
+    # 4. AGREGAR DENGUE POR MUNICÍPIO E ANO
+    # ============================================================================
+
+    print("\n4️⃣ Agregando casos de dengue por município e ano...")
+
+    agg_dengue = agregar_dengue(df_dengue)
+    if agg_dengue is not None:
+        print(f"✓ Agregado: {len(agg_dengue):,} registros (município × ano)")
+    else:
+        print("⚠️  Coluna CASOS não encontrada em dengue")
+
+    # ============================================================================
+    # 5. CRIAR MEGA TABELA (MUNICÍPIO × ANO)
+    # ============================================================================
 
-print(f"""
+    print("\n5️⃣ Criando MEGA TABELA...")
+
+    mega_tabela = montar_mega_tabela(df_municipios, ANOS, agg_atividades, agg_dengue)
+
+    print(f"✓ MEGA TABELA: {len(mega_tabela):,} registros ({len(df_municipios)} municípios × {len(ANOS)} anos)")
+
+    return mega_tabela
+
+
+def construir_mega_tabela_particionada(municipios_path, pois_path, atividades_path, dengue_path, anos=ANOS):
+    """
+    Monta a MEGA TABELA ano a ano a partir das tabelas silver gravadas,
+    gerando um DataFrame (município × ano) por ano.
+
+    As atividades e os casos de dengue são lidos com filtro ``ANO == ano``
+    (apenas as colunas usadas de dengue) e os POIs em lotes de ``POIS_LOTE``.
+    """
+    print("\n1️⃣ Carregando dimensão de municípios...")
+
+    df_municipios = pd.read_parquet(municipios_path)
+    print(f"✓ dim_municipios: {len(df_municipios):,} registros")
+
+    print("\n2️⃣ Agregando POIs do servidor em lotes...")
+
+    lotes = (
+        lote.to_pandas()
+        for lote in pq.ParquetFile(pois_path).iter_batches(batch_size=POIS_LOTE, columns=COLUNAS_POIS)
+    )
+    agg_pois_servidor, total_pois_geral = agregar_pois_servidor(lotes)
+
+    print(f"✓ Agregado por sistema: {len(agg_pois_servidor):,} sistemas")
+    print(f"✓ Total de POIs no servidor: {total_pois_geral:,}")
+
+    colunas_dengue = pq.read_schema(dengue_path).names
+    if 'CASOS' not in colunas_dengue:
+        print("⚠️  Coluna CASOS não encontrada em dengue")
+
+    print(f"\n3️⃣ Criando e gravando MEGA TABELA por ano ({len(df_municipios)} municípios × {len(anos)} anos)...")
+
+    for ano in anos:
+        filtro = pc.field('ANO') == ano
+        df_atividades = pq.read_table(atividades_path, filters=filtro).to_pandas()
+        agg_atividades = agregar_atividades(df_atividades)
+
+        agg_dengue = None
+        if 'CASOS' in colunas_dengue:
+            df_dengue = pq.read_table(dengue_path, columns=['MUNICIPIO', 'ANO', 'CASOS'], filters=filtro).to_pandas()
+            agg_dengue = agregar_dengue(df_dengue)
+
+        bloco = montar_mega_tabela(df_municipios, [ano], agg_atividades, agg_dengue)
+        print(f"✓ {ano}: {len(df_atividades):,} atividades → {len(bloco):,} registros")
+        del df_atividades, agg_atividades, agg_dengue
+        yield bloco
+
+
+def gravar_mega_tabela(blocos):
+    """
+    Grava os blocos da MEGA TABELA: cada bloco vira um row group do Parquet e
+    é anexado ao CSV. Os arquivos são substituídos apenas ao final.
+
+    Returns:
+        (caminho do Parquet, caminho do CSV)
+    """
+    mega_tabela_path = GOLD_DIR / 'mega_tabela_analitica.parquet'
+    mega_tabela_csv = GOLD_DIR / 'mega_tabela_analitica.csv'
+    tmp_parquet = mega_tabela_path.with_name(mega_tabela_path.name + '.tmp')
+    tmp_csv = mega_tabela_csv.with_name(mega_tabela_csv.name + '.tmp')
+
+    tmp_parquet.unlink(missing_ok=True)
+    tmp_csv.unlink(missing_ok=True)
+    writer = None
+    try:
+        for bloco in blocos:
+            table = pa.Table.from_pandas(bloco, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_parquet, table.schema)
+            else:
+                # Blocos sem nenhum cruzamento podem inferir tipos diferentes (ex.: int x float)
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            bloco.to_csv(tmp_csv, mode='a' if tmp_csv.exists() else 'w', header=not tmp_csv.exists(), index=False)
+    except BaseException:
+        # Fechar antes de remover: no Windows um arquivo aberto não pode ser apagado
+        if writer is not None:
+            writer.close()
+        tmp_parquet.unlink(missing_ok=True)
+        tmp_csv.unlink(missing_ok=True)
+        raise
+
+    if writer is not None:
+        writer.close()
+    os.replace(tmp_parquet, mega_tabela_path)
+    os.replace(tmp_csv, mega_tabela_csv)
+    return mega_tabela_path, mega_tabela_csv
+
+
+def salvar_mega_tabela(mega_tabela):
+    """Grava a MEGA TABELA montada em memória (Parquet + CSV), estatísticas e dicionário de dados"""
+    print("\n7️⃣ Salvando MEGA TABELA...")
+
+    relatorio_mega_tabela(*gravar_mega_tabela([mega_tabela]))
+
+
+def relatorio_mega_tabela(mega_tabela_path, mega_tabela_csv):
+    """Estatísticas e dicionário de dados da MEGA TABELA gravada"""
+    # A granularidade é município × ano: a tabela final é pequena mesmo com
+    # milhões de POIs, então o relatório a relê inteira
+    mega_tabela = pd.read_parquet(mega_tabela_path)
+
+    print(f"✓ MEGA TABELA salva: {mega_tabela_path}")
+    print(f"   Registros: {len(mega_tabela):,}")
+    print(f"   Colunas: {len(mega_tabela.columns)}")
+    print(f"   Tamanho: {mega_tabela_path.stat().st_size / 1024 / 1024:.2f} MB")
+    print(f"✓ CSV salvo: {mega_tabela_csv}")
+
+    # ============================================================================
+    # 8. ESTATÍSTICAS DA MEGA TABELA
+    # ============================================================================
+
+    print("\n8️⃣ Estatísticas da MEGA TABELA:")
+    print("="*80)
+
+    print(f"\nDimensões:")
+    print(f"  Registros: {len(mega_tabela):,}")
+    print(f"  Colunas: {len(mega_tabela.columns)}")
+    print(f"  Municípios únicos: {mega_tabela['codigo_ibge'].nunique()}")
+    print(f"  Anos: {sorted(mega_tabela['ano'].unique())}")
+
+    print(f"\nCobertura:")
+    print(f"  Municípios com atividades: {mega_tabela['tem_atividade_techdengue'].sum():,}")
+    print(f"  Municípios com casos de dengue: {mega_tabela['tem_casos_dengue'].sum():,}")
+
+    print(f"\nTotais:")
+    print(f"  Total de atividades: {mega_tabela['total_atividades'].sum():,.0f}")
+    print(f"  Total de POIs: {mega_tabela['total_pois_excel'].sum():,.0f}")
+    print(f"  Total de devolutivas: {mega_tabela['total_devolutivas'].sum():,.0f}")
+    print(f"  Total de hectares: {mega_tabela['total_hectares_mapeados'].sum():,.2f}")
+    print(f"  Total de casos dengue: {mega_tabela['total_casos_dengue'].sum():,.0f}")
+
+    print(f"\nMétricas médias:")
+    print(f"  Taxa de conversão: {mega_tabela[mega_tabela['total_pois_excel'] > 0]['taxa_conversao_devolutivas'].mean():.2f}%")
+    print(f"  Densidade POIs/ha: {mega_tabela[mega_tabela['total_hectares_mapeados'] > 0]['densidade_pois_por_hectare'].mean():.2f}")
+    print(f"  Taxa incidência dengue: {mega_tabela[mega_tabela['populacao'] > 0]['taxa_incidencia_dengue_100k'].mean():.2f} por 100k hab")
+
+    # ============================================================================
+    # 9. CRIAR DICIONÁRIO DE DADOS
+    # ============================================================================
+
+    print("\n9️⃣ Criando dicionário de dados...")
+
+    dicionario = []
+
+    for col in mega_tabela.columns:
+        dicionario.append({
+            'coluna': col,
+            'tipo': str(mega_tabela[col].dtype),
+            'nulos': mega_tabela[col].isnull().sum(),
+            'nulos_pct': f"{mega_tabela[col].isnull().sum() / len(mega_tabela) * 100:.1f}%",
+            'unicos': mega_tabela[col].nunique(),
+            'exemplo': str(mega_tabela[col].iloc[0]) if len(mega_tabela) > 0 else None
+        })
+
+    df_dicionario = pd.DataFrame(dicionario)
+    dicionario_path = METADATA_DIR / 'dicionario_mega_tabela.csv'
+    df_dicionario.to_csv(dicionario_path, index=False)
+
+    print(f"✓ Dicionário salvo: {dicionario_path}")
+
+    # ============================================================================
+    # 10. RESUMO FINAL
+    # ============================================================================
+
+    print("\n" + "="*80)
+    print("✅ MEGA TABELA CRIADA COM SUCESSO!")
+    print("="*80)
+
+    print(f"""
 MEGA TABELA ANALÍTICA COMPLETA
 {'='*80}
 
@@ -394,4 +550,24 @@ MEGA TABELA ANALÍTICA COMPLETA
   4. Machine Learning
 """)
 
-print("="*80)
+    print("="*80)
+
+    return mega_tabela
+
+
+def main():
+    print("="*80)
+    print("🥇 CRIANDO MEGA TABELA ANALÍTICA COMPLETA")
+    print("="*80)
+
+    blocos = construir_mega_tabela_particionada(
+        SILVER_DIR / 'dim_municipios.parquet',
+        SILVER_DIR / 'fato_pois_servidor.parquet',
+        SILVER_DIR / 'fato_atividades.parquet',
+        SILVER_DIR / 'fato_dengue.parquet',
+    )
+    relatorio_mega_tabela(*gravar_mega_tabela(blocos))
+
+
+if __name__ == "__main__":
+    main()
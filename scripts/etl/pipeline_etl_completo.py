@@ -11,13 +11,17 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-import hashlib
 import json
 import warnings
 warnings.filterwarnings('ignore')
 
 from src.sync import DataSynchronizer
 from src.config import Config
+from src.core.excel_cache import read_excel_cached
+from src.core.lineage import DataLineage
+from src.core.municipio_resolver import IBGE_CODIGO_COLUMN, IBGE_NOME_COLUMN, MunicipioResolver
+from src.core.task_graph import BLOCKED, ERROR, TaskGraph, file_source
+from criar_mega_tabela import construir_mega_tabela_particionada, gravar_mega_tabela, relatorio_mega_tabela
 
 # ============================================================================
 # CONFIGURAÇÕES
@@ -36,50 +40,9 @@ for dir_path in [BRONZE_DIR, SILVER_DIR, GOLD_DIR, METADATA_DIR]:
 VERSION = "1.0.0"
 
 # ============================================================================
-# CLASSE DE METADADOS E LINEAGE
+# QUALIDADE DE DADOS
 # ============================================================================
 
-class DataLineage:
-    """Rastreabilidade de dados (Data Lineage)"""
-    
-    def __init__(self):
-        self.lineage_file = METADATA_DIR / "data_lineage.json"
-        self.lineage = self._load()
-    
-    def _load(self):
-        if self.lineage_file.exists():
-            with open(self.lineage_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def _save(self):
-        with open(self.lineage_file, 'w', encoding='utf-8') as f:
-            json.dump(self.lineage, f, indent=2, default=str)
-    
-    def register_transformation(
-        self,
-        output_table: str,
-        input_tables: list,
-        transformation: str,
-        row_count: int,
-        hash_md5: str
-    ):
-        """Registra transformação de dados"""
-        self.lineage[output_table] = {
-            'timestamp': datetime.now().isoformat(),
-            'input_tables': input_tables,
-            'transformation': transformation,
-            'row_count': row_count,
-            'hash_md5': hash_md5,
-            'version': VERSION
-        }
-        self._save()
-    
-    def get_lineage(self, table_name: str):
-        """Retorna lineage de uma tabela"""
-        return self.lineage.get(table_name)
-
-
 class DataQuality:
     """Framework de qualidade de dados"""
     
@@ -158,164 +121,70 @@ class DataQuality:
 # ============================================================================
 # CAMADA BRONZE: Dados Brutos
 # ============================================================================
+# Cada função abaixo produz uma tabela do grafo (ver construir_grafo): recebe
+# as tabelas de entrada por nome, grava sua saída e retorna o DataFrame.
+
+EXCEL_PATH = BASE_DIR / "base_dados" / "dados_techdengue" / "Atividades Techdengue.xlsx"
+DENGUE_DIR = BASE_DIR / "base_dados" / "dados_dengue"
+ANOS_DENGUE = [2023, 2024, 2025]
+
 
-def bronze_layer():
+def bronze_servidor(sync: DataSynchronizer, table_name: str):
     """
-    CAMADA BRONZE: Ingestão de dados brutos
-    - Sincroniza do servidor PostgreSQL
-    - Carrega do Excel
-    - Salva como está (sem transformações)
+    Tabela bronze sincronizada do servidor PostgreSQL (salva como está).
+    A sincronização só roda quando o fingerprint remoto da tabela muda.
     """
-    print("="*80)
-    print("🥉 CAMADA BRONZE: Ingestão de Dados Brutos")
-    print("="*80)
-    
-    lineage = DataLineage()
-    
-    # 1. Sincronizar do servidor
-    print("\n1️⃣ Sincronizando dados do servidor PostgreSQL...")
-    sync = DataSynchronizer()
-    results = sync.sync_all(force=True)
-    
-    # Copiar para bronze
-    print("\n2️⃣ Copiando para camada BRONZE...")
-    
-    # Bronze: banco_techdengue
-    df_banco = pd.read_parquet('cache/banco_techdengue.parquet')
-    bronze_banco_path = BRONZE_DIR / 'banco_techdengue.parquet'
-    df_banco.to_parquet(bronze_banco_path, index=False)
-    
-    hash_banco = hashlib.md5(pd.util.hash_pandas_object(df_banco).values).hexdigest()
-    lineage.register_transformation(
-        'bronze.banco_techdengue',
-        ['servidor.banco_techdengue'],
-        'sync_from_postgresql',
-        len(df_banco),
-        hash_banco
-    )
-    
-    print(f"✓ bronze.banco_techdengue: {len(df_banco):,} registros")
-    
-    # Bronze: planilha_campo
-    df_planilha = pd.read_parquet('cache/planilha_campo.parquet')
-    bronze_planilha_path = BRONZE_DIR / 'planilha_campo.parquet'
-    df_planilha.to_parquet(bronze_planilha_path, index=False)
-    
-    hash_planilha = hashlib.md5(pd.util.hash_pandas_object(df_planilha).values).hexdigest()
-    lineage.register_transformation(
-        'bronze.planilha_campo',
-        ['servidor.planilha_campo'],
-        'sync_from_postgresql',
-        len(df_planilha),
-        hash_planilha
-    )
-    
-    print(f"✓ bronze.planilha_campo: {len(df_planilha):,} registros")
-    
-    # 3. Carregar do Excel
-    print("\n3️⃣ Carregando dados do Excel...")
-    
-    excel_path = BASE_DIR / "base_dados" / "dados_techdengue" / "Atividades Techdengue.xlsx"
-    
-    # Bronze: atividades_excel
-    df_atividades = pd.read_excel(excel_path, sheet_name='Atividades (com sub)')
-    bronze_atividades_path = BRONZE_DIR / 'atividades_excel.parquet'
-    df_atividades.to_parquet(bronze_atividades_path, index=False)
-    
-    hash_atividades = hashlib.md5(pd.util.hash_pandas_object(df_atividades).values).hexdigest()
-    lineage.register_transformation(
-        'bronze.atividades_excel',
-        ['excel.Atividades Techdengue.xlsx'],
-        'load_from_excel',
-        len(df_atividades),
-        hash_atividades
-    )
-    
-    print(f"✓ bronze.atividades_excel: {len(df_atividades):,} registros")
-    
-    # Bronze: ibge_referencia
-    df_ibge = pd.read_excel(excel_path, sheet_name='IBGE')
-    bronze_ibge_path = BRONZE_DIR / 'ibge_referencia.parquet'
-    df_ibge.to_parquet(bronze_ibge_path, index=False)
-    
-    hash_ibge = hashlib.md5(pd.util.hash_pandas_object(df_ibge).values).hexdigest()
-    lineage.register_transformation(
-        'bronze.ibge_referencia',
-        ['excel.Atividades Techdengue.xlsx'],
-        'load_from_excel',
-        len(df_ibge),
-        hash_ibge
-    )
-    
-    print(f"✓ bronze.ibge_referencia: {len(df_ibge):,} registros")
-    
-    # 4. Carregar dados de dengue
-    print("\n4️⃣ Carregando dados de dengue...")
-    
-    dengue_dir = BASE_DIR / "base_dados" / "dados_dengue"
+    def run(inputs):
+        sync.sync_all(force=True, tables=[table_name])  # falhas registradas; usa o cache local
+        df = sync.load_cache(table_name)  # planilha_campo: cache particionado (year=/month=)
+        df.to_parquet(BRONZE_DIR / f'{table_name}.parquet', index=False)
+        print(f"✓ bronze.{table_name}: {len(df):,} registros")
+        return df
+    return run
+
+
+def fingerprint_servidor(sync: DataSynchronizer, table_name: str):
+    """Fingerprint remoto da tabela (contagem, última alteração e hash agregado)."""
+    def fingerprint():
+        remote = sync.remote_fingerprint(table_name)
+        return json.dumps(remote, sort_keys=True, default=str) if remote else None
+    return fingerprint
+
+
+def bronze_excel(sheet_name: str, table_name: str):
+    """Aba da planilha de atividades salva como está na camada bronze."""
+    def run(inputs):
+        df = read_excel_cached(EXCEL_PATH, sheet_name=sheet_name)
+        df.to_parquet(BRONZE_DIR / f'{table_name}.parquet', index=False)
+        print(f"✓ bronze.{table_name}: {len(df):,} registros")
+        return df
+    return run
+
+
+def bronze_dengue_historico(inputs):
+    """Planilhas anuais de dengue concatenadas (formato largo, uma coluna por semana)."""
     dfs_dengue = []
-    
-    for year in [2023, 2024, 2025]:
-        dengue_file = dengue_dir / f"base.dengue.{year}.xlsx"
+    for year in ANOS_DENGUE:
+        dengue_file = DENGUE_DIR / f"base.dengue.{year}.xlsx"
         if dengue_file.exists():
-            df_year = pd.read_excel(dengue_file)
+            df_year = read_excel_cached(dengue_file)
             df_year['ANO'] = year
             dfs_dengue.append(df_year)
             print(f"✓ Dengue {year}: {len(df_year):,} registros")
     
     df_dengue = pd.concat(dfs_dengue, ignore_index=True)
-    bronze_dengue_path = BRONZE_DIR / 'dengue_historico.parquet'
-    df_dengue.to_parquet(bronze_dengue_path, index=False)
-    
-    hash_dengue = hashlib.md5(pd.util.hash_pandas_object(df_dengue).values).hexdigest()
-    lineage.register_transformation(
-        'bronze.dengue_historico',
-        ['excel.base.dengue.2023-2025.xlsx'],
-        'load_from_excel',
-        len(df_dengue),
-        hash_dengue
-    )
-    
+    df_dengue.to_parquet(BRONZE_DIR / 'dengue_historico.parquet', index=False)
     print(f"✓ bronze.dengue_historico: {len(df_dengue):,} registros")
-    
-    print("\n✅ CAMADA BRONZE CONCLUÍDA")
-    print(f"   Tabelas criadas: 5")
-    print(f"   Localização: {BRONZE_DIR}")
-    
-    return {
-        'banco_techdengue': df_banco,
-        'planilha_campo': df_planilha,
-        'atividades_excel': df_atividades,
-        'ibge_referencia': df_ibge,
-        'dengue_historico': df_dengue
-    }
+    return df_dengue
 
 
 # ============================================================================
 # CAMADA SILVER: Dados Limpos e Validados
 # ============================================================================
 
-def silver_layer(bronze_data: dict):
-    """
-    CAMADA SILVER: Limpeza e validação
-    - Remove duplicatas
-    - Padroniza formatos
-    - Valida qualidade
-    - Enriquece dados
-    """
-    print("\n" + "="*80)
-    print("🥈 CAMADA SILVER: Limpeza e Validação")
-    print("="*80)
-    
-    lineage = DataLineage()
-    quality = DataQuality()
-    
-    silver_data = {}
-    
-    # 1. DIMENSÃO: Municípios
-    print("\n1️⃣ Criando dim_municipios...")
-    
-    df_ibge = bronze_data['ibge_referencia'].copy()
+def silver_dim_municipios(inputs, quality: DataQuality):
+    """Dimensão de municípios padronizada a partir da aba IBGE"""
+    df_ibge = inputs['bronze.ibge_referencia'].copy()
     
     # Renomear e padronizar (colunas reais do Excel)
     df_municipios = df_ibge.rename(columns={
@@ -342,25 +211,14 @@ def silver_layer(bronze_data: dict):
     quality.check_unique(df_municipios, ['codigo_ibge'], 'dim_municipios')
     
     # Salvar
-    silver_municipios_path = SILVER_DIR / 'dim_municipios.parquet'
-    df_municipios.to_parquet(silver_municipios_path, index=False)
-    
-    hash_mun = hashlib.md5(pd.util.hash_pandas_object(df_municipios).values).hexdigest()
-    lineage.register_transformation(
-        'silver.dim_municipios',
-        ['bronze.ibge_referencia'],
-        'clean_and_standardize',
-        len(df_municipios),
-        hash_mun
-    )
-    
-    silver_data['dim_municipios'] = df_municipios
+    df_municipios.to_parquet(SILVER_DIR / 'dim_municipios.parquet', index=False)
     print(f"✓ dim_municipios: {len(df_municipios):,} registros")
-    
-    # 2. FATO: POIs do Servidor
-    print("\n2️⃣ Criando fato_pois_servidor...")
-    
-    df_pois = bronze_data['banco_techdengue'].copy()
+    return df_municipios
+
+
+def silver_fato_pois_servidor(inputs, quality: DataQuality):
+    """POIs do servidor com coordenadas numéricas"""
+    df_pois = inputs['bronze.banco_techdengue'].copy()
     
     # Renomear
     df_pois = df_pois.rename(columns={
@@ -389,25 +247,14 @@ def silver_layer(bronze_data: dict):
     quality.check_range(df_pois, 'longitude', -180, 180, 'fato_pois_servidor')
     
     # Salvar
-    silver_pois_path = SILVER_DIR / 'fato_pois_servidor.parquet'
-    df_pois.to_parquet(silver_pois_path, index=False)
-    
-    hash_pois = hashlib.md5(pd.util.hash_pandas_object(df_pois).values).hexdigest()
-    lineage.register_transformation(
-        'silver.fato_pois_servidor',
-        ['bronze.banco_techdengue'],
-        'clean_and_validate',
-        len(df_pois),
-        hash_pois
-    )
-    
-    silver_data['fato_pois_servidor'] = df_pois
+    df_pois.to_parquet(SILVER_DIR / 'fato_pois_servidor.parquet', index=False)
     print(f"✓ fato_pois_servidor: {len(df_pois):,} registros")
-    
-    # 3. FATO: Atividades (corrigido - sem duplicação de hectares)
-    print("\n3️⃣ Criando fato_atividades...")
-    
-    df_ativ = bronze_data['atividades_excel'].copy()
+    return df_pois
+
+
+def silver_fato_atividades(inputs, quality: DataQuality):
+    """Atividades agregadas por (município, data, atividade), sem duplicação de hectares"""
+    df_ativ = inputs['bronze.atividades_excel'].copy()
     
     # Renomear colunas
     if 'CODIGO IBGE' in df_ativ.columns:
@@ -450,92 +297,123 @@ def silver_layer(bronze_data: dict):
     quality.check_not_null(df_ativ_clean, ['CODIGO_IBGE', 'DATA_MAP'], 'fato_atividades')
     
     # Salvar
-    silver_ativ_path = SILVER_DIR / 'fato_atividades.parquet'
-    df_ativ_clean.to_parquet(silver_ativ_path, index=False)
-    
-    hash_ativ = hashlib.md5(pd.util.hash_pandas_object(df_ativ_clean).values).hexdigest()
-    lineage.register_transformation(
-        'silver.fato_atividades',
-        ['bronze.atividades_excel'],
-        'clean_aggregate_deduplicate',
-        len(df_ativ_clean),
-        hash_ativ
-    )
-    
-    silver_data['fato_atividades'] = df_ativ_clean
+    df_ativ_clean.to_parquet(SILVER_DIR / 'fato_atividades.parquet', index=False)
     print(f"✓ fato_atividades: {len(df_ativ_clean):,} registros (corrigido)")
+    return df_ativ_clean
+
+
+def silver_fato_dengue(inputs, quality: DataQuality):
+    """Histórico de dengue com código IBGE correlacionado pelo nome do município"""
+    df_dengue = inputs['bronze.dengue_historico'].copy()
     
-    # 4. FATO: Dengue
-    print("\n4️⃣ Criando fato_dengue...")
-    
-    df_dengue = bronze_data['dengue_historico'].copy()
-    
-    # Correlacionar códigos IBGE
-    # (usar lógica do criar_base_integrada.py)
+    # Correlacionar códigos IBGE pelo nome (o código das planilhas de dengue é corrompido)
+    mapa_ibge = MunicipioResolver.from_frame(
+        inputs['bronze.ibge_referencia'], IBGE_NOME_COLUMN, IBGE_CODIGO_COLUMN
+    )
+    df_dengue['CODIGO_IBGE'] = mapa_ibge.resolve(df_dengue['Municipio'])
+    sem_codigo = mapa_ibge.unmatched(df_dengue['Municipio'])
+    if sem_codigo:
+        print(f"⚠️  {len(sem_codigo)} municípios sem código IBGE (ex.: {sem_codigo[:5]})")
     
     # Adicionar metadados
     df_dengue['data_carga'] = datetime.now()
     df_dengue['fonte'] = 'excel'
     
     # Salvar
-    silver_dengue_path = SILVER_DIR / 'fato_dengue.parquet'
-    df_dengue.to_parquet(silver_dengue_path, index=False)
-    
-    hash_dengue = hashlib.md5(pd.util.hash_pandas_object(df_dengue).values).hexdigest()
-    lineage.register_transformation(
-        'silver.fato_dengue',
-        ['bronze.dengue_historico'],
-        'clean_and_correlate_ibge',
-        len(df_dengue),
-        hash_dengue
-    )
-    
-    silver_data['fato_dengue'] = df_dengue
+    df_dengue.to_parquet(SILVER_DIR / 'fato_dengue.parquet', index=False)
     print(f"✓ fato_dengue: {len(df_dengue):,} registros")
-    
-    # Relatório de qualidade
-    print("\n📊 Relatório de Qualidade:")
-    quality_report = quality.get_report()
-    print(quality_report.groupby(['table', 'status']).size())
-    
-    # Salvar relatório
-    quality_report.to_csv(METADATA_DIR / 'quality_report.csv', index=False)
-    
-    print("\n✅ CAMADA SILVER CONCLUÍDA")
-    print(f"   Tabelas criadas: 4")
-    print(f"   Localização: {SILVER_DIR}")
-    
-    return silver_data
+    return df_dengue
 
 
 # ============================================================================
 # CAMADA GOLD: Dados Agregados (MEGA TABELA)
 # ============================================================================
 
-def gold_layer(silver_data: dict):
+def gold_mega_tabela(inputs):
+    """MEGA TABELA (município × ano) construída ano a ano a partir dos Parquets silver"""
+    blocos = construir_mega_tabela_particionada(
+        inputs['silver.dim_municipios'],
+        inputs['silver.fato_pois_servidor'],
+        inputs['silver.fato_atividades'],
+        inputs['silver.fato_dengue'],
+    )
+    return relatorio_mega_tabela(*gravar_mega_tabela(blocos))
+
+
+# ============================================================================
+# GRAFO DE TAREFAS
+# ============================================================================
+
+def construir_grafo(lineage: DataLineage, sync: DataSynchronizer, quality: DataQuality) -> TaskGraph:
     """
-    CAMADA GOLD: Dados agregados e prontos para análise
-    - MEGA TABELA completa
-    - Tabelas agregadas especializadas
+    Declara as tabelas do pipeline e suas entradas. Tabelas independentes rodam
+    em paralelo; tabelas cujas entradas não mudaram são reaproveitadas.
     """
-    print("\n" + "="*80)
-    print("🥇 CAMADA GOLD: Agregações e MEGA TABELA")
-    print("="*80)
-    
-    lineage = DataLineage()
+    graph = TaskGraph(lineage, max_workers=Config.ETL_MAX_WORKERS or None)
+    excel = {'excel.Atividades Techdengue.xlsx': file_source(EXCEL_PATH)}
+    
+    # Bronze
+    for table_name in ('banco_techdengue', 'planilha_campo'):
+        graph.add(
+            f'bronze.{table_name}', bronze_servidor(sync, table_name),
+            sources={f'servidor.{table_name}': fingerprint_servidor(sync, table_name)},
+            output=BRONZE_DIR / f'{table_name}.parquet',
+            transformation='sync_from_postgresql',
+        )
+    graph.add(
+        'bronze.atividades_excel', bronze_excel('Atividades (com sub)', 'atividades_excel'),
+        sources=excel, output=BRONZE_DIR / 'atividades_excel.parquet', transformation='load_from_excel',
+    )
+    graph.add(
+        'bronze.ibge_referencia', bronze_excel('IBGE', 'ibge_referencia'),
+        sources=excel, output=BRONZE_DIR / 'ibge_referencia.parquet', transformation='load_from_excel',
+    )
+    graph.add(
+        'bronze.dengue_historico', bronze_dengue_historico,
+        sources={
+            f'excel.base.dengue.{year}.xlsx': file_source(DENGUE_DIR / f"base.dengue.{year}.xlsx")
+            for year in ANOS_DENGUE
+        },
+        output=BRONZE_DIR / 'dengue_historico.parquet', transformation='load_from_excel',
+    )
     
-    # Continua na próxima parte...
-    print("\n⏳ Implementando MEGA TABELA...")
-    print("   (Continuação no próximo arquivo)")
+    # Silver
+    graph.add(
+        'silver.dim_municipios', lambda inputs: silver_dim_municipios(inputs, quality),
+        inputs=['bronze.ibge_referencia'],
+        output=SILVER_DIR / 'dim_municipios.parquet', transformation='clean_and_standardize',
+    )
+    graph.add(
+        'silver.fato_pois_servidor', lambda inputs: silver_fato_pois_servidor(inputs, quality),
+        inputs=['bronze.banco_techdengue'],
+        output=SILVER_DIR / 'fato_pois_servidor.parquet', transformation='clean_and_validate',
+    )
+    graph.add(
+        'silver.fato_atividades', lambda inputs: silver_fato_atividades(inputs, quality),
+        inputs=['bronze.atividades_excel'],
+        output=SILVER_DIR / 'fato_atividades.parquet', transformation='clean_aggregate_deduplicate',
+    )
+    graph.add(
+        'silver.fato_dengue', lambda inputs: silver_fato_dengue(inputs, quality),
+        inputs=['bronze.dengue_historico', 'bronze.ibge_referencia'],
+        output=SILVER_DIR / 'fato_dengue.parquet', transformation='clean_and_correlate_ibge',
+    )
     
-    return {}
+    # Gold
+    graph.add(
+        'gold.mega_tabela', gold_mega_tabela,
+        inputs=['silver.dim_municipios', 'silver.fato_pois_servidor', 'silver.fato_atividades', 'silver.fato_dengue'],
+        output=GOLD_DIR / 'mega_tabela_analitica.parquet', transformation='aggregate_municipio_ano',
+        load_inputs=False,
+    )
+    return graph
 
 
 # ============================================================================
 # MAIN: Executar Pipeline Completo
 # ============================================================================
 
-def main():
+def main(force: bool = False):
     """Executa pipeline ETL completo"""
     print("="*80)
     print("🚀 PIPELINE ETL COMPLETO - ARQUITETURA MEDALLION")
@@ -547,19 +425,34 @@ def main():
     start_time = datetime.now()
     
     try:
-        # Camada Bronze
-        bronze_data = bronze_layer()
+        lineage = DataLineage(METADATA_DIR / "data_lineage.json", VERSION)
+        quality = DataQuality()
+        graph = construir_grafo(lineage, DataSynchronizer(), quality)
         
-        # Camada Silver
-        silver_data = silver_layer(bronze_data)
+        status = graph.run(force=force)
         
-        # Camada Gold
-        gold_data = gold_layer(silver_data)
+        # Relatório de qualidade (apenas tabelas silver executadas nesta rodada)
+        if quality.checks:
+            print("\n📊 Relatório de Qualidade:")
+            quality_report = quality.get_report()
+            print(quality_report.groupby(['table', 'status']).size())
+            quality_report.to_csv(METADATA_DIR / 'quality_report.csv', index=False)
         
         # Tempo total
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         
+        print("\n" + "="*80)
+        print("📋 TABELAS")
+        print("="*80)
+        for name, situacao in status.items():
+            print(f"  {name}: {situacao}")
+        
+        falhas = [name for name, situacao in status.items() if situacao in (ERROR, BLOCKED)]
+        if falhas:
+            print(f"\n❌ ERRO NO PIPELINE: {len(falhas)} tabela(s) não geradas")
+            return 1
+        
         print("\n" + "="*80)
         print("✅ PIPELINE ETL CONCLUÍDO COM SUCESSO")
         print("="*80)
@@ -580,4 +473,8 @@ def main():
 
 
 if __name__ == '__main__':
-    exit(main())
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Pipeline ETL Bronze → Silver → Gold")
+    parser.add_argument('--force', action='store_true', help="Recria todas as tabelas, mesmo sem mudanças nas entradas")
+    exit(main(force=parser.parse_args().force))
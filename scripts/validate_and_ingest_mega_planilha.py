@@ -21,30 +21,26 @@ def main():
     parser.add_argument("--validate-only", dest="validate_only", action="store_true", help="Somente valida a planilha e sai")
     args = parser.parse_args()
 
-    logger.info("Validando mega planilha...")
-    report = validate_mega_planilha(path=args.file, sheet=args.sheet)
-
-    result = {"validation": report.model_dump()}
-
     if args.validate_only:
         # Relatório apenas de validação, sem banco/ingestão
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        logger.info("Validando mega planilha...")
+        report = validate_mega_planilha(path=args.file, sheet=args.sheet)
+        print(json.dumps({"validation": report.model_dump()}, indent=2, ensure_ascii=False))
         sys.exit(0 if report.ok else 1)
 
-    if not report.ok:
-        logger.error("Validação falhou. Corrija os problemas antes da ingestão.")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-        sys.exit(1)
-
     logger.info("Testando conexão com o banco...")
     db = get_database()
     if not db.test_connection():
         logger.error("Falha ao conectar no banco. Verifique variáveis de ambiente GIS_DB_*.")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
         sys.exit(2)
 
-    logger.info("Ingerindo dados validados para o banco...")
+    # Validação e ingestão no mesmo passe de leitura da planilha
+    logger.info("Validando e ingerindo mega planilha...")
     ingest = ingest_mega_planilha(path=args.file, sheet=args.sheet)
+    if not ingest.get("ok"):
+        logger.error("Validação falhou. Corrija os problemas antes da ingestão.")
+        print(json.dumps({"validation": ingest["report"]}, indent=2, ensure_ascii=False))
+        sys.exit(1)
 
     # Consultar informação da tabela
     table_info = db.get_table_info(FACT_TABLE)
@@ -52,9 +48,10 @@ def main():
     out = {
         "ok": ingest.get("ok", False),
         "ingested_rows": ingest.get("ingested_rows", 0),
+        **{k: ingest[k] for k in ("inserted", "updated", "unchanged") if k in ingest},
         "table": FACT_TABLE,
         "table_info": table_info,
-        "validation": report.model_dump(),
+        "validation": ingest["report"],
     }
 
     print(json.dumps(out, indent=2, ensure_ascii=False, default=str))
@@ -16,7 +16,7 @@ Exemplo de uso:
 """
 
 import os
-from typing import Optional, Any
+from typing import Optional, Any, Iterator, AsyncIterator
 from urllib.parse import urljoin
 
 import httpx
@@ -31,6 +31,15 @@ from techdengue.models import (
 )
 
 
+# Datasets paginados por cursor (chave natural)
+DATASET_PATHS = {
+    "facts": "/facts",
+    "dengue": "/dengue",
+    "municipios": "/municipios",
+    "gold": "/gold/analise",
+}
+
+
 class TechDengueError(Exception):
     """Erro da API TechDengue."""
     def __init__(self, error: ApiError):
@@ -276,6 +285,35 @@ class TechDengueClient:
             status_code=404,
         ))
     
+    def iter_records(
+        self,
+        dataset: str,
+        page_size: int = 1000,
+        **filters: Any,
+    ) -> Iterator[dict]:
+        """
+        Percorre um dataset completo usando paginação por cursor.
+        
+        Cada página custa o mesmo independente da profundidade e a ordem
+        (chave natural) permanece estável mesmo se os dados forem recarregados.
+        
+        Args:
+            dataset: Nome do dataset (facts, dengue, municipios, gold)
+            page_size: Registros por página (máx. 1000)
+            **filters: Filtros do endpoint (ex: codigo_ibge, start_date)
+        
+        Exemplo:
+            for rec in client.iter_records("facts", codigo_ibge="3106200"):
+                print(rec["data_map"], rec["pois"])
+        """
+        path = DATASET_PATHS.get(dataset, f"/{dataset}")
+        cursor = ""
+        while cursor is not None:
+            params = {**filters, "limit": page_size, "cursor": cursor}
+            data = self._request("GET", path, params=params)
+            yield from data.get("items", [])
+            cursor = data.get("next_cursor")
+    
     # ==================== Export ====================
     
     def export_data(
@@ -391,3 +429,19 @@ class AsyncTechDengueClient:
     
     async def get_risk_dashboard(self) -> dict:
         return await self._request("GET", "/api/v1/risk/dashboard")
+    
+    async def iter_records(
+        self,
+        dataset: str,
+        page_size: int = 1000,
+        **filters: Any,
+    ) -> AsyncIterator[dict]:
+        """Percorre um dataset completo usando paginação por cursor."""
+        path = DATASET_PATHS.get(dataset, f"/{dataset}")
+        cursor = ""
+        while cursor is not None:
+            params = {**filters, "limit": page_size, "cursor": cursor}
+            data = await self._request("GET", path, params=params)
+            for item in data.get("items", []):
+                yield item
+            cursor = data.get("next_cursor")
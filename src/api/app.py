@@ -18,6 +18,7 @@ from src.config import Config
 from src.core.cache import get_cache
 from src.core.rate_limiter import limiter, rate_limit_exceeded_handler
 from src.core.audit import AuditMiddleware
+from src.async_repository import close_async_repository
 
 # Routers
 from src.api.routers import (
@@ -56,6 +57,7 @@ async def lifespan(app: FastAPI):
     cache = get_cache()
     logger.info(f"Cache inicializado: {cache.stats['backend']}")
     yield
+    await close_async_repository()
     logger.info("API shutdown")
 
 
@@ -3,16 +3,37 @@ Dependências compartilhadas entre routers.
 Funções utilitárias e helpers para a API.
 """
 
+import json
+import math
+import typing
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Type
 
 import pandas as pd
-import io
-from fastapi.responses import StreamingResponse
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+from src.shared.exporters import ExportData, iso_column, iter_csv, iter_ndjson, iter_parquet
+
+# orjson é opcional - fallback para json da stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_PY_TO_ARROW = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+}
 
 
 def df_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    """Converte DataFrame para lista de dicionários com serialização de datas."""
+    """Converte DataFrame para lista de dicionários com serialização de datas (NaN como null)."""
     out = []
     for rec in df.to_dict(orient="records"):
         for k, v in list(rec.items()):
@@ -20,10 +41,79 @@ def df_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
                 rec[k] = v.isoformat()
             elif isinstance(v, date):
                 rec[k] = v.isoformat()
+            elif isinstance(v, float) and math.isnan(v):
+                rec[k] = None
         out.append(rec)
     return out
 
 
+def _model_arrow_types(model: Type[BaseModel]) -> Dict[str, Optional[pa.DataType]]:
+    """Tipo Arrow de cada campo do modelo (None para datas e tipos sem mapeamento)."""
+    types: Dict[str, Optional[pa.DataType]] = {}
+    for name, field in model.model_fields.items():
+        args = [a for a in typing.get_args(field.annotation) if a is not type(None)]
+        py_type = args[0] if args else field.annotation
+        types[name] = _PY_TO_ARROW.get(py_type)
+    return types
+
+
+def _json_column(column: pa.ChunkedArray, target: Optional[pa.DataType] = None) -> pa.ChunkedArray:
+    """Prepara uma coluna para JSON em bloco: datas em ISO 8601, NaN como null."""
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    if target is not None and column.type != target:
+        try:
+            column = column.cast(target)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    col_type = column.type
+    if pa.types.is_date(col_type) or pa.types.is_timestamp(col_type):
+        return iso_column(column)
+    if pa.types.is_floating(col_type):
+        return pc.if_else(pc.is_nan(column), pa.scalar(None, col_type), column)
+    return column
+
+
+def table_to_records(table: pa.Table, model: Optional[Type[BaseModel]] = None) -> List[Dict[str, Any]]:
+    """
+    Converte uma tabela Arrow em registros prontos para JSON, coluna a coluna.
+
+    Com ``model``, a saída contém exatamente os campos do modelo (ausentes como
+    null) convertidos para os tipos declarados, sem instanciar um modelo por linha.
+    """
+    if model is not None:
+        types = _model_arrow_types(model)
+        columns = {}
+        for name, target in types.items():
+            if name in table.column_names:
+                columns[name] = _json_column(table.column(name), target)
+            else:
+                columns[name] = pa.nulls(table.num_rows)
+        table = pa.table(columns) if columns else table
+    else:
+        table = pa.table({name: _json_column(table.column(name)) for name in table.column_names})
+    return table.to_pylist()
+
+
+def json_response(payload: Dict[str, Any]) -> Response:
+    """Resposta JSON serializada diretamente (orjson quando disponível), sem revalidação."""
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
+
+def select_fields(table: pa.Table, fields: Optional[str]) -> pa.Table:
+    """Aplica filtro de campos à tabela Arrow (projeção sem cópia)."""
+    if fields:
+        cols = [c.strip() for c in str(fields).split(",") if c.strip()]
+        cols = [c for c in cols if c in table.column_names]
+        if cols:
+            table = table.select(cols)
+    return table
+
+
 def apply_fields(df: pd.DataFrame, fields: Optional[str]) -> pd.DataFrame:
     """Aplica filtro de campos ao DataFrame."""
     if fields:
@@ -34,23 +124,23 @@ def apply_fields(df: pd.DataFrame, fields: Optional[str]) -> pd.DataFrame:
     return df
 
 
-def export_df(df: pd.DataFrame, fmt: str, filename: str) -> StreamingResponse:
-    """Exporta DataFrame para CSV ou Parquet."""
+def export_df(df: ExportData, fmt: str, filename: str) -> StreamingResponse:
+    """Exporta DataFrame para CSV, NDJSON ou Parquet, transmitindo lote a lote."""
     if fmt == "csv":
-        buf = io.StringIO()
-        df.to_csv(buf, index=False)
-        buf.seek(0)
         return StreamingResponse(
-            iter([buf.getvalue()]),
+            iter_csv(df),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}.csv"},
         )
+    if fmt == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(df),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename={filename}.ndjson"},
+        )
     if fmt == "parquet":
-        b = io.BytesIO()
-        df.to_parquet(b, index=False)
-        b.seek(0)
         return StreamingResponse(
-            b,
+            iter_parquet(df),
             media_type="application/x-parquet",
             headers={"Content-Disposition": f"attachment; filename={filename}.parquet"},
         )
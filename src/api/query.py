@@ -0,0 +1,268 @@
+"""
+Camada de consulta sobre os datasets Parquet em cache.
+Traduz os filtros dos routers em expressões ``pyarrow.compute`` avaliadas
+de forma vetorizada sobre colunas tipadas, sem coerção linha a linha.
+Filtros sobre colunas indexadas (``TableIndex``) usam os índices secundários.
+"""
+
+from __future__ import annotations
+
+import base64
+import bisect
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.api.utils import read_indexed_cached
+from src.core.table_index import intersect_positions, take_positions
+
+
+def _scalar_for(field_type: pa.DataType, value: Any) -> Optional[pa.Scalar]:
+    """Converte um valor de filtro para o tipo da coluna (None se incompatível)."""
+    if pa.types.is_dictionary(field_type):
+        field_type = field_type.value_type
+    if pa.types.is_integer(field_type):
+        try:
+            return pa.scalar(int(str(value).strip()), field_type)
+        except ValueError:
+            return None
+    if pa.types.is_floating(field_type):
+        try:
+            return pa.scalar(float(value), field_type)
+        except ValueError:
+            return None
+    return pa.scalar(str(value))
+
+
+# Linhas avaliadas no primeiro bloco da varredura de uma página (dobra a cada bloco)
+PAGE_SCAN_CHUNK = 1024
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado."""
+    pass
+
+
+def _sortable(value: Any) -> Tuple:
+    """Chave comparável para um valor de coluna (nulos ordenados ao final)."""
+    if value is None:
+        return (1,)
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return (0, value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Codifica os valores da chave natural da última linha em um cursor opaco."""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple:
+    """Decodifica um cursor opaco na tupla comparável da chave natural."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Cursor inválido: chave incompatível com o dataset")
+    return tuple(_sortable(v) for v in values)
+
+
+class DatasetQuery:
+    """
+    Builder de consultas sobre um dataset de dados_integrados.
+
+    Uso:
+        table = (
+            DatasetQuery("fato_atividades_techdengue.parquet")
+            .where_equals("codigo_ibge", "3106200")
+            .where_between("data_map", date(2024, 1, 1), None)
+            .to_table()
+        )
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.table, self.index = read_indexed_cached(filename)
+        self.schema = self.table.schema
+        self._filters: List[pc.Expression] = []
+        self._positions: Optional[np.ndarray] = None
+        # Filtros aplicados (chave do total memorizado no TableIndex)
+        self._signature: List[Tuple] = []
+
+    def has_column(self, column: str) -> bool:
+        return column in self.schema.names
+
+    def where_equals(self, column: str, value: Any) -> "DatasetQuery":
+        """Igualdade exata, com o valor convertido para o tipo da coluna."""
+        if value is None or not self.has_column(column):
+            return self
+        self._signature.append(("equals", column, str(value)))
+        if self.index.has_hash(column):
+            self._positions = intersect_positions(self._positions, self.index.lookup(column, value))
+            return self
+        scalar = _scalar_for(self.schema.field(column).type, value)
+        if scalar is None:
+            self._filters.append(pc.scalar(False))
+        elif pa.types.is_string(scalar.type):
+            self._filters.append(pc.field(column).cast(pa.string()) == scalar)
+        else:
+            self._filters.append(pc.field(column) == scalar)
+        return self
+
+    def where_contains(self, column: str, text: Optional[str]) -> "DatasetQuery":
+        """Busca por substring sem diferenciar maiúsculas/minúsculas."""
+        if not text or not self.has_column(column):
+            return self
+        self._signature.append(("contains", column, str(text)))
+        self._filters.append(
+            pc.match_substring(pc.field(column).cast(pa.string()), str(text), ignore_case=True)
+        )
+        return self
+
+    def where_between(self, column: str, start: Optional[date], end: Optional[date]) -> "DatasetQuery":
+        """Intervalo fechado de datas sobre a coluna convertida para date32."""
+        if (start is None and end is None) or not self.has_column(column):
+            return self
+        self._signature.append(("between", column, start, end))
+        if self.index.has_range(column):
+            positions = self.index.lookup_range(column, start, end)
+            self._positions = intersect_positions(self._positions, positions)
+            return self
+        field = pc.field(column)
+        if not pa.types.is_date32(self.schema.field(column).type):
+            field = field.cast(pa.date32())
+        if start is not None:
+            self._filters.append(field >= pa.scalar(start, pa.date32()))
+        if end is not None:
+            self._filters.append(field <= pa.scalar(end, pa.date32()))
+        return self
+
+    @property
+    def expression(self) -> Optional[pc.Expression]:
+        """Conjunção de todos os filtros registrados."""
+        if not self._filters:
+            return None
+        expr = self._filters[0]
+        for f in self._filters[1:]:
+            expr = expr & f
+        return expr
+
+    def _row_positions(self) -> Optional[np.ndarray]:
+        """Posições (ordem original) das linhas que atendem aos filtros, ou None se não há filtros."""
+        positions = self._positions
+        if self.expression is not None:
+            if positions is None:
+                rows = self.table
+                positions = np.arange(self.table.num_rows)
+            else:
+                positions = np.sort(positions)
+                rows = self.table.take(pa.array(positions, type=pa.int64()))
+            rows = rows.append_column("__row", pa.array(positions, type=pa.int64()))
+            positions = rows.filter(self.expression).column("__row").to_numpy()
+        return positions
+
+    def _first_matches(self, candidates: np.ndarray, count: int) -> np.ndarray:
+        """
+        Primeiras ``count`` posições de ``candidates`` (na ordem dada) que atendem
+        à expressão, avaliada em blocos crescentes a partir do início.
+        """
+        if self.expression is None:
+            return candidates[:count]
+        found: List[np.ndarray] = []
+        matched = 0
+        offset = 0
+        chunk = max(count, PAGE_SCAN_CHUNK)
+        while offset < len(candidates) and matched < count:
+            block = candidates[offset:offset + chunk]
+            offset += len(block)
+            rows = self.table.take(pa.array(block, type=pa.int64()))
+            rows = rows.append_column("__row", pa.array(block, type=pa.int64()))
+            hits = rows.filter(self.expression).column("__row").to_numpy()
+            found.append(hits)
+            matched += len(hits)
+            chunk *= 2
+        if not found:
+            return candidates[:0]
+        return np.concatenate(found)[:count]
+
+    def count(self) -> int:
+        """Total de linhas filtradas (memorizado por filtro enquanto a tabela estiver em cache)."""
+        if not self._signature:
+            return self.table.num_rows
+        key = tuple(sorted(self._signature, key=repr))
+        return self.index.count(key, lambda: int(len(self._row_positions())))
+
+    def page_after(
+        self,
+        key_columns: Sequence[str],
+        cursor: Optional[str],
+        limit: int,
+    ) -> Tuple[pa.Table, int, Optional[str]]:
+        """
+        Paginação por chave (keyset) na ordem crescente da chave natural.
+
+        A página é buscada a partir da posição do cursor (busca binária na
+        ordem da chave) e a varredura para ao encontrar ``limit`` linhas; o
+        total é memorizado por filtro (``count``).
+
+        Args:
+            key_columns: Colunas da chave natural do dataset
+            cursor: Cursor retornado pela página anterior ("" ou None para começar)
+            limit: Tamanho da página
+
+        Returns:
+            Tupla (página, total filtrado, próximo cursor ou None)
+        """
+        key_columns = [c for c in key_columns if self.has_column(c)]
+        order = self.index.key_order(self.table, key_columns)
+        columns = [self.table.column(c) for c in key_columns]
+
+        def row_key(pos: int) -> Tuple:
+            return tuple(_sortable(col[int(pos)].as_py()) for col in columns)
+
+        start = 0
+        if cursor:
+            start = bisect.bisect_right(order, decode_cursor(cursor, len(key_columns)), key=row_key)
+
+        if self._positions is None:
+            candidates = order[start:]
+        else:
+            # Linhas dos índices na ordem da chave, a partir do cursor
+            ranks = np.sort(self.index.key_rank(self.table, key_columns)[self._positions])
+            candidates = order[ranks[np.searchsorted(ranks, start):]]
+
+        matches = self._first_matches(candidates, limit + 1)
+        page_positions = matches[:limit]
+        page = self.table.take(pa.array(page_positions, type=pa.int64()))
+        next_cursor = None
+        if len(matches) > limit:
+            last = int(page_positions[-1])
+            next_cursor = encode_cursor([col[last].as_py() for col in columns])
+        return page, self.count(), next_cursor
+
+    def to_table(self, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """Executa a consulta e retorna a tabela Arrow filtrada."""
+        table = self.table
+        if self._positions is not None:
+            table = take_positions(table, self._positions)
+        if self.expression is not None:
+            table = table.filter(self.expression)
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return table
+
+
+def sort_table(table: pa.Table, sort_by: Optional[str], order: Optional[str]) -> pa.Table:
+    """Ordena a tabela pela coluna informada (nulos ao final), se existir."""
+    if not sort_by or sort_by not in table.column_names:
+        return table
+    direction = "ascending" if order == "asc" else "descending"
+    return table.sort_by([(sort_by, direction)])
@@ -4,10 +4,12 @@ Endpoints: /facts, /facts/summary, /dengue, /municipios, /gold/analise
 """
 
 from datetime import datetime, date, timezone
-from typing import Any, Optional, List
+from pathlib import Path
+from typing import Any, Dict, Optional, List, Sequence, Tuple
 
 import pandas as pd
-from fastapi import APIRouter, Query
+import pyarrow as pa
+from fastapi import APIRouter, HTTPException, Query
 
 from src.api.schemas import (
     FactsResponse,
@@ -18,11 +20,116 @@ from src.api.schemas import (
     GoldAnaliseRecord,
     PageResponse,
 )
-from src.api.utils import read_parquet_cached
-from src.api.dependencies import df_to_records, apply_fields, export_df
+from src.api.utils import dataset_resource, read_table_cached
+from src.core.cache_manager import ParquetCache
+from src.materialize import (
+    FACTS_SUMMARY_FILE,
+    SUMMARY_SOURCE_MTIME_KEY,
+    SUMMARY_SOURCE_SIZE_KEY,
+    build_facts_summary,
+)
+from src.api.query import DatasetQuery, InvalidCursorError, sort_table
+from src.api.dependencies import export_df, json_response, select_fields, table_to_records
 
 router = APIRouter()
 
+# Chaves naturais usadas na paginação por cursor
+FACTS_KEY = ("codigo_ibge", "data_map", "nomenclatura_atividade")
+DENGUE_KEY = ("codigo_ibge", "ano", "semana_epidemiologica")
+MUNICIPIOS_KEY = ("codigo_ibge",)
+GOLD_KEY = ("codigo_ibge", "competencia", "municipio")
+
+FACTS_FILE = "fato_atividades_techdengue.parquet"
+SUMMARY_COLUMNS = ["codigo_ibge", "municipio", "nomenclatura_atividade", "pois", "devolutivas", "hectares_mapeados"]
+
+# Cubo de resumo por tabela de origem: recalculado só quando o ParquetCache recarrega
+_summary_cubes: Dict[str, Tuple[pa.Table, Dict[str, List[SummaryItem]]]] = {}
+
+CURSOR_DESCRIPTION = (
+    "Paginação por cursor na ordem da chave natural. Envie vazio para a primeira "
+    "página e depois o `next_cursor` da resposta; `offset` e `sort_by` são ignorados."
+)
+
+
+def _paginate(
+    query: DatasetQuery,
+    key_columns: Sequence[str],
+    cursor: Optional[str],
+    sort_by: Optional[str],
+    order: Optional[str],
+    offset: int,
+    limit: int,
+) -> Tuple[pa.Table, int, Optional[str]]:
+    """Retorna (página, total, próximo cursor) por offset ou por cursor."""
+    if cursor is not None:
+        try:
+            return query.page_after(key_columns, cursor, limit)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    table = sort_table(query.to_table(), sort_by, order)
+    return table.slice(offset, limit), table.num_rows, None
+
+
+def _page_response(page: List[Any], total: int, limit: int, offset: int, next_cursor: Optional[str]):
+    return json_response(
+        {"total": total, "limit": limit, "offset": offset, "items": page, "next_cursor": next_cursor}
+    )
+
+
+def _summary_source() -> Tuple[str, pa.Table, bool]:
+    """
+    Tabela de origem do cubo: o sidecar materializado quando corresponde ao
+    Parquet de atividades atual (mtime/tamanho), senão o próprio dataset.
+    """
+    resource = dataset_resource(FACTS_FILE)
+    if isinstance(resource, Path):
+        sidecar = resource.parent / FACTS_SUMMARY_FILE
+        if sidecar.exists() and resource.exists():
+            table = ParquetCache.get_table(sidecar)
+            meta = table.schema.metadata or {}
+            stat = resource.stat()
+            if (
+                meta.get(SUMMARY_SOURCE_MTIME_KEY) == str(stat.st_mtime_ns).encode()
+                and meta.get(SUMMARY_SOURCE_SIZE_KEY) == str(stat.st_size).encode()
+            ):
+                return str(sidecar), table, True
+    return FACTS_FILE, read_table_cached(FACTS_FILE), False
+
+
+def _summary_cube() -> Dict[str, List[SummaryItem]]:
+    """Itens de resumo por dimensão (municipio, codigo_ibge, atividade, total)."""
+    key, table, precomputed = _summary_source()
+    memo = _summary_cubes.get(key)
+    if memo is not None and memo[0] is table:
+        return memo[1]
+
+    if precomputed:
+        cube = table.to_pandas()
+    else:
+        cube = build_facts_summary(table.select([c for c in SUMMARY_COLUMNS if c in table.column_names]).to_pandas())
+
+    items: Dict[str, List[SummaryItem]] = {}
+    for r in cube.to_dict(orient="records"):
+        items.setdefault(r["group_by"], []).append(
+            SummaryItem(
+                key=r["key"] if pd.notna(r["key"]) else None,
+                total_pois=int(r["total_pois"]),
+                total_devolutivas=float(r["total_devolutivas"]),
+                total_hectares=float(r["total_hectares"]),
+                atividades=int(r["atividades"]),
+            )
+        )
+    _summary_cubes[key] = (table, items)
+    return items
+
+
+def _export_page(page: pa.Table, fmt: str, fields: Optional[str], filename: str, next_cursor: Optional[str]):
+    response = export_df(select_fields(page, fields), fmt, filename)
+    if next_cursor:
+        response.headers["X-TechDengue-Next-Cursor"] = next_cursor
+    return response
+
 
 @router.get("/facts", response_model=FactsResponse, tags=["Atividades"], summary="Listar atividades TechDengue")
 def get_facts(
@@ -34,115 +141,34 @@ def get_facts(
     offset: int = 0,
     sort_by: Optional[str] = None,
     order: Optional[str] = Query("desc", pattern="^(asc|desc)$"),
-    format: Optional[str] = Query("json", pattern="^(json|csv|parquet)$"),
+    format: Optional[str] = Query("json", pattern="^(json|csv|ndjson|parquet)$"),
     fields: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
 ) -> Any:
-    """Lista atividades TechDengue com filtros e paginação."""
+    """Lista atividades TechDengue com filtros e paginação (offset ou cursor)."""
     limit = max(1, min(limit, 1000))
-    offset = max(0, offset)
-
-    df = read_parquet_cached("fato_atividades_techdengue.parquet")
+    offset = max(0, offset) if cursor is None else 0
 
-    if codigo_ibge:
-        df = df[df["codigo_ibge"].astype(str) == str(codigo_ibge)]
-    if atividade:
-        df = df[
-            df["nomenclatura_atividade"]
-            .astype(str)
-            .str.contains(str(atividade), case=False, na=False)
-        ]
-    if start_date:
-        df = df[pd.to_datetime(df["data_map"]).dt.date >= start_date]
-    if end_date:
-        df = df[pd.to_datetime(df["data_map"]).dt.date <= end_date]
-
-    if sort_by and sort_by in df.columns:
-        df = df.sort_values(by=sort_by, ascending=(order == "asc"), na_position="last")
+    query = (
+        DatasetQuery(FACTS_FILE)
+        .where_equals("codigo_ibge", codigo_ibge)
+        .where_contains("nomenclatura_atividade", atividade)
+        .where_between("data_map", start_date, end_date)
+    )
+    page, total, next_cursor = _paginate(query, FACTS_KEY, cursor, sort_by, order, offset, limit)
 
     if format != "json":
-        df_export = apply_fields(df, fields)
-        page = df_export.iloc[offset : offset + limit]
-        return export_df(page, format, "facts")
-
-    total = len(df)
-    page = df.iloc[offset : offset + limit]
-
-    items: List[FactRecord] = []
-    for rec in df_to_records(page):
-        items.append(
-            FactRecord(
-                codigo_ibge=rec.get("codigo_ibge"),
-                municipio=rec.get("municipio"),
-                data_map=rec.get("data_map"),
-                nomenclatura_atividade=rec.get("nomenclatura_atividade"),
-                pois=rec.get("pois"),
-                devolutivas=rec.get("devolutivas"),
-                hectares_mapeados=rec.get("hectares_mapeados"),
-            )
-        )
+        return _export_page(page, format, fields, "facts", next_cursor)
 
-    return FactsResponse(total=total, limit=limit, offset=offset, items=items)
+    return _page_response(table_to_records(page, FactRecord), total, limit, offset, next_cursor)
 
 
 @router.get("/facts/summary", response_model=SummaryResponse, tags=["Atividades"], summary="Resumo agregado das atividades")
 def facts_summary(
     group_by: Optional[str] = Query(None, pattern="^(municipio|codigo_ibge|atividade)$"),
 ) -> Any:
-    """Retorna resumo agregado das atividades, opcionalmente agrupado."""
-    df = read_parquet_cached("fato_atividades_techdengue.parquet")
-
-    if group_by == "municipio":
-        key_col = "municipio"
-    elif group_by == "codigo_ibge":
-        key_col = "codigo_ibge"
-    elif group_by == "atividade":
-        key_col = "nomenclatura_atividade"
-    else:
-        key_col = None
-
-    if key_col:
-        # Usar coluna diferente para count quando agrupando por nomenclatura_atividade
-        count_col = "pois" if key_col == "nomenclatura_atividade" else "nomenclatura_atividade"
-        g = (
-            df.groupby(key_col)
-            .agg(
-                total_pois=("pois", "sum"),
-                total_devolutivas=("devolutivas", "sum"),
-                total_hectares=("hectares_mapeados", "sum"),
-                atividades=(count_col, "count"),
-            )
-            .reset_index()
-            .rename(columns={key_col: "key"})
-        )
-        items = [
-            SummaryItem(
-                key=str(r["key"]) if r.get("key") is not None else None,
-                total_pois=int(r["total_pois"]) if pd.notna(r["total_pois"]) else 0,
-                total_devolutivas=float(r["total_devolutivas"]) if pd.notna(r["total_devolutivas"]) else 0.0,
-                total_hectares=float(r["total_hectares"]) if pd.notna(r["total_hectares"]) else 0.0,
-                atividades=int(r["atividades"]) if pd.notna(r["atividades"]) else 0,
-            )
-            for _, r in g.iterrows()
-        ]
-    else:
-        s = df.agg(
-            {
-                "pois": "sum",
-                "devolutivas": "sum",
-                "hectares_mapeados": "sum",
-                "nomenclatura_atividade": "count",
-            }
-        )
-        items = [
-            SummaryItem(
-                key=None,
-                total_pois=int(s.get("pois", 0) or 0),
-                total_devolutivas=float(s.get("devolutivas", 0.0) or 0.0),
-                total_hectares=float(s.get("hectares_mapeados", 0.0) or 0.0),
-                atividades=int(s.get("nomenclatura_atividade", 0) or 0),
-            )
-        ]
-
+    """Retorna resumo agregado das atividades, opcionalmente agrupado (cubo pré-calculado)."""
+    items = _summary_cube().get(group_by or "total", [])
     return SummaryResponse(generated_at=datetime.now(timezone.utc), group_by=group_by, summary=items)
 
 
@@ -153,31 +179,25 @@ def dengue(
     offset: int = 0,
     sort_by: Optional[str] = None,
     order: Optional[str] = Query("desc", pattern="^(asc|desc)$"),
-    format: Optional[str] = Query("json", pattern="^(json|csv|parquet)$"),
+    format: Optional[str] = Query("json", pattern="^(json|csv|ndjson|parquet)$"),
     fields: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
 ) -> Any:
     """Retorna dados históricos de casos de dengue."""
     limit = max(1, min(limit, 1000))
-    offset = max(0, offset)
+    offset = max(0, offset) if cursor is None else 0
 
-    df = read_parquet_cached("fato_dengue_historico.parquet")
+    query = DatasetQuery("fato_dengue_historico.parquet")
     if codigo_ibge:
-        col = "codigo_ibge" if "codigo_ibge" in df.columns else "codmun"
-        if col in df.columns:
-            df = df[df[col].astype(str) == str(codigo_ibge)]
-
-    if sort_by and sort_by in df.columns:
-        df = df.sort_values(by=sort_by, ascending=(order == "asc"), na_position="last")
+        col = "codigo_ibge" if query.has_column("codigo_ibge") else "codmun"
+        query = query.where_equals(col, codigo_ibge)
+    page, total, next_cursor = _paginate(query, DENGUE_KEY, cursor, sort_by, order, offset, limit)
 
     if format != "json":
-        df_export = apply_fields(df, fields)
-        page = df_export.iloc[offset : offset + limit]
-        return export_df(page, format, "dengue")
+        return _export_page(page, format, fields, "dengue", next_cursor)
 
-    df = apply_fields(df, fields)
-    total = len(df)
-    page = df.iloc[offset : offset + limit]
-    return PageResponse(total=total, limit=limit, offset=offset, items=df_to_records(page))
+    page = table_to_records(select_fields(page, fields))
+    return _page_response(page, total, limit, offset, next_cursor)
 
 
 @router.get("/municipios", response_model=PageResponse, tags=["Municípios"], summary="Dados dos municípios de MG")
@@ -188,33 +208,26 @@ def municipios(
     offset: int = 0,
     sort_by: Optional[str] = None,
     order: Optional[str] = Query("asc", pattern="^(asc|desc)$"),
-    format: Optional[str] = Query("json", pattern="^(json|csv|parquet)$"),
+    format: Optional[str] = Query("json", pattern="^(json|csv|ndjson|parquet)$"),
     fields: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
 ) -> Any:
     """Retorna dados dos municípios de Minas Gerais."""
     limit = max(1, min(limit, 1000))
-    offset = max(0, offset)
+    offset = max(0, offset) if cursor is None else 0
 
-    df = read_parquet_cached("dim_municipios.parquet")
-    if codigo_ibge and "codigo_ibge" in df.columns:
-        df = df[df["codigo_ibge"].astype(str) == str(codigo_ibge)]
-    if q:
-        name_col = "municipio" if "municipio" in df.columns else None
-        if name_col:
-            df = df[df[name_col].astype(str).str.contains(q, case=False, na=False)]
-
-    if sort_by and sort_by in df.columns:
-        df = df.sort_values(by=sort_by, ascending=(order == "asc"), na_position="last")
+    query = (
+        DatasetQuery("dim_municipios.parquet")
+        .where_equals("codigo_ibge", codigo_ibge)
+        .where_contains("municipio", q)
+    )
+    page, total, next_cursor = _paginate(query, MUNICIPIOS_KEY, cursor, sort_by, order, offset, limit)
 
     if format != "json":
-        df_export = apply_fields(df, fields)
-        page = df_export.iloc[offset : offset + limit]
-        return export_df(page, format, "municipios")
+        return _export_page(page, format, fields, "municipios", next_cursor)
 
-    df = apply_fields(df, fields)
-    total = len(df)
-    page = df.iloc[offset : offset + limit]
-    return PageResponse(total=total, limit=limit, offset=offset, items=df_to_records(page))
+    page = table_to_records(select_fields(page, fields))
+    return _page_response(page, total, limit, offset, next_cursor)
 
 
 @router.get("/gold/analise", response_model=GoldAnaliseResponse, tags=["Análise Gold"], summary="Análise integrada consolidada")
@@ -227,47 +240,23 @@ def gold_analise(
     offset: int = 0,
     sort_by: Optional[str] = None,
     order: Optional[str] = Query("desc", pattern="^(asc|desc)$"),
-    format: Optional[str] = Query("json", pattern="^(json|csv|parquet)$"),
+    format: Optional[str] = Query("json", pattern="^(json|csv|ndjson|parquet)$"),
     fields: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
 ) -> Any:
     """Retorna dados analíticos consolidados (camada Gold)."""
     limit = max(1, min(limit, 1000))
-    offset = max(0, offset)
+    offset = max(0, offset) if cursor is None else 0
 
-    df = read_parquet_cached("analise_integrada.parquet")
-
-    if codigo_ibge:
-        df = df[df["codigo_ibge"].astype(str) == str(codigo_ibge)]
-    if municipio:
-        df = df[df["municipio"].astype(str).str.contains(str(municipio), case=False, na=False)]
-    if comp_start:
-        df = df[pd.to_datetime(df["competencia"]).dt.date >= comp_start]
-    if comp_end:
-        df = df[pd.to_datetime(df["competencia"]).dt.date <= comp_end]
-
-    if sort_by and sort_by in df.columns:
-        df = df.sort_values(by=sort_by, ascending=(order == "asc"), na_position="last")
+    query = (
+        DatasetQuery("analise_integrada.parquet")
+        .where_equals("codigo_ibge", codigo_ibge)
+        .where_contains("municipio", municipio)
+        .where_between("competencia", comp_start, comp_end)
+    )
+    page, total, next_cursor = _paginate(query, GOLD_KEY, cursor, sort_by, order, offset, limit)
 
     if format != "json":
-        df_export = apply_fields(df, fields)
-        page = df_export.iloc[offset : offset + limit]
-        return export_df(page, format, "gold_analise")
-
-    total = len(df)
-    page = df.iloc[offset : offset + limit]
-
-    items: List[GoldAnaliseRecord] = []
-    for rec in df_to_records(page):
-        items.append(
-            GoldAnaliseRecord(
-                codigo_ibge=rec.get("codigo_ibge"),
-                municipio=rec.get("municipio"),
-                competencia=rec.get("competencia"),
-                total_pois=rec.get("total_pois"),
-                total_devolutivas=rec.get("total_devolutivas"),
-                total_hectares=rec.get("total_hectares"),
-                atividades=rec.get("atividades"),
-            )
-        )
+        return _export_page(page, format, fields, "gold_analise", next_cursor)
 
-    return GoldAnaliseResponse(total=total, limit=limit, offset=offset, items=items)
+    return _page_response(table_to_records(page, GoldAnaliseRecord), total, limit, offset, next_cursor)
@@ -6,11 +6,14 @@ Endpoints: /gis/banco, /gis/pois
 import os
 from typing import Any, Optional
 
+import pandas as pd
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from loguru import logger
 
-from src.repository import TechDengueRepository
+from src.async_repository import ASYNCPG_AVAILABLE, get_async_repository
+from src.repository import get_repository
 from src.api.dependencies import df_to_records
 from src.database import DatabaseConnectionError, DatabaseQueryError
 
@@ -38,6 +41,16 @@ def _is_expected_gis_error(e: Exception) -> bool:
     return any(m in msg for m in expected_markers)
 
 
+async def _query(method: str, *args: Any, **kwargs: Any) -> pd.DataFrame:
+    """
+    Executa a consulta no repositório assíncrono (asyncpg), sem ocupar uma
+    thread da API; sem asyncpg, usa o repositório síncrono no threadpool.
+    """
+    if ASYNCPG_AVAILABLE:
+        return await getattr(get_async_repository(), method)(*args, **kwargs)
+    return await run_in_threadpool(getattr(get_repository(), method), *args, **kwargs)
+
+
 def _empty_ok(reason: str, message: str) -> JSONResponse:
     return JSONResponse(
         content=[],
@@ -64,12 +77,11 @@ def _unavailable(reason: str, message: str, status_code: int = 503) -> JSONRespo
 
 
 @router.get("/banco", summary="Dados do banco GIS")
-def gis_banco(limit: int = 100, strict: bool = False) -> Any:
+async def gis_banco(limit: int = 100, strict: bool = False) -> Any:
     """Retorna dados do banco TechDengue no PostgreSQL."""
     limit = max(1, min(limit, 1000))
-    repo = TechDengueRepository()
     try:
-        df = repo.get_banco_techdengue_all(limit=limit)
+        df = await _query("get_banco_techdengue_all", limit=limit)
         return JSONResponse(content=df_to_records(df), headers={"X-TechDengue-Data-Available": "true"})
     except Exception as e:
         if _is_expected_gis_error(e):
@@ -91,17 +103,16 @@ def gis_banco(limit: int = 100, strict: bool = False) -> Any:
 
 
 @router.get("/pois", summary="POIs do campo")
-def gis_pois(limit: int = 100, id_atividade: Optional[str] = None, strict: bool = False) -> Any:
+async def gis_pois(limit: int = 100, id_atividade: Optional[str] = None, strict: bool = False) -> Any:
     """Retorna POIs (pontos de interesse) das atividades de campo."""
     limit = max(1, min(limit, 2000))
-    repo = TechDengueRepository()
     try:
         if id_atividade:
-            df = repo.get_planilha_campo_by_atividade(id_atividade=id_atividade)
+            df = await _query("get_planilha_campo_by_atividade", id_atividade=id_atividade)
             if len(df) > limit:
                 df = df.head(limit)
         else:
-            df = repo.get_planilha_campo_all(limit=limit)
+            df = await _query("get_planilha_campo_all", limit=limit)
         return JSONResponse(content=df_to_records(df), headers={"X-TechDengue-Data-Available": "true"})
     except Exception as e:
         if _is_expected_gis_error(e):
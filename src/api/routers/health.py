@@ -15,7 +15,7 @@ from loguru import logger
 from src.config import Config
 from src.api.schemas import HealthResponse, DatasetsResponse
 from src.api.utils import read_parquet_cached
-from src.repository import TechDengueRepository
+from src.repository import get_repository
 from src.core.cache import get_cache
 from src.core.rate_limiter import limiter
 
@@ -75,7 +75,7 @@ def health() -> Any:
     # Verificar banco de dados
     db_ok = False
     try:
-        repo = TechDengueRepository()
+        repo = get_repository()
         db_ok = repo.test_connection()
     except Exception as e:
         logger.warning(f"DB health check failed: {e}")
@@ -135,13 +135,16 @@ def monitor() -> Any:
 
     db_connected = False
     try:
-        repo = TechDengueRepository()
+        repo = get_repository()
         db_connected = repo.test_connection()
     except Exception:
         pass
 
     try:
-        df_facts = read_parquet_cached("fato_atividades_techdengue.parquet")
+        df_facts = read_parquet_cached(
+            "fato_atividades_techdengue.parquet",
+            columns=["codigo_ibge", "pois", "hectares_mapeados"],
+        )
         total_pois = int(df_facts["pois"].sum())
         total_hectares = float(df_facts["hectares_mapeados"].sum())
         total_atividades = len(df_facts)
@@ -318,8 +321,10 @@ async def prometheus_metrics() -> Response:
     - techdengue_cache_misses_total
     - techdengue_requests_total
     - techdengue_datasets_available
+    - techdengue_db_pool_* (conexões em uso/ociosas, espera, timeouts)
     """
     from src.core.audit import _audit_buffer
+    from src.database import get_pool_stats
     
     cache = get_cache()
     stats = cache.stats
@@ -362,4 +367,25 @@ async def prometheus_metrics() -> Response:
     for status, count in sorted(requests_by_status.items()):
         lines.append(f'techdengue_requests_total{{status="{status}"}} {count}')
     
+    # Pools de conexão já criados (GIS/Warehouse)
+    pool_metrics = [
+        ("in_use", "gauge", "Connections currently checked out"),
+        ("idle", "gauge", "Idle connections in the pool"),
+        ("max_size", "gauge", "Maximum pool size"),
+        ("wait_seconds_total", "counter", "Total time spent waiting for a connection"),
+        ("wait_seconds_max", "gauge", "Longest wait for a connection"),
+        ("timeouts_total", "counter", "Connection acquisitions that timed out"),
+        ("discarded_total", "counter", "Broken connections discarded"),
+    ]
+    pools = get_pool_stats()
+    if pools:
+        for key, kind, help_text in pool_metrics:
+            lines += [
+                "",
+                f"# HELP techdengue_db_pool_{key} {help_text}",
+                f"# TYPE techdengue_db_pool_{key} {kind}",
+            ]
+            for name, pool_stats in sorted(pools.items()):
+                lines.append(f'techdengue_db_pool_{key}{{pool="{name}"}} {pool_stats[key]}')
+    
     return PlainTextResponse("\n".join(lines), media_type="text/plain")
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 from loguru import logger
 
-from src.api.utils import read_parquet_cached
+from src.api.query import DatasetQuery
 from src.core.rate_limiter import limiter
 from src.services.weather import get_weather_service, WeatherData, DengueWeatherRisk
 from src.services.risk_analyzer import (
@@ -113,8 +113,12 @@ async def get_municipio_risk(request: Request, codigo_ibge: str) -> Any:
     Combina dados do banco com análise climática em tempo real.
     """
     try:
-        df_municipios = read_parquet_cached("dim_municipios.parquet")
-        municipio = df_municipios[df_municipios["codigo_ibge"].astype(str) == codigo_ibge]
+        municipio = (
+            DatasetQuery("dim_municipios.parquet")
+            .where_equals("codigo_ibge", codigo_ibge)
+            .to_table()
+            .to_pandas()
+        )
 
         if municipio.empty:
             return JSONResponse(status_code=404, content={"error": "municipio_nao_encontrado"})
@@ -26,6 +26,7 @@ class FactsResponse(BaseModel):
     limit: int
     offset: int
     items: List[FactRecord]
+    next_cursor: Optional[str] = None
 
 
 class SummaryItem(BaseModel):
@@ -57,6 +58,7 @@ class GoldAnaliseResponse(BaseModel):
     limit: int
     offset: int
     items: List[GoldAnaliseRecord]
+    next_cursor: Optional[str] = None
 
 
 class PageResponse(BaseModel):
@@ -64,6 +66,7 @@ class PageResponse(BaseModel):
     limit: int
     offset: int
     items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
 
 
 class DatasetsResponse(BaseModel):
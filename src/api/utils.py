@@ -1,32 +1,49 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Tuple
-import os
+from typing import Optional, Sequence, Tuple, Union
 import pandas as pd
-from loguru import logger
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from src.config import Config
 from src.core.cache_manager import ParquetCache
+from src.core.table_index import TableIndex
 
-def read_parquet_cached(filename: str) -> pd.DataFrame:
-    """
-    Reads a Parquet from dados_integrados with a simple mtime-based cache.
-    Normalizes column names to lowercase for internal consistency.
-    """
-    base_path = Config.PATHS.output_dir
-    resource = None
+
+def dataset_resource(filename: str) -> Union[Path, str]:
+    """Resolve o recurso (local, HTTP(s) ou S3) de um dataset de dados_integrados."""
     # HTTP(s) base
     if getattr(Config, "DATASETS_REMOTE_URL", ""):
         base = str(Config.DATASETS_REMOTE_URL).rstrip("/")
-        resource = f"{base}/{filename}"
+        return f"{base}/{filename}"
     # S3 base
-    elif getattr(Config, "DATASETS_S3_URI", ""):
+    if getattr(Config, "DATASETS_S3_URI", ""):
         base = str(Config.DATASETS_S3_URI).rstrip("/")
-        resource = f"{base}/{filename}"
-    else:
-        resource = base_path / filename
-
-    df = ParquetCache.get_parquet(resource)
-    df = df.copy()
-    df.columns = [str(c).strip().lower() for c in df.columns]
-    return df
+        return f"{base}/{filename}"
+    return Config.PATHS.output_dir / filename
+
+
+def read_table_cached(
+    filename: str,
+    columns: Optional[Sequence[str]] = None,
+    filter: Optional[Union[pc.Expression, pa.ChunkedArray, pa.Array]] = None,
+) -> pa.Table:
+    """
+    Retorna a tabela Arrow em cache de dados_integrados (colunas em minúsculas).
+    A tabela é imutável e compartilhada: projeções e filtros não copiam o dataset.
+    """
+    return ParquetCache.get_table(dataset_resource(filename), columns=columns, filter=filter)
+
+
+def read_indexed_cached(filename: str) -> Tuple[pa.Table, TableIndex]:
+    """Retorna a tabela Arrow em cache e seus índices secundários (codigo_ibge, datas)."""
+    return ParquetCache.get_indexed(dataset_resource(filename))
+
+
+def read_parquet_cached(filename: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Reads a Parquet from dados_integrados with a simple mtime-based cache.
+    Column names are normalized to lowercase once, when the file is loaded,
+    and the pandas conversion is cached per load (see ParquetCache.get_parquet).
+    """
+    return ParquetCache.get_parquet(dataset_resource(filename), columns=columns)
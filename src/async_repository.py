@@ -0,0 +1,380 @@
+"""
+Repositório Assíncrono de Dados (Data Access Layer)
+Mesma superfície de consulta do TechDengueRepository sobre asyncpg, com pool
+próprio, para que consultas PostGIS lentas não ocupem threads da API.
+"""
+from typing import List, Optional, Dict, Any, Sequence
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+import asyncio
+import re
+
+import pandas as pd
+from loguru import logger
+
+from .config import Config, DatabaseConfig
+from .database import ConnectionPoolTimeout, DatabaseConnectionError, DatabaseQueryError
+from .repository import (
+    BANCO_TECHDENGUE_ALL_SQL,
+    BANCO_TECHDENGUE_BY_DATE_RANGE_SQL,
+    BANCO_TECHDENGUE_STATS_SQL,
+    PLANILHA_CAMPO_ALL_SQL,
+    PLANILHA_CAMPO_BY_ATIVIDADE_SQL,
+    PLANILHA_CAMPO_STATS_SQL,
+    POIS_POR_CATEGORIA_SQL,
+    ATIVIDADES_AGREGADAS_SQL,
+    EVOLUCAO_TEMPORAL_POIS_SQL,
+    POIS_EM_RAIO_SQL,
+)
+
+# asyncpg é opcional - sem ele a API usa o repositório síncrono em threadpool
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    asyncpg = None
+    ASYNCPG_AVAILABLE = False
+
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+def to_asyncpg_query(query: str) -> str:
+    """Converte placeholders psycopg2 (%s) para os posicionais do asyncpg ($1, $2, ...)"""
+    counter = iter(range(1, query.count("%s") + 1))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", query)
+
+
+def _record_column(values: Sequence[Any], pg_type: str) -> List[Any]:
+    """
+    Converte os valores de uma coluna (registros asyncpg) para os mesmos tipos
+    do repositório síncrono: numeric → float (coerce_float do pandas) e
+    uuid → texto (psycopg2 não registra o tipo UUID)
+    """
+    if pg_type == 'numeric':
+        return [float(v) if isinstance(v, Decimal) else v for v in values]
+    if pg_type == 'uuid':
+        return [str(v) if isinstance(v, UUID) else v for v in values]
+    return list(values)
+
+
+class AsyncDatabaseManager:
+    """
+    Gerenciador assíncrono de conexões com PostgreSQL/PostGIS (asyncpg)
+
+    Features:
+    - Pool próprio (DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE), criado sob demanda
+    - Aquisição com timeout (DB_POOL_ACQUIRE_TIMEOUT)
+    - Conversão automática para pandas
+    """
+
+    def __init__(self, config: Config = Config, db_config: Optional[DatabaseConfig] = None):
+        if not ASYNCPG_AVAILABLE:
+            raise DatabaseConnectionError("asyncpg não instalado (pip install asyncpg)")
+        self.config = config
+        self.db_config: DatabaseConfig = db_config or config.GIS_DB
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        """Retorna pool de conexões (lazy loading)"""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    try:
+                        logger.info(f"Criando pool assíncrono de conexões para {self.db_config.host}")
+                        self._pool = await asyncpg.create_pool(
+                            min_size=self.config.DB_POOL_MIN_SIZE,
+                            max_size=self.config.DB_POOL_MAX_SIZE,
+                            host=self.db_config.host,
+                            port=self.db_config.port,
+                            database=self.db_config.database,
+                            user=self.db_config.username,
+                            password=self.db_config.password,
+                            ssl=self.db_config.ssl_mode,
+                            timeout=self.config.DB_CONNECTION_TIMEOUT,
+                            command_timeout=self.config.DB_QUERY_TIMEOUT,
+                        )
+                        logger.info("✓ Pool assíncrono criado com sucesso")
+                    except Exception as e:
+                        logger.error(f"❌ Erro ao criar pool assíncrono: {e}")
+                        raise DatabaseConnectionError(f"Falha ao conectar ao banco: {e}")
+        return self._pool
+
+    async def query_to_dataframe(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        parse_dates: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Executa query (placeholders %s) e retorna DataFrame pandas
+
+        Args:
+            query: Query SQL
+            params: Parâmetros da query
+            parse_dates: Colunas para parsear como datas
+
+        Returns:
+            DataFrame com resultados
+        """
+        pool = await self._get_pool()
+        try:
+            conn = await pool.acquire(timeout=self.config.DB_POOL_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionPoolTimeout(
+                f"Nenhuma conexão livre no pool após {self.config.DB_POOL_ACQUIRE_TIMEOUT}s"
+            )
+
+        try:
+            stmt = await conn.prepare(to_asyncpg_query(query))
+            rows = await stmt.fetch(*(params or ()))
+            attributes = stmt.get_attributes()
+        except asyncio.TimeoutError:
+            # command_timeout do pool: a query excedeu DB_QUERY_TIMEOUT
+            logger.error(f"❌ Query excedeu {self.config.DB_QUERY_TIMEOUT}s")
+            raise DatabaseQueryError(f"Query excedeu o tempo limite de {self.config.DB_QUERY_TIMEOUT}s")
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar DataFrame: {e}")
+            raise DatabaseQueryError(f"Falha ao executar query: {e}")
+        finally:
+            await pool.release(conn)
+
+        values = list(zip(*rows)) if rows else [()] * len(attributes)
+        df = pd.DataFrame(dict(enumerate(
+            _record_column(col, attr.type.name) for col, attr in zip(values, attributes)
+        )))
+        df.columns = [attr.name for attr in attributes]
+        for col in parse_dates or []:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+        logger.debug(f"Query retornou {len(df):,} linhas")
+        return df
+
+    async def get_table_info(self, table_name: str, schema: str = 'public') -> Dict[str, Any]:
+        """
+        Obtém informações sobre uma tabela
+
+        Args:
+            table_name: Nome da tabela
+            schema: Schema da tabela
+
+        Returns:
+            Dicionário com informações da tabela
+        """
+        columns = await self.query_to_dataframe(
+            """
+            SELECT column_name, data_type, is_nullable, column_default
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+            """,
+            params=(schema, table_name),
+        )
+        count = await self.query_to_dataframe(f"SELECT COUNT(*) AS n FROM {schema}.{table_name}")
+
+        return {
+            'table_name': table_name,
+            'schema': schema,
+            'row_count': int(count['n'].iloc[0]),
+            'columns': columns.to_dict(orient='records'),
+        }
+
+    async def test_connection(self) -> bool:
+        """
+        Testa conexão com banco de dados
+
+        Returns:
+            True se conexão bem-sucedida
+        """
+        try:
+            df = await self.query_to_dataframe("SELECT version() AS version")
+            logger.info(f"✓ Conexão bem-sucedida: {df['version'].iloc[0]}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Falha no teste de conexão: {e}")
+            return False
+
+    async def close(self):
+        """Fecha pool de conexões"""
+        if self._pool is not None:
+            logger.info("Fechando pool assíncrono de conexões...")
+            await self._pool.close()
+            self._pool = None
+            logger.info("✓ Pool assíncrono fechado")
+
+
+class AsyncTechDengueRepository:
+    """
+    Repositório assíncrono para acesso aos dados TechDengue
+
+    Espelha os métodos do TechDengueRepository (mesmas consultas e retornos),
+    como corrotinas sobre o AsyncDatabaseManager
+    """
+
+    def __init__(self, db: Optional[AsyncDatabaseManager] = None):
+        """
+        Inicializa repositório
+
+        Args:
+            db: Instância do AsyncDatabaseManager (cria uma nova se None)
+        """
+        self.db = db or AsyncDatabaseManager()
+        logger.info("AsyncTechDengueRepository inicializado")
+
+    # ========================================================================
+    # BANCO_TECHDENGUE
+    # ========================================================================
+
+    async def get_banco_techdengue_all(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """Retorna todos os registros de banco_techdengue"""
+        query = BANCO_TECHDENGUE_ALL_SQL
+        if limit:
+            query += f" LIMIT {int(limit)}"
+
+        logger.info(f"Buscando registros de banco_techdengue (limit={limit})")
+        return await self.db.query_to_dataframe(query, parse_dates=['data_criacao'])
+
+    async def get_banco_techdengue_by_date_range(
+        self,
+        start_date: datetime,
+        end_date: datetime
+    ) -> pd.DataFrame:
+        """Retorna registros de banco_techdengue por período"""
+        logger.info(f"Buscando registros entre {start_date} e {end_date}")
+        return await self.db.query_to_dataframe(
+            BANCO_TECHDENGUE_BY_DATE_RANGE_SQL,
+            params=(start_date, end_date),
+            parse_dates=['data_criacao']
+        )
+
+    async def get_banco_techdengue_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de banco_techdengue"""
+        logger.info("Calculando estatísticas de banco_techdengue")
+        df = await self.db.query_to_dataframe(
+            BANCO_TECHDENGUE_STATS_SQL,
+            parse_dates=['data_mais_antiga', 'data_mais_recente']
+        )
+
+        if len(df) > 0:
+            return df.iloc[0].to_dict()
+        return {}
+
+    # ========================================================================
+    # PLANILHA_CAMPO (POIs)
+    # ========================================================================
+
+    async def get_planilha_campo_all(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """Retorna todos os registros de planilha_campo (POIs)"""
+        query = PLANILHA_CAMPO_ALL_SQL
+        if limit:
+            query += f" LIMIT {int(limit)}"
+
+        logger.info(f"Buscando POIs de planilha_campo (limit={limit})")
+        return await self.db.query_to_dataframe(query, parse_dates=['created_at', 'updated_at'])
+
+    async def get_planilha_campo_by_atividade(self, id_atividade: str) -> pd.DataFrame:
+        """Retorna POIs de uma atividade específica"""
+        logger.info(f"Buscando POIs da atividade {id_atividade}")
+        return await self.db.query_to_dataframe(
+            PLANILHA_CAMPO_BY_ATIVIDADE_SQL,
+            params=(id_atividade,),
+            parse_dates=['data_upload']
+        )
+
+    async def get_planilha_campo_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de planilha_campo"""
+        logger.info("Calculando estatísticas de planilha_campo")
+        df = await self.db.query_to_dataframe(
+            PLANILHA_CAMPO_STATS_SQL,
+            parse_dates=['data_mais_antiga', 'data_mais_recente']
+        )
+
+        if len(df) > 0:
+            return df.iloc[0].to_dict()
+        return {}
+
+    async def get_pois_por_categoria(self) -> pd.DataFrame:
+        """Retorna contagem de POIs por categoria"""
+        logger.info("Agregando POIs por categoria")
+        return await self.db.query_to_dataframe(POIS_POR_CATEGORIA_SQL)
+
+    # ========================================================================
+    # ANÁLISES AGREGADAS
+    # ========================================================================
+
+    async def get_atividades_agregadas_por_municipio(self) -> pd.DataFrame:
+        """Retorna atividades agregadas por município"""
+        logger.info("Agregando atividades")
+        return await self.db.query_to_dataframe(
+            ATIVIDADES_AGREGADAS_SQL,
+            parse_dates=['data_inicio', 'data_fim']
+        )
+
+    async def get_evolucao_temporal_pois(self, intervalo: str = 'month') -> pd.DataFrame:
+        """Retorna evolução temporal de POIs ('day', 'week', 'month', 'year')"""
+        trunc = intervalo if intervalo in ('day', 'week', 'month', 'year') else 'month'
+
+        logger.info(f"Calculando evolução temporal (intervalo={intervalo})")
+        return await self.db.query_to_dataframe(
+            EVOLUCAO_TEMPORAL_POIS_SQL.format(trunc=trunc),
+            parse_dates=['periodo']
+        )
+
+    # ========================================================================
+    # QUERIES GEOESPACIAIS
+    # ========================================================================
+
+    async def get_pois_em_raio(
+        self,
+        lat: float,
+        lon: float,
+        raio_metros: float = 1000
+    ) -> pd.DataFrame:
+        """Retorna POIs dentro de um raio de um ponto"""
+        logger.info(f"Buscando POIs em raio de {raio_metros}m de ({lat}, {lon})")
+        return await self.db.query_to_dataframe(
+            POIS_EM_RAIO_SQL,
+            params=(lon, lat, lon, lat, raio_metros)
+        )
+
+    # ========================================================================
+    # UTILIDADES
+    # ========================================================================
+
+    async def get_table_info(self, table_name: str) -> Dict[str, Any]:
+        """Retorna informações sobre uma tabela"""
+        return await self.db.get_table_info(table_name)
+
+    async def test_connection(self) -> bool:
+        """Testa conexão com banco"""
+        return await self.db.test_connection()
+
+
+# Instância global (singleton pattern)
+_async_repository_instance: Optional[AsyncTechDengueRepository] = None
+
+
+def get_async_repository() -> AsyncTechDengueRepository:
+    """
+    Retorna instância global do AsyncTechDengueRepository (singleton)
+
+    Returns:
+        Instância do AsyncTechDengueRepository (requer asyncpg)
+    """
+    global _async_repository_instance
+
+    if _async_repository_instance is None:
+        _async_repository_instance = AsyncTechDengueRepository()
+
+    return _async_repository_instance
+
+
+async def close_async_repository() -> None:
+    """Fecha o pool do repositório assíncrono global (shutdown da API)"""
+    global _async_repository_instance
+
+    if _async_repository_instance is not None:
+        await _async_repository_instance.db.close()
+        _async_repository_instance = None
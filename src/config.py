@@ -102,6 +102,23 @@ class Config:
     SYNC_BATCH_SIZE = 1000
     SYNC_MAX_RETRIES = 3
     SYNC_RETRY_DELAY = 5  # segundos
+    SYNC_MAX_WORKERS = int(os.getenv('SYNC_MAX_WORKERS', '4'))  # tabelas sincronizadas em paralelo
+    # Sincronização incremental por watermark (False = sempre baixar a tabela completa)
+    SYNC_INCREMENTAL = os.getenv('SYNC_INCREMENTAL', 'true').strip().lower() in ('1', 'true', 'yes')
+    
+    # Configurações de exportação (linhas por bloco/row group transmitido)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))
+    
+    # Leitura da mega planilha em blocos (linhas por bloco, openpyxl read-only)
+    EXCEL_CHUNK_SIZE = int(os.getenv('EXCEL_CHUNK_SIZE', '20000'))
+    # Processos para etapas do ETL independentes por arquivo (0 = núcleos disponíveis)
+    ETL_MAX_WORKERS = int(os.getenv('ETL_MAX_WORKERS', '0'))
+    # Camada gold: recalcular apenas grupos (codigo_ibge, competencia) alterados
+    GOLD_INCREMENTAL = os.getenv('GOLD_INCREMENTAL', 'true').strip().lower() in ('1', 'true', 'yes')
+    # Carga na tabela fato do Warehouse: "copy" (COPY + merge) ou "values" (execute_values)
+    WAREHOUSE_LOAD_MODE = os.getenv('WAREHOUSE_LOAD_MODE', 'copy').strip().lower()
+    # Snapshot Parquet de cada aba XLSX por hash do conteúdo (cache/excel)
+    EXCEL_CACHE_ENABLED = os.getenv('EXCEL_CACHE_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
     
     # Configurações de validação
     VALIDATION_ENABLED = True
@@ -133,6 +150,12 @@ class Config:
     DB_CONNECTION_TIMEOUT = 30  # segundos
     DB_QUERY_TIMEOUT = 300  # 5 minutos
     
+    # Pool de conexões (compartilhado entre as threads da API)
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+    DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10'))  # segundos
+    DB_POOL_HEALTHCHECK_IDLE = float(os.getenv('DB_POOL_HEALTHCHECK_IDLE', '30'))  # segundos ociosa antes do SELECT 1
+    
     @classmethod
     def validate(cls):
         """Valida configurações"""
@@ -1,21 +1,93 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Union
+from typing import Dict, Tuple, Optional, Union, Sequence
 import time
 import os
 import pandas as pd
-import io
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import httpx
 from loguru import logger
 
 from src.config import Config
+from src.core.table_index import TableIndex
+
+
+def normalize_column_names(table: pa.Table) -> pa.Table:
+    """Renomeia colunas para minúsculas sem espaços nas bordas (sem copiar buffers)."""
+    names = [str(c).strip().lower() for c in table.column_names]
+    if names == table.column_names:
+        return table
+    return table.rename_columns(names).replace_schema_metadata(table.schema.metadata)
 
 
 class ParquetCache:
-    _cache: Dict[str, Tuple[float, pd.DataFrame]] = {}
+    """
+    Cache em memória de datasets Parquet como ``pyarrow.Table`` imutáveis.
+
+    As colunas são normalizadas (minúsculas) uma única vez na carga. Como
+    tabelas Arrow são imutáveis, ``get_table`` devolve a própria tabela em
+    cache (ou projeções/filtros dela) sem cópia defensiva por requisição.
+    Os índices secundários (``TableIndex``) são construídos na mesma carga
+    e guardados na mesma entrada do cache que a tabela: uma única leitura do
+    dicionário devolve o par, mesmo com recargas concorrentes (handlers
+    síncronos do FastAPI rodam em threads).
+    """
+
+    # recurso -> (expiração, tabela, índices, mtime do arquivo local ou None)
+    _cache: Dict[str, Tuple[float, pa.Table, TableIndex, Optional[float]]] = {}
+    # (recurso, colunas) -> (tabela de origem, DataFrame convertido)
+    _frames: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[pa.Table, pd.DataFrame]] = {}
+
+    @classmethod
+    def get_table(
+        cls,
+        resource: Union[Path, str],
+        columns: Optional[Sequence[str]] = None,
+        filter: Optional[Union[pc.Expression, pa.ChunkedArray, pa.Array]] = None,
+    ) -> pa.Table:
+        """
+        Retorna a tabela Arrow em cache para ``resource``.
+
+        Args:
+            resource: Caminho local, URL HTTP(S) ou URI S3 do Parquet
+            columns: Projeção opcional de colunas (zero-copy)
+            filter: Expressão ou máscara booleana opcional aplicada à tabela
+        """
+        table, _ = cls._load(resource)
+        if filter is not None:
+            table = table.filter(filter)
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return table
+
+    @classmethod
+    def get_indexed(cls, resource: Union[Path, str]) -> Tuple[pa.Table, TableIndex]:
+        """Retorna a tabela em cache e seus índices secundários (do mesmo arquivo)."""
+        return cls._load(resource)
+
+    @classmethod
+    def get_parquet(cls, resource: Union[Path, str], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Converte a tabela em cache (ou uma projeção) para DataFrame pandas.
+
+        A conversão é feita uma vez por carga do arquivo: o DataFrame fica
+        guardado junto à tabela de origem e é descartado quando ela é
+        recarregada. Cada chamada recebe uma cópia rasa (copy-on-write), de
+        modo que alterações do chamador não atingem o cache.
+        """
+        table, _ = cls._load(resource)
+        key = (str(resource), None if columns is None else tuple(columns))
+        entry = cls._frames.get(key)
+        if entry is None or entry[0] is not table:
+            projected = table if columns is None else table.select([c for c in columns if c in table.column_names])
+            entry = (table, projected.to_pandas())
+            cls._frames[key] = entry
+        return entry[1].copy(deep=False)
 
     @classmethod
-    def get_parquet(cls, resource: Union[Path, str]) -> pd.DataFrame:
+    def _load(cls, resource: Union[Path, str]) -> Tuple[pa.Table, TableIndex]:
         ttl = int(getattr(Config, "CACHE_TTL_SECONDS", 0) or 0)
         now = time.time()
 
@@ -23,16 +95,23 @@ class ParquetCache:
         entry = cls._cache.get(key)
 
         # Helper to return cached value if valid by TTL (and mtime when available)
-        def _try_cached(version: Optional[float] = None) -> Optional[pd.DataFrame]:
+        def _try_cached(version: Optional[float] = None) -> Optional[Tuple[pa.Table, TableIndex]]:
             if not entry:
                 return None
-            exp, df_cached = entry
-            if (ttl <= 0 or now < exp) and df_cached is not None:
+            exp, table_cached, index_cached, version_cached = entry
+            if ttl <= 0 or now < exp:
                 # If version provided (local file), ensure same mtime
-                if version is None or cls._is_same_file(key, version):
-                    return df_cached.copy()
+                if version is None or version_cached == version:
+                    return table_cached, index_cached
             return None
 
+        def _store(table: pa.Table, version: Optional[float] = None) -> Tuple[pa.Table, TableIndex]:
+            table = normalize_column_names(table)
+            index = TableIndex.build(table)
+            exp_at = now + ttl if ttl > 0 else now + 10**12
+            cls._cache[key] = (exp_at, table, index, version)
+            return table, index
+
         # Local file path handling
         is_http = isinstance(resource, str) and (resource.startswith("http://") or resource.startswith("https://"))
         is_s3 = isinstance(resource, str) and resource.startswith("s3://")
@@ -47,12 +126,9 @@ class ParquetCache:
             if cached is not None:
                 return cached
 
-            df = pd.read_parquet(path)
-            exp_at = now + ttl if ttl > 0 else now + 10**12
-            cls._cache[key] = (exp_at, df)
-            cls._set_mtime(key, mtime)
+            loaded = _store(pq.read_table(path), version=mtime)
             logger.debug(f"Cache atualizado (local) para {path}")
-            return df.copy()
+            return loaded
 
         # Remote over HTTP/HTTPS
         if is_http:
@@ -61,34 +137,21 @@ class ParquetCache:
                 return cached
             resp = httpx.get(str(resource), timeout=30.0)
             resp.raise_for_status()
-            b = io.BytesIO(resp.content)
-            df = pd.read_parquet(b)
-            exp_at = now + ttl if ttl > 0 else now + 10**12
-            cls._cache[key] = (exp_at, df)
+            loaded = _store(pq.read_table(pa.BufferReader(resp.content)))
             logger.debug(f"Cache atualizado (http) para {resource}")
-            return df.copy()
+            return loaded
 
         # Remote over S3 (requires s3fs)
-        if is_s3:
-            cached = _try_cached(version=None)
-            if cached is not None:
-                return cached
-            try:
-                df = pd.read_parquet(str(resource))
-            except Exception as e:
-                raise RuntimeError(f"Falha ao ler parquet S3 '{resource}': {e}")
-            exp_at = now + ttl if ttl > 0 else now + 10**12
-            cls._cache[key] = (exp_at, df)
-            logger.debug(f"Cache atualizado (s3) para {resource}")
-            return df.copy()
-
-    _mtimes: Dict[str, float] = {}
+        cached = _try_cached(version=None)
+        if cached is not None:
+            return cached
+        try:
+            import fsspec
 
-    @classmethod
-    def _is_same_file(cls, key: str, mtime: float) -> bool:
-        prev = cls._mtimes.get(key)
-        return prev == mtime
-
-    @classmethod
-    def _set_mtime(cls, key: str, mtime: float) -> None:
-        cls._mtimes[key] = mtime
+            with fsspec.open(str(resource), "rb") as f:
+                table = pq.read_table(f)
+        except Exception as e:
+            raise RuntimeError(f"Falha ao ler parquet S3 '{resource}': {e}")
+        loaded = _store(table)
+        logger.debug(f"Cache atualizado (s3) para {resource}")
+        return loaded
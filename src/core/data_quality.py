@@ -3,7 +3,9 @@ Validador de Qualidade de Dados - TechDengue
 Garante aderência das informações à realidade do projeto.
 """
 from datetime import date, datetime
-from typing import Any
+from typing import Any, Callable
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel, field_validator, ValidationError
 from loguru import logger
 
@@ -163,10 +165,133 @@ def validate_dengue_historico(data: dict) -> tuple[bool, list[str]]:
         return False, errors
 
 
+# ============================================================
+# MOTOR VETORIZADO
+# ============================================================
+#
+# As regras de cada campo dependem apenas do valor do próprio campo. As máscaras
+# abaixo marcam, por coluna, os valores certamente válidos (conforme o dtype);
+# os demais são avaliados pelo validador Pydantic uma vez por valor distinto,
+# o que preserva exatamente as mensagens de erro do modelo.
+
+def _not_bool_numeric(s: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+
+
+def _str_mask(s: pd.Series, optional: bool = False) -> np.ndarray:
+    if pd.api.types.is_string_dtype(s) and s.dtype != object:
+        return s.notna().to_numpy()
+    if s.dtype == object:
+        return np.fromiter(
+            (type(v) is str or (optional and v is None) for v in s), dtype=bool, count=len(s)
+        )
+    return np.zeros(len(s), dtype=bool)
+
+
+def _int_mask(rule: Callable[[pd.Series], pd.Series]) -> Callable[[pd.Series], np.ndarray]:
+    def mask(s: pd.Series) -> np.ndarray:
+        if pd.api.types.is_integer_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            return rule(s).fillna(False).to_numpy(dtype=bool)
+        if pd.api.types.is_float_dtype(s):
+            whole = np.isfinite(s) & (s % 1 == 0)
+            return (whole & rule(s)).fillna(False).to_numpy(dtype=bool)
+        return np.zeros(len(s), dtype=bool)
+    return mask
+
+
+def _float_mask(rule: Callable[[pd.Series], pd.Series]) -> Callable[[pd.Series], np.ndarray]:
+    def mask(s: pd.Series) -> np.ndarray:
+        if _not_bool_numeric(s):
+            return (s.isna() | rule(s)).fillna(False).to_numpy(dtype=bool)
+        return np.zeros(len(s), dtype=bool)
+    return mask
+
+
+def _data_map_mask(s: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_dtype(s):
+        return (s.notna() & (s >= pd.Timestamp(PROJECT_START_DATE))).to_numpy(dtype=bool)
+    return np.zeros(len(s), dtype=bool)
+
+
+def _warn_unknown_contratantes(s: pd.Series) -> None:
+    """Mesmo aviso do AtividadeValidator, uma vez por contratante desconhecido."""
+    known = {c.upper() for c in VALID_CONTRATANTES}
+    values = s[s.map(lambda v: isinstance(v, str) and bool(v))]
+    if values.empty:
+        # Coluna vazia ou sem textos (ex.: toda NaN, dtype float)
+        return
+    values = values.astype(str)
+    for value, count in values[~values.str.upper().isin(known)].value_counts(sort=False).items():
+        logger.warning(f"Contratante não reconhecido: {value} ({count} registros)")
+
+
+_NONE = object()
+
+
+def _factorize_keeping_none(s: pd.Series) -> tuple[np.ndarray, list[Any]]:
+    """
+    ``pd.factorize`` que mantém None distinto de NaN: o Pydantic gera mensagens
+    diferentes para cada um ("valid integer" x "finite number").
+    """
+    if s.dtype == object:
+        s = s.map(lambda v: _NONE if v is None else v)
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    return codes, [None if v is _NONE else v for v in pd.Series(uniques, dtype=object).tolist()]
+
+
+# Validador, registro-base válido e máscara "certamente válido" por campo
+_QUALITY_MODELS: dict[str, dict[str, Any]] = {
+    "atividade": {
+        "validate": validate_atividade,
+        "model": AtividadeValidator,
+        "baseline": {
+            "codigo_ibge": "3100104",
+            "data_map": PROJECT_START_DATE,
+            "nomenclatura_atividade": "baseline",
+            "pois": 0,
+            "hectares_mapeados": 0.0,
+        },
+        "masks": {
+            "codigo_ibge": _str_mask,
+            "data_map": _data_map_mask,
+            "nomenclatura_atividade": _str_mask,
+            "pois": _int_mask(lambda v: v >= 0),
+            "hectares_mapeados": _float_mask(lambda v: v >= 0),
+            "contratante": lambda s: _str_mask(s, optional=True),
+        },
+    },
+    "dengue": {
+        "validate": validate_dengue_historico,
+        "model": DengueHistoricoValidator,
+        "baseline": {"codigo_ibge": "3100104", "ano": PROJECT_START_DATE.year, "casos": 0},
+        "masks": {
+            "codigo_ibge": _str_mask,
+            "ano": _int_mask(lambda v: (v >= PROJECT_START_DATE.year) & (v <= date.today().year + 1)),
+            "casos": _int_mask(lambda v: v >= 0),
+        },
+    },
+}
+
+
+def _field_errors(spec: dict, field: str, value: Any = None, missing: bool = False) -> list[str]:
+    """Erros do validador Pydantic atribuídos a ``field`` para um valor isolado."""
+    record = dict(spec["baseline"])
+    if missing:
+        record.pop(field, None)
+    else:
+        record[field] = value
+    _, errors = spec["validate"](record)
+    return [e for e in errors if e.split(":")[0].split(".")[0] == field]
+
+
 def run_quality_checks(df, validator_type: str = "atividade") -> dict:
     """
     Executa validações de qualidade em um DataFrame.
     
+    Avalia as regras de negócio por coluna (máscaras vetorizadas); somente os
+    valores distintos não classificados pelas máscaras passam pelo validador
+    Pydantic. O resultado é o mesmo da validação registro a registro.
+    
     Args:
         df: pandas DataFrame
         validator_type: "atividade" ou "dengue"
@@ -174,38 +299,64 @@ def run_quality_checks(df, validator_type: str = "atividade") -> dict:
     Returns:
         dict com estatísticas de validação
     """
-    import pandas as pd
-    
-    validator = validate_atividade if validator_type == "atividade" else validate_dengue_historico
-    
+    spec = _QUALITY_MODELS["atividade" if validator_type == "atividade" else "dengue"]
     total = len(df)
-    valid_count = 0
-    invalid_count = 0
-    all_errors = []
-    
-    for idx, row in df.iterrows():
-        is_valid, errors = validator(row.to_dict())
-        if is_valid:
-            valid_count += 1
-        else:
-            invalid_count += 1
-            all_errors.extend([(idx, e) for e in errors])
-    
-    # Agrupar erros por tipo
-    error_summary = {}
-    for idx, error in all_errors:
-        error_type = error.split(":")[0]
-        if error_type not in error_summary:
-            error_summary[error_type] = 0
-        error_summary[error_type] += 1
-    
+
+    # Por campo: posições com erro e erros por posição (via código do valor distinto)
+    field_errors: list[tuple[str, np.ndarray, np.ndarray, list[list[str]]]] = []
+    invalid = np.zeros(total, dtype=bool)
+    for field, info in spec["model"].model_fields.items():
+        if field not in df.columns:
+            if info.is_required() and total:
+                errors = _field_errors(spec, field, missing=True)
+                field_errors.append((field, np.arange(total), np.zeros(total, dtype=np.intp), [errors]))
+                invalid[:] = True
+            continue
+
+        series = df[field].reset_index(drop=True)
+        if field == "contratante":
+            _warn_unknown_contratantes(series)
+        positions = np.flatnonzero(~spec["masks"][field](series))
+        if len(positions) == 0:
+            continue
+
+        codes, uniques = _factorize_keeping_none(series.iloc[positions])
+        errors = [_field_errors(spec, field, v) for v in uniques]
+        has_error = np.array([bool(e) for e in errors], dtype=bool)[codes]
+        field_errors.append((field, positions[has_error], codes[has_error], errors))
+        invalid[positions[has_error]] = True
+
+    invalid_count = int(invalid.sum())
+    valid_count = total - invalid_count
+
+    # Agrupar erros por tipo (ordem da primeira ocorrência: registro, depois campo)
+    counts: dict[str, int] = {}
+    first_seen: dict[str, tuple[int, int, int]] = {}
+    for order, (field, positions, codes, errors) in enumerate(field_errors):
+        for code in np.unique(codes):
+            rows = positions[codes == code]
+            for k, error in enumerate(errors[code]):
+                error_type = error.split(":")[0]
+                counts[error_type] = counts.get(error_type, 0) + len(rows)
+                first_seen[error_type] = min(first_seen.get(error_type, (total, 0, 0)), (int(rows[0]), order, k))
+    error_summary = {t: counts[t] for t in sorted(counts, key=first_seen.get)}
+
+    # Primeiros 10 erros, na ordem registro → campo
+    first_invalid = np.flatnonzero(invalid)[:10]
+    by_position: dict[int, list[str]] = {int(pos): [] for pos in first_invalid}
+    for field, positions, codes, errors in field_errors:
+        selected = np.isin(positions, first_invalid)
+        for pos, code in zip(positions[selected], codes[selected]):
+            by_position[int(pos)].extend(errors[code])
+    sample_errors = [(df.index[pos], e) for pos in sorted(by_position) for e in by_position[pos]][:10]
+
     return {
         "total_records": total,
         "valid_records": valid_count,
         "invalid_records": invalid_count,
         "validity_rate": round(valid_count / total * 100, 2) if total > 0 else 0,
         "error_summary": error_summary,
-        "sample_errors": all_errors[:10],  # Primeiros 10 erros
+        "sample_errors": sample_errors,  # Primeiros 10 erros
     }
 
 
@@ -0,0 +1,169 @@
+"""
+Esquema de armazenamento dos datasets de ``dados_integrados``.
+
+Cada dataset declara o tipo físico das colunas (comparadas em minúsculas) e a
+ordenação das linhas. Textos repetidos são gravados como dicionário (índices
+int32), datas como date32 e contagens no menor inteiro adequado; as linhas
+são ordenadas por (codigo_ibge, data) e gravadas em row groups com
+estatísticas, o que permite descartar row groups inteiros em filtros por
+município ou período. Colunas não declaradas mantêm o tipo inferido.
+
+``codigo_ibge`` é gravado como dicionário (índices int32 sobre o texto do
+código) e não como ``pa.int32()``: os modelos da API (``codigo_ibge: str``),
+o cubo de resumo (``key`` mistura códigos e nomes) e o registro de grupos
+pendentes da gold tratam o código como texto. O dicionário mantém esse
+contrato com índices int32 em disco e estatísticas por row group.
+
+Lidas com ``pd.read_parquet``, colunas em dicionário viram ``category``:
+agrupamentos sobre elas devem usar ``observed=True`` (no pandas 2 o padrão
+gera o produto cartesiano das categorias).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+PathLike = Union[str, Path]
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+LOAD_TIMESTAMP = pa.timestamp("us")
+# Formato de DATA_CARGA gravado como texto pelos scripts de ETL
+LOAD_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ROW_GROUP_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """Tipos declarados (coluna em minúsculas -> tipo Arrow) e chave de ordenação."""
+
+    columns: Dict[str, pa.DataType] = field(default_factory=dict)
+    sort_by: Tuple[str, ...] = ()
+
+
+_LOAD_COLUMNS = {"data_carga": LOAD_TIMESTAMP, "versao": CATEGORY}
+_REGIONAL_COLUMNS = {
+    "codigo_ibge": CATEGORY,
+    "municipio": CATEGORY,
+    "urs": CATEGORY,
+    "microregiao_saude": CATEGORY,
+    "macroregiao_saude": CATEGORY,
+}
+
+DATASET_SCHEMAS: Dict[str, DatasetSchema] = {
+    "dim_municipios.parquet": DatasetSchema(
+        {**_REGIONAL_COLUMNS, **_LOAD_COLUMNS},
+        sort_by=("codigo_ibge",),
+    ),
+    "fato_atividades_techdengue.parquet": DatasetSchema(
+        {
+            "codigo_ibge": CATEGORY,
+            "municipio": CATEGORY,
+            "data_map": pa.date32(),
+            "nomenclatura_atividade": CATEGORY,
+            "sub_atividade": CATEGORY,
+            "contratante": CATEGORY,
+            **_LOAD_COLUMNS,
+        },
+        sort_by=("codigo_ibge", "data_map"),
+    ),
+    "fato_dengue_historico.parquet": DatasetSchema(
+        {
+            "codigo_ibge": CATEGORY,
+            "municipio": CATEGORY,
+            "ano": pa.int16(),
+            "semana_epidemiologica": pa.int8(),
+            "casos": pa.int32(),
+            **_LOAD_COLUMNS,
+        },
+        sort_by=("codigo_ibge", "ano", "semana_epidemiologica"),
+    ),
+    # Gold: grão município x competência (materialize) ou município (ETL)
+    "analise_integrada.parquet": DatasetSchema(
+        {
+            **_REGIONAL_COLUMNS,
+            "competencia": pa.date32(),
+            "data_primeira_atividade": pa.date32(),
+            "data_ultima_atividade": pa.date32(),
+            "atividades": pa.int32(),
+            **_LOAD_COLUMNS,
+        },
+        sort_by=("codigo_ibge", "competencia"),
+    ),
+    "fato_atividades_summary.parquet": DatasetSchema({"group_by": CATEGORY}),
+}
+
+
+def _cast_column(column: pa.ChunkedArray, target: pa.DataType) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    if pa.types.is_dictionary(target):
+        # A codificação em dicionário é aplicada após a ordenação
+        return column.cast(target.value_type)
+    if pa.types.is_date32(target) and pa.types.is_timestamp(column.type):
+        return pc.cast(column, target, safe=False)
+    if pa.types.is_timestamp(target) and pa.types.is_string(column.type):
+        return pc.strptime(column, format=LOAD_TIMESTAMP_FORMAT, unit=target.unit)
+    if pa.types.is_integer(target) and pa.types.is_floating(column.type):
+        column = pc.if_else(pc.is_nan(column), pa.scalar(None, column.type), column)
+    return column.cast(target)
+
+
+def to_storage_table(df: pd.DataFrame, schema: DatasetSchema) -> pa.Table:
+    """
+    Converte ``df`` para o esquema de armazenamento: tipos declarados,
+    linhas ordenadas por ``schema.sort_by`` (nulos ao final) e textos
+    repetidos codificados em dicionário. Os nomes das colunas são mantidos.
+
+    Raises:
+        pyarrow.ArrowInvalid: Valor incompatível com o tipo declarado
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    declared = {name: schema.columns[name.lower()] for name in table.column_names if name.lower() in schema.columns}
+    for name, target in declared.items():
+        i = table.column_names.index(name)
+        table = table.set_column(i, name, _cast_column(table.column(i), target))
+
+    names = {name.lower(): name for name in table.column_names}
+    keys = [(names[k], "ascending") for k in schema.sort_by if k in names]
+    if keys and table.num_rows:
+        table = table.take(pc.sort_indices(table, sort_keys=keys))
+
+    for name, target in declared.items():
+        if pa.types.is_dictionary(target):
+            i = table.column_names.index(name)
+            table = table.set_column(i, name, pc.dictionary_encode(table.column(i).combine_chunks()).cast(target))
+    return table
+
+
+def write_dataset(
+    df: pd.DataFrame,
+    path: PathLike,
+    metadata: Optional[Mapping[bytes, bytes]] = None,
+) -> pa.Table:
+    """
+    Grava ``df`` em ``path`` com o esquema declarado para o nome do arquivo.
+
+    Args:
+        df: Tabela a gravar
+        path: Destino (o nome do arquivo deve estar em DATASET_SCHEMAS)
+        metadata: Metadados adicionais do esquema Parquet
+
+    Returns:
+        Tabela Arrow gravada
+    """
+    path = Path(path)
+    if path.name not in DATASET_SCHEMAS:
+        raise ValueError(f"Dataset sem esquema declarado: {path.name}")
+    table = to_storage_table(df, DATASET_SCHEMAS[path.name])
+    if metadata:
+        table = table.replace_schema_metadata(dict(metadata))
+    pq.write_table(table, path, row_group_size=ROW_GROUP_SIZE, write_statistics=True)
+    return table
@@ -0,0 +1,154 @@
+"""
+Cache de conversão XLSX → Parquet endereçado por conteúdo.
+
+Cada aba lida é gravada como snapshot Parquet tipado, identificado pelo hash
+SHA-256 do arquivo de origem (mais aba e opções de leitura). Execuções
+seguintes leem a cópia colunar; o parse do Excel só roda quando o arquivo muda.
+Snapshots de versões anteriores do mesmo arquivo/aba são removidos.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from src.config import Config
+
+PathLike = Union[str, Path]
+
+# Hash por (arquivo, mtime, tamanho): evita reler o arquivo inteiro na mesma execução
+_digests: Dict[Tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def _cache_dir() -> Path:
+    return Config.PATHS.cache_dir / "excel"
+
+
+def _slug(value: Any) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(value)).strip("_").lower() or "x"
+
+
+def file_digest(path: PathLike) -> str:
+    """SHA-256 do conteúdo do arquivo (memorizado por mtime/tamanho)."""
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        with _digests_lock:
+            _digests[key] = digest
+    return digest
+
+
+def snapshot_path(path: PathLike, sheet: Union[str, int], kind: str, options: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Caminho do snapshot para (conteúdo do arquivo, aba, tipo de leitura, opções).
+    ``kind`` separa leituras completas (``frame``) de leituras em blocos (``chunks``).
+    """
+    opts = json.dumps(options or {}, sort_keys=True, default=str)
+    opts_hash = hashlib.sha1(opts.encode("utf-8")).hexdigest()[:8]
+    name = f"{_slug(Path(path).stem)}__{_slug(sheet)}__{kind}__{file_digest(path)[:24]}_{opts_hash}"
+    return _cache_dir() / name
+
+
+def _tmp_path(target: Path) -> Path:
+    """Arquivo temporário exclusivo do processo/thread (leituras concorrentes da mesma aba)."""
+    return target.with_name(f"{target.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def _prune_versions(snapshot: Path) -> None:
+    """Remove snapshots do mesmo arquivo/aba/tipo gerados a partir de outro conteúdo."""
+    prefix = snapshot.name.rsplit("__", 1)[0] + "__"
+    for old in snapshot.parent.glob(prefix + "*"):
+        if old.name == snapshot.name or old.name.endswith(".tmp"):
+            continue
+        if old.is_dir():
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            old.unlink(missing_ok=True)
+        logger.debug(f"Snapshot Excel antigo removido: {old.name}")
+
+
+def read_excel_cached(path: PathLike, sheet_name: Union[str, int] = 0, **kwargs: Any) -> pd.DataFrame:
+    """
+    Equivalente a ``pd.read_excel(path, sheet_name=..., **kwargs)`` com snapshot Parquet.
+
+    Abas cujas colunas não são representáveis em Parquet (tipos mistos) são
+    lidas normalmente, sem snapshot.
+    """
+    if not Config.EXCEL_CACHE_ENABLED:
+        return pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+
+    snapshot = snapshot_path(path, sheet_name, "frame", kwargs).with_suffix(".parquet")
+    if snapshot.exists():
+        logger.debug(f"Snapshot Excel: {snapshot.name}")
+        return pd.read_parquet(snapshot)
+
+    df = pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(snapshot)
+    try:
+        df.to_parquet(tmp)
+        os.replace(tmp, snapshot)
+        _prune_versions(snapshot)
+        logger.info(f"Snapshot Parquet criado para {Path(path).name} [{sheet_name}]")
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        tmp.unlink(missing_ok=True)
+        logger.warning(f"Aba {sheet_name} de {Path(path).name} sem snapshot Parquet: {e}")
+    return df
+
+
+def iter_snapshot_chunks(snapshot: Path) -> Iterator[pd.DataFrame]:
+    """Lê os blocos de um snapshot em blocos, na ordem em que foram gravados."""
+    for part in sorted(snapshot.glob("part-*.parquet")):
+        yield pq.read_table(part).to_pandas()
+
+
+def write_through_chunks(snapshot: Path, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Repassa os blocos ao consumidor gravando cada um como parte do snapshot.
+    O snapshot só é publicado se todos os blocos forem consumidos e gravados.
+    """
+    tmp = _tmp_path(snapshot)
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    writable = True
+    complete = False
+    try:
+        for i, chunk in enumerate(chunks):
+            if writable:
+                try:
+                    pq.write_table(pa.Table.from_pandas(chunk, preserve_index=False), tmp / f"part-{i:05d}.parquet")
+                except (pa.ArrowException, TypeError, ValueError) as e:
+                    writable = False
+                    logger.warning(f"Snapshot {snapshot.name} descartado: {e}")
+            yield chunk
+        complete = writable
+    finally:
+        if complete:
+            shutil.rmtree(snapshot, ignore_errors=True)
+            try:
+                os.replace(tmp, snapshot)
+            except OSError:
+                # Outro leitor publicou o mesmo snapshot primeiro
+                shutil.rmtree(tmp, ignore_errors=True)
+            else:
+                _prune_versions(snapshot)
+                logger.info(f"Snapshot Parquet em blocos criado: {snapshot.name}")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,68 @@
+"""
+Rastreabilidade de dados (Data Lineage) das tabelas geradas pelo ETL.
+
+Cada tabela registra entradas, transformação, contagem de linhas e hash MD5 do
+conteúdo. O hash das entradas usadas (``input_hashes``) permite ao TaskGraph
+pular tabelas cujas entradas não mudaram.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class DataLineage:
+    """Rastreabilidade de dados (Data Lineage)"""
+
+    def __init__(self, lineage_file: Path, version: str = "1.0.0"):
+        self.lineage_file = Path(lineage_file)
+        self.version = version
+        self._lock = threading.Lock()
+        self.lineage = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.lineage_file.exists():
+            with open(self.lineage_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save(self):
+        self.lineage_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.lineage_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.lineage, f, indent=2, default=str)
+        os.replace(tmp, self.lineage_file)
+
+    def register_transformation(
+        self,
+        output_table: str,
+        input_tables: list,
+        transformation: str,
+        row_count: int,
+        hash_md5: str,
+        input_hashes: Optional[Dict[str, str]] = None,
+    ):
+        """Registra transformação de dados"""
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'input_tables': input_tables,
+            'transformation': transformation,
+            'row_count': row_count,
+            'hash_md5': hash_md5,
+            'version': self.version,
+        }
+        if input_hashes is not None:
+            entry['input_hashes'] = input_hashes
+        with self._lock:
+            self.lineage[output_table] = entry
+            self._save()
+
+    def get_lineage(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Retorna lineage de uma tabela"""
+        with self._lock:
+            return self.lineage.get(table_name)
@@ -0,0 +1,121 @@
+"""
+Resolução de nomes de município para código IBGE.
+
+O índice (nome normalizado → código IBGE) é construído uma vez a partir da aba
+IBGE da planilha de atividades (ou de ``dim_municipios.parquet``) e persistido
+em ``cache/municipios``, identificado pelo hash do arquivo de origem. A
+resolução é feita por coluna: os nomes são fatorados, apenas os valores
+distintos são normalizados e o código é obtido por ``Index.get_indexer``.
+"""
+
+from __future__ import annotations
+
+import os
+import unicodedata
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.config import Config
+from src.core.excel_cache import _slug, _tmp_path, file_digest, read_excel_cached
+
+PathLike = Union[str, Path]
+
+IBGE_SHEET = "IBGE"
+IBGE_NOME_COLUMN = "Nome_Município"
+IBGE_CODIGO_COLUMN = "Código Município Completo"
+
+
+def normalizar_nome(nome) -> str:
+    """Remove acentos, converte para maiúsculas e remove espaços das bordas."""
+    if pd.isna(nome):
+        return ""
+    texto = unicodedata.normalize("NFKD", str(nome))
+    texto = texto.encode("ascii", errors="ignore").decode("ascii")
+    return texto.upper().strip()
+
+
+def normalizar_nomes(nomes: pd.Series) -> pd.Series:
+    """Versão vetorizada de ``normalizar_nome``: normaliza só os valores distintos."""
+    codes, uniques = pd.factorize(nomes, use_na_sentinel=False)
+    distintos = pd.Series(uniques, dtype=object)
+    normalizados = (
+        distintos.where(distintos.notna(), "").astype(str)
+        .str.normalize("NFKD").str.encode("ascii", errors="ignore").str.decode("ascii")
+        .str.upper().str.strip()
+        .to_numpy(dtype=object)
+    )
+    return pd.Series(normalizados[codes] if len(codes) else [], index=nomes.index, dtype=object)
+
+
+class MunicipioResolver:
+    """Índice hash nome normalizado → código IBGE (texto)."""
+
+    def __init__(self, index: pd.Series):
+        # Nomes repetidos: prevalece a última ocorrência (mesma regra de dict(zip(...)))
+        index = index[~index.index.duplicated(keep="last")]
+        self._nomes = pd.Index(index.index, dtype=object)
+        self._codigos = index.to_numpy(dtype=object)
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, nome_col: str, codigo_col: str) -> "MunicipioResolver":
+        nomes = normalizar_nomes(df[nome_col])
+        return cls(pd.Series(df[codigo_col].astype(str).to_numpy(), index=nomes.to_numpy()))
+
+    @classmethod
+    def carregar(
+        cls,
+        path: PathLike,
+        nome_col: str = IBGE_NOME_COLUMN,
+        codigo_col: str = IBGE_CODIGO_COLUMN,
+        sheet_name: str = IBGE_SHEET,
+    ) -> "MunicipioResolver":
+        """
+        Carrega o índice de ``path`` (XLSX: aba ``sheet_name``; Parquet: tabela
+        inteira), reaproveitando o índice persistido enquanto o arquivo não mudar.
+        """
+        path = Path(path)
+        cached = (
+            Config.PATHS.cache_dir / "municipios"
+            / f"{_slug(path.stem)}__{_slug(nome_col)}__{file_digest(path)[:24]}.parquet"
+        )
+        if cached.exists():
+            index = pd.read_parquet(cached)
+            return cls(pd.Series(index["codigo_ibge"].to_numpy(dtype=object), index=index["nome"].to_numpy(dtype=object)))
+
+        if path.suffix == ".parquet":
+            df = pd.read_parquet(path, columns=[nome_col, codigo_col])
+        else:
+            df = read_excel_cached(path, sheet_name=sheet_name)
+        resolver = cls.from_frame(df, nome_col, codigo_col)
+
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        for old in cached.parent.glob(cached.name.rsplit("__", 1)[0] + "__*.parquet"):
+            old.unlink(missing_ok=True)
+        tmp = _tmp_path(cached)
+        pd.DataFrame({"nome": resolver._nomes, "codigo_ibge": resolver._codigos}).to_parquet(tmp, index=False)
+        os.replace(tmp, cached)
+        logger.info(f"Índice de municípios criado a partir de {path.name}: {len(resolver)} nomes")
+        return resolver
+
+    def _positions(self, nomes: pd.Series):
+        codes, uniques = pd.factorize(nomes, use_na_sentinel=False)
+        normalizados = normalizar_nomes(pd.Series(uniques, dtype=object))
+        return codes, uniques, self._nomes.get_indexer(normalizados)
+
+    def resolve(self, nomes: pd.Series) -> pd.Series:
+        """Código IBGE de cada nome (NaN quando não encontrado), alinhado ao índice de ``nomes``."""
+        codes, _, found = self._positions(nomes)
+        codigos = np.append(self._codigos, np.nan)[found] if len(found) else np.empty(0, dtype=object)
+        return pd.Series(codigos[codes] if len(codes) else [], index=nomes.index, dtype=object)
+
+    def unmatched(self, nomes: pd.Series) -> List:
+        """Nomes distintos (originais) sem código IBGE, na ordem de ocorrência."""
+        _, uniques, found = self._positions(nomes)
+        return [nome for nome, pos in zip(uniques, found) if pos < 0]
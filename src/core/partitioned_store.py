@@ -0,0 +1,204 @@
+"""
+Armazenamento Parquet particionado no layout Hive (``year=AAAA/month=MM``).
+Cada partição é um arquivo independente: a sincronização incremental reescreve
+apenas as partições tocadas e os leitores podem podar partições por filtro.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from loguru import logger
+
+PARTITION_SCHEMA = pa.schema([("year", pa.int16()), ("month", pa.int8())])
+PARTITION_COLUMNS = tuple(PARTITION_SCHEMA.names)
+PART_FILE = "part-0.parquet"
+
+# Linhas sem data vão para ``year=0/month=00`` (partições nulas do Hive quebram
+# leitores que usam pd.read_parquet no diretório)
+_UNDATED_ID = 0
+
+
+def partition_name(partition_id: int) -> str:
+    """Caminho relativo da partição (``year=2024/month=03``) para um id ``AAAAMM``."""
+    return f"year={partition_id // 100}/month={partition_id % 100:02d}"
+
+
+def table_hash(table: pa.Table) -> str:
+    """Hash MD5 das linhas (mesma regra do DataSynchronizer._calculate_hash)."""
+    return hashlib.md5(pd.util.hash_pandas_object(table.to_pandas(), index=False).values.tobytes()).hexdigest()
+
+
+def combined_hash(partitions: Dict[str, Dict[str, Any]]) -> str:
+    """Hash do dataset a partir dos hashes das partições (ordem estável)."""
+    md5 = hashlib.md5()
+    for name in sorted(partitions):
+        md5.update(f"{name}:{partitions[name]['hash_md5']};".encode("utf-8"))
+    return md5.hexdigest()
+
+
+class PartitionedParquetStore:
+    """
+    Dataset Parquet particionado por ano/mês de uma coluna de data.
+
+    Uso:
+        store = PartitionedParquetStore(cache_dir / "planilha_campo.parquet", "created_at")
+        partitions = store.write(batches)
+        table = store.dataset().to_table(filter=(ds.field("year") == 2024))
+    """
+
+    def __init__(self, root: Path, partition_column: str):
+        self.root = Path(root)
+        self.partition_column = partition_column
+        self.partitioning = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+    def exists(self) -> bool:
+        return self.root.is_dir()
+
+    def dataset(self) -> ds.Dataset:
+        """Dataset Arrow com as colunas de partição ``year`` e ``month``."""
+        return ds.dataset(self.root, format="parquet", partitioning=self.partitioning)
+
+    def _partition_ids(self, data) -> np.ndarray:
+        column = data.column(self.partition_column)
+        ids = pc.add(pc.multiply(pc.year(column), 100), pc.month(column))
+        return pc.fill_null(ids, _UNDATED_ID).to_numpy(zero_copy_only=False)
+
+    def _split(self, data) -> Iterator[Tuple[str, Any]]:
+        """Divide uma tabela/lote em (partição, linhas da partição)."""
+        ids = self._partition_ids(data)
+        for partition_id in np.unique(ids):
+            mask = pa.array(ids == partition_id)
+            yield partition_name(int(partition_id)), data.filter(mask)
+
+    def _write_partition(self, root: Path, name: str, table: pa.Table) -> Dict[str, Any]:
+        path = root / name / PART_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        return {"rows": table.num_rows, "hash_md5": table_hash(table)}
+
+    def write(self, batches: Iterable[pa.RecordBatch]) -> Dict[str, Dict[str, Any]]:
+        """
+        Regrava o dataset inteiro a partir de lotes (um writer por partição).
+        O novo dataset é montado em diretório temporário e substitui o atual ao final.
+
+        Returns:
+            Informações por partição: {"year=2024/month=03": {"rows", "hash_md5"}}
+        """
+        tmp_root = self.root.with_name(self.root.name + ".tmp")
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+        writers: Dict[str, pq.ParquetWriter] = {}
+        hashes: Dict[str, Any] = {}
+        rows: Dict[str, int] = {}
+        schema: Optional[pa.Schema] = None
+        try:
+            for batch in batches:
+                schema = batch.schema
+                for name, part in self._split(batch):
+                    if name not in writers:
+                        (tmp_root / name).mkdir(parents=True, exist_ok=True)
+                        writers[name] = pq.ParquetWriter(tmp_root / name / PART_FILE, schema)
+                        hashes[name] = hashlib.md5()
+                        rows[name] = 0
+                    writers[name].write_batch(part)
+                    rows[name] += part.num_rows
+                    hashes[name].update(
+                        pd.util.hash_pandas_object(part.to_pandas(), index=False).values.tobytes()
+                    )
+            if schema is None:
+                raise ValueError(f"Nenhum lote recebido para {self.root.name}")
+            if not writers:
+                # Sem linhas: partição vazia preserva o schema do dataset
+                name = partition_name(_UNDATED_ID)
+                (tmp_root / name).mkdir(parents=True, exist_ok=True)
+                writers[name] = pq.ParquetWriter(tmp_root / name / PART_FILE, schema)
+                hashes[name] = hashlib.md5()
+                rows[name] = 0
+        except Exception:
+            for writer in writers.values():
+                writer.close()
+            shutil.rmtree(tmp_root, ignore_errors=True)
+            raise
+
+        for writer in writers.values():
+            writer.close()
+        self._swap(tmp_root)
+        logger.info(f"✓ Dataset particionado salvo: {self.root} ({len(writers)} partições)")
+        return {name: {"rows": rows[name], "hash_md5": hashes[name].hexdigest()} for name in writers}
+
+    def _swap(self, tmp_root: Path) -> None:
+        old_root = self.root.with_name(self.root.name + ".old")
+        shutil.rmtree(old_root, ignore_errors=True)
+        if self.root.is_dir():
+            os.replace(self.root, old_root)
+        elif self.root.exists():
+            # Layout anterior (arquivo único): migrado na primeira gravação
+            self.root.unlink()
+        os.replace(tmp_root, self.root)
+        shutil.rmtree(old_root, ignore_errors=True)
+
+    def merge(
+        self,
+        upserts: pa.Table,
+        changed_keys: pa.Array,
+        key: str,
+        order_by: str,
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Aplica alterações reescrevendo somente as partições afetadas.
+
+        Args:
+            upserts: Linhas novas/alteradas (schema do dataset)
+            changed_keys: Chaves de todas as linhas alteradas ou excluídas
+            key: Coluna de chave primária
+            order_by: Coluna de ordenação (decrescente) dentro da partição
+
+        Returns:
+            Tupla (informações das partições reescritas, partições removidas)
+        """
+        incoming = dict(self._split(upserts)) if upserts.num_rows else {}
+
+        # Partições onde as chaves alteradas estão hoje
+        located = self.dataset().to_table(
+            columns=[key, *PARTITION_COLUMNS],
+            filter=pc.field(key).isin(changed_keys),
+        )
+        touched = set(incoming)
+        for year, month in zip(located.column("year").to_pylist(), located.column("month").to_pylist()):
+            touched.add(partition_name(year * 100 + month))
+
+        written: Dict[str, Dict[str, Any]] = {}
+        removed: List[str] = []
+        for name in sorted(touched):
+            path = self.root / name / PART_FILE
+            parts = []
+            schema = upserts.schema
+            if path.exists():
+                current = pq.read_table(path)
+                schema = current.schema
+                parts.append(current.filter(pc.invert(pc.is_in(current.column(key), value_set=changed_keys))))
+            if name in incoming:
+                parts.append(incoming[name].cast(schema))
+            merged = pa.concat_tables(parts).sort_by([(order_by, "descending")])
+
+            if merged.num_rows == 0:
+                shutil.rmtree(path.parent, ignore_errors=True)
+                removed.append(name)
+                continue
+            written[name] = self._write_partition(self.root, name, merged)
+
+        logger.info(f"✓ {len(written)} partições reescritas, {len(removed)} removidas em {self.root.name}")
+        return written, removed
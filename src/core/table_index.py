@@ -0,0 +1,161 @@
+"""
+Índices secundários para tabelas Arrow em memória.
+Construídos uma vez na carga do Parquet pelo ParquetCache e descartados
+junto com a tabela quando o arquivo muda.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from loguru import logger
+
+# Colunas indexadas por igualdade (hash) e por intervalo (ordenado)
+HASH_INDEX_COLUMNS = ("codigo_ibge", "codmun")
+RANGE_INDEX_COLUMNS = ("data_map", "competencia")
+
+# Totais de filtros memorizados por tabela carregada (os mais recentes)
+COUNT_CACHE_SIZE = 256
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _days(value: date) -> int:
+    return (value - _EPOCH).days
+
+
+class HashIndex:
+    """Mapeia cada valor da coluna (como texto) para as posições das linhas."""
+
+    def __init__(self, column: pa.ChunkedArray):
+        self.positions: Dict[str, np.ndarray] = {}
+        encoded = pc.dictionary_encode(column.combine_chunks())
+        codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False)
+        valid = np.flatnonzero(codes >= 0)
+        order = valid[np.argsort(codes[valid], kind="stable")]
+        counts = np.bincount(codes[valid], minlength=len(encoded.dictionary))
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        for i, key in enumerate(encoded.dictionary.to_pylist()):
+            self.positions[str(key).strip()] = order[bounds[i]:bounds[i + 1]]
+
+    def lookup(self, value) -> np.ndarray:
+        return self.positions.get(str(value).strip(), np.empty(0, dtype=np.int64))
+
+
+class RangeIndex:
+    """Datas ordenadas (em dias desde 1970) com as posições correspondentes."""
+
+    def __init__(self, column: pa.ChunkedArray):
+        if not pa.types.is_date32(column.type):
+            column = column.cast(pa.date32())
+        order = pc.sort_indices(column)
+        valid = len(column) - column.null_count
+        self.order = order.to_numpy()[:valid]
+        self.days = column.take(self.order).cast(pa.int32()).to_numpy()
+
+    def lookup(self, start: Optional[date], end: Optional[date]) -> np.ndarray:
+        lo = 0 if start is None else int(np.searchsorted(self.days, _days(start), side="left"))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, _days(end), side="right"))
+        return self.order[lo:hi]
+
+
+class TableIndex:
+    """
+    Conjunto de índices secundários de uma tabela.
+
+    Pontuais (``codigo_ibge``) são O(1) e por intervalo (``data_map``,
+    ``competencia``) O(log n); ambos retornam posições de linhas.
+    """
+
+    def __init__(self, hash_indexes: Dict[str, HashIndex], range_indexes: Dict[str, RangeIndex]):
+        self.hash_indexes = hash_indexes
+        self.range_indexes = range_indexes
+        self._key_orders: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._key_ranks: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._counts: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._counts_lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        table: pa.Table,
+        hash_columns: Iterable[str] = HASH_INDEX_COLUMNS,
+        range_columns: Iterable[str] = RANGE_INDEX_COLUMNS,
+    ) -> "TableIndex":
+        hash_indexes: Dict[str, HashIndex] = {}
+        range_indexes: Dict[str, RangeIndex] = {}
+        for col in hash_columns:
+            if col in table.column_names:
+                hash_indexes[col] = HashIndex(table.column(col))
+        for col in range_columns:
+            if col in table.column_names:
+                try:
+                    range_indexes[col] = RangeIndex(table.column(col))
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    logger.debug(f"Índice de intervalo ignorado para {col}: {e}")
+        return cls(hash_indexes, range_indexes)
+
+    def has_hash(self, column: str) -> bool:
+        return column in self.hash_indexes
+
+    def has_range(self, column: str) -> bool:
+        return column in self.range_indexes
+
+    def lookup(self, column: str, value) -> np.ndarray:
+        """Posições das linhas com ``column == value``."""
+        return self.hash_indexes[column].lookup(value)
+
+    def lookup_range(self, column: str, start: Optional[date], end: Optional[date]) -> np.ndarray:
+        """Posições das linhas com ``start <= column <= end``."""
+        return self.range_indexes[column].lookup(start, end)
+
+    def key_order(self, table: pa.Table, columns: Sequence[str]) -> np.ndarray:
+        """Posições das linhas ordenadas pela chave composta (calculada uma vez por carga)."""
+        key = tuple(columns)
+        order = self._key_orders.get(key)
+        if order is None:
+            order = pc.sort_indices(table, sort_keys=[(c, "ascending") for c in key]).to_numpy()
+            self._key_orders[key] = order
+        return order
+
+    def key_rank(self, table: pa.Table, columns: Sequence[str]) -> np.ndarray:
+        """Posição de cada linha na ordem da chave composta (inversa de ``key_order``)."""
+        key = tuple(columns)
+        rank = self._key_ranks.get(key)
+        if rank is None:
+            order = self.key_order(table, key)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order), dtype=order.dtype)
+            self._key_ranks[key] = rank
+        return rank
+
+    def count(self, key: Hashable, compute: Callable[[], int]) -> int:
+        """Total de linhas de um filtro, memorizado enquanto a tabela estiver carregada."""
+        with self._counts_lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        value = compute()
+        with self._counts_lock:
+            self._counts[key] = value
+            while len(self._counts) > COUNT_CACHE_SIZE:
+                self._counts.popitem(last=False)
+        return value
+
+
+def intersect_positions(current: Optional[np.ndarray], positions: np.ndarray) -> np.ndarray:
+    """Interseção de conjuntos de posições (None representa todas as linhas)."""
+    if current is None:
+        return positions
+    return np.intersect1d(current, positions, assume_unique=True)
+
+
+def take_positions(table: pa.Table, positions: np.ndarray) -> pa.Table:
+    """Seleciona as linhas nas posições informadas, preservando a ordem original."""
+    return table.take(pa.array(np.sort(positions), type=pa.int64()))
@@ -0,0 +1,236 @@
+"""
+Grafo de tarefas do ETL.
+
+Cada tarefa produz uma tabela e declara suas entradas: outras tarefas do grafo
+e fontes externas (arquivos, tabelas do servidor) identificadas por um
+fingerprint. Tarefas independentes rodam em paralelo (threads); uma tarefa é
+pulada quando os hashes de suas entradas coincidem com os registrados no
+DataLineage da última execução e a saída ainda existe.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from src.core.excel_cache import file_digest
+from src.core.lineage import DataLineage
+
+Fingerprint = Callable[[], Optional[str]]
+
+# Situação de cada tarefa ao final de TaskGraph.run
+EXECUTED = "executed"
+SKIPPED = "skipped"
+ERROR = "error"
+BLOCKED = "blocked"
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Hash MD5 do conteúdo do DataFrame (mesmo critério do DataLineage)."""
+    return hashlib.md5(pd.util.hash_pandas_object(df).values).hexdigest()
+
+
+def file_source(path: Path) -> Fingerprint:
+    """Fingerprint de arquivo de origem: SHA-256 do conteúdo (None se ausente)."""
+    path = Path(path)
+    return lambda: file_digest(path) if path.exists() else None
+
+
+@dataclass
+class Task:
+    """
+    Tabela produzida pelo ETL.
+
+    ``run`` recebe os DataFrames das tarefas em ``inputs`` (por nome) e retorna
+    a tabela produzida; a gravação de ``output`` é feita pela própria função.
+    Sem ``output`` a tarefa nunca é pulada (não há de onde recarregar a tabela).
+    Com ``load_inputs=False`` a tarefa recebe os caminhos de saída das entradas
+    em vez dos DataFrames, para lê-las em partições.
+    """
+
+    name: str
+    run: Callable[[Dict[str, pd.DataFrame]], pd.DataFrame]
+    inputs: Tuple[str, ...] = ()
+    sources: Dict[str, Fingerprint] = field(default_factory=dict)
+    output: Optional[Path] = None
+    transformation: str = ""
+    load_inputs: bool = True
+
+
+class TaskGraph:
+    """Executa tarefas na ordem das dependências, em paralelo quando possível."""
+
+    def __init__(self, lineage: DataLineage, max_workers: Optional[int] = None):
+        self.lineage = lineage
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Task] = {}
+
+    def add(
+        self,
+        name: str,
+        run: Callable[[Dict[str, pd.DataFrame]], pd.DataFrame],
+        inputs: Iterable[str] = (),
+        sources: Optional[Dict[str, Fingerprint]] = None,
+        output: Optional[Path] = None,
+        transformation: str = "",
+        load_inputs: bool = True,
+    ) -> Task:
+        """
+        Declara uma tarefa. As entradas precisam ter sido declaradas antes,
+        o que garante um grafo sem ciclos.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Tarefa duplicada: {name}")
+        inputs = tuple(inputs)
+        unknown = [i for i in inputs if i not in self.tasks]
+        if unknown:
+            raise ValueError(f"Tarefa {name}: entradas não declaradas {unknown}")
+        if not load_inputs and any(self.tasks[i].output is None for i in inputs):
+            raise ValueError(f"Tarefa {name}: entradas sem saída gravada não podem ser lidas do disco")
+        task = Task(name, run, inputs, dict(sources or {}), output, transformation or name, load_inputs)
+        self.tasks[name] = task
+        return task
+
+    def _closure(self, targets: Optional[Iterable[str]]) -> List[str]:
+        if targets is None:
+            return list(self.tasks)
+        unknown = [t for t in targets if t not in self.tasks]
+        if unknown:
+            raise ValueError(f"Tarefas desconhecidas: {unknown}")
+        selected = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.tasks[name].inputs)
+        return [name for name in self.tasks if name in selected]
+
+    def _input_hashes(self, task: Task, hashes: Dict[str, str]) -> Dict[str, Optional[str]]:
+        current: Dict[str, Optional[str]] = {name: hashes.get(name) for name in task.inputs}
+        for name, fingerprint in task.sources.items():
+            try:
+                current[name] = fingerprint()
+            except Exception as e:
+                logger.warning(f"{task.name}: fingerprint de {name} indisponível ({e})")
+                current[name] = None
+        return current
+
+    def _is_fresh(self, task: Task, input_hashes: Dict[str, Optional[str]]) -> bool:
+        entry = self.lineage.get_lineage(task.name)
+        return (
+            entry is not None
+            and task.output is not None
+            and task.output.exists()
+            and None not in input_hashes.values()
+            and entry.get('version') == self.lineage.version
+            and entry.get('input_hashes') == input_hashes
+        )
+
+    def run(self, force: bool = False, targets: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Executa o grafo (ou apenas ``targets`` e suas dependências).
+
+        Args:
+            force: Executa todas as tarefas, mesmo com entradas inalteradas
+            targets: Tarefas desejadas (default: todas)
+
+        Returns:
+            Dicionário tarefa -> executed | skipped | error | blocked
+        """
+        selected = self._closure(targets)
+        pending = list(selected)
+        status: Dict[str, str] = {}
+        hashes: Dict[str, str] = {}
+        frames: Dict[str, pd.DataFrame] = {}
+        frames_lock = threading.Lock()
+        # Tarefas que recebem o DataFrame de cada tabela (as demais leem do disco)
+        consumers = {
+            name: sum(name in self.tasks[p].inputs for p in pending if self.tasks[p].load_inputs)
+            for name in pending
+        }
+
+        def load(name: str) -> pd.DataFrame:
+            # Tabelas puladas são lidas da saída apenas se alguma dependente rodar
+            with frames_lock:
+                if name not in frames:
+                    frames[name] = pd.read_parquet(self.tasks[name].output)
+                return frames[name]
+
+        def release(task: Task) -> None:
+            if not task.load_inputs:
+                return
+            for name in task.inputs:
+                consumers[name] -= 1
+                if consumers[name] == 0:
+                    with frames_lock:
+                        frames.pop(name, None)
+
+        running: Dict = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name in list(pending):
+                        task = self.tasks[name]
+                        if not all(i in status for i in task.inputs):
+                            continue
+                        pending.remove(name)
+                        progressed = True
+
+                        if any(status[i] in (ERROR, BLOCKED) for i in task.inputs):
+                            status[name] = BLOCKED
+                            logger.warning(f"{name}: não executada (dependência falhou)")
+                            continue
+
+                        input_hashes = self._input_hashes(task, hashes)
+                        if not force and self._is_fresh(task, input_hashes):
+                            status[name] = SKIPPED
+                            hashes[name] = self.lineage.get_lineage(name)['hash_md5']
+                            release(task)
+                            logger.info(f"{name}: entradas inalteradas, reaproveitada")
+                            continue
+
+                        def execute(task=task):
+                            if not task.load_inputs:
+                                return task.run({i: self.tasks[i].output for i in task.inputs})
+                            return task.run({i: load(i) for i in task.inputs})
+
+                        running[pool.submit(execute)] = (name, input_hashes)
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, input_hashes = running.pop(future)
+                    task = self.tasks[name]
+                    try:
+                        df = future.result()
+                        hashes[name] = frame_hash(df)
+                        self.lineage.register_transformation(
+                            name,
+                            list(task.inputs) + list(task.sources),
+                            task.transformation,
+                            len(df),
+                            hashes[name],
+                            input_hashes=input_hashes,
+                        )
+                        if consumers[name]:
+                            with frames_lock:
+                                frames[name] = df
+                        status[name] = EXECUTED
+                        logger.info(f"{name}: {len(df):,} registros")
+                    except Exception as e:
+                        status[name] = ERROR
+                        logger.error(f"{name}: falha na execução: {e}")
+                    release(task)
+
+        return {name: status[name] for name in selected}
@@ -2,14 +2,18 @@
 Gerenciador de Conexão com Banco de Dados
 Implementação profissional com pool de conexões, retry logic e logging
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence
 from contextlib import contextmanager
+from decimal import Decimal
+import threading
 import time
+import uuid
 
 import psycopg2
 from psycopg2 import pool, extras
 from psycopg2.extensions import connection as Connection
 import pandas as pd
+import pyarrow as pa
 
 from .config import Config, DatabaseConfig
 from loguru import logger
@@ -25,12 +29,156 @@ class DatabaseQueryError(Exception):
     pass
 
 
+# OIDs do PostgreSQL -> tipos Arrow (demais tipos viram texto)
+_PG_ARROW_TYPES: Dict[int, pa.DataType] = {
+    16: pa.bool_(),
+    20: pa.int64(), 21: pa.int64(), 23: pa.int64(),
+    700: pa.float64(), 701: pa.float64(), 1700: pa.float64(),
+    1082: pa.date32(),
+    1114: pa.timestamp("us"),
+    1184: pa.timestamp("us", tz="UTC"),
+}
+
+
+def _arrow_column(values: Sequence[Any], arrow_type: pa.DataType) -> pa.Array:
+    """Converte os valores de uma coluna (tuplas do cursor) para Arrow"""
+    if pa.types.is_floating(arrow_type):
+        values = [float(v) if isinstance(v, Decimal) else v for v in values]
+    elif pa.types.is_string(arrow_type):
+        values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+    return pa.array(values, type=arrow_type)
+
+
+class ConnectionPoolTimeout(DatabaseConnectionError):
+    """Nenhuma conexão livre no pool dentro do timeout"""
+    pass
+
+
+class BlockingConnectionPool:
+    """
+    Pool thread-safe sobre ``psycopg2.pool.ThreadedConnectionPool``.
+
+    - Aquisição bloqueante: espera até ``timeout`` segundos por uma conexão
+      livre em vez de falhar imediatamente quando o pool está esgotado
+    - Health-check no checkout: conexões fechadas são descartadas e as que
+      ficaram ociosas por mais de ``healthcheck_idle`` segundos passam por ``SELECT 1``
+    - Métricas: conexões em uso/ociosas, tempo de espera, timeouts e descartes
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        timeout: float = 10.0,
+        healthcheck_idle: float = 30.0,
+        **connect_kwargs: Any,
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._returned_at: Dict[int, float] = {}
+        self._in_use = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def getconn(self, timeout: Optional[float] = None) -> Connection:
+        """Obtém uma conexão saudável, bloqueando até ``timeout`` segundos"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise ConnectionPoolTimeout(
+                f"Nenhuma conexão livre no pool após {timeout}s (max={self.maxconn})"
+            )
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def putconn(self, conn: Connection, close: bool = False) -> None:
+        """Devolve a conexão ao pool (fechando-a se estiver quebrada)"""
+        close = close or bool(conn.closed)
+        if not close:
+            self._returned_at[id(conn)] = time.monotonic()
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                if close:
+                    self._discarded += 1
+            self._slots.release()
+
+    def _checkout(self) -> Connection:
+        # Cada conexão ociosa é testada no máximo uma vez; ao esgotá-las o pool abre uma nova
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            logger.warning("Conexão inválida descartada do pool")
+            self._pool.putconn(conn, close=True)
+            with self._lock:
+                self._discarded += 1
+        raise DatabaseConnectionError("Não foi possível obter uma conexão válida do pool")
+
+    def _is_healthy(self, conn: Connection) -> bool:
+        if conn.closed:
+            self._returned_at.pop(id(conn), None)
+            return False
+        returned = self._returned_at.pop(id(conn), None)
+        if returned is None or time.monotonic() - returned < self.healthcheck_idle:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do pool (gauges e contadores)"""
+        with self._lock:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._pool._pool),
+                "acquired_total": self._acquired,
+                "timeouts_total": self._timeouts,
+                "discarded_total": self._discarded,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+            }
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+        self._returned_at.clear()
+
+
 class DatabaseManager:
     """
     Gerenciador de conexões com PostgreSQL/PostGIS
     
     Features:
-    - Pool de conexões
+    - Pool de conexões thread-safe com timeout de aquisição e métricas
     - Retry automático
     - Logging detalhado
     - Context manager para transações
@@ -46,19 +194,22 @@ class DatabaseManager:
         """
         self.config = config
         self.db_config: DatabaseConfig = db_config or config.GIS_DB
-        self._pool: Optional[pool.SimpleConnectionPool] = None
+        self._pool: Optional[BlockingConnectionPool] = None
+        self._pool_lock = threading.Lock()
         self._connection_attempts = 0
         
         logger.info(f"Inicializando DatabaseManager (versão {config.VERSION})")
     
-    def _create_pool(self) -> pool.SimpleConnectionPool:
+    def _create_pool(self) -> BlockingConnectionPool:
         """Cria pool de conexões"""
         try:
             logger.info(f"Criando pool de conexões para {self.db_config.host}")
             
-            connection_pool = pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
+            connection_pool = BlockingConnectionPool(
+                minconn=self.config.DB_POOL_MIN_SIZE,
+                maxconn=self.config.DB_POOL_MAX_SIZE,
+                timeout=self.config.DB_POOL_ACQUIRE_TIMEOUT,
+                healthcheck_idle=self.config.DB_POOL_HEALTHCHECK_IDLE,
                 host=self.db_config.host,
                 port=self.db_config.port,
                 database=self.db_config.database,
@@ -76,12 +227,18 @@ class DatabaseManager:
             raise DatabaseConnectionError(f"Falha ao conectar ao banco: {e}")
     
     @property
-    def pool(self) -> pool.SimpleConnectionPool:
+    def pool(self) -> BlockingConnectionPool:
         """Retorna pool de conexões (lazy loading)"""
         if self._pool is None:
-            self._pool = self._create_pool()
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self._create_pool()
         return self._pool
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """Métricas do pool ({} se o pool ainda não foi criado)"""
+        return self._pool.stats() if self._pool is not None else {}
+    
     @contextmanager
     def get_connection(self):
         """
@@ -98,7 +255,7 @@ class DatabaseManager:
             yield conn
             conn.commit()
         except Exception as e:
-            if conn:
+            if conn and not conn.closed:
                 conn.rollback()
             logger.error(f"Erro na conexão: {e}")
             raise
@@ -182,6 +339,61 @@ class DatabaseManager:
             logger.error(f"❌ Erro ao criar DataFrame: {e}")
             raise DatabaseQueryError(f"Falha ao executar query: {e}")
     
+    def stream_batches(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Executa query em cursor nomeado (server-side) e gera lotes Arrow
+        
+        Apenas ``batch_size`` linhas ficam em memória por vez; o schema Arrow
+        vem dos tipos das colunas no PostgreSQL, igual em todos os lotes.
+        Sem linhas, gera um único lote vazio (para preservar o schema).
+        
+        Args:
+            query: Query SQL
+            params: Parâmetros da query
+            batch_size: Linhas por lote (default: SYNC_BATCH_SIZE)
+            
+        Yields:
+            pyarrow.RecordBatch com até ``batch_size`` linhas
+        """
+        batch_size = batch_size or self.config.SYNC_BATCH_SIZE
+        cursor_name = f"techdengue_stream_{uuid.uuid4().hex[:12]}"
+        
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(name=cursor_name) as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(query, params)
+                    
+                    schema: Optional[pa.Schema] = None
+                    total = 0
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if schema is None:
+                            schema = pa.schema([
+                                pa.field(col.name, _PG_ARROW_TYPES.get(col.type_code, pa.string()))
+                                for col in cursor.description
+                            ])
+                        if not rows:
+                            break
+                        columns = list(zip(*rows))
+                        total += len(rows)
+                        yield pa.RecordBatch.from_arrays(
+                            [_arrow_column(values, field.type) for values, field in zip(columns, schema)],
+                            schema=schema,
+                        )
+                    
+                    if total == 0:
+                        yield pa.RecordBatch.from_pylist([], schema=schema)
+                    logger.debug(f"Cursor {cursor_name} transmitiu {total:,} linhas")
+        except (psycopg2.Error, pa.ArrowException) as e:
+            logger.error(f"❌ Erro no streaming da query: {e}")
+            raise DatabaseQueryError(f"Falha ao executar query: {e}")
+    
     def get_table_info(self, table_name: str, schema: str = 'public') -> Dict[str, Any]:
         """
         Obtém informações sobre uma tabela
@@ -247,7 +459,7 @@ class DatabaseManager:
     
     def close(self):
         """Fecha pool de conexões"""
-        if self._pool:
+        if getattr(self, "_pool", None):
             logger.info("Fechando pool de conexões...")
             self._pool.closeall()
             self._pool = None
@@ -302,3 +514,19 @@ def get_warehouse_database() -> DatabaseManager:
         _warehouse_db_instance = DatabaseManager(db_config=Config.WAREHOUSE_DB)
     
     return _warehouse_db_instance
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Métricas dos pools já criados (não abre conexões)
+    
+    Returns:
+        Dicionário {"gis": {...}, "warehouse": {...}} com os pools ativos
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    for name, instance in (("gis", _db_instance), ("warehouse", _warehouse_db_instance)):
+        if instance is not None:
+            pool_stats = instance.pool_stats()
+            if pool_stats:
+                stats[name] = pool_stats
+    return stats
@@ -0,0 +1,74 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from .config import Config
+from .core.excel_cache import iter_snapshot_chunks, snapshot_path, write_through_chunks
+
+
+def _header_names(row) -> List[str]:
+    # Mesmas convenções do pd.read_excel: "Unnamed: i" e sufixo ".n" em duplicadas
+    names: List[str] = []
+    seen: dict = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_excel_chunks(
+    path: Union[str, Path],
+    sheet: str,
+    chunk_size: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê uma aba XLSX em blocos de linhas (openpyxl read-only), sem carregar o
+    workbook inteiro. A primeira linha é o cabeçalho; linhas vazias são ignoradas.
+
+    Com EXCEL_CACHE_ENABLED, a primeira leitura de cada versão do arquivo grava
+    um snapshot Parquet em blocos; as seguintes leem o snapshot (ver excel_cache).
+
+    Yields:
+        DataFrame por bloco (pelo menos um, possivelmente vazio, com as colunas)
+    """
+    chunk_size = chunk_size or Config.EXCEL_CHUNK_SIZE
+    if not Config.EXCEL_CACHE_ENABLED:
+        yield from _iter_workbook_chunks(path, sheet, chunk_size)
+        return
+
+    snapshot = snapshot_path(path, sheet, "chunks", {"chunk_size": chunk_size})
+    if snapshot.is_dir():
+        yield from iter_snapshot_chunks(snapshot)
+    else:
+        yield from write_through_chunks(snapshot, _iter_workbook_chunks(path, sheet, chunk_size))
+
+
+def _iter_workbook_chunks(path: Union[str, Path], sheet: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        columns = _header_names(header or ())
+
+        buffer: List[tuple] = []
+        emitted = False
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buffer.append(tuple(row[:len(columns)]) + (None,) * (len(columns) - len(row)))
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+                emitted = True
+        if buffer or not emitted:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        wb.close()
@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import io
 import pandas as pd
 from loguru import logger
 from datetime import datetime
@@ -7,10 +8,28 @@ import psycopg2.extras as extras
 
 from .config import Config
 from .database import get_database, get_warehouse_database, DatabaseManager
-from .validators import validate_mega_planilha
+from .excel_reader import iter_excel_chunks
+from .validators import MegaPlanilhaValidator, ValidationReport, ibge_to_str, read_error_report
 
 
 FACT_TABLE = "fato_atividades_techdengue"
+FACT_STAGE_TABLE = f"_stage_{FACT_TABLE}"
+FACT_KEY = ["codigo_ibge", "data_map", "nomenclatura_atividade"]
+FACT_COLUMNS = [
+    "codigo_ibge", "municipio", "data_map", "nomenclatura_atividade",
+    "pois", "devolutivas", "removido_solucionado", "descaracterizado",
+    "tratado", "morador_ausente", "nao_autorizado", "tratamento_via_drones",
+    "monitorado", "hectares_mapeados", "contratante", "link_gis", "sub_atividade",
+    "row_hash", "data_carga", "versao"
+]
+FACT_INT_COLUMNS = [
+    "pois", "devolutivas", "removido_solucionado", "descaracterizado", "tratado",
+    "morador_ausente", "nao_autorizado", "tratamento_via_drones", "monitorado",
+]
+# Colunas de carga: não contam como alteração do registro
+FACT_LOAD_COLUMNS = ["data_carga", "versao"]
+# Hash do conteúdo do registro (_row_hash): atualização só quando difere
+FACT_HASH_COLUMN = "row_hash"
 
 
 def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
@@ -53,27 +72,55 @@ def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
 
     # Normalize IBGE
     if "CODIGO_IBGE" in df.columns:
-        df["CODIGO_IBGE"] = df["CODIGO_IBGE"].astype(str).str.strip()
+        df["CODIGO_IBGE"] = ibge_to_str(df["CODIGO_IBGE"])
 
     return df
 
 
-def _aggregate_for_fact(df: pd.DataFrame) -> pd.DataFrame:
+# Colunas somadas na agregação (inteiras na tabela fato)
+SUM_COLUMNS = [
+    "POIS",
+    "devolutivas",
+    "removido_solucionado",
+    "descaracterizado",
+    "morador_ausente",
+    "tratamento_via_drones",
+    "monitorado",
+]
+
+
+def _row_hash(df: pd.DataFrame) -> pd.Series:
+    """
+    Hash do conteúdo de cada registro agregado (16 hex), estável entre cargas:
+    valores são canonizados como gravados no banco (somas como inteiros,
+    demais números como float, nulos como vazio), de modo que int/float do
+    pandas não alteram o hash.
+    """
+    canonical = pd.Series("", index=df.index, dtype=object)
+    for c in sorted(df.columns):
+        if c == "ROW_HASH":
+            continue
+        col = df[c]
+        if c in SUM_COLUMNS:
+            text = pd.to_numeric(col, errors="coerce").round().astype("Int64").astype(str)
+        elif pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            text = col.astype("float64").astype(str)
+        else:
+            text = col.astype(str)
+        text = text.where(col.notna(), "")
+        canonical = canonical + f"{c}=" + text + "\x1f"
+    hashed = pd.util.hash_pandas_object(canonical, index=False)
+    return hashed.map("{:016x}".format)
+
+
+def _aggregate_for_fact(df: pd.DataFrame, with_hash: bool = True) -> pd.DataFrame:
     # Group at (CODIGO_IBGE, DATA_MAP, NOMENCLATURA_ATIVIDADE)
     for required in ["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"]:
         if required not in df.columns:
             raise ValueError(f"Coluna obrigatória ausente para agregação: {required}")
 
     # Identify columns
-    numeric_sum_cols = [c for c in [
-        "POIS",
-        "devolutivas",
-        "removido_solucionado",
-        "descaracterizado",
-        "morador_ausente",
-        "tratamento_via_drones",
-        "monitorado",
-    ] if c in df.columns]
+    numeric_sum_cols = [c for c in SUM_COLUMNS if c in df.columns]
 
     agg_dict: Dict[str, Any] = {}
     for c in numeric_sum_cols:
@@ -90,9 +137,65 @@ def _aggregate_for_fact(df: pd.DataFrame) -> pd.DataFrame:
         df.groupby(["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"], as_index=False)
           .agg(agg_dict)
     )
+    if with_hash:
+        grouped["ROW_HASH"] = _row_hash(grouped)
     return grouped
 
 
+def _combine_partials(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    # Reagrega os parciais de cada bloco: soma de somas, máximo de máximos e
+    # primeiro dos primeiros (blocos em ordem) equivalem à agregação direta
+    df = pd.concat(partials, ignore_index=True).infer_objects()
+    agg_dict: Dict[str, Any] = {}
+    for c in df.columns:
+        if c in ["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"]:
+            continue
+        if c == "HECTARES_MAPEADOS":
+            agg_dict[c] = "max"
+        elif c in ["CONTRATANTE", "LINK_GIS", "SUB_ATIVIDADE", "MUNICIPIO"]:
+            agg_dict[c] = "first"
+        else:
+            agg_dict[c] = "sum"
+    if not agg_dict:
+        grouped = df.drop_duplicates(["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"]).reset_index(drop=True)
+    else:
+        grouped = df.groupby(["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"], as_index=False).agg(agg_dict)
+    grouped["ROW_HASH"] = _row_hash(grouped)
+    return grouped
+
+
+def read_mega_planilha(
+    path: Optional[str] = None,
+    sheet: str = "Atividades (com sub)",
+    chunk_size: Optional[int] = None,
+) -> Tuple[ValidationReport, Optional[pd.DataFrame]]:
+    """
+    Lê a mega planilha uma única vez, em blocos (openpyxl read-only): cada bloco
+    é normalizado, alimenta a validação e é pré-agregado no grão do fato.
+
+    Returns:
+        (relatório de validação, DataFrame agregado ou None se a validação falhar)
+    """
+    path = path or str(Config.PATHS.data_dir / "dados_techdengue" / "Atividades Techdengue.xlsx")
+    validator = MegaPlanilhaValidator(path, sheet)
+    partials: List[pd.DataFrame] = []
+
+    try:
+        for chunk in iter_excel_chunks(path, sheet, chunk_size):
+            chunk = _normalize_df(chunk)
+            validator.update(chunk)
+            if validator.missing_columns:
+                break  # sem colunas obrigatórias não há o que agregar
+            partials.append(_aggregate_for_fact(chunk, with_hash=False))
+    except Exception as e:
+        return read_error_report(e), None
+
+    report = validator.report()
+    if not report.ok:
+        return report, None
+    return report, _combine_partials(partials)
+
+
 def _rename_to_db(df: pd.DataFrame) -> pd.DataFrame:
     rename_map = {
         "CODIGO_IBGE": "codigo_ibge",
@@ -112,6 +215,7 @@ def _rename_to_db(df: pd.DataFrame) -> pd.DataFrame:
         "CONTRATANTE": "contratante",
         "LINK_GIS": "link_gis",
         "SUB_ATIVIDADE": "sub_atividade",
+        "ROW_HASH": "row_hash",
     }
     df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
     # Add metadata cols
@@ -141,33 +245,45 @@ def ensure_fact_table(db: Optional[DatabaseManager] = None) -> None:
         contratante TEXT,
         link_gis TEXT,
         sub_atividade TEXT,
+        row_hash TEXT,
         data_carga TIMESTAMP DEFAULT NOW(),
         versao TEXT,
         PRIMARY KEY (codigo_ibge, data_map, nomenclatura_atividade)
     );
+    ALTER TABLE {FACT_TABLE} ADD COLUMN IF NOT EXISTS row_hash TEXT;
     """
     db.execute_query(create_sql, fetch=False)
     logger.info(f"Garantida existência da tabela {FACT_TABLE}")
 
 
+def _changed_clause(present_cols: List[str]) -> str:
+    """
+    Condição do ON CONFLICT DO UPDATE: só reescreve registros alterados. Com
+    row_hash compara o hash; sem ele, as colunas de negócio (exceto as de carga).
+    """
+    if FACT_HASH_COLUMN in present_cols:
+        return f"WHERE {FACT_TABLE}.{FACT_HASH_COLUMN} IS DISTINCT FROM EXCLUDED.{FACT_HASH_COLUMN}"
+    compare_cols = [c for c in present_cols if c not in FACT_KEY and c not in FACT_LOAD_COLUMNS]
+    if not compare_cols:
+        return "WHERE FALSE"
+    return (
+        f"WHERE ({', '.join(f'{FACT_TABLE}.{c}' for c in compare_cols)}) "
+        f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in compare_cols)})"
+    )
+
+
 def upsert_fact(df: pd.DataFrame, db: Optional[DatabaseManager] = None, chunk_size: int = 5000) -> int:
     db = db or get_database()
     if df.empty:
         return 0
 
-    cols = [
-        "codigo_ibge", "municipio", "data_map", "nomenclatura_atividade",
-        "pois", "devolutivas", "removido_solucionado", "descaracterizado",
-        "tratado", "morador_ausente", "nao_autorizado", "tratamento_via_drones",
-        "monitorado", "hectares_mapeados", "contratante", "link_gis", "sub_atividade",
-        "data_carga", "versao"
-    ]
-    present_cols = [c for c in cols if c in df.columns]
+    present_cols = [c for c in FACT_COLUMNS if c in df.columns]
     df = df[present_cols]
 
     insert_sql = f"INSERT INTO {FACT_TABLE} ({', '.join(present_cols)}) VALUES %s\n" \
                  f"ON CONFLICT (codigo_ibge, data_map, nomenclatura_atividade) DO UPDATE SET " + \
-                 ", ".join([f"{c}=EXCLUDED.{c}" for c in present_cols if c not in ["codigo_ibge", "data_map", "nomenclatura_atividade"]])
+                 ", ".join([f"{c}=EXCLUDED.{c}" for c in present_cols if c not in ["codigo_ibge", "data_map", "nomenclatura_atividade"]]) + \
+                 f"\n{_changed_clause(present_cols)}"
 
     total = 0
     with db.get_connection() as conn:
@@ -181,33 +297,113 @@ def upsert_fact(df: pd.DataFrame, db: Optional[DatabaseManager] = None, chunk_si
     return total
 
 
+def _copy_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Inteiros como Int64 (sem "12.0" no CSV, que o COPY rejeita em colunas INTEGER)
+    df = df.copy()
+    for c in FACT_INT_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").round().astype("Int64")
+    return df
+
+
+def copy_upsert_fact(df: pd.DataFrame, db: Optional[DatabaseManager] = None, chunk_size: int = 50000) -> Dict[str, int]:
+    """
+    Carga em massa: COPY FROM STDIN (CSV) para uma tabela temporária de staging
+    e um único INSERT ... ON CONFLICT DO UPDATE set-based na tabela fato.
+    Registros inalterados (mesmo row_hash) não são reescritos.
+
+    Returns:
+        Contagens {"inserted", "updated", "unchanged", "total"}
+    """
+    db = db or get_database()
+    if df.empty:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "total": 0}
+
+    present_cols = [c for c in FACT_COLUMNS if c in df.columns]
+    df = _copy_frame(df[present_cols])
+    col_list = ", ".join(present_cols)
+    update_cols = [c for c in present_cols if c not in FACT_KEY]
+
+    update_sql = ", ".join(f"{c}=EXCLUDED.{c}" for c in update_cols) or f"{FACT_KEY[0]}=EXCLUDED.{FACT_KEY[0]}"
+    changed_sql = _changed_clause(present_cols)
+    merge_sql = f"""
+    WITH merged AS (
+        INSERT INTO {FACT_TABLE} ({col_list})
+        SELECT {col_list} FROM {FACT_STAGE_TABLE}
+        ON CONFLICT ({', '.join(FACT_KEY)}) DO UPDATE SET {update_sql}
+        {changed_sql}
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+    """
+    copy_sql = f"COPY {FACT_STAGE_TABLE} ({col_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TEMP TABLE {FACT_STAGE_TABLE} "
+                f"(LIKE {FACT_TABLE} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            for start in range(0, len(df), chunk_size):
+                buffer = io.StringIO()
+                df.iloc[start:start + chunk_size].to_csv(buffer, index=False, header=False, na_rep="\\N")
+                buffer.seek(0)
+                cur.copy_expert(copy_sql, buffer)
+            cur.execute(merge_sql)
+            inserted, updated = cur.fetchone()
+
+    total = int(len(df))
+    result = {
+        "inserted": int(inserted),
+        "updated": int(updated),
+        "unchanged": total - int(inserted) - int(updated),
+        "total": total,
+    }
+    logger.info(
+        f"Carga COPY concluída na tabela {FACT_TABLE}: {result['inserted']} inseridas, "
+        f"{result['updated']} atualizadas, {result['unchanged']} inalteradas"
+    )
+    return result
+
+
 def ingest_mega_planilha(
     path: Optional[str] = None,
     sheet: str = "Atividades (com sub)",
     db: Optional[DatabaseManager] = None,
     use_warehouse: bool = True,
+    load_mode: Optional[str] = None,
 ) -> Dict[str, Any]:
-    # Validate first
-    report = validate_mega_planilha(path=path, sheet=sheet)
+    """
+    Valida e carrega a mega planilha na tabela fato.
+
+    Args:
+        load_mode: "copy" (COPY + merge set-based) ou "values" (execute_values);
+            default: WAREHOUSE_LOAD_MODE
+    """
+    # Leitura única: validação e transformação no mesmo passe
+    report, df_grouped = read_mega_planilha(path=path, sheet=sheet)
     if not report.ok:
         logger.error("Validação falhou, abortando ingestão")
         return {"ok": False, "report": report.dict()}
 
-    # Load and transform
-    path = path or str(Config.PATHS.data_dir / "dados_techdengue" / "Atividades Techdengue.xlsx")
-    df_raw = pd.read_excel(path, sheet_name=sheet)
-    df_raw = _normalize_df(df_raw)
-    df_grouped = _aggregate_for_fact(df_raw)
     df_db = _rename_to_db(df_grouped)
 
     # Ensure table and upsert (escreve no Warehouse por padrão)
     db = db or (get_warehouse_database() if use_warehouse else get_database())
     ensure_fact_table(db)
-    total = upsert_fact(df_db, db)
+    load_mode = load_mode or Config.WAREHOUSE_LOAD_MODE
+    counts: Dict[str, int] = {}
+    if load_mode == "copy":
+        counts = copy_upsert_fact(df_db, db)
+        total = counts["total"]
+    else:
+        total = upsert_fact(df_db, db)
 
     return {
         "ok": True,
         "ingested_rows": total,
+        **counts,
+        "load_mode": load_mode,
         "report": report.dict(),
         "table": FACT_TABLE,
     }
@@ -2,11 +2,177 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Optional, Dict, Any
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from loguru import logger
 
 from .config import Config
-from .ingestion import _normalize_df, _aggregate_for_fact, _rename_to_db
-from .validators import validate_mega_planilha
+from .core.dataset_schema import write_dataset
+from .ingestion import FACT_HASH_COLUMN, FACT_KEY, read_mega_planilha, _rename_to_db
+
+
+FACTS_SUMMARY_FILE = "fato_atividades_summary.parquet"
+
+# Dimensões do cubo de resumo -> coluna agrupada (None = total geral)
+SUMMARY_DIMENSIONS = {
+    "municipio": "municipio",
+    "codigo_ibge": "codigo_ibge",
+    "atividade": "nomenclatura_atividade",
+    "total": None,
+}
+
+SUMMARY_SOURCE_MTIME_KEY = b"techdengue.source_mtime_ns"
+SUMMARY_SOURCE_SIZE_KEY = b"techdengue.source_size"
+
+FACTS_FILE = "fato_atividades_techdengue.parquet"
+GOLD_FILE = "analise_integrada.parquet"
+# Grupos (codigo_ibge, competencia) alterados por cargas de fatos ainda não
+# aplicadas na camada gold
+GOLD_PENDING_FILE = "analise_integrada_pending.parquet"
+GOLD_GROUP = ["codigo_ibge", "competencia"]
+GOLD_SOURCE_COLUMNS = ["codigo_ibge", "municipio", "data_map", "nomenclatura_atividade", "pois", "devolutivas", "hectares_mapeados"]
+
+# Versão (mtime:tamanho) do Parquet de fatos usada pela gold e pelo registro de pendências
+GOLD_SOURCE_STAMP_KEY = b"techdengue.source_stamp"
+PENDING_BASE_STAMP_KEY = b"techdengue.base_stamp"
+PENDING_HEAD_STAMP_KEY = b"techdengue.head_stamp"
+
+
+def _stamp(path: Path) -> bytes:
+    stat = path.stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+
+def _competencia(data_map: pd.Series) -> pd.Series:
+    return pd.to_datetime(data_map, errors="coerce").dt.to_period("M").dt.to_timestamp().dt.date
+
+
+def _changed_groups(old_facts_path: Path, new_facts: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Grupos (codigo_ibge, competencia) com fatos novos, alterados (row_hash) ou
+    removidos em relação ao Parquet anterior; None se não for possível rastrear.
+    """
+    if not old_facts_path.exists() or FACT_HASH_COLUMN not in new_facts.columns:
+        return None
+    if FACT_HASH_COLUMN not in pq.read_schema(old_facts_path).names:
+        return None
+
+    cols = FACT_KEY + [FACT_HASH_COLUMN]
+    old = pq.read_table(old_facts_path, columns=cols).to_pandas()
+    merged = old.merge(new_facts[cols], on=FACT_KEY, how="outer", suffixes=("_old", "_new"), indicator=True)
+    changed = merged[
+        (merged["_merge"] != "both")
+        | (merged[f"{FACT_HASH_COLUMN}_old"] != merged[f"{FACT_HASH_COLUMN}_new"])
+    ]
+    groups = pd.DataFrame({
+        "codigo_ibge": changed["codigo_ibge"].astype(str),
+        "competencia": _competencia(changed["data_map"]),
+    })
+    return groups.drop_duplicates().reset_index(drop=True)
+
+
+def _record_fact_changes(
+    out_dir: Path,
+    groups: Optional[pd.DataFrame],
+    old_stamp: Optional[bytes],
+    new_stamp: bytes,
+) -> None:
+    """
+    Acumula os grupos alterados no registro de pendências da gold. O registro
+    guarda a versão dos fatos de onde partiu (base) e a última carga (head).
+    """
+    pending_path = out_dir / GOLD_PENDING_FILE
+    if groups is None or old_stamp is None:
+        pending_path.unlink(missing_ok=True)  # sem rastreamento: próxima gold é completa
+        return
+
+    base = old_stamp
+    if pending_path.exists():
+        previous = pq.read_table(pending_path)
+        meta = previous.schema.metadata or {}
+        if meta.get(PENDING_HEAD_STAMP_KEY) == old_stamp:
+            base = meta[PENDING_BASE_STAMP_KEY]
+            groups = pd.concat([previous.to_pandas(), groups], ignore_index=True).drop_duplicates()
+
+    table = pa.Table.from_pandas(groups, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        PENDING_BASE_STAMP_KEY: base,
+        PENDING_HEAD_STAMP_KEY: new_stamp,
+    })
+    pq.write_table(table, pending_path)
+    logger.info(f"{len(groups)} grupos (codigo_ibge, competencia) pendentes para a camada gold")
+
+
+def build_facts_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pré-calcula os rollups de /facts/summary em formato longo.
+
+    Uma linha por (group_by, key) com total_pois, total_devolutivas,
+    total_hectares e atividades; ``group_by == "total"`` traz o total geral.
+    """
+    for c in ["pois", "devolutivas", "hectares_mapeados"]:
+        if c not in df.columns:
+            df[c] = 0
+    if "nomenclatura_atividade" not in df.columns:
+        df["nomenclatura_atividade"] = None
+
+    parts = []
+    for dim, key_col in SUMMARY_DIMENSIONS.items():
+        if key_col is None:
+            g = pd.DataFrame({
+                "key": [None],
+                "total_pois": [df["pois"].sum()],
+                "total_devolutivas": [df["devolutivas"].sum()],
+                "total_hectares": [df["hectares_mapeados"].sum()],
+                "atividades": [df["nomenclatura_atividade"].count()],
+            })
+        elif key_col in df.columns:
+            # Usar coluna diferente para count quando agrupando por nomenclatura_atividade
+            count_col = "pois" if key_col == "nomenclatura_atividade" else "nomenclatura_atividade"
+            g = (
+                df.groupby(key_col, observed=True)
+                  .agg(
+                      total_pois=("pois", "sum"),
+                      total_devolutivas=("devolutivas", "sum"),
+                      total_hectares=("hectares_mapeados", "sum"),
+                      atividades=(count_col, "count"),
+                  )
+                  .reset_index()
+                  .rename(columns={key_col: "key"})
+            )
+            g["key"] = g["key"].astype(str)
+        else:
+            continue
+        g.insert(0, "group_by", dim)
+        parts.append(g)
+
+    cube = pd.concat(parts, ignore_index=True)
+    cube["total_pois"] = cube["total_pois"].fillna(0).astype("int64")
+    cube["total_devolutivas"] = cube["total_devolutivas"].fillna(0).astype("float64")
+    cube["total_hectares"] = cube["total_hectares"].fillna(0).astype("float64")
+    cube["atividades"] = cube["atividades"].fillna(0).astype("int64")
+    return cube
+
+
+def materialize_facts_summary(facts_path: Path, out_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Grava o cubo de resumo como sidecar Parquet ao lado do dataset de atividades.
+    O sidecar registra mtime/tamanho da fonte para que a API detecte se está defasado.
+    """
+    out_dir = out_dir or facts_path.parent
+    summary_path = out_dir / FACTS_SUMMARY_FILE
+
+    cube = build_facts_summary(pd.read_parquet(facts_path))
+    stat = facts_path.stat()
+    write_dataset(cube, summary_path, metadata={
+        SUMMARY_SOURCE_MTIME_KEY: str(stat.st_mtime_ns).encode(),
+        SUMMARY_SOURCE_SIZE_KEY: str(stat.st_size).encode(),
+    })
+    logger.info(f"Resumo de atividades salvo em {summary_path} ({len(cube)} linhas)")
+
+    return {"ok": True, "rows": int(len(cube)), "parquet": str(summary_path)}
 
 
 def materialize_facts_to_parquet(
@@ -22,59 +188,43 @@ def materialize_facts_to_parquet(
     out_dir.mkdir(parents=True, exist_ok=True)
 
     xlsx_path = xlsx_path or (Config.PATHS.data_dir / "dados_techdengue" / "Atividades Techdengue.xlsx")
-    parquet_path = out_dir / "fato_atividades_techdengue.parquet"
+    parquet_path = out_dir / FACTS_FILE
 
-    logger.info(f"Validando mega planilha em: {xlsx_path}")
-    report = validate_mega_planilha(path=str(xlsx_path), sheet=sheet)
+    logger.info(f"Lendo, validando e transformando mega planilha em: {xlsx_path}")
+    report, df_grouped = read_mega_planilha(path=str(xlsx_path), sheet=sheet)
     if not report.ok:
         return {"ok": False, "error": "validation_failed", "report": report.model_dump()}
 
-    logger.info("Lendo e transformando planilha...")
-    df_raw = pd.read_excel(xlsx_path, sheet_name=sheet)
-    df_raw = _normalize_df(df_raw)
-    df_grouped = _aggregate_for_fact(df_raw)
     df_db = _rename_to_db(df_grouped)
 
+    old_stamp = _stamp(parquet_path) if parquet_path.exists() else None
+    changed = _changed_groups(parquet_path, df_db)
+
     logger.info(f"Salvando Parquet em {parquet_path}")
-    df_db.to_parquet(parquet_path, index=False)
+    write_dataset(df_db, parquet_path)
+    _record_fact_changes(out_dir, changed, old_stamp, _stamp(parquet_path))
+    summary = materialize_facts_summary(parquet_path, out_dir)
 
     return {
         "ok": True,
         "rows": int(len(df_db)),
         "columns": df_db.columns.tolist(),
         "parquet": str(parquet_path),
+        "summary_parquet": summary["parquet"],
         "report": report.model_dump(),
     }
 
 
-def materialize_gold_analise(
-    out_dir: Optional[Path] = None,
-) -> Dict[str, Any]:
-    out_dir = out_dir or Config.PATHS.output_dir
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    facts_path = out_dir / "fato_atividades_techdengue.parquet"
-    gold_path = out_dir / "analise_integrada.parquet"
-
-    if not facts_path.exists():
-        return {"ok": False, "error": "facts_missing", "parquet": str(facts_path)}
-
-    df = pd.read_parquet(facts_path)
-
-    if "data_map" not in df.columns:
-        return {"ok": False, "error": "column_missing:data_map"}
-
-    comp = pd.to_datetime(df["data_map"], errors="coerce").dt.to_period("M").dt.to_timestamp()
-    df["competencia"] = comp.dt.date
-
+def _aggregate_gold(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega fatos (com ``competencia``) no grão da gold: município x competência."""
     for c in ["pois", "devolutivas", "hectares_mapeados"]:
         if c not in df.columns:
             df[c] = 0
     if "nomenclatura_atividade" not in df.columns:
         df["nomenclatura_atividade"] = None
 
-    g = (
-        df.groupby(["codigo_ibge", "municipio", "competencia"], as_index=False)
+    return (
+        df.groupby(["codigo_ibge", "municipio", "competencia"], as_index=False, observed=True)
           .agg({
               "pois": "sum",
               "devolutivas": "sum",
@@ -89,11 +239,94 @@ def materialize_gold_analise(
           })
     )
 
-    g.to_parquet(gold_path, index=False)
+
+def _write_gold(g: pd.DataFrame, gold_path: Path, source_stamp: bytes) -> None:
+    write_dataset(g, gold_path, metadata={GOLD_SOURCE_STAMP_KEY: source_stamp})
+
+
+def _refresh_gold_incremental(facts_path: Path, gold_path: Path, pending_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Recalcula apenas os grupos pendentes e os mescla na gold existente.
+    Retorna None quando a gold não corresponde à base das pendências
+    (é necessário recálculo completo).
+    """
+    if not gold_path.exists():
+        return None
+    source = (pq.read_schema(gold_path).metadata or {}).get(GOLD_SOURCE_STAMP_KEY)
+    current = _stamp(facts_path)
+    if source == current:
+        logger.info("Camada gold já corresponde aos fatos atuais")
+        return {"mode": "unchanged", "rows": pq.read_metadata(gold_path).num_rows, "groups_recomputed": 0}
+    if not pending_path.exists():
+        return None
+
+    pending = pq.read_table(pending_path)
+    meta = pending.schema.metadata or {}
+    if meta.get(PENDING_BASE_STAMP_KEY) != source or meta.get(PENDING_HEAD_STAMP_KEY) != current:
+        return None
+
+    groups = pending.to_pandas()
+    columns = [c for c in GOLD_SOURCE_COLUMNS if c in pq.read_schema(facts_path).names]
+    facts = pq.read_table(
+        facts_path,
+        columns=columns,
+        filters=pc.field("codigo_ibge").isin(groups["codigo_ibge"].unique().tolist()),
+    ).to_pandas()
+    facts["competencia"] = _competencia(facts["data_map"])
+    facts = facts.merge(groups, on=GOLD_GROUP, how="inner")
+
+    gold = pd.read_parquet(gold_path)
+    touched = gold.merge(groups.assign(_touched=True), on=GOLD_GROUP, how="left")["_touched"].fillna(False).to_numpy(dtype=bool)
+    g = pd.concat([gold[~touched], _aggregate_gold(facts)], ignore_index=True)
+    g = g.sort_values(["codigo_ibge", "municipio", "competencia"], kind="stable").reset_index(drop=True)
+
+    _write_gold(g, gold_path, current)
+    pending_path.unlink(missing_ok=True)
+    logger.info(f"Camada gold atualizada incrementalmente: {len(groups)} grupos recalculados")
+    return {"mode": "incremental", "rows": int(len(g)), "columns": g.columns.tolist(), "groups_recomputed": int(len(groups))}
+
+
+def materialize_gold_analise(
+    out_dir: Optional[Path] = None,
+    incremental: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Materializa a análise integrada (gold) a partir do Parquet de fatos.
+
+    No modo incremental (default: GOLD_INCREMENTAL), recalcula apenas os grupos
+    (codigo_ibge, competencia) alterados pelas cargas de fatos desde a última
+    materialização; sem esse registro, recalcula tudo.
+    """
+    out_dir = out_dir or Config.PATHS.output_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    facts_path = out_dir / FACTS_FILE
+    gold_path = out_dir / GOLD_FILE
+    pending_path = out_dir / GOLD_PENDING_FILE
+    incremental = Config.GOLD_INCREMENTAL if incremental is None else incremental
+
+    if not facts_path.exists():
+        return {"ok": False, "error": "facts_missing", "parquet": str(facts_path)}
+
+    result = _refresh_gold_incremental(facts_path, gold_path, pending_path) if incremental else None
+    if result is None:
+        df = pd.read_parquet(facts_path)
+
+        if "data_map" not in df.columns:
+            return {"ok": False, "error": "column_missing:data_map"}
+
+        df["competencia"] = _competencia(df["data_map"])
+        g = _aggregate_gold(df)
+
+        _write_gold(g, gold_path, _stamp(facts_path))
+        pending_path.unlink(missing_ok=True)
+        result = {"mode": "full", "rows": int(len(g)), "columns": g.columns.tolist()}
+
+    summary = materialize_facts_summary(facts_path, out_dir)
 
     return {
         "ok": True,
-        "rows": int(len(g)),
-        "columns": g.columns.tolist(),
+        **result,
         "parquet": str(gold_path),
+        "summary_parquet": summary["parquet"],
     }
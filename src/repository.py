@@ -2,16 +2,250 @@
 Repositório de Dados (Data Access Layer)
 Camada de abstração para acesso aos dados do servidor GIS
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from datetime import datetime, timedelta
 
 import pandas as pd
+import pyarrow as pa
 
 from .database import DatabaseManager, get_database
 from .models import BancoTechdengue, PlanilhaCampo, AtividadeAgregada
 from loguru import logger
 
 
+# Consultas SQL (placeholders psycopg2, compartilhadas com o repositório assíncrono)
+BANCO_TECHDENGUE_ALL_SQL = """
+SELECT 
+    id,
+    nome,
+    lat,
+    long,
+    ST_AsGeoJSON(geom) as geom_json,
+    data_criacao,
+    analista,
+    id_sistema
+FROM banco_techdengue
+ORDER BY data_criacao DESC NULLS LAST
+"""
+
+BANCO_TECHDENGUE_BY_DATE_RANGE_SQL = """
+SELECT 
+    id,
+    nome,
+    lat,
+    long,
+    ST_AsGeoJSON(geom) as geom_json,
+    data_criacao,
+    analista,
+    id_sistema
+FROM banco_techdengue
+WHERE data_criacao BETWEEN %s AND %s
+ORDER BY data_criacao DESC
+"""
+
+# Linhas criadas desde o watermark (sync_watermark). Não captura atualizações nem
+# exclusões: banco_techdengue é sincronizada por completo (ver SYNC_TABLES)
+BANCO_TECHDENGUE_CHANGES_SQL = """
+SELECT 
+    id,
+    nome,
+    lat,
+    long,
+    ST_AsGeoJSON(geom) as geom_json,
+    data_criacao,
+    analista,
+    id_sistema,
+    data_criacao as sync_watermark
+FROM banco_techdengue
+WHERE data_criacao >= %s
+"""
+
+# Fingerprint remoto: contagem, última alteração e hash agregado (soma dos MD5
+# das linhas, independente de ordem) - uma linha trafega, nada é baixado
+BANCO_TECHDENGUE_FINGERPRINT_SQL = """
+SELECT 
+    COUNT(*) as row_count,
+    MAX(data_criacao) as max_updated_at,
+    COALESCE(SUM(('x' || substr(md5(t::text), 1, 15))::bit(60)::bigint), 0)::text as content_hash
+FROM banco_techdengue t
+"""
+
+BANCO_TECHDENGUE_STATS_SQL = """
+SELECT 
+    COUNT(*) as total_registros,
+    COUNT(DISTINCT analista) as total_analistas,
+    MIN(data_criacao) as data_mais_antiga,
+    MAX(data_criacao) as data_mais_recente,
+    COUNT(CASE WHEN geom IS NOT NULL THEN 1 END) as registros_com_geometria,
+    COUNT(CASE WHEN lat IS NOT NULL AND long IS NOT NULL THEN 1 END) as registros_com_coordenadas
+FROM banco_techdengue
+"""
+
+PLANILHA_CAMPO_ALL_SQL = """
+SELECT 
+    id,
+    created_at,
+    updated_at,
+    id_atividade,
+    id_sub_atividade,
+    nome_sub_atividade,
+    quadra,
+    bairro,
+    logradouro,
+    poi,
+    descricao,
+    vol_estimado,
+    pastilhas,
+    granulado,
+    data_visita,
+    removido_solucionado,
+    descaracterizado,
+    tratado,
+    morador_ausente,
+    nao_autorizado,
+    observacao,
+    tratamento_via_drone,
+    monitorado,
+    lat,
+    longi,
+    foto
+FROM planilha_campo
+WHERE deleted_at IS NULL
+ORDER BY created_at DESC NULLS LAST
+"""
+
+# Sincronização incremental: POIs criados/alterados/excluídos (soft delete) desde o watermark
+PLANILHA_CAMPO_CHANGES_SQL = """
+SELECT 
+    id,
+    created_at,
+    updated_at,
+    id_atividade,
+    id_sub_atividade,
+    nome_sub_atividade,
+    quadra,
+    bairro,
+    logradouro,
+    poi,
+    descricao,
+    vol_estimado,
+    pastilhas,
+    granulado,
+    data_visita,
+    removido_solucionado,
+    descaracterizado,
+    tratado,
+    morador_ausente,
+    nao_autorizado,
+    observacao,
+    tratamento_via_drone,
+    monitorado,
+    lat,
+    longi,
+    foto,
+    deleted_at,
+    GREATEST(COALESCE(updated_at, created_at), deleted_at) as sync_watermark
+FROM planilha_campo
+WHERE COALESCE(updated_at, created_at) >= %s OR deleted_at >= %s
+"""
+
+PLANILHA_CAMPO_BY_ATIVIDADE_SQL = """
+SELECT 
+    id,
+    id_atividade,
+    poi,
+    descricao,
+    bairro,
+    lat,
+    longi,
+    data_upload,
+    categoria,
+    tratamento,
+    observacoes
+FROM planilha_campo
+WHERE id_atividade = %s
+ORDER BY data_upload DESC
+"""
+
+# Inclui as linhas excluídas (soft delete): uma exclusão altera o fingerprint
+PLANILHA_CAMPO_FINGERPRINT_SQL = """
+SELECT 
+    COUNT(*) as row_count,
+    MAX(GREATEST(COALESCE(updated_at, created_at), deleted_at)) as max_updated_at,
+    COALESCE(SUM(('x' || substr(md5(t::text), 1, 15))::bit(60)::bigint), 0)::text as content_hash
+FROM planilha_campo t
+"""
+
+PLANILHA_CAMPO_STATS_SQL = """
+SELECT 
+    COUNT(*) as total_pois,
+    COUNT(DISTINCT id_atividade) as total_atividades,
+    MIN(created_at) as data_mais_antiga,
+    MAX(created_at) as data_mais_recente,
+    COUNT(CASE WHEN lat IS NOT NULL AND longi IS NOT NULL THEN 1 END) as pois_com_coordenadas,
+    COUNT(CASE WHEN tratado IS NOT NULL OR removido_solucionado IS NOT NULL THEN 1 END) as pois_com_tratamento
+FROM planilha_campo
+WHERE deleted_at IS NULL
+"""
+
+POIS_POR_CATEGORIA_SQL = """
+SELECT 
+    categoria,
+    COUNT(*) as total_pois,
+    COUNT(CASE WHEN tratamento IS NOT NULL THEN 1 END) as pois_tratados
+FROM planilha_campo
+WHERE categoria IS NOT NULL
+GROUP BY categoria
+ORDER BY total_pois DESC
+"""
+
+ATIVIDADES_AGREGADAS_SQL = """
+SELECT 
+    id_atividade,
+    COUNT(*) as total_pois,
+    COUNT(CASE WHEN tratamento IS NOT NULL THEN 1 END) as total_tratados,
+    MIN(data_upload) as data_inicio,
+    MAX(data_upload) as data_fim
+FROM planilha_campo
+WHERE id_atividade IS NOT NULL
+GROUP BY id_atividade
+ORDER BY total_pois DESC
+"""
+
+EVOLUCAO_TEMPORAL_POIS_SQL = """
+SELECT 
+    DATE_TRUNC('{trunc}', data_upload) as periodo,
+    COUNT(*) as total_pois,
+    COUNT(DISTINCT id_atividade) as total_atividades,
+    COUNT(CASE WHEN tratamento IS NOT NULL THEN 1 END) as pois_tratados
+FROM planilha_campo
+WHERE data_upload IS NOT NULL
+GROUP BY DATE_TRUNC('{trunc}', data_upload)
+ORDER BY periodo
+"""
+
+POIS_EM_RAIO_SQL = """
+SELECT 
+    id,
+    poi,
+    descricao,
+    lat,
+    longi,
+    ST_Distance(
+        ST_SetSRID(ST_MakePoint(longi, lat), 4326)::geography,
+        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography
+    ) as distancia_metros
+FROM planilha_campo
+WHERE lat IS NOT NULL AND longi IS NOT NULL
+    AND ST_DWithin(
+        ST_SetSRID(ST_MakePoint(longi, lat), 4326)::geography,
+        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
+        %s
+    )
+ORDER BY distancia_metros
+"""
+
+
 class TechDengueRepository:
     """
     Repositório para acesso aos dados TechDengue
@@ -43,19 +277,7 @@ class TechDengueRepository:
         Returns:
             DataFrame com registros
         """
-        query = """
-        SELECT 
-            id,
-            nome,
-            lat,
-            long,
-            ST_AsGeoJSON(geom) as geom_json,
-            data_criacao,
-            analista,
-            id_sistema
-        FROM banco_techdengue
-        ORDER BY data_criacao DESC NULLS LAST
-        """
+        query = BANCO_TECHDENGUE_ALL_SQL
         
         if limit:
             query += f" LIMIT {limit}"
@@ -63,6 +285,37 @@ class TechDengueRepository:
         logger.info(f"Buscando registros de banco_techdengue (limit={limit})")
         return self.db.query_to_dataframe(query, parse_dates=['data_criacao'])
     
+    def iter_banco_techdengue_batches(self, batch_size: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Transmite banco_techdengue completo em lotes Arrow (cursor server-side)
+        
+        Args:
+            batch_size: Linhas por lote (default: SYNC_BATCH_SIZE)
+            
+        Yields:
+            pyarrow.RecordBatch
+        """
+        logger.info("Transmitindo banco_techdengue em lotes (cursor server-side)")
+        return self.db.stream_batches(BANCO_TECHDENGUE_ALL_SQL, batch_size=batch_size)
+    
+    def iter_banco_techdengue_changes(
+        self,
+        since: datetime,
+        batch_size: Optional[int] = None
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Transmite registros de banco_techdengue criados desde ``since``
+        
+        Args:
+            since: Watermark da última sincronização
+            batch_size: Linhas por lote (default: SYNC_BATCH_SIZE)
+            
+        Yields:
+            pyarrow.RecordBatch (com a coluna sync_watermark)
+        """
+        logger.info(f"Transmitindo alterações de banco_techdengue desde {since}")
+        return self.db.stream_batches(BANCO_TECHDENGUE_CHANGES_SQL, params=(since,), batch_size=batch_size)
+    
     def get_banco_techdengue_by_date_range(
         self,
         start_date: datetime,
@@ -78,20 +331,7 @@ class TechDengueRepository:
         Returns:
             DataFrame com registros
         """
-        query = """
-        SELECT 
-            id,
-            nome,
-            lat,
-            long,
-            ST_AsGeoJSON(geom) as geom_json,
-            data_criacao,
-            analista,
-            id_sistema
-        FROM banco_techdengue
-        WHERE data_criacao BETWEEN %s AND %s
-        ORDER BY data_criacao DESC
-        """
+        query = BANCO_TECHDENGUE_BY_DATE_RANGE_SQL
         
         logger.info(f"Buscando registros entre {start_date} e {end_date}")
         return self.db.query_to_dataframe(
@@ -100,6 +340,15 @@ class TechDengueRepository:
             parse_dates=['data_criacao']
         )
     
+    def get_banco_techdengue_fingerprint(self) -> Dict[str, Any]:
+        """
+        Retorna o fingerprint remoto de banco_techdengue (calculado no servidor)
+        
+        Returns:
+            Dicionário com row_count, max_updated_at e content_hash
+        """
+        return self._fingerprint(BANCO_TECHDENGUE_FINGERPRINT_SQL)
+    
     def get_banco_techdengue_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas de banco_techdengue
@@ -107,16 +356,7 @@ class TechDengueRepository:
         Returns:
             Dicionário com estatísticas
         """
-        query = """
-        SELECT 
-            COUNT(*) as total_registros,
-            COUNT(DISTINCT analista) as total_analistas,
-            MIN(data_criacao) as data_mais_antiga,
-            MAX(data_criacao) as data_mais_recente,
-            COUNT(CASE WHEN geom IS NOT NULL THEN 1 END) as registros_com_geometria,
-            COUNT(CASE WHEN lat IS NOT NULL AND long IS NOT NULL THEN 1 END) as registros_com_coordenadas
-        FROM banco_techdengue
-        """
+        query = BANCO_TECHDENGUE_STATS_SQL
         
         logger.info("Calculando estatísticas de banco_techdengue")
         df = self.db.query_to_dataframe(query, parse_dates=['data_mais_antiga', 'data_mais_recente'])
@@ -139,38 +379,7 @@ class TechDengueRepository:
         Returns:
             DataFrame com POIs
         """
-        query = """
-        SELECT 
-            id,
-            created_at,
-            updated_at,
-            id_atividade,
-            id_sub_atividade,
-            nome_sub_atividade,
-            quadra,
-            bairro,
-            logradouro,
-            poi,
-            descricao,
-            vol_estimado,
-            pastilhas,
-            granulado,
-            data_visita,
-            removido_solucionado,
-            descaracterizado,
-            tratado,
-            morador_ausente,
-            nao_autorizado,
-            observacao,
-            tratamento_via_drone,
-            monitorado,
-            lat,
-            longi,
-            foto
-        FROM planilha_campo
-        WHERE deleted_at IS NULL
-        ORDER BY created_at DESC NULLS LAST
-        """
+        query = PLANILHA_CAMPO_ALL_SQL
         
         if limit:
             query += f" LIMIT {limit}"
@@ -178,6 +387,37 @@ class TechDengueRepository:
         logger.info(f"Buscando POIs de planilha_campo (limit={limit})")
         return self.db.query_to_dataframe(query, parse_dates=['created_at', 'updated_at'])
     
+    def iter_planilha_campo_batches(self, batch_size: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Transmite planilha_campo completa em lotes Arrow (cursor server-side)
+        
+        Args:
+            batch_size: Linhas por lote (default: SYNC_BATCH_SIZE)
+            
+        Yields:
+            pyarrow.RecordBatch
+        """
+        logger.info("Transmitindo POIs de planilha_campo em lotes (cursor server-side)")
+        return self.db.stream_batches(PLANILHA_CAMPO_ALL_SQL, batch_size=batch_size)
+    
+    def iter_planilha_campo_changes(
+        self,
+        since: datetime,
+        batch_size: Optional[int] = None
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Transmite POIs criados, alterados ou excluídos (deleted_at) desde ``since``
+        
+        Args:
+            since: Watermark da última sincronização
+            batch_size: Linhas por lote (default: SYNC_BATCH_SIZE)
+            
+        Yields:
+            pyarrow.RecordBatch (com as colunas deleted_at e sync_watermark)
+        """
+        logger.info(f"Transmitindo alterações de planilha_campo desde {since}")
+        return self.db.stream_batches(PLANILHA_CAMPO_CHANGES_SQL, params=(since, since), batch_size=batch_size)
+    
     def get_planilha_campo_by_atividade(self, id_atividade: str) -> pd.DataFrame:
         """
         Retorna POIs de uma atividade específica
@@ -188,23 +428,7 @@ class TechDengueRepository:
         Returns:
             DataFrame com POIs da atividade
         """
-        query = """
-        SELECT 
-            id,
-            id_atividade,
-            poi,
-            descricao,
-            bairro,
-            lat,
-            longi,
-            data_upload,
-            categoria,
-            tratamento,
-            observacoes
-        FROM planilha_campo
-        WHERE id_atividade = %s
-        ORDER BY data_upload DESC
-        """
+        query = PLANILHA_CAMPO_BY_ATIVIDADE_SQL
         
         logger.info(f"Buscando POIs da atividade {id_atividade}")
         return self.db.query_to_dataframe(
@@ -213,6 +437,15 @@ class TechDengueRepository:
             parse_dates=['data_upload']
         )
     
+    def get_planilha_campo_fingerprint(self) -> Dict[str, Any]:
+        """
+        Retorna o fingerprint remoto de planilha_campo (calculado no servidor)
+        
+        Returns:
+            Dicionário com row_count, max_updated_at e content_hash
+        """
+        return self._fingerprint(PLANILHA_CAMPO_FINGERPRINT_SQL)
+    
     def get_planilha_campo_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas de planilha_campo
@@ -220,17 +453,7 @@ class TechDengueRepository:
         Returns:
             Dicionário com estatísticas
         """
-        query = """
-        SELECT 
-            COUNT(*) as total_pois,
-            COUNT(DISTINCT id_atividade) as total_atividades,
-            MIN(created_at) as data_mais_antiga,
-            MAX(created_at) as data_mais_recente,
-            COUNT(CASE WHEN lat IS NOT NULL AND longi IS NOT NULL THEN 1 END) as pois_com_coordenadas,
-            COUNT(CASE WHEN tratado IS NOT NULL OR removido_solucionado IS NOT NULL THEN 1 END) as pois_com_tratamento
-        FROM planilha_campo
-        WHERE deleted_at IS NULL
-        """
+        query = PLANILHA_CAMPO_STATS_SQL
         
         logger.info("Calculando estatísticas de planilha_campo")
         df = self.db.query_to_dataframe(query, parse_dates=['data_mais_antiga', 'data_mais_recente'])
@@ -246,16 +469,7 @@ class TechDengueRepository:
         Returns:
             DataFrame com categoria e contagem
         """
-        query = """
-        SELECT 
-            categoria,
-            COUNT(*) as total_pois,
-            COUNT(CASE WHEN tratamento IS NOT NULL THEN 1 END) as pois_tratados
-        FROM planilha_campo
-        WHERE categoria IS NOT NULL
-        GROUP BY categoria
-        ORDER BY total_pois DESC
-        """
+        query = POIS_POR_CATEGORIA_SQL
         
         logger.info("Agregando POIs por categoria")
         return self.db.query_to_dataframe(query)
@@ -275,18 +489,7 @@ class TechDengueRepository:
             DataFrame com dados agregados
         """
         # Esta é uma query exemplo - ajustar conforme estrutura real
-        query = """
-        SELECT 
-            id_atividade,
-            COUNT(*) as total_pois,
-            COUNT(CASE WHEN tratamento IS NOT NULL THEN 1 END) as total_tratados,
-            MIN(data_upload) as data_inicio,
-            MAX(data_upload) as data_fim
-        FROM planilha_campo
-        WHERE id_atividade IS NOT NULL
-        GROUP BY id_atividade
-        ORDER BY total_pois DESC
-        """
+        query = ATIVIDADES_AGREGADAS_SQL
         
         logger.info("Agregando atividades")
         return self.db.query_to_dataframe(
@@ -313,17 +516,7 @@ class TechDengueRepository:
         
         trunc = trunc_map.get(intervalo, 'month')
         
-        query = f"""
-        SELECT 
-            DATE_TRUNC('{trunc}', data_upload) as periodo,
-            COUNT(*) as total_pois,
-            COUNT(DISTINCT id_atividade) as total_atividades,
-            COUNT(CASE WHEN tratamento IS NOT NULL THEN 1 END) as pois_tratados
-        FROM planilha_campo
-        WHERE data_upload IS NOT NULL
-        GROUP BY DATE_TRUNC('{trunc}', data_upload)
-        ORDER BY periodo
-        """
+        query = EVOLUCAO_TEMPORAL_POIS_SQL.format(trunc=trunc)
         
         logger.info(f"Calculando evolução temporal (intervalo={intervalo})")
         return self.db.query_to_dataframe(query, parse_dates=['periodo'])
@@ -349,26 +542,7 @@ class TechDengueRepository:
         Returns:
             DataFrame com POIs no raio
         """
-        query = """
-        SELECT 
-            id,
-            poi,
-            descricao,
-            lat,
-            longi,
-            ST_Distance(
-                ST_SetSRID(ST_MakePoint(longi, lat), 4326)::geography,
-                ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography
-            ) as distancia_metros
-        FROM planilha_campo
-        WHERE lat IS NOT NULL AND longi IS NOT NULL
-            AND ST_DWithin(
-                ST_SetSRID(ST_MakePoint(longi, lat), 4326)::geography,
-                ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                %s
-            )
-        ORDER BY distancia_metros
-        """
+        query = POIS_EM_RAIO_SQL
         
         logger.info(f"Buscando POIs em raio de {raio_metros}m de ({lat}, {lon})")
         return self.db.query_to_dataframe(
@@ -380,6 +554,17 @@ class TechDengueRepository:
     # UTILIDADES
     # ========================================================================
     
+    def _fingerprint(self, query: str) -> Dict[str, Any]:
+        """Executa a consulta de fingerprint e normaliza o resultado (serializável em JSON)"""
+        df = self.db.query_to_dataframe(query)
+        row = df.iloc[0] if len(df) > 0 else {}
+        max_updated_at = row.get('max_updated_at')
+        return {
+            'row_count': int(row.get('row_count', 0) or 0),
+            'max_updated_at': pd.Timestamp(max_updated_at).isoformat() if pd.notna(max_updated_at) else None,
+            'content_hash': str(row.get('content_hash', '0')),
+        }
+    
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """
         Retorna informações sobre uma tabela
@@ -400,3 +585,22 @@ class TechDengueRepository:
             True se conexão OK
         """
         return self.db.test_connection()
+
+
+# Instância global (singleton pattern), compartilhada entre as requisições da API
+_repository_instance: Optional[TechDengueRepository] = None
+
+
+def get_repository() -> TechDengueRepository:
+    """
+    Retorna instância global do TechDengueRepository (singleton)
+    
+    Returns:
+        Instância do TechDengueRepository sobre o DatabaseManager global
+    """
+    global _repository_instance
+    
+    if _repository_instance is None:
+        _repository_instance = TechDengueRepository()
+    
+    return _repository_instance
@@ -2,6 +2,6 @@
 Módulo compartilhado com utilitários reutilizáveis.
 """
 
-from src.shared.exporters import export_csv, export_parquet
+from src.shared.exporters import export_csv, export_ndjson, export_parquet
 
-__all__ = ["export_csv", "export_parquet"]
+__all__ = ["export_csv", "export_ndjson", "export_parquet"]
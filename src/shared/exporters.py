@@ -1,67 +1,221 @@
 """
-Exporters para CSV e Parquet.
+Exporters para CSV, NDJSON e Parquet.
 Funções reutilizáveis para exportação de dados.
+
+As exportações são transmitidas em lotes de linhas: CSV e NDJSON são
+serializados lote a lote e o Parquet é escrito row group a row group por
+um ``pyarrow.parquet.ParquetWriter``, de modo que o primeiro byte sai
+imediatamente e a memória de pico não depende do tamanho do resultado.
 """
 
-import io
-from typing import Any
+import codecs
+from typing import Any, Iterator, Optional, Union
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from fastapi.responses import StreamingResponse
 from loguru import logger
 
+from src.config import Config
+
+ExportData = Union[pd.DataFrame, pa.Table]
+
+
+def _batch_size(batch_size: Optional[int]) -> int:
+    return max(1, int(batch_size or getattr(Config, "EXPORT_BATCH_SIZE", 5000)))
+
+
+def _num_rows(data: ExportData) -> int:
+    return data.num_rows if isinstance(data, pa.Table) else len(data)
+
+
+def iso_column(column: Union[pa.Array, pa.ChunkedArray]) -> Union[pa.Array, pa.ChunkedArray]:
+    """Datas e timestamps como texto ISO 8601, no formato das respostas JSON da API."""
+    if pa.types.is_date(column.type):
+        return column.cast(pa.string())
+    if pa.types.is_timestamp(column.type):
+        return pc.replace_substring(column.cast(pa.string()), " ", "T", max_replacements=1)
+    return column
+
+
+def _iter_frames(data: ExportData, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Fatia os dados em DataFrames de até ``batch_size`` linhas."""
+    if isinstance(data, pa.Table):
+        for batch in data.to_batches(max_chunksize=batch_size):
+            yield batch.to_pandas()
+        return
+    for start in range(0, len(data), batch_size):
+        yield data.iloc[start:start + batch_size]
+
+
+def iter_csv(
+    data: ExportData,
+    batch_size: Optional[int] = None,
+    encoding: str = "utf-8",
+) -> Iterator[bytes]:
+    """Gera o CSV em blocos de bytes, um por lote de linhas (cabeçalho no primeiro)."""
+    encoder = codecs.getincrementalencoder(encoding)()
+    header = True
+    for frame in _iter_frames(data, _batch_size(batch_size)):
+        yield encoder.encode(frame.to_csv(index=False, header=header))
+        header = False
+    if header:
+        # Sem linhas: emitir apenas o cabeçalho
+        columns = data.column_names if isinstance(data, pa.Table) else data.columns
+        yield encoder.encode(pd.DataFrame(columns=list(columns)).to_csv(index=False))
+
+
+def iter_ndjson(data: ExportData, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Gera JSON delimitado por linha (um objeto por registro), lote a lote.
+    Datas de tabelas Arrow saem como na resposta JSON (``iso_column``).
+    """
+    size = _batch_size(batch_size)
+    if isinstance(data, pa.Table):
+        frames = (
+            pa.RecordBatch.from_arrays([iso_column(c) for c in batch.columns], names=batch.schema.names).to_pandas()
+            for batch in data.to_batches(max_chunksize=size)
+        )
+    else:
+        frames = _iter_frames(data, size)
+    for frame in frames:
+        if frame.empty:
+            continue
+        chunk = frame.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+        if not chunk.endswith("\n"):
+            chunk += "\n"
+        yield chunk.encode("utf-8")
+
+
+class _ChunkSink:
+    """Arquivo somente-escrita que acumula bytes até serem drenados pelo gerador."""
+
+    def __init__(self):
+        self._chunks: list = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks = []
+        return out
+
+
+def iter_parquet(data: ExportData, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """Gera o Parquet row group a row group via ``ParquetWriter``."""
+    size = _batch_size(batch_size)
+    sink = _ChunkSink()
+    if isinstance(data, pa.Table):
+        schema = data.schema
+        batches = data.to_batches(max_chunksize=size)
+    else:
+        schema = pa.Schema.from_pandas(data, preserve_index=False)
+        batches = (
+            pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+            for frame in _iter_frames(data, size)
+        )
+
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            writer.write_batch(batch, row_group_size=size)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
 
 def export_csv(
-    df: pd.DataFrame,
+    df: ExportData,
     filename: str = "export.csv",
     encoding: str = "utf-8-sig",
+    batch_size: Optional[int] = None,
 ) -> StreamingResponse:
     """
     Exporta DataFrame para CSV como StreamingResponse.
-    
+
     Args:
-        df: DataFrame a exportar
+        df: DataFrame (ou tabela Arrow) a exportar
         filename: Nome do arquivo para download
         encoding: Encoding do CSV (default: utf-8-sig para Excel)
-    
+        batch_size: Linhas por bloco transmitido
+
     Returns:
         StreamingResponse com o CSV
     """
-    buffer = io.StringIO()
-    df.to_csv(buffer, index=False, encoding=encoding)
-    buffer.seek(0)
-    
-    logger.info(f"Exportando CSV: {filename} ({len(df)} linhas)")
-    
+    logger.info(f"Exportando CSV: {filename} ({_num_rows(df)} linhas)")
+
     return StreamingResponse(
-        iter([buffer.getvalue()]),
+        iter_csv(df, batch_size=batch_size, encoding=encoding),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
 
+def export_ndjson(
+    df: ExportData,
+    filename: str = "export.ndjson",
+    batch_size: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Exporta DataFrame para NDJSON (um registro JSON por linha) como StreamingResponse.
+
+    Args:
+        df: DataFrame (ou tabela Arrow) a exportar
+        filename: Nome do arquivo para download
+        batch_size: Linhas por bloco transmitido
+
+    Returns:
+        StreamingResponse com o NDJSON
+    """
+    logger.info(f"Exportando NDJSON: {filename} ({_num_rows(df)} linhas)")
+
+    return StreamingResponse(
+        iter_ndjson(df, batch_size=batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 def export_parquet(
-    df: pd.DataFrame,
+    df: ExportData,
     filename: str = "export.parquet",
+    batch_size: Optional[int] = None,
 ) -> StreamingResponse:
     """
     Exporta DataFrame para Parquet como StreamingResponse.
-    
+
     Args:
-        df: DataFrame a exportar
+        df: DataFrame (ou tabela Arrow) a exportar
         filename: Nome do arquivo para download
-    
+        batch_size: Linhas por row group transmitido
+
     Returns:
         StreamingResponse com o Parquet
     """
-    buffer = io.BytesIO()
-    df.to_parquet(buffer, index=False, engine="pyarrow")
-    buffer.seek(0)
-    
-    logger.info(f"Exportando Parquet: {filename} ({len(df)} linhas)")
-    
+    logger.info(f"Exportando Parquet: {filename} ({_num_rows(df)} linhas)")
+
     return StreamingResponse(
-        iter([buffer.getvalue()]),
+        iter_parquet(df, batch_size=batch_size),
         media_type="application/octet-stream",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
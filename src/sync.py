@@ -4,39 +4,124 @@ Sincroniza dados do servidor GIS com cache local
 """
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable
 from datetime import datetime
 import json
 import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 from .config import Config
+from .core.excel_cache import read_excel_cached
+from .core.partitioned_store import PARTITION_COLUMNS, PartitionedParquetStore, combined_hash
 from .repository import TechDengueRepository
 from .database import get_database
 
 logger = logging.getLogger(__name__)
 
 
+# Tabelas sincronizadas: chave primária, colunas de watermark, métodos do repositório
+# (lotes completos, alterações e fingerprint remoto) e, opcionalmente, a coluna de
+# data usada para particionar o cache (year=/month=). Tabelas com 'incremental'
+# falso são sempre sincronizadas por completo.
+SYNC_TABLES: Dict[str, Dict[str, Any]] = {
+    'banco_techdengue': {
+        'key': 'id',
+        'watermark': ['data_criacao'],
+        'order_by': 'data_criacao',
+        'full': 'iter_banco_techdengue_batches',
+        'changes': 'iter_banco_techdengue_changes',
+        'fingerprint': 'get_banco_techdengue_fingerprint',
+        # Sem coluna de alteração/exclusão: o watermark de data_criacao só
+        # captura inserções, e atualizações e exclusões nunca chegariam ao cache
+        'incremental': False,
+    },
+    'planilha_campo': {
+        'key': 'id',
+        'watermark': ['updated_at', 'created_at'],
+        'order_by': 'created_at',
+        'full': 'iter_planilha_campo_batches',
+        'changes': 'iter_planilha_campo_changes',
+        'fingerprint': 'get_planilha_campo_fingerprint',
+        'partition_by': 'created_at',
+    },
+}
+
+
+def register_sync_table(
+    table_name: str,
+    key: str,
+    watermark: List[str],
+    order_by: str,
+    full: str,
+    changes: str,
+    partition_by: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    incremental: bool = True,
+) -> None:
+    """
+    Registra uma tabela para sincronização (sync_table/sync_all)
+    
+    Args:
+        table_name: Nome da tabela (e do cache local)
+        key: Coluna de chave primária
+        watermark: Colunas de data usadas como high-watermark
+        order_by: Coluna de ordenação (decrescente) do cache
+        full: Método do repositório que transmite a tabela completa em lotes
+        changes: Método do repositório que transmite as alterações desde o watermark
+        partition_by: Coluna de data para particionar o cache (opcional)
+        fingerprint: Método do repositório que retorna o fingerprint remoto (opcional)
+        incremental: Permite o modo incremental; use False quando o watermark não
+            registra atualizações e exclusões (ex.: apenas a data de criação)
+    """
+    spec: Dict[str, Any] = {
+        'key': key,
+        'watermark': list(watermark),
+        'order_by': order_by,
+        'full': full,
+        'changes': changes,
+    }
+    if partition_by:
+        spec['partition_by'] = partition_by
+    if fingerprint:
+        spec['fingerprint'] = fingerprint
+    if not incremental:
+        spec['incremental'] = False
+    SYNC_TABLES[table_name] = spec
+
+
 class SyncMetadata:
     """Metadados de sincronização"""
     
     def __init__(self, cache_dir: Path):
         self.cache_dir = cache_dir
         self.metadata_file = cache_dir / "sync_metadata.json"
+        # Tabelas sincronizadas em paralelo compartilham o mesmo arquivo
+        self._lock = threading.RLock()
     
     def load(self) -> Dict[str, Any]:
         """Carrega metadados"""
-        if self.metadata_file.exists():
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        with self._lock:
+            if self.metadata_file.exists():
+                with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            return {}
     
     def save(self, metadata: Dict[str, Any]):
-        """Salva metadados"""
-        self.cache_dir.mkdir(exist_ok=True, parents=True)
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, default=str)
+        """Salva metadados (escrita atômica)"""
+        with self._lock:
+            self.cache_dir.mkdir(exist_ok=True, parents=True)
+            tmp_file = self.metadata_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            os.replace(tmp_file, self.metadata_file)
     
     def get_last_sync(self, table_name: str) -> Optional[datetime]:
         """Retorna data da última sincronização"""
@@ -47,14 +132,42 @@ class SyncMetadata:
                 return datetime.fromisoformat(timestamp)
         return None
     
+    def get_info(self, table_name: str) -> Dict[str, Any]:
+        """Retorna os metadados de sincronização de uma tabela"""
+        return dict(self.load().get(table_name, {}))
+    
+    def get_watermark(self, table_name: str) -> Optional[datetime]:
+        """Retorna o high-watermark da tabela (maior data de alteração sincronizada)"""
+        watermark = self.get_info(table_name).get('watermark')
+        return datetime.fromisoformat(watermark) if watermark else None
+    
+    def set_watermark(self, table_name: str, watermark: datetime):
+        """Registra o high-watermark da tabela sem alterar os demais metadados"""
+        with self._lock:
+            metadata = self.load()
+            metadata.setdefault(table_name, {})['watermark'] = watermark.isoformat()
+            self.save(metadata)
+    
+    def get_fingerprint(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Retorna o fingerprint remoto registrado na última sincronização"""
+        return self.get_info(table_name).get('fingerprint')
+    
+    def set_fingerprint(self, table_name: str, fingerprint: Dict[str, Any]):
+        """Registra o fingerprint remoto sem alterar os demais metadados"""
+        with self._lock:
+            metadata = self.load()
+            metadata.setdefault(table_name, {})['fingerprint'] = dict(fingerprint)
+            self.save(metadata)
+    
     def update_sync(self, table_name: str, info: Dict[str, Any]):
-        """Atualiza informações de sincronização"""
-        metadata = self.load()
-        metadata[table_name] = {
-            'last_sync': datetime.now().isoformat(),
-            **info
-        }
-        self.save(metadata)
+        """Atualiza informações de sincronização (mantém watermark e fingerprint)"""
+        with self._lock:
+            metadata = self.load()
+            metadata.setdefault(table_name, {}).update({
+                'last_sync': datetime.now().isoformat(),
+                **info
+            })
+            self.save(metadata)
 
 
 class DataSynchronizer:
@@ -80,6 +193,8 @@ class DataSynchronizer:
         self.repository = TechDengueRepository(get_database())
         self.cache_dir = config.PATHS.cache_dir
         self.metadata = SyncMetadata(self.cache_dir)
+        # Fingerprints consultados por detect_changes, registrados após a sincronização
+        self._pending_fingerprints: Dict[str, Dict[str, Any]] = {}
         
         logger.info("DataSynchronizer inicializado")
     
@@ -132,110 +247,402 @@ class DataSynchronizer:
         
         self.metadata.update_sync(table_name, sync_info)
     
-    def _load_from_cache(self, table_name: str) -> Optional[pd.DataFrame]:
+    def _save_batches_to_cache(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        table_name: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
-        Carrega DataFrame do cache
+        Grava lotes Arrow no cache de forma incremental (memória limitada a um lote)
+        
+        O Parquet é escrito em arquivo temporário e só substitui o cache ao final;
+        o hash MD5 é acumulado lote a lote.
         
         Args:
+            batches: Lotes Arrow (ex.: repository.iter_planilha_campo_batches())
             table_name: Nome da tabela
+            metadata: Metadados adicionais
             
         Returns:
-            DataFrame ou None se não existir
+            Dicionário com row_count e columns
         """
         cache_file = self.cache_dir / f"{table_name}.parquet"
+        tmp_file = self.cache_dir / f"{table_name}.parquet.tmp"
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        
+        store = self._partitioned_store(table_name)
+        if store is not None:
+            partitions = store.write(batches)
+            return self._update_partitioned_metadata(table_name, partitions, metadata)
+        
+        md5 = hashlib.md5()
+        row_count = 0
+        writer: Optional[pq.ParquetWriter] = None
+        try:
+            for batch in batches:
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_file, batch.schema)
+                writer.write_batch(batch)
+                row_count += batch.num_rows
+                md5.update(pd.util.hash_pandas_object(batch.to_pandas(), index=False).values.tobytes())
+        except Exception:
+            if writer is not None:
+                writer.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+        
+        if writer is None:
+            raise ValueError(f"Nenhum lote recebido para {table_name}")
+        writer.close()
+        columns = writer.schema.names
+        os.replace(tmp_file, cache_file)
+        logger.info(f"✓ Cache salvo: {cache_file} ({row_count:,} linhas)")
+        
+        self.metadata.update_sync(table_name, {
+            'row_count': row_count,
+            'columns': columns,
+            'hash_md5': md5.hexdigest(),
+            'file_path': str(cache_file),
+            **(metadata or {})
+        })
+        return {'row_count': row_count, 'columns': columns}
+    
+    def _partitioned_store(self, table_name: str) -> Optional[PartitionedParquetStore]:
+        """Store particionado da tabela (None se a tabela usa arquivo único)"""
+        partition_by = SYNC_TABLES.get(table_name, {}).get('partition_by')
+        if not partition_by:
+            return None
+        return PartitionedParquetStore(self.cache_dir / f"{table_name}.parquet", partition_by)
+    
+    def _update_partitioned_metadata(
+        self,
+        table_name: str,
+        partitions: Dict[str, Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Registra metadados de um cache particionado (contagens e hash por partição)"""
+        store = self._partitioned_store(table_name)
+        row_count = sum(p['rows'] for p in partitions.values())
+        columns = [c for c in store.dataset().schema.names if c not in PARTITION_COLUMNS]
+        
+        self.metadata.update_sync(table_name, {
+            'row_count': row_count,
+            'columns': columns,
+            'hash_md5': combined_hash(partitions),
+            'file_path': str(store.root),
+            'partitions': partitions,
+            **(metadata or {})
+        })
+        return {'row_count': row_count, 'columns': columns}
+    
+    def cache_dataset(self, table_name: str) -> Optional[ds.Dataset]:
+        """
+        Dataset Arrow do cache (arquivo único ou particionado), sem carregar dados
         
-        if cache_file.exists():
-            logger.info(f"Carregando do cache: {cache_file}")
-            return pd.read_parquet(cache_file)
+        Nos caches particionados, filtros sobre ``year``/``month`` podam partições:
+            sync.cache_dataset('planilha_campo').to_table(filter=ds.field('year') >= 2024)
         
+        Returns:
+            pyarrow.dataset.Dataset ou None se o cache não existir
+        """
+        store = self._partitioned_store(table_name)
+        if store is not None and store.exists():
+            return store.dataset()
+        cache_file = self.cache_dir / f"{table_name}.parquet"
+        if cache_file.is_file():
+            return ds.dataset(cache_file, format="parquet")
         return None
     
-    def sync_banco_techdengue(self, force: bool = False) -> Dict[str, Any]:
+    def load_cache(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        filter: Optional[ds.Expression] = None
+    ) -> Optional[pd.DataFrame]:
         """
-        Sincroniza tabela banco_techdengue
+        Carrega DataFrame do cache, com projeção e filtro opcionais
         
         Args:
-            force: Força sincronização mesmo se cache válido
+            table_name: Nome da tabela
+            columns: Colunas a carregar (default: todas, sem year/month)
+            filter: Expressão Arrow (ex.: ds.field('year') == 2024)
             
         Returns:
-            Dicionário com resultado da sincronização
+            DataFrame ou None se não existir
         """
-        table_name = 'banco_techdengue'
-        logger.info(f"Sincronizando {table_name}...")
+        dataset = self.cache_dataset(table_name)
+        if dataset is None:
+            return None
+        
+        if columns is None:
+            columns = [c for c in dataset.schema.names if c not in PARTITION_COLUMNS]
+        logger.info(f"Carregando do cache: {table_name}")
+        return dataset.to_table(columns=columns, filter=filter).to_pandas()
+    
+    def _load_from_cache(self, table_name: str) -> Optional[pd.DataFrame]:
+        """
+        Carrega DataFrame do cache
         
-        # Verificar cache
-        last_sync = self.metadata.get_last_sync(table_name)
-        if not force and last_sync and self.config.CACHE_ENABLED:
-            cache_age = (datetime.now() - last_sync).total_seconds()
-            if cache_age < self.config.CACHE_TTL_SECONDS:
-                logger.info(f"✓ Cache válido (idade: {cache_age:.0f}s)")
-                cached_df = self._load_from_cache(table_name)
-                if cached_df is not None:
-                    return {
-                        'status': 'cache_hit',
-                        'row_count': len(cached_df),
-                        'cache_age_seconds': cache_age
-                    }
+        Args:
+            table_name: Nome da tabela
+            
+        Returns:
+            DataFrame ou None se não existir
+        """
+        return self.load_cache(table_name)
+    
+    def _cache_watermark(self, table_name: str) -> Optional[datetime]:
+        """Maior valor das colunas de watermark no cache local (None se vazio)"""
+        spec = SYNC_TABLES[table_name]
+        dataset = self.cache_dataset(table_name)
+        columns = [c for c in spec['watermark'] if c in dataset.schema.names]
+        table = dataset.to_table(columns=columns)
+        values = [pc.max(table.column(c)).as_py() for c in columns]
+        values = [v for v in values if v is not None]
+        return max(values) if values else None
+    
+    def _merge_changes(
+        self,
+        table_name: str,
+        changes: Iterable[pa.RecordBatch],
+        watermark: datetime
+    ) -> Dict[str, Any]:
+        """
+        Aplica as alterações desde o watermark ao cache local, pela chave primária
         
-        # Buscar do servidor
-        logger.info("Buscando dados do servidor...")
-        df = self.repository.get_banco_techdengue_all()
+        Linhas com ``deleted_at`` preenchido são removidas do cache (soft delete);
+        as demais substituem a versão em cache ou são acrescentadas.
         
-        # Salvar no cache
-        self._save_to_cache(df, table_name)
+        Args:
+            table_name: Nome da tabela
+            changes: Lotes Arrow com as linhas alteradas (coluna sync_watermark)
+            watermark: Watermark anterior
+            
+        Returns:
+            Dicionário com contagens da mesclagem
+        """
+        spec = SYNC_TABLES[table_name]
+        key = spec['key']
+        cache_file = self.cache_dir / f"{table_name}.parquet"
         
-        return {
-            'status': 'synced',
-            'row_count': len(df),
-            'columns': list(df.columns)
-        }
+        batches = [b for b in changes if b.num_rows]
+        if not batches:
+            self.metadata.update_sync(table_name, {'mode': 'incremental'})
+            logger.info(f"✓ {table_name} sem alterações desde {watermark}")
+            return {'row_count': self.metadata.get_info(table_name).get('row_count'), 'upserted': 0, 'deleted': 0}
+        
+        delta = pa.Table.from_batches(batches)
+        new_watermark = max(watermark, pc.max(delta.column('sync_watermark')).as_py())
+        if 'deleted_at' in delta.column_names:
+            deleted_mask = pc.is_valid(delta.column('deleted_at'))
+        else:
+            deleted_mask = pa.array([False] * delta.num_rows)
+        
+        deleted = int(pc.sum(deleted_mask).as_py() or 0)
+        store = self._partitioned_store(table_name)
+        if store is not None:
+            schema = pa.schema([f for f in store.dataset().schema if f.name not in PARTITION_COLUMNS])
+            upserts = delta.filter(pc.invert(deleted_mask)).select(schema.names).cast(schema)
+            written, removed = store.merge(upserts, delta.column(key).combine_chunks(), key, spec['order_by'])
+            partitions = {**self.metadata.get_info(table_name).get('partitions', {}), **written}
+            for name in removed:
+                partitions.pop(name, None)
+            saved = self._update_partitioned_metadata(
+                table_name,
+                partitions,
+                metadata={'watermark': new_watermark.isoformat(), 'mode': 'incremental'},
+            )
+            logger.info(f"✓ {table_name}: {upserts.num_rows:,} linhas novas/alteradas, {deleted:,} excluídas")
+            return {**saved, 'upserted': upserts.num_rows, 'deleted': deleted, 'partitions_rewritten': len(written)}
+        
+        cached = pq.read_table(cache_file)
+        upserts = delta.filter(pc.invert(deleted_mask)).select(cached.column_names).cast(cached.schema)
+        kept = cached.filter(pc.invert(pc.is_in(cached.column(key), value_set=delta.column(key).combine_chunks())))
+        merged = pa.concat_tables([kept, upserts]).sort_by([(spec['order_by'], 'descending')])
+        
+        saved = self._save_batches_to_cache(
+            merged.to_batches(max_chunksize=self.config.SYNC_BATCH_SIZE) or [pa.RecordBatch.from_pylist([], schema=merged.schema)],
+            table_name,
+            metadata={'watermark': new_watermark.isoformat(), 'mode': 'incremental'},
+        )
+        logger.info(f"✓ {table_name}: {upserts.num_rows:,} linhas novas/alteradas, {deleted:,} excluídas")
+        return {**saved, 'upserted': upserts.num_rows, 'deleted': deleted}
     
-    def sync_planilha_campo(self, force: bool = False) -> Dict[str, Any]:
+    def remote_fingerprint(self, table_name: str) -> Optional[Dict[str, Any]]:
         """
-        Sincroniza tabela planilha_campo (POIs)
+        Consulta o fingerprint remoto da tabela (contagem, última alteração e hash
+        agregado calculados no servidor, sem baixar linhas)
+        
+        Returns:
+            Fingerprint ou None se a tabela não registra método de fingerprint
+        """
+        method = SYNC_TABLES[table_name].get('fingerprint')
+        if not method:
+            return None
+        return getattr(self.repository, method)()
+    
+    def detect_changes(self, tables: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Compara o fingerprint remoto de cada tabela com o registrado na última
+        sincronização. Tabelas sem cache local, sem fingerprint registrado ou cuja
+        consulta falhar são consideradas alteradas.
+        
+        Os fingerprints consultados ficam pendentes e são registrados quando a
+        tabela for sincronizada com sucesso (sync_table/sync_all).
         
         Args:
-            force: Força sincronização mesmo se cache válido
+            tables: Subconjunto de tabelas (default: todas as de SYNC_TABLES)
+            
+        Returns:
+            Dicionário tabela -> True se houve mudança
+        """
+        changes = {}
+        for table_name in tables or SYNC_TABLES:
+            try:
+                remote = self.remote_fingerprint(table_name)
+            except Exception as e:
+                logger.warning(f"Falha ao consultar fingerprint de {table_name}: {e}")
+                changes[table_name] = True
+                continue
+            
+            if remote is None or self.cache_dataset(table_name) is None:
+                changes[table_name] = True
+            else:
+                changes[table_name] = remote != self.metadata.get_fingerprint(table_name)
+            
+            if remote is not None:
+                self._pending_fingerprints[table_name] = remote
+            logger.info(f"{table_name}: {'alterada' if changes[table_name] else 'sem mudanças'} (fingerprint remoto)")
+        
+        return changes
+    
+    def _commit_fingerprint(self, table_name: str) -> None:
+        """Registra o fingerprint consultado antes da sincronização concluída"""
+        fingerprint = self._pending_fingerprints.pop(table_name, None)
+        if fingerprint is not None:
+            self.metadata.set_fingerprint(table_name, fingerprint)
+    
+    def sync_table(self, table_name: str, force: bool = False, incremental: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Sincroniza uma tabela registrada em SYNC_TABLES (ver register_sync_table)
+        
+        Com cache e watermark existentes (e sem ``force``), baixa apenas as linhas
+        alteradas desde o watermark; caso contrário, ou se a tabela não permite o
+        modo incremental, baixa a tabela completa.
+        
+        Args:
+            table_name: Nome da tabela
+            force: Força sincronização completa mesmo se cache válido
+            incremental: Usa o modo incremental (default: SYNC_INCREMENTAL)
             
         Returns:
             Dicionário com resultado da sincronização
         """
-        table_name = 'planilha_campo'
+        spec = SYNC_TABLES[table_name]
+        incremental = self.config.SYNC_INCREMENTAL if incremental is None else incremental
+        incremental = incremental and spec.get('incremental', True)
         logger.info(f"Sincronizando {table_name}...")
         
-        # Verificar cache
+        # Verificar cache (ignorado se detect_changes viu o fingerprint remoto mudar)
         last_sync = self.metadata.get_last_sync(table_name)
-        if not force and last_sync and self.config.CACHE_ENABLED:
+        changed = (
+            table_name in self._pending_fingerprints
+            and self._pending_fingerprints[table_name] != self.metadata.get_fingerprint(table_name)
+        )
+        if not force and not changed and last_sync and self.config.CACHE_ENABLED:
             cache_age = (datetime.now() - last_sync).total_seconds()
             if cache_age < self.config.CACHE_TTL_SECONDS:
                 logger.info(f"✓ Cache válido (idade: {cache_age:.0f}s)")
-                cached_df = self._load_from_cache(table_name)
-                if cached_df is not None:
+                dataset = self.cache_dataset(table_name)
+                if dataset is not None:
                     return {
                         'status': 'cache_hit',
-                        'row_count': len(cached_df),
+                        'row_count': dataset.count_rows(),
                         'cache_age_seconds': cache_age
                     }
         
-        # Buscar do servidor
+        # Incremental: apenas alterações desde o watermark
+        watermark = self.metadata.get_watermark(table_name)
+        store = self._partitioned_store(table_name)
+        has_cache = store.exists() if store is not None else (self.cache_dir / f"{table_name}.parquet").is_file()
+        if incremental and not force and watermark is not None and has_cache:
+            logger.info(f"Buscando alterações desde {watermark}...")
+            changes = getattr(self.repository, spec['changes'])(watermark, batch_size=self.config.SYNC_BATCH_SIZE)
+            result = {'status': 'synced', 'mode': 'incremental', **self._merge_changes(table_name, changes, watermark)}
+            self._commit_fingerprint(table_name)
+            return result
+        
+        # Buscar do servidor (cursor server-side, lotes de SYNC_BATCH_SIZE)
         logger.info("Buscando dados do servidor...")
-        df = self.repository.get_planilha_campo_all()
+        batches = getattr(self.repository, spec['full'])(batch_size=self.config.SYNC_BATCH_SIZE)
         
-        # Salvar no cache
-        self._save_to_cache(df, table_name)
+        # Salvar no cache lote a lote
+        saved = self._save_batches_to_cache(batches, table_name, metadata={'mode': 'full'})
+        
+        # Registrar watermark para as próximas sincronizações incrementais
+        watermark = self._cache_watermark(table_name)
+        if watermark is not None:
+            self.metadata.set_watermark(table_name, watermark)
+        self._commit_fingerprint(table_name)
         
         return {
             'status': 'synced',
-            'row_count': len(df),
-            'columns': list(df.columns)
+            'mode': 'full',
+            **saved
         }
     
-    def sync_all(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+    def sync_banco_techdengue(self, force: bool = False, incremental: Optional[bool] = None) -> Dict[str, Any]:
         """
-        Sincroniza todas as tabelas
+        Sincroniza tabela banco_techdengue
+        
+        Args:
+            force: Força sincronização completa mesmo se cache válido
+            incremental: Ignorado; a tabela é sempre sincronizada por completo (ver SYNC_TABLES)
+            
+        Returns:
+            Dicionário com resultado da sincronização
+        """
+        return self.sync_table('banco_techdengue', force=force, incremental=incremental)
+    
+    def sync_planilha_campo(self, force: bool = False, incremental: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Sincroniza tabela planilha_campo (POIs)
+        
+        Args:
+            force: Força sincronização completa mesmo se cache válido
+            incremental: Usa o watermark de updated_at/deleted_at (default: SYNC_INCREMENTAL)
+            
+        Returns:
+            Dicionário com resultado da sincronização
+        """
+        return self.sync_table('planilha_campo', force=force, incremental=incremental)
+    
+    def _sync_safely(self, table_name: str, force: bool) -> Dict[str, Any]:
+        """Sincroniza uma tabela convertendo falhas em resultado de erro"""
+        try:
+            return self.sync_table(table_name, force=force)
+        except Exception as e:
+            logger.error(f"Erro ao sincronizar {table_name}: {e}")
+            return {'status': 'error', 'error': str(e)}
+    
+    def sync_all(
+        self,
+        force: bool = False,
+        tables: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Sincroniza todas as tabelas registradas, em paralelo
+        
+        Cada tabela roda em uma thread do pool (limitado a SYNC_MAX_WORKERS),
+        com sua própria conexão do pool do DatabaseManager; o tempo total fica
+        limitado pela tabela mais lenta, não pela soma.
         
         Args:
             force: Força sincronização mesmo se cache válido
+            tables: Subconjunto de tabelas (default: todas as de SYNC_TABLES)
+            max_workers: Máximo de tabelas simultâneas (default: SYNC_MAX_WORKERS)
             
         Returns:
             Dicionário com resultados de cada tabela
@@ -244,21 +651,15 @@ class DataSynchronizer:
         logger.info("SINCRONIZAÇÃO COMPLETA")
         logger.info("="*80)
         
-        results = {}
-        
-        # Sincronizar banco_techdengue
-        try:
-            results['banco_techdengue'] = self.sync_banco_techdengue(force=force)
-        except Exception as e:
-            logger.error(f"Erro ao sincronizar banco_techdengue: {e}")
-            results['banco_techdengue'] = {'status': 'error', 'error': str(e)}
+        tables = list(tables or SYNC_TABLES)
+        unknown = [t for t in tables if t not in SYNC_TABLES]
+        if unknown:
+            raise ValueError(f"Tabelas não registradas para sincronização: {unknown}")
         
-        # Sincronizar planilha_campo
-        try:
-            results['planilha_campo'] = self.sync_planilha_campo(force=force)
-        except Exception as e:
-            logger.error(f"Erro ao sincronizar planilha_campo: {e}")
-            results['planilha_campo'] = {'status': 'error', 'error': str(e)}
+        workers = max(1, min(max_workers or self.config.SYNC_MAX_WORKERS, len(tables) or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync") as executor:
+            futures = {name: executor.submit(self._sync_safely, name, force) for name in tables}
+            results = {name: future.result() for name, future in futures.items()}
         
         logger.info("="*80)
         logger.info("SINCRONIZAÇÃO CONCLUÍDA")
@@ -316,22 +717,24 @@ class DataSynchronizer:
         """
         logger.info(f"Comparando servidor com Excel: {excel_path}")
         
-        # Carregar do servidor (cache)
-        df_servidor = self._load_from_cache('planilha_campo')
-        if df_servidor is None:
+        # Carregar do servidor (cache) - apenas a coluna usada na comparação
+        dataset = self.cache_dataset('planilha_campo')
+        if dataset is None:
             logger.warning("Cache não encontrado. Sincronizando...")
             self.sync_planilha_campo()
-            df_servidor = self._load_from_cache('planilha_campo')
+            dataset = self.cache_dataset('planilha_campo')
+        colunas_servidor = [c for c in dataset.schema.names if c not in PARTITION_COLUMNS]
+        df_servidor = self.load_cache('planilha_campo', columns=[c for c in ['poi'] if c in colunas_servidor])
         
         # Carregar do Excel
-        df_excel = pd.read_excel(excel_path, sheet_name='Atividades (com sub)')
+        df_excel = read_excel_cached(excel_path, sheet_name='Atividades (com sub)')
         
         # Comparar
         comparison = {
             'servidor': {
                 'total_registros': len(df_servidor),
                 'total_pois': df_servidor['poi'].notna().sum() if 'poi' in df_servidor.columns else 0,
-                'colunas': list(df_servidor.columns)
+                'colunas': colunas_servidor
             },
             'excel': {
                 'total_registros': len(df_excel),
@@ -1,10 +1,11 @@
 from __future__ import annotations
 import re
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Set, Tuple
 import pandas as pd
 from pydantic import BaseModel, Field
 from loguru import logger
 from .config import Config
+from .excel_reader import iter_excel_chunks
 
 
 class ValidationIssue(BaseModel):
@@ -63,21 +64,7 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def validate_mega_planilha(path: Optional[str] = None, sheet: str = "Atividades (com sub)") -> ValidationReport:
-    path = path or str(Config.PATHS.data_dir / "dados_techdengue" / "Atividades Techdengue.xlsx")
-    issues: List[ValidationIssue] = []
-
-    try:
-        df = pd.read_excel(path, sheet_name=sheet)
-    except Exception as e:
-        return ValidationReport(ok=False, issues=[ValidationIssue(level="ERROR", message=f"Falha ao ler arquivo: {e}")])
-
-    df = _normalize_columns(df)
-
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
-    if missing:
-        issues.append(ValidationIssue(level="ERROR", message=f"Colunas obrigatórias ausentes: {missing}"))
-
+def _coerce_chunk(df: pd.DataFrame) -> pd.DataFrame:
     for col in NUMERIC_COLUMNS:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
@@ -86,38 +73,108 @@ def validate_mega_planilha(path: Optional[str] = None, sheet: str = "Atividades
         df["DATA_MAP"] = pd.to_datetime(df["DATA_MAP"], errors="coerce").dt.date
 
     if "CODIGO_IBGE" in df.columns:
-        df["CODIGO_IBGE"] = df["CODIGO_IBGE"].astype(str).str.strip()
-        invalid_ibge = (~df["CODIGO_IBGE"].fillna("").str.match(IBGE_PATTERN)).sum()
-        if invalid_ibge > 0:
-            issues.append(ValidationIssue(level="WARN", message="Códigos IBGE fora do padrão 31xxxxx", count=int(invalid_ibge)))
-
-    key_cols = [c for c in ["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"] if c in df.columns]
-    if len(key_cols) == 3:
-        dup = df.duplicated(subset=key_cols).sum()
-        if dup > 0:
-            issues.append(ValidationIssue(level="WARN", message=f"Registros duplicados pela chave {key_cols}", count=int(dup)))
-
-    hectares_total = float(df["HECTARES_MAPEADOS"].sum()) if "HECTARES_MAPEADOS" in df.columns else 0.0
-    pois_total = int(df["POIS"].sum()) if "POIS" in df.columns else 0
-
-    summary = {
-        "hectares_total": hectares_total,
-        "pois_total": pois_total,
-        "path": path,
-        "sheet": sheet,
-        "row_count": int(len(df)),
-        "columns": df.columns.tolist(),
-    }
-
-    has_errors = any(i.level == "ERROR" for i in issues)
-    ok = not has_errors
-
-    logger.info(f"Mega planilha validada: ok={ok}, rows={len(df)}, hectares_total={hectares_total:.2f}, pois_total={pois_total}")
-
-    return ValidationReport(
-        ok=ok,
-        rows=int(len(df)),
-        columns=int(len(df.columns)),
-        issues=issues,
-        summary=summary,
-    )
+        df["CODIGO_IBGE"] = ibge_to_str(df["CODIGO_IBGE"])
+    return df
+
+
+def ibge_to_str(ibge: pd.Series) -> pd.Series:
+    # Células numéricas com vazios chegam como float (3106200.0): converter para inteiro
+    if pd.api.types.is_float_dtype(ibge) and (ibge.dropna() % 1 == 0).all():
+        ibge = ibge.astype("Int64")
+    return ibge.astype(str).str.strip()
+
+
+class MegaPlanilhaValidator:
+    """
+    Validação incremental da mega planilha: recebe blocos já normalizados
+    (update) e produz o ValidationReport ao final (report).
+    """
+
+    def __init__(self, path: str, sheet: str):
+        self.path = path
+        self.sheet = sheet
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+        self.invalid_ibge = 0
+        self.duplicates = 0
+        self.hectares_total = 0.0
+        self.pois_total = 0
+        self._keys: Set[Tuple[Any, ...]] = set()
+
+    @property
+    def missing_columns(self) -> List[str]:
+        return [c for c in REQUIRED_COLUMNS if c not in (self.columns or [])]
+
+    def update(self, df: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = df.columns.tolist()
+        self.rows += len(df)
+
+        if "CODIGO_IBGE" in df.columns:
+            self.invalid_ibge += int((~df["CODIGO_IBGE"].fillna("").str.match(IBGE_PATTERN)).sum())
+
+        key_cols = [c for c in ["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"] if c in df.columns]
+        if len(key_cols) == 3:
+            # Duplicadas no bloco + chaves já vistas em blocos anteriores
+            keys = df[key_cols]
+            self.duplicates += int(keys.duplicated().sum())
+            first = keys[~keys.duplicated()]
+            for key in first.itertuples(index=False, name=None):
+                if key in self._keys:
+                    self.duplicates += 1
+                else:
+                    self._keys.add(key)
+
+        if "HECTARES_MAPEADOS" in df.columns:
+            self.hectares_total += float(df["HECTARES_MAPEADOS"].sum())
+        if "POIS" in df.columns:
+            self.pois_total += int(df["POIS"].sum())
+
+    def report(self) -> ValidationReport:
+        issues: List[ValidationIssue] = []
+        missing = self.missing_columns
+        if missing:
+            issues.append(ValidationIssue(level="ERROR", message=f"Colunas obrigatórias ausentes: {missing}"))
+        if self.invalid_ibge > 0:
+            issues.append(ValidationIssue(level="WARN", message="Códigos IBGE fora do padrão 31xxxxx", count=self.invalid_ibge))
+        if self.duplicates > 0:
+            key_cols = ["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"]
+            issues.append(ValidationIssue(level="WARN", message=f"Registros duplicados pela chave {key_cols}", count=self.duplicates))
+
+        columns = self.columns or []
+        summary = {
+            "hectares_total": self.hectares_total,
+            "pois_total": self.pois_total,
+            "path": self.path,
+            "sheet": self.sheet,
+            "row_count": self.rows,
+            "columns": columns,
+        }
+
+        ok = not any(i.level == "ERROR" for i in issues)
+        logger.info(
+            f"Mega planilha validada: ok={ok}, rows={self.rows}, "
+            f"hectares_total={self.hectares_total:.2f}, pois_total={self.pois_total}"
+        )
+        return ValidationReport(ok=ok, rows=self.rows, columns=len(columns), issues=issues, summary=summary)
+
+
+def read_error_report(e: Exception) -> ValidationReport:
+    return ValidationReport(ok=False, issues=[ValidationIssue(level="ERROR", message=f"Falha ao ler arquivo: {e}")])
+
+
+def validate_mega_planilha(
+    path: Optional[str] = None,
+    sheet: str = "Atividades (com sub)",
+    chunk_size: Optional[int] = None,
+) -> ValidationReport:
+    path = path or str(Config.PATHS.data_dir / "dados_techdengue" / "Atividades Techdengue.xlsx")
+    validator = MegaPlanilhaValidator(path, sheet)
+
+    try:
+        for chunk in iter_excel_chunks(path, sheet, chunk_size):
+            validator.update(_coerce_chunk(_normalize_columns(chunk)))
+    except Exception as e:
+        return read_error_report(e)
+
+    return validator.report()
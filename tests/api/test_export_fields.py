@@ -36,3 +36,68 @@ def test_municipios_json_fields_single_column():
         pytest.skip("Sem municipios para validar campos")
     item = data["items"][0]
     assert set(item.keys()) == {"municipio"}
+
+
+def test_gold_export_ndjson_lines():
+    r = client.get("/gold/analise", params={"format": "ndjson", "limit": 3})
+    assert r.status_code == 200
+    assert "application/x-ndjson" in r.headers.get("content-type", "")
+    lines = [ln for ln in r.text.splitlines() if ln.strip()]
+    assert len(lines) <= 3
+    import json
+    for ln in lines:
+        assert "codigo_ibge" in json.loads(ln)
+
+
+def test_streaming_exporters_write_in_batches():
+    import io
+    import pandas as pd
+    import pyarrow.parquet as pq
+    from src.shared.exporters import iter_csv, iter_parquet
+
+    df = pd.DataFrame({"codigo_ibge": [str(3100000 + i) for i in range(10)], "pois": list(range(10))})
+
+    csv_chunks = list(iter_csv(df, batch_size=4))
+    assert len(csv_chunks) == 3
+    assert b"".join(csv_chunks).decode().splitlines()[0] == "codigo_ibge,pois"
+
+    pf = pq.ParquetFile(io.BytesIO(b"".join(iter_parquet(df, batch_size=4))))
+    assert pf.metadata.num_row_groups == 3
+    assert pf.read().to_pandas()["pois"].tolist() == list(range(10))
+
+
+def test_date_field_matches_across_json_csv_ndjson():
+    import csv
+    import io
+    import json
+
+    params = {"limit": 1, "fields": "codigo_ibge,data_map"}
+    items = client.get("/facts", params=params).json()["items"]
+    if not items:
+        pytest.skip("Sem atividades para comparar datas")
+    expected = items[0]["data_map"]
+
+    csv_rows = list(csv.DictReader(io.StringIO(client.get("/facts", params={**params, "format": "csv"}).text)))
+    ndjson_text = client.get("/facts", params={**params, "format": "ndjson"}).text
+    ndjson_row = json.loads(ndjson_text.splitlines()[0])
+
+    assert len(expected) == 10  # AAAA-MM-DD
+    assert csv_rows[0]["data_map"] == expected
+    assert ndjson_row["data_map"] == expected
+
+
+def test_ndjson_dates_from_arrow_table():
+    import datetime
+    import json
+    import pyarrow as pa
+    from src.api.dependencies import table_to_records
+    from src.shared.exporters import iter_ndjson
+
+    table = pa.table({
+        "data_map": pa.array([datetime.date(2025, 2, 26), None], pa.date32()),
+        "carga": pa.array([datetime.datetime(2025, 2, 26, 10, 30), None], pa.timestamp("us")),
+    })
+    rows = [json.loads(ln) for ln in b"".join(iter_ndjson(table, batch_size=1)).decode().splitlines()]
+    # Mesmo formato da resposta JSON
+    assert rows == table_to_records(table)
+    assert rows[0]["data_map"] == "2025-02-26" and rows[1] == {"data_map": None, "carga": None}
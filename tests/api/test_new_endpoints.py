@@ -58,3 +58,21 @@ def test_gold_analise_sorting_total_pois():
     values = [it.get("total_pois") for it in items if it.get("total_pois") is not None]
     if len(values) >= 2:
         assert all(values[i] <= values[i+1] for i in range(len(values)-1))
+
+
+def test_municipios_cursor_walks_all_rows():
+    cursor, seen, total = "", [], None
+    while cursor is not None:
+        r = client.get("/municipios", params={"limit": 250, "cursor": cursor, "fields": "codigo_ibge"})
+        assert r.status_code == 200
+        data = r.json()
+        total = data["total"]
+        seen.extend(item["codigo_ibge"] for item in data["items"])
+        cursor = data.get("next_cursor")
+    assert len(seen) == total
+    assert seen == sorted(seen)
+
+
+def test_facts_invalid_cursor_returns_400():
+    r = client.get("/facts", params={"cursor": "nao-e-um-cursor"})
+    assert r.status_code == 400
@@ -0,0 +1,169 @@
+"""
+Testes unitários para a camada de consulta (DatasetQuery).
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api import query as query_module
+from src.api.query import (
+    DatasetQuery,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    sort_table,
+)
+from src.config import Config
+
+
+@pytest.fixture
+def facts_dir(tmp_path, monkeypatch):
+    """Diretório de dados com um dataset de atividades sintético."""
+    pd.DataFrame({
+        "CODIGO_IBGE": ["3100104", "3100104", "3100203", None],
+        "DATA_MAP": [date(2024, 1, 10), date(2024, 3, 5), date(2024, 2, 1), date(2024, 2, 2)],
+        "NOMENCLATURA_ATIVIDADE": ["Mapeamento Inicial", "Remapeamento", "mapeamento", None],
+        "POIS": [10, 20, 30, 40],
+    }).to_parquet(tmp_path / "facts.parquet", index=False)
+    monkeypatch.setattr(Config.PATHS, "output_dir", tmp_path)
+    monkeypatch.setattr(Config, "DATASETS_REMOTE_URL", "")
+    monkeypatch.setattr(Config, "DATASETS_S3_URI", "")
+    return tmp_path
+
+
+class TestDatasetQuery:
+    """Testes da tradução de filtros para expressões Arrow."""
+
+    def test_no_filters_returns_all(self, facts_dir):
+        q = DatasetQuery("facts.parquet")
+        assert q.expression is None
+        assert q.to_table().num_rows == 4
+
+    def test_where_equals(self, facts_dir):
+        table = DatasetQuery("facts.parquet").where_equals("codigo_ibge", 3100104).to_table()
+        assert table.column("pois").to_pylist() == [10, 20]
+
+    def test_where_equals_incompatible_value(self, facts_dir):
+        table = DatasetQuery("facts.parquet").where_equals("pois", "abc").to_table()
+        assert table.num_rows == 0
+
+    def test_where_contains_ignores_case_and_nulls(self, facts_dir):
+        table = DatasetQuery("facts.parquet").where_contains("nomenclatura_atividade", "MAPEAMENTO").to_table()
+        assert table.column("pois").to_pylist() == [10, 20, 30]
+
+    def test_where_between(self, facts_dir):
+        table = (
+            DatasetQuery("facts.parquet")
+            .where_between("data_map", date(2024, 2, 1), date(2024, 3, 1))
+            .to_table()
+        )
+        assert table.column("pois").to_pylist() == [30, 40]
+
+    def test_unknown_column_is_ignored(self, facts_dir):
+        table = DatasetQuery("facts.parquet").where_equals("inexistente", "x").to_table()
+        assert table.num_rows == 4
+
+    def test_sort_table_nulls_last(self, facts_dir):
+        table = sort_table(DatasetQuery("facts.parquet").to_table(), "codigo_ibge", "desc")
+        assert table.column("codigo_ibge").to_pylist() == ["3100203", "3100104", "3100104", None]
+
+
+class TestCursorPagination:
+    """Testes da paginação por chave (keyset)."""
+
+    KEY = ("codigo_ibge", "data_map", "nomenclatura_atividade")
+
+    def _walk(self, query_factory, limit):
+        cursor, rows = "", []
+        while cursor is not None:
+            page, total, cursor = query_factory().page_after(self.KEY, cursor, limit)
+            rows.extend(page.column("pois").to_pylist())
+        return rows, total
+
+    def test_walks_all_rows_in_key_order(self, facts_dir):
+        rows, total = self._walk(lambda: DatasetQuery("facts.parquet"), limit=1)
+        assert rows == [10, 20, 30, 40]
+        assert total == 4
+
+    def test_walk_with_filters(self, facts_dir):
+        rows, total = self._walk(
+            lambda: DatasetQuery("facts.parquet").where_contains("nomenclatura_atividade", "mapeamento"),
+            limit=2,
+        )
+        assert rows == [10, 20, 30]
+        assert total == 3
+
+    def test_cursor_roundtrip(self):
+        cursor = encode_cursor(["3100104", date(2024, 1, 10), None])
+        assert decode_cursor(cursor, 3) == ((0, "3100104"), (0, "2024-01-10"), (1,))
+
+    def test_invalid_cursor(self, facts_dir):
+        with pytest.raises(InvalidCursorError):
+            DatasetQuery("facts.parquet").page_after(self.KEY, "nao-e-um-cursor", 10)
+
+
+@pytest.fixture
+def large_facts_dir(tmp_path, monkeypatch):
+    """Dataset maior (chave natural única, com nulos) em ordem aleatória."""
+    rng = np.random.default_rng(0)
+    keys = pd.MultiIndex.from_product([
+        ["3100104", "3100203", "3100302", None],
+        [date(2024, 1, 1) + timedelta(days=d) for d in range(120)],
+        ["Mapeamento", "Remapeamento", "Vistoria", None],
+    ]).to_frame(index=False, name=["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"])
+    df = keys.sample(n=1500, random_state=0).reset_index(drop=True)
+    df["POIS"] = np.arange(len(df))
+    df.to_parquet(tmp_path / "large.parquet", index=False)
+    monkeypatch.setattr(Config.PATHS, "output_dir", tmp_path)
+    monkeypatch.setattr(Config, "DATASETS_REMOTE_URL", "")
+    monkeypatch.setattr(Config, "DATASETS_S3_URI", "")
+    # Blocos pequenos: a varredura de uma página atravessa vários blocos
+    monkeypatch.setattr(query_module, "PAGE_SCAN_CHUNK", 16)
+    return tmp_path
+
+
+class TestCursorPaginationScan:
+    """Varredura limitada por página: mesmo resultado da filtragem completa."""
+
+    KEY = ("codigo_ibge", "data_map", "nomenclatura_atividade")
+    FILTERS = [
+        lambda q: q,
+        lambda q: q.where_contains("nomenclatura_atividade", "mapeamento"),
+        lambda q: q.where_equals("codigo_ibge", "3100203"),
+        lambda q: q.where_between("data_map", date(2024, 2, 1), date(2024, 3, 1))
+                   .where_contains("nomenclatura_atividade", "vist"),
+    ]
+
+    def _expected(self, apply):
+        table = sort_table(apply(DatasetQuery("large.parquet")).to_table(), None, None)
+        return (
+            table.to_pandas()
+            .sort_values(list(self.KEY), na_position="last", kind="stable")["pois"].tolist()
+        )
+
+    @pytest.mark.parametrize("apply", FILTERS)
+    def test_pages_match_full_filter(self, large_facts_dir, apply):
+        expected = self._expected(apply)
+        cursor, rows = "", []
+        while cursor is not None:
+            page, total, cursor = apply(DatasetQuery("large.parquet")).page_after(self.KEY, cursor, 70)
+            rows.extend(page.column("pois").to_pylist())
+        assert rows == expected
+        assert total == len(expected)
+
+    def test_pages_do_not_filter_whole_table(self, large_facts_dir, monkeypatch):
+        apply = self.FILTERS[1]
+        _, total, cursor = apply(DatasetQuery("large.parquet")).page_after(self.KEY, "", 10)
+
+        def _full_scan(self):
+            raise AssertionError("página filtrou a tabela inteira")
+
+        # Total memorizado por filtro: as páginas seguintes só varrem a partir do cursor
+        monkeypatch.setattr(DatasetQuery, "_row_positions", _full_scan)
+        page, again, _ = apply(DatasetQuery("large.parquet")).page_after(self.KEY, cursor, 10)
+        assert page.num_rows == 10
+        assert again == total
+
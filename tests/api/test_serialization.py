@@ -0,0 +1,35 @@
+"""
+Testes da serialização vetorizada (Arrow -> JSON).
+"""
+
+from datetime import date, datetime
+
+import pyarrow as pa
+
+from src.api.dependencies import table_to_records
+from src.api.schemas import FactRecord
+
+
+def test_table_to_records_converts_dates_and_nan():
+    table = pa.table({
+        "data_map": pa.array([date(2024, 1, 2), None], type=pa.date32()),
+        "data_carga": pa.array([datetime(2024, 1, 2, 3, 4, 5), None], type=pa.timestamp("us")),
+        "hectares": [1.5, float("nan")],
+    })
+    recs = table_to_records(table)
+    assert recs[0]["data_map"] == "2024-01-02"
+    assert recs[0]["data_carga"].startswith("2024-01-02T03:04:05")
+    assert recs[1] == {"data_map": None, "data_carga": None, "hectares": None}
+
+
+def test_table_to_records_with_model_projects_and_casts():
+    table = pa.table({
+        "codigo_ibge": pa.array([3100104], type=pa.int32()),
+        "pois": [10],
+        "extra": ["ignorado"],
+    })
+    recs = table_to_records(table, FactRecord)
+    assert list(recs[0].keys()) == list(FactRecord.model_fields.keys())
+    assert recs[0]["codigo_ibge"] == "3100104"
+    assert recs[0]["pois"] == 10
+    assert recs[0]["data_map"] is None
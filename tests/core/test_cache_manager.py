@@ -0,0 +1,105 @@
+"""
+Testes unitários para ParquetCache.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.core.cache_manager import ParquetCache
+
+
+def _write(path, **cols):
+    pd.DataFrame(cols).to_parquet(path, index=False)
+
+
+class TestParquetCache:
+    """Testes do cache Arrow de arquivos Parquet."""
+
+    def test_columns_normalized_on_load(self, tmp_path):
+        """Colunas devem ser normalizadas para minúsculas na carga."""
+        path = tmp_path / "dim.parquet"
+        _write(path, CODIGO_IBGE=["3100104"], MUNICIPIO=["Abadia dos Dourados"])
+        table = ParquetCache.get_table(path)
+        assert isinstance(table, pa.Table)
+        assert table.column_names == ["codigo_ibge", "municipio"]
+
+    def test_cache_hit_returns_same_table(self, tmp_path):
+        """Acertos de cache devem devolver a mesma tabela, sem cópia."""
+        path = tmp_path / "facts.parquet"
+        _write(path, codigo_ibge=["3100104", "3100203"], pois=[1, 2])
+        assert ParquetCache.get_table(path) is ParquetCache.get_table(path)
+
+    def test_projection_and_filter(self, tmp_path):
+        """Projeção e filtro devem ser aplicados sobre a tabela em cache."""
+        path = tmp_path / "facts.parquet"
+        _write(path, codigo_ibge=["3100104", "3100203"], pois=[1, 2])
+        table = ParquetCache.get_table(path, columns=["pois"], filter=pc.field("codigo_ibge") == "3100203")
+        assert table.column_names == ["pois"]
+        assert table.column("pois").to_pylist() == [2]
+
+    def test_reload_on_mtime_change(self, tmp_path):
+        """Alteração no arquivo deve invalidar o cache."""
+        path = tmp_path / "facts.parquet"
+        _write(path, pois=[1])
+        assert ParquetCache.get_table(path).num_rows == 1
+        _write(path, pois=[1, 2, 3])
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        assert ParquetCache.get_table(path).num_rows == 3
+
+    def test_get_parquet_returns_dataframe(self, tmp_path):
+        """get_parquet deve converter a tabela para DataFrame."""
+        path = tmp_path / "facts.parquet"
+        _write(path, POIS=[1, 2])
+        df = ParquetCache.get_parquet(path)
+        assert isinstance(df, pd.DataFrame)
+        assert list(df.columns) == ["pois"]
+
+    def test_get_parquet_converts_once_per_load(self, tmp_path):
+        """A conversão para pandas deve ocorrer uma vez por carga e projeção."""
+        path = tmp_path / "facts.parquet"
+        _write(path, POIS=[1, 2], HECTARES=[0.5, 1.5])
+        key = (str(path), ("pois",))
+
+        first = ParquetCache.get_parquet(path, columns=["pois"])
+        converted = ParquetCache._frames[key][1]
+        first["pois"] = 0  # alteração do chamador não atinge o cache
+        second = ParquetCache.get_parquet(path, columns=["pois"])
+        assert ParquetCache._frames[key][1] is converted
+        assert second["pois"].tolist() == [1, 2]
+        assert list(ParquetCache.get_parquet(path).columns) == ["pois", "hectares"]
+
+        _write(path, POIS=[1, 2, 3], HECTARES=[0.5, 1.5, 2.5])
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        assert ParquetCache.get_parquet(path, columns=["pois"])["pois"].tolist() == [1, 2, 3]
+        assert ParquetCache._frames[key][1] is not converted
+
+    def test_indexed_pair_survives_concurrent_reload(self, tmp_path, monkeypatch):
+        """Tabela e índices devem vir da mesma carga, mesmo com recarga concorrente."""
+        path = tmp_path / "facts.parquet"
+        _write(path, codigo_ibge=["3100104", "3100203"], pois=[1, 2])
+        ParquetCache.get_table(path)
+
+        load = ParquetCache._load.__func__
+        reloading = []
+
+        def load_then_reload(cls, resource):
+            loaded = load(cls, resource)
+            if not reloading:
+                # Outra requisição recarrega o arquivo logo após esta leitura do cache
+                reloading.append(True)
+                _write(path, codigo_ibge=["3100203"] * 5 + ["3100104"], pois=list(range(6)))
+                stat = os.stat(path)
+                os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+                load(cls, resource)
+            return loaded
+
+        monkeypatch.setattr(ParquetCache, "_load", classmethod(load_then_reload))
+        table, index = ParquetCache.get_indexed(path)
+
+        assert table.num_rows == 2
+        assert table.take(index.lookup("codigo_ibge", "3100203")).column("pois").to_pylist() == [2]
@@ -0,0 +1,143 @@
+"""
+Testes do motor vetorizado de qualidade de dados.
+
+O resultado de run_quality_checks deve ser idêntico ao da validação Pydantic
+linha a linha (validate_atividade / validate_dengue_historico).
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.data_quality import run_quality_checks, validate_atividade, validate_dengue_historico
+
+
+def _row_by_row(df, data_type):
+    validator = validate_atividade if data_type == "atividade" else validate_dengue_historico
+    valid = 0
+    errors = []
+    for idx, row in df.iterrows():
+        ok, row_errors = validator(row.to_dict())
+        valid += ok
+        errors.extend((idx, e) for e in row_errors)
+    summary = {}
+    for _, e in errors:
+        key = e.split(":")[0]
+        summary[key] = summary.get(key, 0) + 1
+    total = len(df)
+    return {
+        "total_records": total,
+        "valid_records": valid,
+        "invalid_records": total - valid,
+        "validity_rate": round(valid / total * 100, 2) if total else 0,
+        "error_summary": summary,
+        "sample_errors": errors[:10],
+    }
+
+
+def _assert_same(df, data_type):
+    expected = _row_by_row(df, data_type)
+    result = run_quality_checks(df, data_type)
+    assert result == expected
+    assert list(result["error_summary"]) == list(expected["error_summary"])
+
+
+def _cycle(values, n):
+    return [values[i % len(values)] for i in range(n)]
+
+
+class TestAtividade:
+    def test_clean_frame(self):
+        n = 50
+        df = pd.DataFrame({
+            "codigo_ibge": [f"31{i:05d}" for i in range(n)],
+            "data_map": pd.to_datetime(["2024-01-01"] * n),
+            "nomenclatura_atividade": ["ATV.01"] * n,
+            "pois": np.arange(n),
+            "hectares_mapeados": np.arange(n) * 1.5,
+            "contratante": ["CISARP"] * n,
+        })
+        result = run_quality_checks(df, "atividade")
+        assert result["validity_rate"] == 100.0
+        _assert_same(df, "atividade")
+
+    def test_mixed_values_match_row_by_row(self):
+        n = 120
+        df = pd.DataFrame({
+            "codigo_ibge": _cycle(["3100104", 3100104, None, "x"], n),
+            "data_map": _cycle([
+                "2024-01-05", "05/01/2024", "2020-01-01", "invalida",
+                datetime.date(2022, 1, 1), datetime.datetime(2024, 3, 1), pd.Timestamp("2019-01-01"),
+            ], n),
+            "nomenclatura_atividade": _cycle(["ATV.01", None, "ATV.02"], n),
+            "pois": _cycle([1, -2, 3.5, None, 0], n),
+            "hectares_mapeados": _cycle([1.0, -1.5, None, 2], n),
+            "contratante": _cycle(["CISARP", "cisaje", "OUTRO", None], n),
+        }, index=range(100, 100 + n))
+        _assert_same(df, "atividade")
+
+    def test_typed_columns_with_nulls(self):
+        n = 60
+        df = pd.DataFrame({
+            "codigo_ibge": pd.Series(_cycle(["3100104", None], n), dtype="str"),
+            "data_map": pd.to_datetime(_cycle(["2024-01-01", "2021-01-01"], n)),
+            "nomenclatura_atividade": ["ATV.01"] * n,
+            "pois": _cycle([1.0, -2.0, 2.5, np.nan], n),
+            "hectares_mapeados": _cycle([1.0, -2.0, np.nan], n),
+        })
+        _assert_same(df, "atividade")
+
+    def test_missing_required_columns(self):
+        df = pd.DataFrame({"codigo_ibge": ["3100104"] * 5, "pois": [1] * 5})
+        result = run_quality_checks(df, "atividade")
+        assert result["invalid_records"] == 5
+        _assert_same(df, "atividade")
+
+
+    def test_none_and_nan_keep_distinct_messages(self):
+        n = 8
+        df = pd.DataFrame({
+            "codigo_ibge": ["3100104"] * n,
+            "data_map": ["2024-01-05"] * n,
+            "nomenclatura_atividade": ["ATV.01"] * n,
+            "pois": pd.Series(_cycle([None, np.nan, 1, None], n), dtype=object),
+            "hectares_mapeados": [1.0] * n,
+        })
+        result = run_quality_checks(df, "atividade")
+        assert [e for _, e in result["sample_errors"][:2]] == [
+            "pois: Input should be a valid integer",
+            "pois: Input should be a finite number",
+        ]
+        _assert_same(df, "atividade")
+
+    @pytest.mark.parametrize("contratante", [[np.nan, np.nan], []])
+    def test_contratante_without_strings(self, contratante):
+        n = len(contratante)
+        df = pd.DataFrame({
+            "codigo_ibge": ["3100104"] * n,
+            "data_map": pd.to_datetime(["2024-01-01"] * n),
+            "nomenclatura_atividade": ["ATV.01"] * n,
+            "pois": [1] * n,
+            "hectares_mapeados": [1.0] * n,
+            "contratante": pd.Series(contratante, dtype=float),
+        })
+        assert run_quality_checks(df, "atividade")["total_records"] == n
+        _assert_same(df, "atividade")
+
+
+class TestDengue:
+    @pytest.mark.parametrize("ano, casos", [
+        ([2024], [0, 10]),
+        ([2020, 2024, 2099, 2024.0], [1, -1, None, 2.5]),
+    ])
+    def test_matches_row_by_row(self, ano, casos):
+        n = 40
+        df = pd.DataFrame({
+            "codigo_ibge": _cycle(["3100104", 3100104], n),
+            "ano": _cycle(ano, n),
+            "casos": _cycle(casos, n),
+        })
+        _assert_same(df, "dengue")
+
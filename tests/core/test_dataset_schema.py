@@ -0,0 +1,89 @@
+"""
+Testes do esquema de armazenamento dos datasets de dados_integrados.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+from src.core import dataset_schema
+from src.core.dataset_schema import CATEGORY, write_dataset
+
+
+def _dengue():
+    return pd.DataFrame({
+        "CODIGO_IBGE": ["3100203", "3100104", "3100203", "3100104"],
+        "MUNICIPIO": ["Abaeté", "Abadia dos Dourados", "Abaeté", "Abadia dos Dourados"],
+        "CASOS": [5.0, np.nan, 7.0, 1.0],
+        "SEMANA_EPIDEMIOLOGICA": [2, 1, 1, 2],
+        "ANO": [2024, 2024, 2024, 2023],
+        "DATA_CARGA": "2024-05-01 10:20:30",
+        "VERSAO": "1.0.0",
+    })
+
+
+class TestWriteDataset:
+    def test_declared_types_keep_column_names(self, tmp_path):
+        path = tmp_path / "fato_dengue_historico.parquet"
+        write_dataset(_dengue(), path)
+
+        schema = pq.read_schema(path)
+        assert schema.names == _dengue().columns.tolist()
+        assert schema.field("CODIGO_IBGE").type == CATEGORY
+        assert schema.field("MUNICIPIO").type == CATEGORY
+        assert schema.field("CASOS").type == pa.int32()
+        assert schema.field("SEMANA_EPIDEMIOLOGICA").type == pa.int8()
+        assert schema.field("ANO").type == pa.int16()
+        assert schema.field("DATA_CARGA").type == pa.timestamp("us")
+
+    def test_rows_sorted_by_ibge_and_date(self, tmp_path):
+        path = tmp_path / "fato_dengue_historico.parquet"
+        write_dataset(_dengue(), path)
+
+        df = pd.read_parquet(path)
+        assert list(zip(df["CODIGO_IBGE"], df["ANO"], df["SEMANA_EPIDEMIOLOGICA"])) == [
+            ("3100104", 2023, 2), ("3100104", 2024, 1), ("3100203", 2024, 1), ("3100203", 2024, 2),
+        ]
+        assert df["CASOS"].iloc[0] == 1 and pd.isna(df["CASOS"].iloc[1])
+        assert df["DATA_CARGA"].iloc[0] == pd.Timestamp("2024-05-01 10:20:30")
+
+    def test_row_groups_carry_statistics(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dataset_schema, "ROW_GROUP_SIZE", 2)
+        facts = pd.DataFrame({
+            "codigo_ibge": ["3100203", "3100104", "3100203", "3100104"],
+            "data_map": pd.to_datetime(["2024-02-01", "2024-03-01", "2024-01-01", "2024-01-15"]),
+            "pois": [1, 2, 3, 4],
+        })
+        path = tmp_path / "fato_atividades_techdengue.parquet"
+        write_dataset(facts, path)
+
+        meta = pq.read_metadata(path)
+        assert meta.num_row_groups == 2
+        stats = [meta.row_group(i).column(0).statistics for i in range(2)]
+        assert [(s.min, s.max) for s in stats] == [("3100104", "3100104"), ("3100203", "3100203")]
+        assert pq.read_schema(path).field("data_map").type == pa.date32()
+
+        table = pq.read_table(path, filters=pc.field("codigo_ibge") == "3100203")
+        assert table.column("data_map").to_pylist() == [datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)]
+
+    def test_extra_metadata_is_kept(self, tmp_path):
+        path = tmp_path / "analise_integrada.parquet"
+        gold = pd.DataFrame({"codigo_ibge": ["3100104"], "competencia": [datetime.date(2024, 1, 1)], "atividades": [3]})
+        write_dataset(gold, path, metadata={b"techdengue.source_stamp": b"1:2"})
+
+        assert pq.read_schema(path).metadata[b"techdengue.source_stamp"] == b"1:2"
+        assert pq.read_schema(path).field("atividades").type == pa.int32()
+
+    def test_incompatible_values_are_rejected(self, tmp_path):
+        df = _dengue().assign(CASOS=[1.5, 2.0, 3.0, 4.0])
+        with pytest.raises(pa.ArrowInvalid):
+            write_dataset(df, tmp_path / "fato_dengue_historico.parquet")
+
+    def test_undeclared_dataset(self, tmp_path):
+        with pytest.raises(ValueError):
+            write_dataset(_dengue(), tmp_path / "outro.parquet")
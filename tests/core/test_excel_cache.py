@@ -0,0 +1,109 @@
+"""
+Testes unitários para o cache XLSX → Parquet endereçado por conteúdo.
+"""
+
+import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from src.config import Config
+from src.core import excel_cache
+from src.core.excel_cache import read_excel_cached
+from src.excel_reader import iter_excel_chunks
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config.PATHS, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(Config, "EXCEL_CACHE_ENABLED", True)
+    return tmp_path / "cache" / "excel"
+
+
+def _write_xlsx(path, rows, sheet="IBGE"):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = sheet
+    ws.append(["CODIGO", "NOME", "DATA"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def _rows(n=5):
+    return [[3100104 + i, f"Mun {i}", datetime.datetime(2024, 1, 1 + i)] for i in range(n)]
+
+
+def _count_excel_reads(monkeypatch):
+    calls = []
+    original = pd.read_excel
+
+    def _read_excel(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(excel_cache.pd, "read_excel", _read_excel)
+    return calls
+
+
+class TestReadExcelCached:
+    """Leituras completas (equivalentes a pd.read_excel)."""
+
+    def test_second_read_uses_snapshot(self, tmp_path, cache_dir, monkeypatch):
+        path = _write_xlsx(tmp_path / "base.xlsx", _rows())
+        calls = _count_excel_reads(monkeypatch)
+
+        first = read_excel_cached(path, sheet_name="IBGE")
+        second = read_excel_cached(path, sheet_name="IBGE")
+
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(first, second)
+        assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+    def test_new_content_replaces_snapshot(self, tmp_path, cache_dir, monkeypatch):
+        path = _write_xlsx(tmp_path / "base.xlsx", _rows(3))
+        read_excel_cached(path, sheet_name="IBGE")
+
+        _write_xlsx(path, _rows(4))
+        df = read_excel_cached(path, sheet_name="IBGE")
+
+        assert len(df) == 4
+        assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+    def test_options_are_part_of_the_key(self, tmp_path):
+        path = _write_xlsx(tmp_path / "base.xlsx", _rows())
+        full = read_excel_cached(path, sheet_name="IBGE")
+        subset = read_excel_cached(path, sheet_name="IBGE", usecols=["CODIGO"])
+        assert full.columns.tolist() == ["CODIGO", "NOME", "DATA"]
+        assert subset.columns.tolist() == ["CODIGO"]
+
+    def test_mixed_types_are_read_without_snapshot(self, tmp_path, cache_dir):
+        path = _write_xlsx(tmp_path / "misto.xlsx", [[1, "a", None], ["x", "b", None]])
+        df = read_excel_cached(path, sheet_name="IBGE")
+        assert df["CODIGO"].tolist() == [1, "x"]
+        assert not list(cache_dir.glob("*.parquet"))
+
+
+class TestChunkSnapshots:
+    """Leituras em blocos (iter_excel_chunks) com snapshot gravado durante a leitura."""
+
+    def test_chunks_round_trip(self, tmp_path, cache_dir, monkeypatch):
+        path = _write_xlsx(tmp_path / "mega.xlsx", _rows(7))
+        first = list(iter_excel_chunks(path, "IBGE", chunk_size=3))
+
+        # Segunda leitura não abre o workbook
+        monkeypatch.setattr("src.excel_reader.load_workbook", None)
+        second = list(iter_excel_chunks(path, "IBGE", chunk_size=3))
+
+        assert [len(c) for c in second] == [3, 3, 1]
+        for a, b in zip(first, second):
+            pd.testing.assert_frame_equal(a, b)
+
+    def test_partial_read_does_not_publish_snapshot(self, tmp_path, cache_dir):
+        path = _write_xlsx(tmp_path / "mega.xlsx", _rows(7))
+        chunks = iter_excel_chunks(path, "IBGE", chunk_size=3)
+        next(chunks)
+        chunks.close()
+        assert not list(cache_dir.iterdir())
@@ -0,0 +1,75 @@
+"""
+Testes do resolvedor nome de município → código IBGE.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import Config
+from src.core import municipio_resolver
+from src.core.municipio_resolver import MunicipioResolver, normalizar_nome, normalizar_nomes
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config.PATHS, "cache_dir", tmp_path / "cache")
+    return tmp_path / "cache" / "municipios"
+
+
+def _referencia():
+    return pd.DataFrame({
+        "Código Município Completo": [3100104, 3100203, 3162500],
+        "Nome_Município": ["Abadia dos Dourados", "Abaeté", "São João del Rei"],
+    })
+
+
+NOMES = pd.Series(
+    ["ABADIA DOS DOURADOS", " abaeté ", None, "Sao Joao del Rei", "Cidade X", "Abaeté", np.nan],
+    index=range(10, 17),
+)
+
+
+class TestNormalizacao:
+    def test_vectorized_matches_scalar(self):
+        assert normalizar_nomes(NOMES).tolist() == [normalizar_nome(v) for v in NOMES]
+        assert normalizar_nomes(NOMES).index.equals(NOMES.index)
+
+
+class TestMunicipioResolver:
+    def test_resolve_matches_dict_lookup(self):
+        ref = _referencia()
+        mapa = dict(zip(ref["Nome_Município"].apply(normalizar_nome), ref["Código Município Completo"].astype(str)))
+        resolver = MunicipioResolver.from_frame(ref, "Nome_Município", "Código Município Completo")
+
+        resolved = resolver.resolve(NOMES)
+
+        expected = NOMES.apply(normalizar_nome).map(mapa)
+        assert resolved.index.equals(NOMES.index)
+        assert resolved.fillna("-").tolist() == expected.fillna("-").tolist()
+        assert resolver.resolve(NOMES.iloc[:0]).empty
+
+    def test_unmatched_lists_distinct_original_names(self):
+        resolver = MunicipioResolver.from_frame(_referencia(), "Nome_Município", "Código Município Completo")
+        unmatched = resolver.unmatched(NOMES)
+        assert unmatched[0] is None or pd.isna(unmatched[0])
+        assert unmatched[1:] == ["Cidade X"]
+
+    def test_index_is_persisted_per_source_version(self, tmp_path, cache_dir, monkeypatch):
+        path = tmp_path / "dim_municipios.parquet"
+        _referencia().rename(columns={"Nome_Município": "MUNICIPIO", "Código Município Completo": "CODIGO_IBGE"}).to_parquet(path)
+
+        first = MunicipioResolver.carregar(path, nome_col="MUNICIPIO", codigo_col="CODIGO_IBGE")
+        monkeypatch.setattr(municipio_resolver.pd, "read_parquet", _fail_source_reads(pd.read_parquet, path))
+        second = MunicipioResolver.carregar(path, nome_col="MUNICIPIO", codigo_col="CODIGO_IBGE")
+
+        assert len(first) == len(second) == 3
+        pd.testing.assert_series_equal(second.resolve(NOMES), first.resolve(NOMES))
+        assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+
+def _fail_source_reads(read_parquet, source):
+    def _read(path, *args, **kwargs):
+        assert str(path) != str(source), "arquivo de origem relido"
+        return read_parquet(path, *args, **kwargs)
+    return _read
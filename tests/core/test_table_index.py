@@ -0,0 +1,81 @@
+"""
+Testes unitários para os índices secundários (TableIndex).
+"""
+
+from datetime import date
+
+import pyarrow as pa
+
+from src.core.table_index import TableIndex, intersect_positions, take_positions
+
+
+def _table():
+    return pa.table({
+        "codigo_ibge": ["3100104", "3100203", "3100104", None, "3100302"],
+        "data_map": pa.array(
+            [date(2024, 3, 1), date(2024, 1, 1), None, date(2024, 2, 1), date(2024, 1, 15)],
+            type=pa.date32(),
+        ),
+        "pois": [1, 2, 3, 4, 5],
+    })
+
+
+class TestTableIndex:
+    """Testes de construção e consulta dos índices."""
+
+    def test_build_only_known_columns(self):
+        index = TableIndex.build(_table())
+        assert index.has_hash("codigo_ibge")
+        assert index.has_range("data_map")
+        assert not index.has_hash("pois")
+
+    def test_hash_lookup(self):
+        index = TableIndex.build(_table())
+        assert sorted(index.lookup("codigo_ibge", "3100104").tolist()) == [0, 2]
+        assert sorted(index.lookup("codigo_ibge", 3100203).tolist()) == [1]
+        assert index.lookup("codigo_ibge", "9999999").size == 0
+
+    def test_range_lookup_skips_nulls(self):
+        index = TableIndex.build(_table())
+        assert sorted(index.lookup_range("data_map", date(2024, 1, 1), date(2024, 2, 1)).tolist()) == [1, 3, 4]
+        assert sorted(index.lookup_range("data_map", date(2024, 2, 2), None).tolist()) == [0]
+        assert sorted(index.lookup_range("data_map", None, None).tolist()) == [0, 1, 3, 4]
+
+    def test_range_index_on_string_dates(self):
+        table = pa.table({"competencia": ["2024-02-01", "2024-01-01"]})
+        index = TableIndex.build(table)
+        assert index.lookup_range("competencia", date(2024, 1, 1), date(2024, 1, 31)).tolist() == [1]
+
+    def test_intersect_and_take_preserve_order(self):
+        table = _table()
+        index = TableIndex.build(table)
+        positions = intersect_positions(None, index.lookup("codigo_ibge", "3100104"))
+        positions = intersect_positions(positions, index.lookup_range("data_map", date(2024, 1, 1), None))
+        assert take_positions(table, positions).column("pois").to_pylist() == [1]
+
+    def test_key_rank_inverts_key_order(self):
+        table = _table()
+        index = TableIndex.build(table)
+        order = index.key_order(table, ["codigo_ibge", "data_map"])
+        rank = index.key_rank(table, ["codigo_ibge", "data_map"])
+        assert rank[order].tolist() == list(range(table.num_rows))
+
+    def test_count_is_memoized_per_key(self, monkeypatch):
+        from src.core import table_index
+
+        monkeypatch.setattr(table_index, "COUNT_CACHE_SIZE", 2)
+        index = TableIndex.build(_table())
+        calls = []
+
+        def _compute(value):
+            def compute():
+                calls.append(value)
+                return value
+            return compute
+
+        assert index.count("a", _compute(1)) == 1
+        assert index.count("a", _compute(99)) == 1
+        index.count("b", _compute(2))
+        index.count("c", _compute(3))  # descarta "a", o mais antigo
+        assert index.count("a", _compute(4)) == 4
+        assert calls == [1, 2, 3, 4]
@@ -0,0 +1,152 @@
+"""
+Testes do grafo de tarefas do ETL (execução por dependências e reaproveitamento).
+"""
+
+import threading
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.core.lineage import DataLineage
+from src.core.task_graph import BLOCKED, ERROR, EXECUTED, SKIPPED, TaskGraph, file_source
+
+
+class _Pipeline:
+    """Grafo fonte → (a, b) → c, com contagem de execuções por tarefa."""
+
+    def __init__(self, tmp_path, source):
+        self.tmp_path = tmp_path
+        self.source = source
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _writer(self, name, build):
+        def run(inputs):
+            with self.lock:
+                self.calls.append(name)
+            df = build(inputs)
+            df.to_parquet(self.tmp_path / f"{name}.parquet", index=False)
+            return df
+        return run
+
+    def graph(self, **kwargs):
+        graph = TaskGraph(DataLineage(self.tmp_path / "lineage.json"), **kwargs)
+        graph.add(
+            "base",
+            self._writer("base", lambda _: pd.read_csv(self.source)),
+            sources={"csv": file_source(self.source)},
+            output=self.tmp_path / "base.parquet",
+        )
+        graph.add("a", self._writer("a", lambda i: i["base"].assign(v=i["base"]["v"] * 2)),
+                  inputs=["base"], output=self.tmp_path / "a.parquet")
+        graph.add("b", self._writer("b", lambda i: i["base"].assign(v=i["base"]["v"] + 1)),
+                  inputs=["base"], output=self.tmp_path / "b.parquet")
+        graph.add("c", self._writer("c", lambda i: pd.DataFrame({"v": [i["a"]["v"].sum() + i["b"]["v"].sum()]})),
+                  inputs=["a", "b"], output=self.tmp_path / "c.parquet")
+        return graph
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    source = tmp_path / "fonte.csv"
+    pd.DataFrame({"v": [1, 2, 3]}).to_csv(source, index=False)
+    return _Pipeline(tmp_path, source)
+
+
+class TestTaskGraph:
+    def test_runs_in_dependency_order(self, pipeline):
+        status = pipeline.graph(max_workers=2).run()
+
+        assert status == dict.fromkeys(["base", "a", "b", "c"], EXECUTED)
+        assert pipeline.calls[0] == "base" and pipeline.calls[-1] == "c"
+        assert pd.read_parquet(pipeline.tmp_path / "c.parquet")["v"].tolist() == [12 + 9]
+
+    def test_independent_tasks_run_concurrently(self, tmp_path):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def side(_):
+            barrier.wait()  # só passa se as duas tarefas estiverem rodando ao mesmo tempo
+            return pd.DataFrame({"v": [1]})
+
+        graph = TaskGraph(DataLineage(tmp_path / "lineage.json"), max_workers=2)
+        graph.add("a", side)
+        graph.add("b", side)
+        assert graph.run() == {"a": EXECUTED, "b": EXECUTED}
+
+    def test_unchanged_inputs_are_skipped(self, pipeline):
+        pipeline.graph().run()
+        pipeline.calls.clear()
+
+        status = pipeline.graph().run()
+
+        assert status == dict.fromkeys(["base", "a", "b", "c"], SKIPPED)
+        assert pipeline.calls == []
+
+    def test_changed_source_reruns_downstream(self, pipeline):
+        pipeline.graph().run()
+        pd.DataFrame({"v": [1, 2, 4]}).to_csv(pipeline.source, index=False)
+        pipeline.calls.clear()
+
+        status = pipeline.graph().run()
+
+        assert set(status.values()) == {EXECUTED}
+        assert pd.read_parquet(pipeline.tmp_path / "c.parquet")["v"].tolist() == [14 + 10]
+
+    def test_skipped_inputs_are_loaded_from_output(self, pipeline):
+        pipeline.graph().run()
+        (pipeline.tmp_path / "c.parquet").unlink()
+        pipeline.calls.clear()
+
+        status = pipeline.graph().run(targets=["c"])
+
+        assert status["c"] == EXECUTED and status["a"] == SKIPPED
+        assert pipeline.calls == ["c"]
+        assert pd.read_parquet(pipeline.tmp_path / "c.parquet")["v"].tolist() == [21]
+
+    def test_disk_inputs_are_not_loaded(self, pipeline, monkeypatch):
+        pipeline.graph().run()
+        graph = pipeline.graph()
+        received = {}
+
+        def total(inputs):
+            received.update(inputs)
+            return pd.DataFrame({"v": [sum(pq.read_table(p).column("v").to_numpy().sum() for p in inputs.values())]})
+
+        graph.add("d", total, inputs=["a", "b"], load_inputs=False)
+        monkeypatch.setattr(pd, "read_parquet", _no_frame_loads)
+
+        status = graph.run()
+
+        assert status["d"] == EXECUTED and status["a"] == SKIPPED
+        assert received == {"a": pipeline.tmp_path / "a.parquet", "b": pipeline.tmp_path / "b.parquet"}
+
+    def test_force_reruns_everything(self, pipeline):
+        pipeline.graph().run()
+        assert set(pipeline.graph().run(force=True).values()) == {EXECUTED}
+
+    def test_failure_blocks_dependents_only(self, tmp_path):
+        def fail(_):
+            raise RuntimeError("boom")
+
+        graph = TaskGraph(DataLineage(tmp_path / "lineage.json"))
+        graph.add("ok", lambda _: pd.DataFrame({"v": [1]}))
+        graph.add("falha", fail)
+        graph.add("depois", lambda i: i["falha"], inputs=["falha"])
+
+        assert graph.run() == {"ok": EXECUTED, "falha": ERROR, "depois": BLOCKED}
+
+    def test_inputs_must_be_declared_first(self, tmp_path):
+        graph = TaskGraph(DataLineage(tmp_path / "lineage.json"))
+        with pytest.raises(ValueError):
+            graph.add("c", lambda i: i["a"], inputs=["a"])
+
+    def test_disk_inputs_need_output(self, tmp_path):
+        graph = TaskGraph(DataLineage(tmp_path / "lineage.json"))
+        graph.add("a", lambda _: pd.DataFrame({"v": [1]}))
+        with pytest.raises(ValueError):
+            graph.add("b", lambda i: i["a"], inputs=["a"], load_inputs=False)
+
+
+def _no_frame_loads(*args, **kwargs):
+    raise AssertionError("tabela de entrada carregada pelo grafo")
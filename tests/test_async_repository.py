@@ -0,0 +1,175 @@
+"""
+Testes do repositório assíncrono (asyncpg) e do seu uso pelo router GIS.
+"""
+
+import asyncio
+import uuid
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.app import app
+from src.api.routers import gis
+from src import async_repository
+from src.async_repository import AsyncDatabaseManager, AsyncTechDengueRepository, to_asyncpg_query
+from src.database import ConnectionPoolTimeout, DatabaseQueryError
+from src.repository import PLANILHA_CAMPO_BY_ATIVIDADE_SQL, POIS_EM_RAIO_SQL
+
+
+class _FakeAsyncDB:
+    """Substituto do AsyncDatabaseManager que registra as consultas."""
+
+    def __init__(self, df=None, error=None):
+        self.df = df if df is not None else pd.DataFrame({"id": [1]})
+        self.error = error
+        self.calls = []
+
+    async def query_to_dataframe(self, query, params=None, parse_dates=None):
+        self.calls.append((query, params, parse_dates))
+        if self.error:
+            raise self.error
+        return self.df
+
+
+def test_to_asyncpg_query_numbers_placeholders():
+    sql = to_asyncpg_query(POIS_EM_RAIO_SQL)
+    assert "%s" not in sql
+    assert all(f"${i}" in sql for i in range(1, 6))
+    assert "$6" not in sql
+
+
+async def test_same_queries_as_sync_repository():
+    db = _FakeAsyncDB()
+    repo = AsyncTechDengueRepository(db=db)
+    await repo.get_planilha_campo_by_atividade("ATV-1")
+    await repo.get_banco_techdengue_all(limit=5)
+
+    assert db.calls[0] == (PLANILHA_CAMPO_BY_ATIVIDADE_SQL, ("ATV-1",), ["data_upload"])
+    assert db.calls[1][0].rstrip().endswith("LIMIT 5")
+
+
+class _FakePool:
+    """Pool asyncpg mínimo: devolve ``rows`` ou excede o tempo limite."""
+
+    class _Attribute:
+        def __init__(self, name, pg_type):
+            self.name = name
+            self.type = type("Type", (), {"name": pg_type})()
+
+    class _Statement:
+        def __init__(self, pool):
+            self.pool = pool
+
+        async def fetch(self, *args):
+            if self.pool.rows is None:
+                raise asyncio.TimeoutError()
+            return self.pool.rows
+
+        def get_attributes(self):
+            return [_FakePool._Attribute(name, pg_type) for name, pg_type in self.pool.attributes]
+
+    class _Connection:
+        def __init__(self, pool):
+            self.pool = pool
+
+        async def prepare(self, query):
+            return _FakePool._Statement(self.pool)
+
+    def __init__(self, acquire_timeout=False, rows=None, attributes=()):
+        self.acquire_timeout = acquire_timeout
+        self.rows = rows
+        self.attributes = attributes
+        self.released = []
+
+    async def acquire(self, timeout=None):
+        if self.acquire_timeout:
+            raise asyncio.TimeoutError()
+        return self._Connection(self)
+
+    async def release(self, conn):
+        self.released.append(conn)
+
+
+class TestAsyncQueryTimeouts:
+    @pytest.fixture
+    def manager(self, monkeypatch):
+        monkeypatch.setattr(async_repository, "ASYNCPG_AVAILABLE", True)
+        return AsyncDatabaseManager()
+
+    async def test_acquire_timeout_is_pool_timeout(self, manager):
+        manager._pool = _FakePool(acquire_timeout=True)
+        with pytest.raises(ConnectionPoolTimeout):
+            await manager.query_to_dataframe("SELECT 1")
+
+    async def test_query_timeout_is_query_error(self, manager):
+        manager._pool = pool = _FakePool()
+        with pytest.raises(DatabaseQueryError) as exc:
+            await manager.query_to_dataframe("SELECT pg_sleep(%s)", (60,))
+        assert not isinstance(exc.value, ConnectionPoolTimeout)
+        assert len(pool.released) == 1
+
+
+class TestAsyncRecordTypes:
+    ATTRIBUTES = [("id", "uuid"), ("lat", "numeric"), ("nome", "text")]
+    ROWS = [
+        (uuid.UUID(int=1), Decimal("-19.5"), "a"),
+        (uuid.UUID(int=2), None, "b"),
+    ]
+
+    @pytest.fixture
+    def manager(self, monkeypatch):
+        monkeypatch.setattr(async_repository, "ASYNCPG_AVAILABLE", True)
+        manager = AsyncDatabaseManager()
+        manager._pool = _FakePool(rows=self.ROWS, attributes=self.ATTRIBUTES)
+        return manager
+
+    async def test_numeric_and_uuid_match_sync_repository(self, manager):
+        df = await manager.query_to_dataframe("SELECT id, lat, nome FROM banco_techdengue")
+
+        assert df.columns.tolist() == ["id", "lat", "nome"]
+        assert df["id"].tolist() == [str(uuid.UUID(int=1)), str(uuid.UUID(int=2))]
+        assert df["lat"].dtype == float
+        assert df["lat"].iloc[0] == -19.5 and pd.isna(df["lat"].iloc[1])
+
+    async def test_empty_result_keeps_columns(self, manager):
+        manager._pool.rows = []
+        df = await manager.query_to_dataframe("SELECT id, lat, nome FROM banco_techdengue")
+        assert df.empty and df.columns.tolist() == ["id", "lat", "nome"]
+
+    def test_gis_endpoint_serializes_records(self, manager, monkeypatch):
+        monkeypatch.setattr(gis, "ASYNCPG_AVAILABLE", True)
+        monkeypatch.setattr(gis, "get_async_repository", lambda: AsyncTechDengueRepository(db=manager))
+
+        resp = TestClient(app).get("/gis/banco?limit=2")
+        assert resp.status_code == 200
+        assert resp.json() == [
+            {"id": str(uuid.UUID(int=1)), "lat": -19.5, "nome": "a"},
+            {"id": str(uuid.UUID(int=2)), "lat": None, "nome": "b"},
+        ]
+
+
+class TestGisRouterAsync:
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_uses_async_repository(self, client, monkeypatch):
+        db = _FakeAsyncDB(df=pd.DataFrame({"id": [1, 2], "nome": ["a", "b"]}))
+        monkeypatch.setattr(gis, "ASYNCPG_AVAILABLE", True)
+        monkeypatch.setattr(gis, "get_async_repository", lambda: AsyncTechDengueRepository(db=db))
+
+        resp = client.get("/gis/banco?limit=2")
+        assert resp.status_code == 200
+        assert resp.json() == [{"id": 1, "nome": "a"}, {"id": 2, "nome": "b"}]
+        assert resp.headers["X-TechDengue-Data-Available"] == "true"
+
+    def test_async_query_error_is_expected_gis_error(self, client, monkeypatch):
+        db = _FakeAsyncDB(error=DatabaseQueryError("relation planilha_campo does not exist"))
+        monkeypatch.setattr(gis, "ASYNCPG_AVAILABLE", True)
+        monkeypatch.setattr(gis, "get_async_repository", lambda: AsyncTechDengueRepository(db=db))
+
+        resp = client.get("/gis/pois?strict=true")
+        assert resp.status_code == 503
+        assert resp.json()["error"] == "gis_unavailable"
@@ -0,0 +1,110 @@
+"""
+Testes da consolidação anual de dengue (processar_ano_dengue) da base integrada.
+"""
+
+import multiprocessing
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "etl"))
+
+import criar_base_integrada  # noqa: E402
+from criar_base_integrada import correlacionar_codigo_ibge, processar_ano_dengue  # noqa: E402
+from src.config import Config  # noqa: E402
+from src.core.municipio_resolver import MunicipioResolver  # noqa: E402
+
+ANOS = [2023, 2024, 2025]
+IBGE = pd.DataFrame({
+    'MUNICIPIO': ['Abaeté', 'Abadia dos Dourados', 'Açucena', 'Belo Horizonte'],
+    'CODIGO_IBGE': ['3100203', '3100104', '3100401', '3106200'],
+})
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    """Planilhas base.dengue.<ano>.xlsx sintéticas (sem snapshot Parquet)."""
+    monkeypatch.setattr(Config, 'EXCEL_CACHE_ENABLED', False)
+    # Processos filhos (spawn) reimportam Config a partir do ambiente
+    monkeypatch.setenv('EXCEL_CACHE_ENABLED', 'false')
+
+    rng = np.random.default_rng(0)
+    pasta = tmp_path / 'dados_dengue'
+    pasta.mkdir()
+    for ano in ANOS:
+        semanas = 3 if ano < 2025 else 2
+        df = pd.DataFrame({
+            'Cod IBGE': ['corrompido'] * 4,
+            'Municipio': ['ABAETE', 'Abadia dos Dourados ', 'Açucena', 'belo horizonte'],
+            **{f'Semana {s:02d}': rng.integers(0, 40, 4).astype(float) for s in range(1, semanas + 1)},
+        })
+        if ano == 2024:
+            df.loc[2, 'Semana 02'] = np.nan
+        df.to_excel(pasta / f'base.dengue.{ano}.xlsx', index=False)
+    return tmp_path
+
+
+@pytest.fixture
+def mapa_ibge():
+    return MunicipioResolver.from_frame(IBGE, 'MUNICIPIO', 'CODIGO_IBGE')
+
+
+def _consolidacao_sequencial(base_dir, mapa_ibge):
+    """Consolidação anterior ao processamento por ano (laço único sobre os anos)."""
+    dfs = []
+    for ano in ANOS:
+        df = pd.read_excel(base_dir / 'dados_dengue' / f'base.dengue.{ano}.xlsx')
+        df = df.rename(columns={'Municipio': 'MUNICIPIO'})
+        df = correlacionar_codigo_ibge(df, mapa_ibge, f'Dengue {ano}')
+        colunas_semanas = [col for col in df.columns if col.startswith('Semana')]
+        df_long = df.melt(
+            id_vars=['CODIGO_IBGE', 'MUNICIPIO'],
+            value_vars=colunas_semanas,
+            var_name='SEMANA_STR',
+            value_name='CASOS'
+        )
+        df_long['SEMANA_EPIDEMIOLOGICA'] = df_long['SEMANA_STR'].str.extract(r'(\d+)').astype(int)
+        df_long['ANO'] = ano
+        dfs.append(df_long.drop(columns=['SEMANA_STR']))
+    return pd.concat(dfs, ignore_index=True)
+
+
+class TestProcessarAnoDengue:
+    def test_concatenated_years_match_sequential(self, base_dir, mapa_ibge):
+        esperado = _consolidacao_sequencial(base_dir, mapa_ibge)
+        dfs = [processar_ano_dengue(ano, mapa_ibge, base_dir) for ano in ANOS]
+        consolidado = pd.concat(dfs, ignore_index=True)
+
+        # Mesmos valores; apenas os tipos foram compactados
+        pd.testing.assert_frame_equal(consolidado, esperado, check_dtype=False)
+        assert consolidado['ANO'].dtype == np.int16
+        assert consolidado['SEMANA_EPIDEMIOLOGICA'].dtype == np.int8
+        assert dfs[0]['CASOS'].dtype == np.int32
+        # Célula vazia: CASOS permanece float
+        assert dfs[1]['CASOS'].hasnans
+        assert consolidado['CODIGO_IBGE'].tolist()[:4] == IBGE['CODIGO_IBGE'].tolist()
+
+    def test_worker_and_arguments_pickle(self, base_dir, mapa_ibge):
+        assert pickle.loads(pickle.dumps(processar_ano_dengue)) is processar_ano_dengue
+        mapa = pickle.loads(pickle.dumps(mapa_ibge))
+        assert mapa.resolve(pd.Series(['ABAETE'])).tolist() == ['3100203']
+
+    def test_spawn_pool_matches_sequential(self, base_dir, mapa_ibge):
+        esperado = pd.concat([processar_ano_dengue(ano, mapa_ibge, base_dir) for ano in ANOS], ignore_index=True)
+
+        n = len(ANOS)
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as pool:
+            dfs = list(pool.map(processar_ano_dengue, ANOS, [mapa_ibge] * n, [base_dir] * n))
+
+        pd.testing.assert_frame_equal(pd.concat(dfs, ignore_index=True), esperado)
+
+    def test_default_base_dir(self, base_dir, mapa_ibge, monkeypatch):
+        monkeypatch.setattr(criar_base_integrada, 'BASE_DIR', base_dir)
+        pd.testing.assert_frame_equal(
+            processar_ano_dengue(2023, mapa_ibge), processar_ano_dengue(2023, mapa_ibge, base_dir)
+        )
@@ -0,0 +1,172 @@
+"""
+Testes da MEGA TABELA: construção ano a ano equivalente à construção em memória.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "etl"))
+
+import criar_mega_tabela  # noqa: E402
+
+TRATAMENTOS = [
+    'removido_solucionado', 'descaracterizado', 'Tratado',
+    'morador_ausente', 'nao_Autorizado', 'tratamento_via_drones', 'monitorado',
+]
+
+
+@pytest.fixture
+def silver(tmp_path, monkeypatch):
+    """Tabelas silver sintéticas; 2023 cobre todos os municípios, 2024 parte e 2025 nenhum."""
+    rng = np.random.default_rng(0)
+    n = 12
+    codigos = [str(3100000 + i) for i in range(n)]
+    municipios = pd.DataFrame({
+        'codigo_ibge': codigos,
+        'municipio': [f'M{i}' for i in range(n)],
+        'populacao': [str(1000 * i) if i % 5 else 'x' for i in range(n)],
+        'area_ha': rng.random(n) * 1000,
+        'urs': 'URS 1',
+        'microregiao_saude': 'Micro',
+        'macroregiao_saude': 'Macro',
+    })
+
+    datas = (
+        list(pd.Timestamp('2023-01-01') + pd.to_timedelta(np.arange(n) * 20, unit='D'))
+        + list(pd.Timestamp('2024-02-01') + pd.to_timedelta(np.arange(6) * 9, unit='D'))
+    )
+    k = len(datas)
+    atividades = pd.DataFrame({
+        'CODIGO_IBGE': codigos + codigos[:6],
+        'DATA_MAP': datas,
+        'NOMENCLATURA_ATIVIDADE': 'ATV',
+        'HECTARES_MAPEADOS': rng.random(k),
+        'POIS': rng.integers(0, 50, k),
+        'devolutivas': rng.integers(0, 10, k),
+        'A - Pneus': rng.integers(0, 3, k),
+        **{col: rng.integers(0, 3, k) for col in TRATAMENTOS},
+    })
+    atividades['ANO'] = atividades['DATA_MAP'].dt.year.astype('int32')
+
+    dengue = pd.DataFrame({
+        'MUNICIPIO': [f'M{i % n}' for i in range(40)],
+        'ANO': [2023, 2024, 2025, 2022] * 10,
+        'CASOS': rng.integers(0, 30, 40),
+    })
+
+    p = 5_000
+    pois = pd.DataFrame({
+        'sistema_id': rng.integers(0, 7, p),
+        'poi_id': np.arange(p),
+        'latitude': np.where(rng.random(p) < 0.1, np.nan, rng.random(p)),
+        'longitude': rng.random(p),
+        'analista': rng.choice(['ana', 'bia', 'caio', None], p),
+    })
+
+    paths = {}
+    for nome, df in [
+        ('dim_municipios', municipios),
+        ('fato_pois_servidor', pois),
+        ('fato_atividades', atividades),
+        ('fato_dengue', dengue),
+    ]:
+        paths[nome] = tmp_path / f'{nome}.parquet'
+        df.to_parquet(paths[nome], index=False)
+
+    monkeypatch.setattr(criar_mega_tabela, 'GOLD_DIR', tmp_path)
+    monkeypatch.setattr(criar_mega_tabela, 'POIS_LOTE', 777)
+    return paths, (municipios, pois, atividades, dengue)
+
+
+def _sem_carga(df):
+    return df.drop(columns='data_atualizacao').reset_index(drop=True)
+
+
+class TestMegaTabelaParticionada:
+    def test_matches_in_memory_build(self, silver):
+        paths, frames = silver
+        esperado = criar_mega_tabela.construir_mega_tabela(*frames)
+
+        blocos = criar_mega_tabela.construir_mega_tabela_particionada(
+            paths['dim_municipios'], paths['fato_pois_servidor'],
+            paths['fato_atividades'], paths['fato_dengue'],
+        )
+        parquet, csv = criar_mega_tabela.gravar_mega_tabela(blocos)
+
+        # Um row group por ano
+        assert pq.read_metadata(parquet).num_row_groups == len(criar_mega_tabela.ANOS)
+        gravado = pd.read_parquet(parquet)
+        pd.testing.assert_frame_equal(_sem_carga(gravado), _sem_carga(esperado), check_dtype=False)
+        assert len(pd.read_csv(csv)) == len(esperado)
+        assert not list(parquet.parent.glob('*.tmp'))
+
+    def test_later_blocks_are_cast_to_first_schema(self, silver):
+        paths, _ = silver
+        blocos = list(criar_mega_tabela.construir_mega_tabela_particionada(
+            paths['dim_municipios'], paths['fato_pois_servidor'],
+            paths['fato_atividades'], paths['fato_dengue'],
+        ))
+        esquemas = [pa.Table.from_pandas(b, preserve_index=False).schema for b in blocos]
+        # 2023 cobre todos os municípios (inteiros); 2024 e 2025 têm lacunas (float)
+        assert esquemas[1] != esquemas[0]
+
+        parquet, _ = criar_mega_tabela.gravar_mega_tabela(iter(blocos))
+        assert pq.read_schema(parquet).remove_metadata() == esquemas[0].remove_metadata()
+
+    def test_failure_removes_temporary_files(self, silver, tmp_path):
+        paths, frames = silver
+        primeiro = criar_mega_tabela.construir_mega_tabela(*frames)
+
+        def _blocos():
+            yield primeiro
+            raise RuntimeError('falha no segundo ano')
+
+        with pytest.raises(RuntimeError):
+            criar_mega_tabela.gravar_mega_tabela(_blocos())
+        assert not list(tmp_path.glob('mega_tabela_analitica*'))
+
+
+class TestAgregarPoisServidor:
+    def test_batches_match_single_pass(self, silver):
+        paths, (_, pois, _, _) = silver
+        lotes = (
+            lote.to_pandas()
+            for lote in pq.ParquetFile(paths['fato_pois_servidor']).iter_batches(batch_size=777)
+        )
+        agg, total = criar_mega_tabela.agregar_pois_servidor(lotes)
+
+        esperado = pois.groupby('sistema_id').agg(
+            total=('poi_id', 'count'),
+            lat=('latitude', 'mean'),
+            long=('longitude', 'mean'),
+            analista=('analista', lambda x: x.mode()[0] if len(x.mode()) > 0 else None),
+        ).reset_index()
+
+        assert total == len(pois)
+        assert agg['sistema_id'].tolist() == esperado['sistema_id'].tolist()
+        assert agg['total_pois_servidor'].tolist() == esperado['total'].tolist()
+        np.testing.assert_allclose(agg['lat_media_sistema'], esperado['lat'])
+        np.testing.assert_allclose(agg['long_media_sistema'], esperado['long'])
+        # Moda do analista acumulada entre lotes (empate: menor valor, como Series.mode)
+        assert agg['analista_principal'].tolist() == esperado['analista'].tolist()
+
+    def test_tied_analysts_across_batches(self):
+        lotes = [
+            pd.DataFrame({'sistema_id': [1, 1], 'poi_id': [1, 2], 'latitude': [0.0, 1.0],
+                          'longitude': [0.0, 1.0], 'analista': ['caio', 'caio']}),
+            pd.DataFrame({'sistema_id': [1, 1, 2], 'poi_id': [3, 4, 5], 'latitude': [2.0, np.nan, 5.0],
+                          'longitude': [2.0, 3.0, 5.0], 'analista': ['bia', 'bia', None]}),
+        ]
+        agg, total = criar_mega_tabela.agregar_pois_servidor(lotes)
+
+        assert total == 5
+        assert agg['total_pois_servidor'].tolist() == [4, 1]
+        assert agg['lat_media_sistema'].tolist() == [1.0, 5.0]
+        assert agg['analista_principal'].iloc[0] == 'bia'
+        assert pd.isna(agg['analista_principal'].iloc[1])
@@ -0,0 +1,227 @@
+"""
+Testes unitários para o pool de conexões do DatabaseManager.
+"""
+
+import threading
+import time
+
+import psycopg2
+import pytest
+
+from src import database
+from src.database import BlockingConnectionPool, ConnectionPoolTimeout, DatabaseConnectionError
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.pings += 1
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.pings = 0
+
+    def cursor(self, *args, **kwargs):
+        return _FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class _FakeThreadedPool:
+    """Substituto do ThreadedConnectionPool sem banco real."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self._pool = [_FakeConnection() for _ in range(minconn)]
+        self.opened = minconn
+
+    def getconn(self):
+        if self._pool:
+            return self._pool.pop()
+        self.opened += 1
+        return _FakeConnection()
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.close()
+        else:
+            self._pool.append(conn)
+
+    def closeall(self):
+        for conn in self._pool:
+            conn.close()
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    monkeypatch.setattr(database.pool, "ThreadedConnectionPool", _FakeThreadedPool)
+
+
+class TestBlockingConnectionPool:
+    def test_checkout_and_return_updates_gauges(self, fake_pool):
+        p = BlockingConnectionPool(1, 2, timeout=0.1)
+        conn = p.getconn()
+        assert p.stats()["in_use"] == 1
+        assert p.stats()["idle"] == 0
+        p.putconn(conn)
+        stats = p.stats()
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 1
+        assert stats["acquired_total"] == 1
+
+    def test_exhausted_pool_times_out(self, fake_pool):
+        p = BlockingConnectionPool(1, 1, timeout=0.05)
+        p.getconn()
+        with pytest.raises(ConnectionPoolTimeout):
+            p.getconn()
+        assert p.stats()["timeouts_total"] == 1
+        assert isinstance(ConnectionPoolTimeout("x"), DatabaseConnectionError)
+
+    def test_waits_for_released_connection(self, fake_pool):
+        p = BlockingConnectionPool(1, 1, timeout=2)
+        conn = p.getconn()
+        threading.Timer(0.05, p.putconn, args=(conn,)).start()
+        assert p.getconn() is conn
+        assert p.stats()["wait_seconds_max"] > 0
+
+    def test_closed_connection_is_replaced(self, fake_pool):
+        p = BlockingConnectionPool(1, 2, timeout=0.1)
+        conn = p.getconn()
+        p.putconn(conn)
+        conn.closed = 1
+        fresh = p.getconn()
+        assert fresh is not conn
+        assert p.stats()["discarded_total"] == 1
+
+    def test_idle_connection_is_pinged(self, fake_pool):
+        p = BlockingConnectionPool(1, 2, timeout=0.1, healthcheck_idle=0)
+        conn = p.getconn()
+        p.putconn(conn)
+        conn.broken = True
+        time.sleep(0.001)
+        fresh = p.getconn()
+        assert conn.pings == 1
+        assert fresh is not conn
+        assert conn.closed
+
+    def test_broken_connection_discarded_on_return(self, fake_pool):
+        p = BlockingConnectionPool(1, 1, timeout=0.1)
+        conn = p.getconn()
+        conn.closed = 2
+        p.putconn(conn)
+        assert p.stats()["idle"] == 0
+        assert p.stats()["discarded_total"] == 1
+        assert p.getconn() is not conn
+
+
+def test_pool_stats_empty_without_pool(monkeypatch):
+    monkeypatch.setattr(database, "_db_instance", None)
+    monkeypatch.setattr(database, "_warehouse_db_instance", None)
+    assert database.get_pool_stats() == {}
+
+
+class _Column:
+    def __init__(self, name, type_code):
+        self.name = name
+        self.type_code = type_code
+
+
+class _NamedCursor:
+    def __init__(self, rows, description):
+        self.rows = list(rows)
+        self.description = description
+        self.fetch_sizes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        out, self.rows = self.rows[:size], self.rows[size:]
+        return out
+
+
+class _StreamConnection(_FakeConnection):
+    def __init__(self, cursor):
+        super().__init__()
+        self._cursor = cursor
+        self.cursor_names = []
+
+    def cursor(self, name=None, **kwargs):
+        self.cursor_names.append(name)
+        return self._cursor
+
+
+class _SinglePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        pass
+
+    def closeall(self):
+        pass
+
+
+def _manager_with(cursor):
+    conn = _StreamConnection(cursor)
+    db = database.DatabaseManager()
+    db._pool = _SinglePool(conn)
+    return db, conn
+
+
+class TestStreamBatches:
+    DESCRIPTION = [_Column("id", 23), _Column("valor", 1700), _Column("nome", 25), _Column("geom", 99999)]
+
+    def test_yields_typed_batches_from_named_cursor(self):
+        from decimal import Decimal
+
+        rows = [(i, Decimal("1.5"), f"poi {i}", {"x": i}) for i in range(5)]
+        cursor = _NamedCursor(rows, self.DESCRIPTION)
+        db, conn = _manager_with(cursor)
+
+        batches = list(db.stream_batches("SELECT 1", batch_size=2))
+
+        assert [b.num_rows for b in batches] == [2, 2, 1]
+        assert conn.cursor_names[0].startswith("techdengue_stream_")
+        assert set(cursor.fetch_sizes) == {2}
+        schema = batches[0].schema
+        assert str(schema.field("id").type) == "int64"
+        assert str(schema.field("valor").type) == "double"
+        assert str(schema.field("geom").type) == "string"
+        assert all(b.schema == schema for b in batches)
+
+    def test_empty_result_keeps_schema(self):
+        db, _ = _manager_with(_NamedCursor([], self.DESCRIPTION))
+        batches = list(db.stream_batches("SELECT 1", batch_size=10))
+        assert len(batches) == 1
+        assert batches[0].num_rows == 0
+        assert batches[0].schema.names == ["id", "valor", "nome", "geom"]
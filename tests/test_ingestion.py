@@ -0,0 +1,215 @@
+"""
+Testes da leitura em blocos da mega planilha (validação + agregação em um passe).
+"""
+
+import datetime
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from src.config import Config
+from src.excel_reader import iter_excel_chunks
+from src.ingestion import (
+    FACT_STAGE_TABLE,
+    FACT_TABLE,
+    _aggregate_for_fact,
+    _normalize_df,
+    copy_upsert_fact,
+    read_mega_planilha,
+)
+from src.validators import validate_mega_planilha
+
+SHEET = "Atividades (com sub)"
+
+
+@pytest.fixture(autouse=True)
+def _excel_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config.PATHS, "cache_dir", tmp_path / "cache")
+
+
+def _write_xlsx(path, header, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    header = ["CODIGO IBGE", "Municipio", "DATA_MAP", "NOMENCLATURA_ATIVIDADE", "POIS", "HECTARES_MAPEADOS", "CONTRATANTE"]
+    rows = []
+    for i in range(23):
+        rows.append([
+            3100104 if i % 3 else 3100203,
+            "Abadia" if i % 3 else "Abaete",
+            datetime.datetime(2024, 1 + i % 2, 1),
+            "ATV.01" if i % 4 else "ATV.02",
+            i if i % 5 else None,
+            float(i),
+            "CISARP" if i % 7 else None,
+        ])
+    rows.append([None] * len(header))  # linha vazia: ignorada
+    rows.append([999, "Fora", datetime.datetime(2024, 3, 1), "ATV.03", 1, 1.0, None])
+    return _write_xlsx(tmp_path / "mega.xlsx", header, rows)
+
+
+class TestIterExcelChunks:
+    def test_chunks_cover_all_rows(self, planilha):
+        chunks = list(iter_excel_chunks(planilha, SHEET, chunk_size=10))
+        assert [len(c) for c in chunks] == [10, 10, 4]
+        assert chunks[0].columns[0] == "CODIGO IBGE"
+
+    def test_header_only_sheet_yields_empty_chunk(self, tmp_path):
+        path = _write_xlsx(tmp_path / "vazia.xlsx", ["A", None, "A"], [])
+        chunks = list(iter_excel_chunks(path, SHEET))
+        assert len(chunks) == 1 and chunks[0].empty
+        assert chunks[0].columns.tolist() == ["A", "Unnamed: 1", "A.1"]
+
+
+class TestReadMegaPlanilha:
+    @pytest.mark.parametrize("chunk_size", [4, 1000])
+    def test_matches_full_read(self, planilha, chunk_size):
+        expected = _aggregate_for_fact(_normalize_df(pd.read_excel(planilha, sheet_name=SHEET)))
+
+        report, grouped = read_mega_planilha(planilha, chunk_size=chunk_size)
+
+        pd.testing.assert_frame_equal(grouped, expected, check_dtype=False)
+        assert report.ok
+        assert report.rows == 24
+        assert report.model_dump() == validate_mega_planilha(planilha, chunk_size=chunk_size).model_dump()
+
+    def test_report_counts_across_chunks(self, planilha):
+        report = validate_mega_planilha(planilha, chunk_size=4)
+        counts = {i.message.split(" ")[0]: i.count for i in report.issues}
+
+        df = _normalize_df(pd.read_excel(planilha, sheet_name=SHEET))
+        assert counts["Registros"] == int(df.duplicated(subset=["CODIGO_IBGE", "DATA_MAP", "NOMENCLATURA_ATIVIDADE"]).sum())
+        assert counts["Códigos"] == 1
+        assert report.summary["pois_total"] == int(df["POIS"].sum())
+
+    def test_missing_columns_fail_without_aggregating(self, tmp_path):
+        path = _write_xlsx(tmp_path / "incompleta.xlsx", ["CODIGO_IBGE", "POIS"], [[3100104, 1]])
+
+        report, grouped = read_mega_planilha(path)
+
+        assert not report.ok
+        assert grouped is None
+        assert "Colunas obrigatórias ausentes" in report.issues[0].message
+
+    def test_unreadable_file_reports_error(self, tmp_path):
+        report, grouped = read_mega_planilha(str(tmp_path / "nao_existe.xlsx"))
+        assert not report.ok and grouped is None
+        assert report.issues[0].message.startswith("Falha ao ler arquivo")
+
+
+class _CopyCursor:
+    def __init__(self, log, counts):
+        self.log = log
+        self.counts = counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append(("execute", sql))
+
+    def copy_expert(self, sql, file):
+        self.log.append(("copy", sql, file.read()))
+
+    def fetchone(self):
+        return self.counts
+
+
+class _CopyDatabase:
+    """DatabaseManager falso: registra SQL e dados enviados via COPY."""
+
+    def __init__(self, counts=(2, 1)):
+        self.log = []
+        self.counts = counts
+
+    @contextmanager
+    def get_connection(self):
+        yield SimpleNamespace(cursor=lambda: _CopyCursor(self.log, self.counts))
+
+
+def _fact_rows():
+    return pd.DataFrame({
+        "codigo_ibge": ["3100104", "3100203", "3100302", "3100401"],
+        "data_map": [datetime.date(2024, 1, 1)] * 4,
+        "nomenclatura_atividade": ["ATV.01"] * 4,
+        "municipio": ["Abadia", None, "Abaete", "Acaiaca"],
+        "pois": [10.0, None, 3.0, 1.0],
+        "hectares_mapeados": [1.5, 2.0, None, 0.0],
+        "data_carga": [datetime.datetime(2024, 2, 1, 12)] * 4,
+        "versao": ["1.0.0"] * 4,
+    })
+
+
+class TestCopyUpsertFact:
+    def test_streams_csv_and_merges_once(self):
+        db = _CopyDatabase(counts=(2, 1))
+
+        result = copy_upsert_fact(_fact_rows(), db, chunk_size=3)
+
+        assert result == {"inserted": 2, "updated": 1, "unchanged": 1, "total": 4}
+        copies = [entry for entry in db.log if entry[0] == "copy"]
+        assert len(copies) == 2  # um COPY por bloco
+        data = "".join(entry[2] for entry in copies).splitlines()
+        assert data[0] == "3100104,Abadia,2024-01-01,ATV.01,10,1.5,2024-02-01 12:00:00,1.0.0"
+        assert data[1].split(",")[1] == "\\N" and data[1].split(",")[4] == "\\N"
+
+        statements = [entry[1] for entry in db.log if entry[0] == "execute"]
+        assert statements[0].startswith(f"CREATE TEMP TABLE {FACT_STAGE_TABLE}")
+        merge = statements[-1]
+        assert "ON CONFLICT (codigo_ibge, data_map, nomenclatura_atividade) DO UPDATE" in merge
+        # Colunas de carga são atualizadas mas não contam como alteração
+        assert "data_carga=EXCLUDED.data_carga" in merge
+        assert "IS DISTINCT FROM" in merge and "EXCLUDED.data_carga)" not in merge
+
+    def test_empty_frame_skips_database(self):
+        db = _CopyDatabase()
+        assert copy_upsert_fact(_fact_rows().iloc[:0], db)["total"] == 0
+        assert db.log == []
+
+
+class TestRowHash:
+    def _grouped(self, pois):
+        return _aggregate_for_fact(pd.DataFrame({
+            "CODIGO_IBGE": ["3100104", "3100203"],
+            "DATA_MAP": [datetime.date(2024, 1, 1)] * 2,
+            "NOMENCLATURA_ATIVIDADE": ["ATV.01"] * 2,
+            "POIS": pois,
+            "MUNICIPIO": ["Abadia", None],
+        }))
+
+    def test_hash_ignores_int_float_representation(self):
+        as_int = self._grouped([10, 5])
+        as_float = self._grouped([10.0, 5.0])
+        assert as_int["ROW_HASH"].tolist() == as_float["ROW_HASH"].tolist()
+        assert as_int["ROW_HASH"].str.fullmatch(r"[0-9a-f]{16}").all()
+
+    def test_hash_changes_only_for_changed_rows(self):
+        before = self._grouped([10, 5])["ROW_HASH"].tolist()
+        after = self._grouped([10, 6])["ROW_HASH"].tolist()
+        assert before[0] == after[0]
+        assert before[1] != after[1]
+
+    def test_merge_compares_row_hash(self):
+        db = _CopyDatabase(counts=(0, 1))
+        rows = _fact_rows().assign(row_hash=["a", "b", "c", "d"])
+
+        result = copy_upsert_fact(rows, db)
+
+        merge = [entry[1] for entry in db.log if entry[0] == "execute"][-1]
+        assert f"WHERE {FACT_TABLE}.row_hash IS DISTINCT FROM EXCLUDED.row_hash" in merge
+        assert result == {"inserted": 0, "updated": 1, "unchanged": 3, "total": 4}
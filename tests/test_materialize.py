@@ -0,0 +1,199 @@
+"""
+Testes do cubo de resumo pré-calculado de /facts/summary.
+"""
+
+import datetime
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+from src.api.app import app
+from src.config import Config
+from src.materialize import (
+    FACTS_SUMMARY_FILE,
+    GOLD_PENDING_FILE,
+    build_facts_summary,
+    materialize_facts_summary,
+    materialize_facts_to_parquet,
+    materialize_gold_analise,
+)
+
+
+def _facts() -> pd.DataFrame:
+    return pd.DataFrame({
+        "codigo_ibge": ["3100104", "3100104", "3100203", None],
+        "municipio": ["Abadia", "Abadia", "Abaete", None],
+        "nomenclatura_atividade": ["ATV.01", "ATV.02", "ATV.01", None],
+        "pois": [10, 20, 30, None],
+        "devolutivas": [1.0, 2.0, None, 4.0],
+        "hectares_mapeados": [0.5, 1.5, 2.0, 3.0],
+    })
+
+
+@pytest.fixture
+def summary_dir(tmp_path, monkeypatch):
+    """Diretório de dados com o dataset de atividades sintético."""
+    _facts().to_parquet(tmp_path / "fato_atividades_techdengue.parquet", index=False)
+    monkeypatch.setattr(Config.PATHS, "output_dir", tmp_path)
+    monkeypatch.setattr(Config, "DATASETS_REMOTE_URL", "")
+    monkeypatch.setattr(Config, "DATASETS_S3_URI", "")
+    return tmp_path
+
+
+def _summary(group_by=None):
+    client = TestClient(app)
+    params = {"group_by": group_by} if group_by else {}
+    resp = client.get("/facts/summary", params=params)
+    assert resp.status_code == 200
+    return resp.json()["summary"]
+
+
+class TestBuildFactsSummary:
+    def test_rollups_match_groupby(self):
+        cube = build_facts_summary(_facts())
+        mun = cube[cube["group_by"] == "municipio"].set_index("key")
+        assert mun.loc["Abadia", "total_pois"] == 30
+        assert mun.loc["Abadia", "atividades"] == 2
+        assert mun.loc["Abaete", "total_devolutivas"] == 0.0
+
+        total = cube[cube["group_by"] == "total"].iloc[0]
+        assert total["total_pois"] == 60
+        assert total["total_hectares"] == 7.0
+        assert total["atividades"] == 3
+        assert pd.isna(total["key"])
+
+    def test_atividade_counts_pois(self):
+        cube = build_facts_summary(_facts())
+        atv = cube[cube["group_by"] == "atividade"].set_index("key")
+        assert atv.loc["ATV.01", "atividades"] == 2
+        assert set(atv.index) == {"ATV.01", "ATV.02"}
+
+
+class TestSummaryEndpoint:
+    def test_without_sidecar_computes_in_memory(self, summary_dir):
+        items = _summary("codigo_ibge")
+        assert [i["key"] for i in items] == ["3100104", "3100203"]
+        assert items[0]["total_pois"] == 30
+
+    def test_uses_matching_sidecar(self, summary_dir):
+        materialize_facts_summary(summary_dir / "fato_atividades_techdengue.parquet")
+        assert (summary_dir / FACTS_SUMMARY_FILE).exists()
+        assert _summary()[0]["total_pois"] == 60
+
+    def test_stale_sidecar_is_ignored(self, summary_dir):
+        facts_path = summary_dir / "fato_atividades_techdengue.parquet"
+        materialize_facts_summary(facts_path)
+
+        df = _facts()
+        df["pois"] = [100, 200, 300, None]
+        df.to_parquet(facts_path, index=False)
+        st = os.stat(facts_path)
+        os.utime(facts_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        assert _summary()[0]["total_pois"] == 600
+
+
+def _write_planilha(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Atividades (com sub)"
+    ws.append(["CODIGO IBGE", "Municipio", "DATA_MAP", "NOMENCLATURA_ATIVIDADE", "POIS", "devolutivas", "HECTARES_MAPEADOS"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _planilha_rows():
+    return [
+        [3100104 + (i % 4) * 99, f"Mun {i % 4}", datetime.datetime(2024, 1 + i % 3, 1 + i % 5), f"ATV.{i:02d}", i, i % 2, float(i)]
+        for i in range(30)
+    ]
+
+
+@pytest.fixture
+def gold_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config.PATHS, "cache_dir", tmp_path / "cache")
+    out_dir = tmp_path / "out"
+    xlsx = tmp_path / "mega.xlsx"
+    _write_planilha(xlsx, _planilha_rows())
+    materialize_facts_to_parquet(xlsx_path=xlsx, out_dir=out_dir)
+    assert materialize_gold_analise(out_dir)["mode"] == "full"
+    return out_dir, xlsx
+
+
+class TestIncrementalGold:
+    def _reload(self, out_dir, xlsx, rows):
+        _write_planilha(xlsx, rows)
+        materialize_facts_to_parquet(xlsx_path=xlsx, out_dir=out_dir)
+
+    def test_recomputes_only_changed_groups(self, gold_dir):
+        out_dir, xlsx = gold_dir
+        rows = _planilha_rows()
+        rows[0][4] = 1000                                                 # alterado
+        del rows[7]                                                       # removido
+        rows.append([3100104, "Mun 0", datetime.datetime(2024, 6, 1), "ATV.99", 5, 1, 2.0])  # novo grupo
+        self._reload(out_dir, xlsx, rows)
+
+        pending = pd.read_parquet(out_dir / GOLD_PENDING_FILE)
+        assert len(pending) == 3
+
+        result = materialize_gold_analise(out_dir)
+        assert result["mode"] == "incremental"
+        assert result["groups_recomputed"] == 3
+        assert not (out_dir / GOLD_PENDING_FILE).exists()
+
+        incremental = pd.read_parquet(out_dir / "analise_integrada.parquet")
+        materialize_gold_analise(out_dir, incremental=False)
+        full = pd.read_parquet(out_dir / "analise_integrada.parquet")
+        pd.testing.assert_frame_equal(incremental, full)
+
+    def test_pending_groups_accumulate_across_loads(self, gold_dir):
+        out_dir, xlsx = gold_dir
+        rows = _planilha_rows()
+        rows[0][4] = 1000
+        self._reload(out_dir, xlsx, rows)
+        rows[1][4] = 2000
+        self._reload(out_dir, xlsx, rows)
+
+        assert len(pd.read_parquet(out_dir / GOLD_PENDING_FILE)) == 2
+        assert materialize_gold_analise(out_dir)["groups_recomputed"] == 2
+
+    def test_unchanged_facts_skip_gold(self, gold_dir):
+        out_dir, _ = gold_dir
+        assert materialize_gold_analise(out_dir)["mode"] == "unchanged"
+
+    def test_untracked_facts_change_forces_full(self, gold_dir):
+        out_dir, _ = gold_dir
+        facts_path = out_dir / "fato_atividades_techdengue.parquet"
+        df = pd.read_parquet(facts_path)
+        df.loc[0, "pois"] = 999
+        df.to_parquet(facts_path, index=False)
+
+        assert materialize_gold_analise(out_dir)["mode"] == "full"
+
+
+class TestDictionaryEncodedFacts:
+    def test_gold_groups_only_observed_combinations(self, gold_dir):
+        out_dir, _ = gold_dir
+        facts_path = out_dir / "fato_atividades_techdengue.parquet"
+        assert pa.types.is_dictionary(pq.read_schema(facts_path).field("codigo_ibge").type)
+
+        facts = pd.read_parquet(facts_path)
+        expected = (
+            facts.astype({"codigo_ibge": str, "municipio": str})
+                 .assign(competencia=pd.to_datetime(facts["data_map"]).dt.to_period("M"))
+                 [["codigo_ibge", "municipio", "competencia"]]
+                 .drop_duplicates()
+        )
+        gold = pd.read_parquet(out_dir / "analise_integrada.parquet")
+        assert len(gold) == len(expected)
+        assert gold["atividades"].sum() == len(facts)
+
+        summary = pd.read_parquet(out_dir / FACTS_SUMMARY_FILE)
+        mun = summary[summary["group_by"] == "municipio"]
+        assert len(mun) == expected["municipio"].nunique()
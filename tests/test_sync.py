@@ -0,0 +1,373 @@
+"""
+Testes do DataSynchronizer (gravação incremental do cache).
+"""
+
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.sync import SYNC_TABLES, DataSynchronizer, SyncMetadata, register_sync_table
+
+
+@pytest.fixture
+def synchronizer(tmp_path):
+    sync = DataSynchronizer()
+    sync.cache_dir = tmp_path
+    sync.metadata = SyncMetadata(tmp_path)
+    return sync
+
+
+def _batches(n_batches=3, size=4):
+    for b in range(n_batches):
+        yield pa.RecordBatch.from_pydict({
+            "id": pa.array(range(b * size, (b + 1) * size), pa.int64()),
+            "poi": pa.array([f"poi {i}" for i in range(size)], pa.string()),
+        })
+
+
+class TestSaveBatchesToCache:
+    def test_writes_all_batches_and_metadata(self, synchronizer, tmp_path):
+        result = synchronizer._save_batches_to_cache(_batches(), "banco_techdengue")
+
+        df = pd.read_parquet(tmp_path / "banco_techdengue.parquet")
+        assert result == {"row_count": 12, "columns": ["id", "poi"]}
+        assert df["id"].tolist() == list(range(12))
+
+        info = synchronizer.metadata.load()["banco_techdengue"]
+        assert info["row_count"] == 12
+        assert info["hash_md5"] == synchronizer._calculate_hash(df)
+        assert not (tmp_path / "banco_techdengue.parquet.tmp").exists()
+
+    def test_failure_keeps_previous_cache(self, synchronizer, tmp_path):
+        synchronizer._save_batches_to_cache(_batches(1), "banco_techdengue")
+
+        def _broken():
+            yield from _batches(1)
+            raise RuntimeError("conexão perdida")
+
+        with pytest.raises(RuntimeError):
+            synchronizer._save_batches_to_cache(_broken(), "banco_techdengue")
+
+        assert len(pd.read_parquet(tmp_path / "banco_techdengue.parquet")) == 4
+        assert not (tmp_path / "banco_techdengue.parquet.tmp").exists()
+
+    def test_sync_banco_techdengue_streams_from_repository(self, synchronizer, monkeypatch):
+        calls = {}
+
+        def _iter(batch_size=None):
+            calls["batch_size"] = batch_size
+            return _batches(2)
+
+        monkeypatch.setattr(synchronizer.repository, "iter_banco_techdengue_batches", _iter)
+        result = synchronizer.sync_banco_techdengue(force=True)
+
+        assert result["status"] == "synced"
+        assert result["row_count"] == 8
+        assert calls["batch_size"] == synchronizer.config.SYNC_BATCH_SIZE
+
+
+def _pois(ids, created, updated=None, deleted=None, extra=False):
+    data = {
+        "id": pa.array(ids, pa.int64()),
+        "created_at": pa.array(created, pa.timestamp("us")),
+        "updated_at": pa.array(updated or [None] * len(ids), pa.timestamp("us")),
+        "poi": pa.array([f"poi {i}" for i in ids], pa.string()),
+    }
+    if extra:
+        data["deleted_at"] = pa.array(deleted or [None] * len(ids), pa.timestamp("us"))
+        data["sync_watermark"] = pa.array(
+            [max(v for v in vals if v is not None)
+             for vals in zip(created, updated or [None] * len(ids), deleted or [None] * len(ids))],
+            pa.timestamp("us"),
+        )
+    return pa.RecordBatch.from_pydict(data)
+
+
+class TestIncrementalSync:
+    def test_full_then_incremental_merge(self, synchronizer, tmp_path, monkeypatch):
+        from datetime import datetime as dt
+
+        d = [dt(2024, 1, day) for day in range(1, 6)]
+        repo = synchronizer.repository
+        monkeypatch.setattr(repo, "iter_planilha_campo_batches",
+                            lambda batch_size=None: iter([_pois([3, 2, 1], d[2::-1])]))
+
+        first = synchronizer.sync_planilha_campo(force=True)
+        assert first["mode"] == "full"
+        assert synchronizer.metadata.get_watermark("planilha_campo") == d[2]
+
+        seen = {}
+
+        def _changes(since, batch_size=None):
+            seen["since"] = since
+            return iter([_pois(
+                [2, 1, 4],
+                [d[1], d[0], d[4]],
+                updated=[d[3], None, None],
+                deleted=[None, d[3], None],
+                extra=True,
+            )])
+
+        monkeypatch.setattr(repo, "iter_planilha_campo_changes", _changes)
+        monkeypatch.setattr(synchronizer.config, "CACHE_TTL_SECONDS", 0)
+        second = synchronizer.sync_planilha_campo()
+
+        assert seen["since"] == d[2]
+        assert second["mode"] == "incremental"
+        assert (second["upserted"], second["deleted"]) == (2, 1)
+
+        df = synchronizer.load_cache("planilha_campo")
+        assert sorted(df["id"].tolist()) == [2, 3, 4]
+        assert df.columns.tolist() == ["id", "created_at", "updated_at", "poi"]
+        assert df.loc[df["id"] == 2, "updated_at"].iloc[0] == d[3]
+        assert synchronizer.metadata.get_watermark("planilha_campo") == d[4]
+
+    def test_no_changes_keeps_cache(self, synchronizer, monkeypatch):
+        from datetime import datetime as dt
+
+        repo = synchronizer.repository
+        monkeypatch.setattr(repo, "iter_planilha_campo_batches",
+                            lambda batch_size=None: iter([_pois([1], [dt(2024, 1, 1)])]))
+        synchronizer.sync_planilha_campo(force=True)
+
+        empty = _pois([], [], extra=True)
+        monkeypatch.setattr(repo, "iter_planilha_campo_changes", lambda since, batch_size=None: iter([empty]))
+        monkeypatch.setattr(synchronizer.config, "CACHE_TTL_SECONDS", 0)
+        result = synchronizer.sync_planilha_campo()
+
+        assert result["upserted"] == 0
+        assert result["row_count"] == 1
+        assert synchronizer.metadata.get_watermark("planilha_campo") == dt(2024, 1, 1)
+
+
+    def test_creation_watermark_table_resyncs_updates_and_deletes(self, synchronizer, monkeypatch):
+        from datetime import datetime as dt
+
+        def _rows(ids, nomes):
+            return pa.RecordBatch.from_pydict({
+                "id": pa.array(ids, pa.int64()),
+                "nome": pa.array(nomes, pa.string()),
+                "data_criacao": pa.array([dt(2024, 1, i) for i in ids], pa.timestamp("us")),
+            })
+
+        repo = synchronizer.repository
+        monkeypatch.setattr(repo, "iter_banco_techdengue_batches",
+                            lambda batch_size=None: iter([_rows([1, 2, 3], ["a", "b", "c"])]))
+        synchronizer.sync_banco_techdengue(force=True)
+
+        # Linha 2 atualizada e linha 3 excluída no servidor: nenhuma aparece em
+        # alterações por data_criacao, então a tabela não usa o modo incremental
+        def _changes(since, batch_size=None):
+            raise AssertionError("banco_techdengue não deve usar o watermark de data_criacao")
+
+        monkeypatch.setattr(repo, "iter_banco_techdengue_changes", _changes)
+        monkeypatch.setattr(repo, "iter_banco_techdengue_batches",
+                            lambda batch_size=None: iter([_rows([1, 2], ["a", "b2"])]))
+        monkeypatch.setattr(synchronizer.config, "CACHE_TTL_SECONDS", 0)
+        result = synchronizer.sync_banco_techdengue(incremental=True)
+
+        assert result["mode"] == "full"
+        df = synchronizer.load_cache("banco_techdengue").sort_values("id")
+        assert df["id"].tolist() == [1, 2]
+        assert df["nome"].tolist() == ["a", "b2"]
+
+    def test_registered_table_can_opt_out_of_incremental(self, monkeypatch):
+        monkeypatch.setitem(SYNC_TABLES, "nova_tabela", {})
+        register_sync_table(
+            "nova_tabela", key="id", watermark=["created_at"], order_by="id",
+            full="iter_nova_tabela_batches", changes="iter_nova_tabela_changes",
+            incremental=False,
+        )
+        assert SYNC_TABLES["nova_tabela"]["incremental"] is False
+
+
+class TestPartitionedCache:
+    def test_full_sync_writes_month_partitions(self, synchronizer, tmp_path, monkeypatch):
+        from datetime import datetime as dt
+
+        import pyarrow.dataset as ds
+
+        created = [dt(2024, 1, 5), dt(2024, 1, 20), dt(2024, 3, 1), None]
+        monkeypatch.setattr(synchronizer.repository, "iter_planilha_campo_batches",
+                            lambda batch_size=None: iter([_pois([1, 2, 3, 4], created)]))
+        result = synchronizer.sync_planilha_campo(force=True)
+
+        root = tmp_path / "planilha_campo.parquet"
+        assert (root / "year=2024" / "month=01" / "part-0.parquet").exists()
+        assert (root / "year=2024" / "month=03" / "part-0.parquet").exists()
+        assert result["row_count"] == 4
+
+        info = synchronizer.metadata.get_info("planilha_campo")
+        assert set(info["partitions"]) == {
+            "year=2024/month=01",
+            "year=2024/month=03",
+            "year=0/month=00",
+        }
+
+        january = synchronizer.load_cache("planilha_campo", filter=(ds.field("year") == 2024) & (ds.field("month") == 1))
+        assert sorted(january["id"].tolist()) == [1, 2]
+        assert "year" not in synchronizer.load_cache("planilha_campo").columns
+
+    def test_incremental_rewrites_only_touched_partitions(self, synchronizer, tmp_path, monkeypatch):
+        from datetime import datetime as dt
+
+        created = [dt(2024, 1, 5), dt(2024, 3, 1)]
+        repo = synchronizer.repository
+        monkeypatch.setattr(repo, "iter_planilha_campo_batches",
+                            lambda batch_size=None: iter([_pois([1, 2], created)]))
+        synchronizer.sync_planilha_campo(force=True)
+
+        untouched = tmp_path / "planilha_campo.parquet" / "year=2024" / "month=01" / "part-0.parquet"
+        mtime = untouched.stat().st_mtime_ns
+
+        changes = _pois([2], [dt(2024, 3, 1)], updated=[dt(2024, 4, 1)], extra=True)
+        monkeypatch.setattr(repo, "iter_planilha_campo_changes", lambda since, batch_size=None: iter([changes]))
+        monkeypatch.setattr(synchronizer.config, "CACHE_TTL_SECONDS", 0)
+        result = synchronizer.sync_planilha_campo()
+
+        assert result["partitions_rewritten"] == 1
+        assert untouched.stat().st_mtime_ns == mtime
+        df = synchronizer.load_cache("planilha_campo")
+        assert df.loc[df["id"] == 2, "updated_at"].iloc[0] == dt(2024, 4, 1)
+        assert synchronizer.metadata.get_info("planilha_campo")["row_count"] == 2
+
+    def test_legacy_single_file_is_migrated(self, synchronizer, tmp_path, monkeypatch):
+        from datetime import datetime as dt
+
+        pd.DataFrame({"id": [1]}).to_parquet(tmp_path / "planilha_campo.parquet")
+        monkeypatch.setattr(synchronizer.repository, "iter_planilha_campo_batches",
+                            lambda batch_size=None: iter([_pois([7], [dt(2024, 2, 1)])]))
+        synchronizer.sync_planilha_campo()
+
+        assert (tmp_path / "planilha_campo.parquet").is_dir()
+        assert synchronizer.load_cache("planilha_campo")["id"].tolist() == [7]
+
+
+class TestSyncAll:
+    def test_tables_run_concurrently(self, synchronizer, monkeypatch):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _sync(table_name, force=False, incremental=None):
+            barrier.wait()  # só passa se as duas tabelas estiverem em execução
+            return {"status": "synced", "table": table_name}
+
+        monkeypatch.setattr(synchronizer, "sync_table", _sync)
+        results = synchronizer.sync_all(max_workers=2)
+
+        assert list(results) == list(SYNC_TABLES)
+        assert all(r["status"] == "synced" for r in results.values())
+
+    def test_failure_is_isolated_per_table(self, synchronizer, monkeypatch):
+        def _sync(table_name, force=False, incremental=None):
+            if table_name == "banco_techdengue":
+                raise RuntimeError("timeout")
+            return {"status": "synced"}
+
+        monkeypatch.setattr(synchronizer, "sync_table", _sync)
+        results = synchronizer.sync_all()
+
+        assert results["banco_techdengue"] == {"status": "error", "error": "timeout"}
+        assert results["planilha_campo"]["status"] == "synced"
+
+    def test_unknown_table_raises(self, synchronizer):
+        with pytest.raises(ValueError):
+            synchronizer.sync_all(tables=["nao_existe"])
+
+    def test_registered_table_is_synced(self, synchronizer, monkeypatch):
+        monkeypatch.setitem(SYNC_TABLES, "nova_tabela", {})
+        register_sync_table(
+            "nova_tabela", key="id", watermark=["created_at"], order_by="id",
+            full="iter_nova_tabela_batches", changes="iter_nova_tabela_changes",
+        )
+        monkeypatch.setattr(
+            synchronizer.repository, "iter_nova_tabela_batches",
+            lambda batch_size=None: _batches(1), raising=False,
+        )
+        results = synchronizer.sync_all(force=True, tables=["nova_tabela"])
+
+        assert results["nova_tabela"]["row_count"] == 4
+
+    def test_concurrent_metadata_updates_are_kept(self, synchronizer):
+        names = [f"tabela_{i}" for i in range(8)]
+        threads = [
+            threading.Thread(target=synchronizer.metadata.update_sync, args=(name, {"row_count": i}))
+            for i, name in enumerate(names)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(synchronizer.metadata.load()) == names
+
+    def test_update_sync_keeps_watermark_and_fingerprint(self, synchronizer):
+        from datetime import datetime as dt
+
+        metadata = synchronizer.metadata
+        metadata.set_watermark("planilha_campo", dt(2024, 1, 3))
+        metadata.set_fingerprint("planilha_campo", {"row_count": 3})
+        metadata.update_sync("planilha_campo", {"row_count": 3, "mode": "full"})
+
+        info = metadata.get_info("planilha_campo")
+        assert info["row_count"] == 3 and "last_sync" in info
+        assert metadata.get_watermark("planilha_campo") == dt(2024, 1, 3)
+        assert metadata.get_fingerprint("planilha_campo") == {"row_count": 3}
+
+
+class TestDetectChanges:
+    FINGERPRINT = {"row_count": 4, "max_updated_at": "2024-03-01T00:00:00", "content_hash": "123"}
+
+    def _remote(self, synchronizer, monkeypatch, fingerprint):
+        monkeypatch.setattr(
+            synchronizer.repository, "get_banco_techdengue_fingerprint", lambda: dict(fingerprint)
+        )
+
+    def test_unchanged_after_sync(self, synchronizer, monkeypatch):
+        self._remote(synchronizer, monkeypatch, self.FINGERPRINT)
+        monkeypatch.setattr(
+            synchronizer.repository, "iter_banco_techdengue_batches", lambda batch_size=None: _batches(1)
+        )
+
+        # Sem cache local: alterada; o fingerprint só é registrado após a sincronização
+        assert synchronizer.detect_changes(["banco_techdengue"]) == {"banco_techdengue": True}
+        assert synchronizer.metadata.get_fingerprint("banco_techdengue") is None
+
+        synchronizer.sync_table("banco_techdengue", force=True)
+        assert synchronizer.metadata.get_fingerprint("banco_techdengue") == self.FINGERPRINT
+        assert synchronizer.detect_changes(["banco_techdengue"]) == {"banco_techdengue": False}
+
+        self._remote(synchronizer, monkeypatch, {**self.FINGERPRINT, "row_count": 5})
+        assert synchronizer.detect_changes(["banco_techdengue"]) == {"banco_techdengue": True}
+
+    def test_probe_failure_counts_as_change(self, synchronizer, monkeypatch):
+        def _broken():
+            raise RuntimeError("servidor indisponível")
+
+        monkeypatch.setattr(synchronizer.repository, "get_banco_techdengue_fingerprint", _broken)
+        assert synchronizer.detect_changes(["banco_techdengue"]) == {"banco_techdengue": True}
+
+    def test_changed_table_skips_ttl_and_syncs_incrementally(self, synchronizer, monkeypatch):
+        from datetime import datetime as dt
+
+        repo = synchronizer.repository
+        fingerprint = {"row_count": 1, "max_updated_at": "2024-01-01T00:00:00", "content_hash": "1"}
+        monkeypatch.setattr(repo, "get_planilha_campo_fingerprint", lambda: dict(fingerprint))
+        monkeypatch.setattr(repo, "iter_planilha_campo_batches",
+                            lambda batch_size=None: iter([_pois([1], [dt(2024, 1, 1)])]))
+        synchronizer.detect_changes(["planilha_campo"])
+        synchronizer.sync_planilha_campo(force=True)
+
+        # Cache ainda válido pelo TTL, mas o fingerprint remoto mudou
+        fingerprint = {**fingerprint, "row_count": 2, "content_hash": "2"}
+        monkeypatch.setattr(repo, "get_planilha_campo_fingerprint", lambda: dict(fingerprint))
+        monkeypatch.setattr(repo, "iter_planilha_campo_changes",
+                            lambda since, batch_size=None: iter([_pois([2], [dt(2024, 1, 2)], extra=True)]))
+        assert synchronizer.detect_changes(["planilha_campo"]) == {"planilha_campo": True}
+
+        results = synchronizer.sync_all(tables=["planilha_campo"])
+        assert results["planilha_campo"]["mode"] == "incremental"
+        assert results["planilha_campo"]["row_count"] == 2
+        assert synchronizer.metadata.get_fingerprint("planilha_campo") == fingerprint
+        assert synchronizer.detect_changes(["planilha_campo"]) == {"planilha_campo": False}